@@ -0,0 +1,219 @@
+# Load packages
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import os
+import pandas as pd
+from .ConductEntityMatching import _MATCH_METHODS
+
+# Declare function
+def ConductDeduplication(dataframe,
+                         columns_to_compare,
+                         match_score_threshold=90,
+                         match_methods=['Token Sort Ratio'],
+                         shingle_size=3,
+                         number_of_bands=16,
+                         rows_per_band=4,
+                         maximum_bucket_size=100,
+                         entities_per_chunk=100000,
+                         number_of_workers=None,
+                         random_seed=412,
+                         show_summary=True):
+    """
+    Finds near-duplicate records within a single dataframe, e.g. the same company or address spelled slightly differently, and gives each group of duplicates a shared cluster ID.
+    Each unique entity is summarized by a MinHash signature of its character shingles (overlapping runs of shingle_size characters), so that entities with many shingles
+    in common have similar signatures. The signatures are split into bands, and entities with the same values in any band land in the same bucket (locality-sensitive
+    hashing), so only entities that share a bucket are compared, rather than every pair. Each candidate pair is then verified with the fuzzy matching methods of
+    ConductEntityMatching, and verified pairs are joined into clusters with union-find, so that if A matches B and B matches C, all three share a cluster.
+    The signatures are calculated in chunks, across processes if number_of_workers is more than 1.
+
+    Args:
+        dataframe (pandas.DataFrame): The dataframe to deduplicate.
+        columns_to_compare (list of str): List of columns to compare. Their values are joined with spaces into one entity per row.
+        match_score_threshold (int, optional): Minimum match score for a pair of entities to be considered duplicates. Defaults to 90.
+        match_methods (list of str, optional): List of fuzzy matching algorithms used to verify candidate pairs. A pair is verified if any method meets the threshold.
+            Partial methods can link entities that are only contained in each other, which can chain unrelated entities into one cluster. Defaults to ['Token Sort Ratio'].
+        shingle_size (int, optional): The number of characters in each shingle. Defaults to 3.
+        number_of_bands (int, optional): The number of LSH bands. More bands find more candidate pairs. Defaults to 16.
+        rows_per_band (int, optional): The number of MinHash values in each band. More rows per band make buckets stricter. Defaults to 4.
+        maximum_bucket_size (int, optional): The number of following entities each entity is compared to within a bucket. Buckets smaller than this have every pair compared. Defaults to 100.
+        entities_per_chunk (int, optional): The number of unique entities in each chunk of signatures sent to a worker. Defaults to 100000.
+        number_of_workers (int, optional): The number of worker processes used to calculate signatures, and threads used to verify pairs. If None, all available CPU cores are used. Defaults to None.
+        random_seed (int, optional): The random seed for the MinHash functions. Defaults to 412.
+        show_summary (bool, optional): Whether to print the number of candidate pairs, verified pairs, and clusters with duplicates. Defaults to True.
+
+    Returns:
+        pandas.DataFrame: A copy of the dataframe with a 'Cluster ID' column, numbered in order of first appearance, and a 'Cluster Size' column with the number of rows in each cluster.
+            Rows with the same entity always share a cluster, and rows with missing values in the columns to compare are each given their own cluster.
+    """
+    # Lazy load uncommon packages
+    from rapidfuzz import fuzz, process, utils
+
+    # Ensure that match methods are valid
+    for match_method in match_methods:
+        if match_method not in _MATCH_METHODS:
+            raise ValueError('Invalid match method specified: ' + match_method + ". Valid match methods are: " + ', '.join(_MATCH_METHODS))
+
+    # Ensure that the LSH settings are valid
+    if shingle_size < 1 or number_of_bands < 1 or rows_per_band < 1 or maximum_bucket_size < 1 or entities_per_chunk < 1:
+        raise ValueError("shingle_size, number_of_bands, rows_per_band, maximum_bucket_size, and entities_per_chunk must be at least 1.")
+
+    # If number_of_workers is not specified, use all available CPU cores
+    if number_of_workers is None:
+        number_of_workers = os.cpu_count() or 1
+
+    # Join the columns to compare into one entity per row, and get the unique entities
+    if len(columns_to_compare) == 1:
+        entity_column = dataframe[columns_to_compare[0]]
+    else:
+        entity_column = dataframe[columns_to_compare[0]].str.cat(dataframe[columns_to_compare[1:]], sep=' ')
+    entity_codes, entities = pd.factorize(entity_column)
+    entities = np.asarray(entities, dtype=object)
+
+    # Clean the entities (lowercase, without punctuation), which the signatures and most match methods are based on
+    processed_entities = np.array([utils.default_process(str(entity)) for entity in entities], dtype=object)
+    is_comparable = np.array([len(entity) > 0 for entity in processed_entities], dtype=bool)
+
+    # Draw the multiply-shift hash functions of the MinHash signature
+    rng = np.random.default_rng(random_seed)
+    hash_multipliers = rng.integers(1, 2**63, size=number_of_bands * rows_per_band, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    hash_offsets = rng.integers(0, 2**63, size=number_of_bands * rows_per_band, dtype=np.uint64)
+
+    # Calculate the band keys of the comparable entities in chunks, across processes if more than one worker is requested
+    comparable_entity_numbers = np.flatnonzero(is_comparable)
+    list_of_chunks = [processed_entities[comparable_entity_numbers[start:start + entities_per_chunk]].tolist() for start in range(0, len(comparable_entity_numbers), entities_per_chunk)]
+    list_of_arguments = [
+        list_of_chunks,
+        [shingle_size] * len(list_of_chunks),
+        [hash_multipliers] * len(list_of_chunks),
+        [hash_offsets] * len(list_of_chunks),
+        [number_of_bands] * len(list_of_chunks)
+    ]
+    if number_of_workers == 1 or len(list_of_chunks) <= 1:
+        list_of_band_keys = list(map(_calculate_band_keys, *list_of_arguments))
+    else:
+        with ProcessPoolExecutor(max_workers=number_of_workers) as executor:
+            list_of_band_keys = list(executor.map(_calculate_band_keys, *list_of_arguments))
+    band_keys = np.concatenate(list_of_band_keys) if len(list_of_band_keys) > 0 else np.empty((0, number_of_bands), dtype=np.uint64)
+
+    # Find, verify, and join the candidate pairs of each band in turn, skipping pairs that are already in the same cluster
+    parents = np.arange(len(entities), dtype=np.int64)
+    number_of_candidate_pairs = 0
+    number_of_verified_pairs = 0
+    for band_number in range(number_of_bands):
+        # Pair entities that share a bucket in this band
+        pair_indices_1, pair_indices_2 = _get_bucket_pairs(band_keys[:, band_number], maximum_bucket_size)
+        pair_indices_1, pair_indices_2 = comparable_entity_numbers[pair_indices_1], comparable_entity_numbers[pair_indices_2]
+        is_new_pair = _find_roots(parents, pair_indices_1) != _find_roots(parents, pair_indices_2)
+        pair_indices_1, pair_indices_2 = pair_indices_1[is_new_pair], pair_indices_2[is_new_pair]
+        number_of_candidate_pairs += len(pair_indices_1)
+        if len(pair_indices_1) == 0:
+            continue
+
+        # Verify the pairs with the match methods, rounding the scores to whole numbers as ConductEntityMatching does
+        is_verified = np.zeros(len(pair_indices_1), dtype=bool)
+        for match_method in sorted(set(match_methods)):
+            scorer_name, cleans_strings = _MATCH_METHODS[match_method]
+            strings = processed_entities if cleans_strings else entities
+            scores = process.cpdist(
+                strings[pair_indices_1[~is_verified]],
+                strings[pair_indices_2[~is_verified]],
+                scorer=getattr(fuzz, scorer_name),
+                score_cutoff=min(100, max(0, match_score_threshold - 0.5)),
+                dtype=np.float64,
+                workers=number_of_workers
+            )
+            is_verified[~is_verified] = np.rint(scores) >= match_score_threshold
+        number_of_verified_pairs += int(is_verified.sum())
+
+        # Join the verified pairs into clusters
+        _union(parents, pair_indices_1[is_verified], pair_indices_2[is_verified])
+        parents = _find_roots(parents, np.arange(len(entities), dtype=np.int64))
+
+    # Give each row the cluster of its entity, and rows with missing values their own cluster
+    row_clusters = -1 - np.arange(len(entity_codes))
+    row_clusters[entity_codes >= 0] = parents[entity_codes[entity_codes >= 0]]
+    cluster_ids = pd.factorize(row_clusters)[0] + 1
+    dataframe = dataframe.copy()
+    dataframe['Cluster ID'] = cluster_ids
+    dataframe['Cluster Size'] = np.bincount(cluster_ids)[cluster_ids]
+
+    # Show the summary if requested
+    if show_summary:
+        number_of_clusters_with_duplicates = int(np.sum(np.bincount(cluster_ids)[1:] > 1))
+        print("Compared {:,} candidate pairs of {:,} unique entities, and verified {:,} as duplicates.".format(number_of_candidate_pairs, len(entities), number_of_verified_pairs))
+        print("Found {:,} clusters with more than one row, out of {:,} clusters.".format(number_of_clusters_with_duplicates, cluster_ids.max() if len(cluster_ids) > 0 else 0))
+
+    # Return the dataframe with cluster IDs
+    return dataframe
+
+
+def _calculate_band_keys(strings, shingle_size, hash_multipliers, hash_offsets, number_of_bands):
+    # Pad strings shorter than one shingle, so every string has at least one shingle
+    strings = [string.ljust(shingle_size) for string in strings]
+    string_lengths = np.array([len(string) for string in strings], dtype=np.int64)
+    characters = np.frombuffer(''.join(strings).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+
+    # Hash every run of shingle_size characters with a polynomial rolling hash
+    number_of_positions = max(0, len(characters) - shingle_size + 1)
+    shingle_hashes = np.zeros(number_of_positions, dtype=np.uint64)
+    for offset in range(shingle_size):
+        shingle_hashes = shingle_hashes * np.uint64(1000003) + characters[offset:offset + number_of_positions]
+
+    # Keep the shingles that don't cross into the next string, and mix each hash down to 32 bits
+    number_of_shingles = string_lengths - shingle_size + 1
+    first_shingles = np.cumsum(number_of_shingles) - number_of_shingles
+    shingle_starts = np.repeat(np.cumsum(string_lengths) - string_lengths - first_shingles, number_of_shingles) + np.arange(number_of_shingles.sum())
+    shingle_hashes = (shingle_hashes[shingle_starts] * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(32)
+
+    # Calculate each MinHash value as the smallest hash of the string's shingles, one hash function at a time to limit memory
+    signatures = np.empty((len(strings), len(hash_multipliers)), dtype=np.uint64)
+    for hash_number in range(len(hash_multipliers)):
+        signatures[:, hash_number] = np.minimum.reduceat((hash_multipliers[hash_number] * shingle_hashes + hash_offsets[hash_number]) >> np.uint64(32), first_shingles)
+
+    # Combine the values of each band into a single key
+    rows_per_band = len(hash_multipliers) // number_of_bands
+    band_keys = np.zeros((len(strings), number_of_bands), dtype=np.uint64)
+    for row_number in range(rows_per_band):
+        band_keys = (band_keys ^ signatures[:, row_number::rows_per_band]) * np.uint64(0x100000001B3)
+    return band_keys
+
+
+def _get_bucket_pairs(keys, maximum_bucket_size):
+    # Sort the entities by their key, keeping only entities that share their bucket with another entity
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    is_shared = np.zeros(len(keys), dtype=bool)
+    is_shared[1:] |= sorted_keys[1:] == sorted_keys[:-1]
+    is_shared[:-1] |= sorted_keys[:-1] == sorted_keys[1:]
+    order, sorted_keys = order[is_shared], sorted_keys[is_shared]
+
+    # Pair each entity with the following entities in its bucket, up to maximum_bucket_size of them
+    list_of_pairs_1, list_of_pairs_2 = [], []
+    for offset in range(1, min(maximum_bucket_size, len(sorted_keys) - 1) + 1):
+        is_same_bucket = sorted_keys[offset:] == sorted_keys[:-offset]
+        if not is_same_bucket.any():
+            break
+        list_of_pairs_1.append(order[:-offset][is_same_bucket])
+        list_of_pairs_2.append(order[offset:][is_same_bucket])
+    if len(list_of_pairs_1) == 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    return np.concatenate(list_of_pairs_1), np.concatenate(list_of_pairs_2)
+
+
+def _find_roots(parents, nodes):
+    # Follow each node's parents until reaching the root of its cluster
+    roots = parents[nodes]
+    while True:
+        next_roots = parents[roots]
+        if np.array_equal(next_roots, roots):
+            return roots
+        roots = next_roots
+
+
+def _union(parents, nodes_1, nodes_2):
+    # Point the larger root of each pair at the smaller one, repeating until every pair shares a root, since pairs that share a root overwrite each other
+    while len(nodes_1) > 0:
+        roots_1, roots_2 = _find_roots(parents, nodes_1), _find_roots(parents, nodes_2)
+        is_separate = roots_1 != roots_2
+        nodes_1, nodes_2, roots_1, roots_2 = nodes_1[is_separate], nodes_2[is_separate], roots_1[is_separate], roots_2[is_separate]
+        parents[np.maximum(roots_1, roots_2)] = np.minimum(roots_1, roots_2)
@@ -1,6 +1,7 @@
 # Load packages
 import numpy as np
 import pandas as pd
+from .CreateEntityMatchingBlocks import CreateEntityMatchingBlocks
 
 # Declare function
 def ConductEntityMatching(dataframe_1, 
@@ -10,9 +11,22 @@ def ConductEntityMatching(dataframe_1,
                           levenshtein_distance_filter=None,
                           match_score_threshold=95,
                           columns_to_compare=None,
-                          match_methods=['Partial Token Set Ratio', 'Weighted Ratio']):
+                          match_methods=['Partial Token Set Ratio', 'Weighted Ratio'],
+                          blocking_methods=None,
+                          maximum_block_size=500,
+                          known_matches=None,
+                          pairs_per_chunk=1000000,
+                          number_of_workers=None,
+                          top_k=None,
+                          output_filepath=None):
     """
     Conducts entity matching between two dataframes using various fuzzy matching algorithms.
+    Each unique entity is compared once, and every requested match method is scored for a chunk of pairs at a time with rapidfuzz,
+    which runs across all CPU cores. Only pairs that meet the match score threshold for at least one method are kept, in one wide dataframe.
+    dataframe_1 is processed in chunks, so with top_k and output_filepath the memory used is set by pairs_per_chunk and top_k, as only the best
+    matches of each entity are kept and each chunk's matches are written to the file before the next chunk is scored.
+    By default, every entity in dataframe_1 is compared to every entity in dataframe_2. For large dataframes, set blocking_methods so that only
+    the candidate pairs found by CreateEntityMatchingBlocks, i.e. entities that share a word, n-gram, phonetic code, or sorted neighborhood, are scored.
     
     Args:
         dataframe_1 (pandas.DataFrame): First dataframe to match.
@@ -20,174 +34,150 @@ def ConductEntityMatching(dataframe_1,
         dataframe_2 (pandas.DataFrame): Second dataframe to match.
         dataframe_2_primary_key (str): Name of the primary key column in dataframe_2.
         levenshtein_distance_filter (int, optional): Maximum Levenshtein distance between two entities to consider a match. Defaults to None.
-        match_score_threshold (int, optional): Minimum match score to consider a match. Defaults to 95.
+        match_score_threshold (int, optional): Minimum match score to consider a match. Scores of methods below the threshold are left empty. Defaults to 95.
         columns_to_compare (list of str, optional): List of columns to compare between the two dataframes. If None, all columns are compared. Defaults to None.
-        match_methods (list of str, optional): List of fuzzy matching algorithms to use. Defaults to ['Partial Token Set Ratio', 'Weighted Ratio'].
+        match_methods (list of str, optional): List of fuzzy matching algorithms to use. Scores are calculated with rapidfuzz. 'Ratio', 'Token Sort Ratio', and 'Token Set Ratio'
+            give the same scores as fuzzywuzzy, but 'Weighted Ratio' and the partial methods ('Partial Ratio', 'Partial Token Sort Ratio', and 'Partial Token Set Ratio') align
+            the strings differently and can score pairs a point or more apart from fuzzywuzzy, so pairs near the threshold may be kept or dropped differently. Defaults to ['Partial Token Set Ratio', 'Weighted Ratio'].
+        blocking_methods (list of str, optional): The blocking methods used to find candidate pairs, from 'Token', 'Character N-Gram', 'Sorted Neighborhood', and 'Phonetic'.
+            If None, every pair of entities is compared. Defaults to None.
+        maximum_block_size (int, optional): The largest number of entities from either dataframe that a block can have before it is skipped. Only used if blocking_methods is specified. Defaults to 500.
+        known_matches (list of tuple, optional): Pairs of primary keys (from dataframe_1 and dataframe_2) that are known to match, used to report the pair recall of the blocks. Defaults to None.
+        pairs_per_chunk (int, optional): The number of pairs of entities to score at a time, which sets the memory used while scoring. Defaults to 1000000.
+        number_of_workers (int, optional): The number of threads used to score each chunk. If None, all available CPU cores are used. Defaults to None.
+        top_k (int, optional): The number of best matches to keep for each entity in dataframe_1, ranked by their highest score across the match methods.
+            If specified, a 'Match Rank' column is added. If None, every match is kept. Defaults to None.
+        output_filepath (str, optional): The filepath to write the matches to, chunk by chunk. Must end with '.csv' or '.parquet'. If None, the matches are returned. Defaults to None.
         
     Returns:
-        pandas.DataFrame: Dataframe of matched entities and their match scores.
+        pandas.DataFrame: Dataframe of matched entities and their match scores. If blocking_methods is specified, the number of candidate pairs,
+            the reduction ratio, and the pair recall of the blocks are recorded in the dataframe's attrs. If output_filepath is specified, None is returned.
     """
-    # Lazy load uncommon packages
-    from fuzzywuzzy import fuzz
-    import Levenshtein
-    
-    # Create list of valid match methods
-    valid_match_methods = [
-        'Ratio', 'Partial Ratio', 
-        'Token Sort Ratio', 'Partial Token Sort Ratio', 
-        'Token Set Ratio', 'Partial Token Set Ratio', 
-        'Weighted Ratio'
-    ]
-    
     # Ensure that match methods are valid
     for match_method in match_methods:
-        if match_method not in valid_match_methods:
-            raise ValueError('Invalid match method specified: ' + match_method + ". Valid match methods are: " + ', '.join(valid_match_methods))
+        if match_method not in _MATCH_METHODS:
+            raise ValueError('Invalid match method specified: ' + match_method + ". Valid match methods are: " + ', '.join(_MATCH_METHODS))
         
     # Ensure that lev distance threshold is either int or None
     if levenshtein_distance_filter is not None:
         if not isinstance(levenshtein_distance_filter, int):
             raise ValueError('Levenshtein distance threshold must be an integer or None')
+    
+    # Ensure that top_k is a positive integer or None
+    if top_k is not None and (not isinstance(top_k, int) or top_k < 1):
+        raise ValueError('top_k must be a positive integer or None')
+    
+    # Ensure that the output filepath ends with '.csv' or '.parquet'
+    if output_filepath is not None and not output_filepath.endswith('.csv') and not output_filepath.endswith('.parquet'):
+        raise ValueError("The filepath to write the matches to must end with '.csv' or '.parquet'.")
 
-    # Select columns to compare if specified
-    if columns_to_compare is not None:
-        dataframe_1 = dataframe_1[[dataframe_1_primary_key] + columns_to_compare].copy()
-        dataframe_2 = dataframe_2[[dataframe_2_primary_key] + columns_to_compare].copy()
-        
-    # Remove duplicate rows from dataframe_1 and dataframe_2
-    dataframe_1.drop_duplicates(inplace=True)
-    dataframe_2.drop_duplicates(inplace=True)
+    # If columns to compare are not specified, compare every column the two dataframes have in common
+    if columns_to_compare is None:
+        columns_to_compare = [column for column in dataframe_1.columns if column in dataframe_2.columns and column not in [dataframe_1_primary_key, dataframe_2_primary_key]]
+
+    # Select columns to compare, remove duplicate rows, and add a string column of the concatenated values of columns to compare
+    dataframe_1 = _create_entity_column(dataframe_1, dataframe_1_primary_key, columns_to_compare)
+    dataframe_2 = _create_entity_column(dataframe_2, dataframe_2_primary_key, columns_to_compare)
     
-    # Create placeholder dataframe to store results
-    data_match_results = pd.DataFrame()
+    # Get the unique entities, so that each pair of entities is only scored once
+    entities_1 = dataframe_1['Entity'].dropna().unique()
+    entities_2 = dataframe_2['Entity'].dropna().unique()
     
-    # Add string column to dataframe_1 to store concatenated values of columns to compare
-    if len(columns_to_compare) == 1:
-        dataframe_1['Entity'] = dataframe_1[columns_to_compare[0]]
-        dataframe_2['Entity'] = dataframe_2[columns_to_compare[0]]
+    # Find the candidate pairs of entities that share a block, if requested
+    if blocking_methods is None:
+        df_candidate_pairs = None
     else:
-        dataframe_1['Entity'] = dataframe_1[columns_to_compare[0]].str.cat(dataframe_1[columns_to_compare[1:]], sep=' ')
-        dataframe_2['Entity'] = dataframe_2[columns_to_compare[0]].str.cat(dataframe_2[columns_to_compare[1:]], sep=' ')
+        # Convert the known matches from primary keys to positions among the unique entities
+        if known_matches is not None:
+            known_matches = pd.DataFrame(list(known_matches), columns=['Key 1', 'Key 2'])
+            known_matches = known_matches.merge(
+                pd.DataFrame({'Key 1': dataframe_1[dataframe_1_primary_key].to_numpy(), 'Entity 1': dataframe_1['Entity'].to_numpy()}), how='inner', on='Key 1'
+            ).merge(
+                pd.DataFrame({'Key 2': dataframe_2[dataframe_2_primary_key].to_numpy(), 'Entity 2': dataframe_2['Entity'].to_numpy()}), how='inner', on='Key 2'
+            ).dropna(subset=['Entity 1', 'Entity 2'])
+            known_matches = np.column_stack([
+                pd.Index(entities_1).get_indexer(known_matches['Entity 1']),
+                pd.Index(entities_2).get_indexer(known_matches['Entity 2'])
+            ])
+        
+        # Find the candidate pairs that share a block
+        df_candidate_pairs = CreateEntityMatchingBlocks(
+            entities_1,
+            entities_2,
+            blocking_methods=blocking_methods,
+            maximum_block_size=maximum_block_size,
+            known_matches=known_matches
+        )
     
-    # Create combination of each Entity 1 and Entity 2
-    entity_combinations = pd.merge(dataframe_1, dataframe_2, how='cross', suffixes=('_1', '_2'))
+    # Split the first list of entities into chunks, keeping all the candidate pairs of an entity in the same chunk
+    pair_indices = None if df_candidate_pairs is None else (df_candidate_pairs['Index 1'].to_numpy(), df_candidate_pairs['Index 2'].to_numpy())
+    list_of_chunks = _get_entity_chunks(len(entities_1), len(entities_2), pair_indices, pairs_per_chunk)
     
-    # Calculate Levenshtein distance if specified
-    if levenshtein_distance_filter is not None:
-        entity_combinations['Levenshtein Distance'] = entity_combinations.apply(lambda row: Levenshtein.distance(row['Entity_1'], row['Entity_2']), axis=1)
-        # Filter out combinations that are not within the threshold
-        entity_combinations = entity_combinations[entity_combinations['Levenshtein Distance'] <= levenshtein_distance_filter]
-    
-    # If dataframe_1_primary_key is not in entity_combinations, add _1 to the end of the column name
-    if dataframe_1_primary_key not in entity_combinations.columns:
-        dataframe_1_primary_key = dataframe_1_primary_key + '_1'
-    
-    # If dataframe_2_primary_key is not in entity_combinations, add _2 to the end of the column name
-    if dataframe_2_primary_key not in entity_combinations.columns:
-        dataframe_2_primary_key = dataframe_2_primary_key + '_2'
-    
-    # Create list of columns to select
-    list_columns_to_select = [
-        'Entity_1', 
-        'Entity_2'
-    ]
-    
-    # Calculate fuzz ratio, which calls difflib.ratio on the two input strings
-    if 'Ratio' in match_methods:
-        # Calculate fuzz ratio
-        df_temp = entity_combinations[list_columns_to_select].copy()
-        df_temp['Match Method'] = 'Ratio'
-        df_temp['Match Score'] = entity_combinations.apply(lambda row: fuzz.ratio(row['Entity_1'], row['Entity_2']), axis=1)
-        # Filter out combinations that are not within the threshold
-        df_temp = df_temp[df_temp['Match Score'] >= match_score_threshold]
-        # Add the matches to the dataframe
-        data_match_results = pd.concat([data_match_results, df_temp], ignore_index=True)
-    
-    # Calculate partial ratio, which calls ratio using the shortest string (length n) against all n-length substrings of the larger string and returns the highest score
-    if 'Partial Ratio' in match_methods:
-        # Calculate partial fuzz ratio
-        df_temp = entity_combinations[list_columns_to_select].copy()
-        df_temp['Match Method'] = 'Partial Ratio'
-        df_temp['Match Score'] = entity_combinations.apply(lambda row: fuzz.partial_ratio(row['Entity_1'], row['Entity_2']), axis=1)
-        # Filter out combinations that are not within the threshold
-        df_temp = df_temp[df_temp['Match Score'] >= match_score_threshold]
-        # Add the matches to the dataframe
-        data_match_results = pd.concat([data_match_results, df_temp], ignore_index=True)
-        
-    # Calculate token sort ratio, which tokenizes the strings and sorts them alphabetically before computing ratio
-    if 'Token Sort Ratio' in match_methods:
-        # Calculate token sort ratio
-        df_temp = entity_combinations[list_columns_to_select].copy()
-        df_temp['Match Method'] = 'Token Sort Ratio'
-        df_temp['Match Score'] = entity_combinations.apply(lambda row: fuzz.token_sort_ratio(row['Entity_1'], row['Entity_2']), axis=1)
-        # Filter out combinations that are not within the threshold
-        df_temp = df_temp[df_temp['Match Score'] >= match_score_threshold]
-        # Add the matches to the dataframe
-        data_match_results = pd.concat([data_match_results, df_temp], ignore_index=True)
+    # Score, rank, and save the matches of each chunk in turn
+    list_of_chunk_results = []
+    parquet_writer = None
+    number_of_matches = 0
+    for chunk_number, (entity_start, entity_end, pair_start, pair_end) in enumerate(list_of_chunks):
+        # Score every requested match method for each pair of entities, keeping pairs that meet the threshold for at least one method
+        df_chunk_results = _score_entity_pairs(
+            entities_1 if pair_indices is not None else entities_1[entity_start:entity_end],
+            entities_2,
+            match_methods=match_methods,
+            match_score_threshold=match_score_threshold,
+            levenshtein_distance_filter=levenshtein_distance_filter,
+            pair_indices=None if pair_indices is None else (pair_indices[0][pair_start:pair_end], pair_indices[1][pair_start:pair_end]),
+            pairs_per_chunk=pairs_per_chunk,
+            number_of_workers=number_of_workers
+        )
         
-    # Calculate partial token sort ratio, which tokenizes the strings and sorts them alphabetically before computing ratio using the shortest string (length n) against all n-length substrings of the larger string and returns the highest score
-    if 'Partial Token Sort Ratio' in match_methods:
-        # Calculate partial token sort ratio
-        df_temp = entity_combinations[list_columns_to_select].copy()
-        df_temp['Match Method'] = 'Partial Token Sort Ratio'
-        df_temp['Match Score'] = entity_combinations.apply(lambda row: fuzz.partial_token_sort_ratio(row['Entity_1'], row['Entity_2']), axis=1)
-        # Filter out combinations that are not within the threshold
-        df_temp = df_temp[df_temp['Match Score'] >= match_score_threshold]
-        # Add the matches to the dataframe
-        data_match_results = pd.concat([data_match_results, df_temp], ignore_index=True)
+        # Keep the best matches of each entity, if requested
+        if top_k is not None:
+            df_chunk_results = _keep_top_matches(df_chunk_results, top_k)
         
-    # Calculate token set ratio, which tokenizes the strings and computes ratio using the intersection of the two token sets
-    if 'Token Set Ratio' in match_methods:
-        # Calculate token set ratio
-        df_temp = entity_combinations[list_columns_to_select].copy()
-        df_temp['Match Method'] = 'Token Set Ratio'
-        df_temp['Match Score'] = entity_combinations.apply(lambda row: fuzz.token_set_ratio(row['Entity_1'], row['Entity_2']), axis=1)
-        # Filter out combinations that are not within the threshold
-        df_temp = df_temp[df_temp['Match Score'] >= match_score_threshold]
-        # Add the matches to the dataframe
-        data_match_results = pd.concat([data_match_results, df_temp], ignore_index=True)
+        # Add the primary keys and columns compared from each dataframe
+        df_chunk_results = _add_entity_columns(df_chunk_results, dataframe_1, dataframe_1_primary_key, dataframe_2, dataframe_2_primary_key, columns_to_compare)
+        number_of_matches += len(df_chunk_results)
         
-    # Calculate partial token set ratio, which tokenizes the strings and computes ratio using the intersection of the two token sets using the shortest string (length n) against all n-length substrings of the larger string and returns the highest score
-    if 'Partial Token Set Ratio' in match_methods:
-        # Calculate partial token set ratio
-        df_temp = entity_combinations[list_columns_to_select].copy()
-        df_temp['Match Method'] = 'Partial Token Set Ratio'
-        df_temp['Match Score'] = entity_combinations.apply(lambda row: fuzz.partial_token_set_ratio(row['Entity_1'], row['Entity_2']), axis=1)
-        # Filter out combinations that are not within the threshold
-        df_temp = df_temp[df_temp['Match Score'] >= match_score_threshold]
-        # Add the matches to the dataframe
-        data_match_results = pd.concat([data_match_results, df_temp], ignore_index=True)
-    
-    # Calculate weighted ratio, which is a weighted average of the above scores
-    if 'Weighted Ratio' in match_methods:
-        # Calculate weighted ratio
-        df_temp = entity_combinations[list_columns_to_select].copy()
-        df_temp['Match Method'] = 'Weighted Ratio'
-        df_temp['Match Score'] = entity_combinations.apply(lambda row: fuzz.WRatio(row['Entity_1'], row['Entity_2']), axis=1)
-        # Filter out combinations that are not within the threshold
-        df_temp = df_temp[df_temp['Match Score'] >= match_score_threshold]
-        # Add the matches to the dataframe
-        data_match_results = pd.concat([data_match_results, df_temp], ignore_index=True)
-    
-    # Drop duplicates
-    data_match_results.drop_duplicates(inplace=True)
-    
-    # Convert to wide-form dataframe
-    data_match_results = data_match_results.pivot(index=['Entity_1', 'Entity_2'], columns='Match Method', values='Match Score')
-    # Reset index of dataframe
-    data_match_results['Entity 1'] = data_match_results.index.get_level_values(0)
-    data_match_results['Entity 2'] = data_match_results.index.get_level_values(1)
-    data_match_results.reset_index(drop=True, inplace=True)
-    
-    # Move entity columns to front
-    data_match_results = data_match_results[['Entity 1', 'Entity 2'] + [col for col in data_match_results.columns if col not in ['Entity 1', 'Entity 2']]]
-    
-     # Reset column names
-    data_match_results.columns.name = None
+        # Write the chunk's matches to the file, or keep them to return
+        if output_filepath is None:
+            list_of_chunk_results.append(df_chunk_results)
+        elif output_filepath.endswith('.csv'):
+            df_chunk_results.to_csv(output_filepath, mode='w' if chunk_number == 0 else 'a', header=chunk_number == 0, index=False)
+        elif len(df_chunk_results) > 0 or (parquet_writer is None and chunk_number == len(list_of_chunks) - 1):
+            parquet_writer = _write_parquet_chunk(df_chunk_results, output_filepath, parquet_writer)
+    
+    # If the matches were written to a file, close it and return nothing
+    if output_filepath is not None:
+        if parquet_writer is not None:
+            parquet_writer.close()
+        print("Wrote {:,} matches to {}.".format(number_of_matches, output_filepath))
+        return None
     
+    # Combine the matches of each chunk
+    data_match_results = pd.concat(list_of_chunk_results, ignore_index=True)
+    
+    # Record the results of the blocking
+    if blocking_methods is not None:
+        data_match_results.attrs.update(df_candidate_pairs.attrs)
+    
+    # Return results
+    return(data_match_results)
+
+
+def _create_entity_column(dataframe, primary_key, columns_to_compare):
+    # Select columns to compare, and remove duplicate rows
+    dataframe = dataframe[[primary_key] + columns_to_compare].drop_duplicates()
+    
+    # Add string column to store concatenated values of columns to compare
+    if len(columns_to_compare) == 1:
+        dataframe['Entity'] = dataframe[columns_to_compare[0]]
+    else:
+        dataframe['Entity'] = dataframe[columns_to_compare[0]].str.cat(dataframe[columns_to_compare[1:]], sep=' ')
+    return dataframe
+
+
+def _add_entity_columns(data_match_results, dataframe_1, dataframe_1_primary_key, dataframe_2, dataframe_2_primary_key, columns_to_compare):
     # Left join columns to compare from dataframe 1
-    if dataframe_1_primary_key not in dataframe_1.columns:
-        dataframe_1_primary_key = dataframe_1_primary_key.replace('_1', '')
     data_match_results = data_match_results.merge(
         dataframe_1[[dataframe_1_primary_key, 'Entity'] + columns_to_compare], 
         how='left', 
@@ -196,8 +186,6 @@ def ConductEntityMatching(dataframe_1,
     )
     
     # Left join columns to compare from dataframe 2
-    if dataframe_2_primary_key not in dataframe_2.columns:
-        dataframe_2_primary_key = dataframe_2_primary_key.replace('_2', '')
     data_match_results = data_match_results.merge(
         dataframe_2[[dataframe_2_primary_key, 'Entity'] + columns_to_compare],
         how='left',
@@ -217,8 +205,139 @@ def ConductEntityMatching(dataframe_1,
     data_match_results = data_match_results[[dataframe_1_primary_key, dataframe_2_primary_key] + [col for col in data_match_results.columns if col not in [dataframe_1_primary_key, dataframe_2_primary_key]]]
     
     # Drop duplicate matches
-    data_match_results.drop_duplicates(inplace=True)
+    return data_match_results.drop_duplicates()
+
+
+def _get_entity_chunks(number_of_entities_1, number_of_entities_2, pair_indices, pairs_per_chunk):
+    # Split the full cross join into blocks of rows with about pairs_per_chunk pairs each
+    if pair_indices is None:
+        rows_per_chunk = max(1, pairs_per_chunk // max(1, number_of_entities_2))
+        list_of_chunks = [(start, min(start + rows_per_chunk, number_of_entities_1), None, None) for start in range(0, number_of_entities_1, rows_per_chunk)]
+        return list_of_chunks if len(list_of_chunks) > 0 else [(0, 0, None, None)]
     
-    # Return results
-    return(data_match_results)
+    # Split the candidate pairs, which are sorted by entity, into slices of about pairs_per_chunk pairs that end where an entity's pairs end
+    pair_starts = np.searchsorted(pair_indices[0], np.arange(number_of_entities_1 + 1))
+    list_of_chunks = []
+    pair_start = 0
+    while pair_start < len(pair_indices[0]):
+        pair_end = pair_starts[pair_indices[0][min(pair_start + pairs_per_chunk, len(pair_indices[0])) - 1] + 1]
+        list_of_chunks.append((None, None, pair_start, pair_end))
+        pair_start = pair_end
+    return list_of_chunks if len(list_of_chunks) > 0 else [(None, None, 0, 0)]
+
+
+def _keep_top_matches(data_match_results, top_k):
+    # Rank each entity's matches by their highest score across the match methods, then keep the best top_k
+    best_scores = data_match_results.drop(columns=['Entity 1', 'Entity 2']).max(axis=1)
+    ranked_order = np.argsort(-best_scores.to_numpy(), kind='stable')
+    match_ranks = np.empty(len(data_match_results), dtype=np.int64)
+    match_ranks[ranked_order] = data_match_results['Entity 1'].iloc[ranked_order].groupby(data_match_results['Entity 1'].iloc[ranked_order], sort=False).cumcount().to_numpy() + 1
+    data_match_results = data_match_results.copy()
+    data_match_results.insert(2, 'Match Rank', match_ranks)
+    return data_match_results[data_match_results['Match Rank'] <= top_k].reset_index(drop=True)
+
+
+def _write_parquet_chunk(df_chunk_results, output_filepath, parquet_writer):
+    # Lazy load uncommon packages
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    # Open the file with the first chunk's columns, then append each chunk as a row group
+    if parquet_writer is None:
+        table = pa.Table.from_pandas(df_chunk_results, preserve_index=False)
+        parquet_writer = pq.ParquetWriter(output_filepath, table.schema)
+    else:
+        table = pa.Table.from_pandas(df_chunk_results, schema=parquet_writer.schema, preserve_index=False)
+    parquet_writer.write_table(table)
+    return parquet_writer
+
 
+# Set the rapidfuzz scorer of each match method, and whether it cleans the strings first as fuzzywuzzy did
+_MATCH_METHODS = {
+    'Ratio': ('ratio', False),
+    'Partial Ratio': ('partial_ratio', False),
+    'Token Sort Ratio': ('token_sort_ratio', True),
+    'Partial Token Sort Ratio': ('partial_token_sort_ratio', True),
+    'Token Set Ratio': ('token_set_ratio', True),
+    'Partial Token Set Ratio': ('partial_token_set_ratio', True),
+    'Weighted Ratio': ('WRatio', True)
+}
+
+
+def _score_entity_pairs(entities_1, entities_2, match_methods, match_score_threshold, levenshtein_distance_filter=None,
+                        pair_indices=None, pairs_per_chunk=1000000, number_of_workers=None, processed_entities=None):
+    # Lazy load uncommon packages
+    from rapidfuzz import fuzz, process, utils
+    from rapidfuzz.distance import Levenshtein
+    
+    # Use all CPU cores if number_of_workers is not specified
+    workers = -1 if number_of_workers is None else number_of_workers
+    entities_1 = np.asarray(entities_1, dtype=object)
+    entities_2 = np.asarray(entities_2, dtype=object)
+    
+    # Clean each string once (lowercase, without punctuation) for the methods that compare cleaned strings, unless they were cleaned beforehand
+    if processed_entities is None:
+        if any(_MATCH_METHODS[match_method][1] for match_method in match_methods):
+            processed_entities = ([utils.default_process(entity) for entity in entities_1], [utils.default_process(entity) for entity in entities_2])
+        else:
+            processed_entities = (entities_1, entities_2)
+    processed_entities_1 = np.asarray(processed_entities[0], dtype=object)
+    processed_entities_2 = np.asarray(processed_entities[1], dtype=object)
+    
+    # Score the pairs in chunks: blocks of rows of the full cross join, or slices of the candidate pairs
+    list_of_chunk_results = []
+    if pair_indices is None:
+        rows_per_chunk = max(1, pairs_per_chunk // max(1, len(entities_2)))
+        list_of_chunk_starts = range(0, len(entities_1), rows_per_chunk)
+    else:
+        list_of_chunk_starts = range(0, len(pair_indices[0]), pairs_per_chunk)
+    for chunk_start in list_of_chunk_starts:
+        if pair_indices is None:
+            # Score a block of rows against every entity in the second list
+            chunk_rows = np.arange(chunk_start, min(chunk_start + rows_per_chunk, len(entities_1)))
+            chunk_indices_1 = np.repeat(chunk_rows, len(entities_2))
+            chunk_indices_2 = np.tile(np.arange(len(entities_2)), len(chunk_rows))
+            def score_chunk(scorer, strings_1, strings_2, **kwargs):
+                return process.cdist(strings_1[chunk_rows], strings_2, scorer=scorer, workers=workers, **kwargs).ravel()
+        else:
+            # Score each candidate pair on its own
+            chunk_indices_1 = pair_indices[0][chunk_start:chunk_start + pairs_per_chunk]
+            chunk_indices_2 = pair_indices[1][chunk_start:chunk_start + pairs_per_chunk]
+            def score_chunk(scorer, strings_1, strings_2, **kwargs):
+                return process.cpdist(strings_1[chunk_indices_1], strings_2[chunk_indices_2], scorer=scorer, workers=workers, **kwargs)
+        
+        # Keep pairs within the Levenshtein distance, if specified
+        is_kept = np.ones(len(chunk_indices_1), dtype=bool)
+        if levenshtein_distance_filter is not None:
+            is_kept &= score_chunk(Levenshtein.distance, entities_1, entities_2, score_cutoff=levenshtein_distance_filter) <= levenshtein_distance_filter
+        
+        # Score each match method, and keep pairs that meet the threshold for at least one of them
+        dict_of_scores = {}
+        for match_method in sorted(set(match_methods)):
+            scorer_name, cleans_strings = _MATCH_METHODS[match_method]
+            scores = score_chunk(
+                getattr(fuzz, scorer_name),
+                processed_entities_1 if cleans_strings else entities_1,
+                processed_entities_2 if cleans_strings else entities_2,
+                score_cutoff=min(100, max(0, match_score_threshold - 0.5)),
+                dtype=np.float64
+            )
+            # Round the scores to whole numbers, as fuzzywuzzy did, before comparing them to the threshold
+            scores = np.rint(scores)
+            scores[scores < match_score_threshold] = np.nan
+            dict_of_scores[match_method] = scores
+        is_kept &= np.any([~np.isnan(scores) for scores in dict_of_scores.values()], axis=0)
+        
+        # Build the rows of the pairs that are kept
+        df_chunk_results = pd.DataFrame({
+            'Entity 1': entities_1[chunk_indices_1[is_kept]],
+            'Entity 2': entities_2[chunk_indices_2[is_kept]]
+        })
+        for match_method, scores in dict_of_scores.items():
+            df_chunk_results[match_method] = scores[is_kept]
+        list_of_chunk_results.append(df_chunk_results)
+    
+    # Combine the chunks into one wide dataframe
+    if len(list_of_chunk_results) == 0:
+        return pd.DataFrame(columns=['Entity 1', 'Entity 2'] + sorted(set(match_methods)))
+    return pd.concat(list_of_chunk_results, ignore_index=True)
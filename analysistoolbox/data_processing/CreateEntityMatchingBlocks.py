@@ -0,0 +1,260 @@
+# Load packages
+import numpy as np
+import pandas as pd
+
+# Declare function
+def CreateEntityMatchingBlocks(entities_1,
+                               entities_2,
+                               blocking_methods=['Token', 'Character N-Gram', 'Sorted Neighborhood', 'Phonetic'],
+                               n_gram_size=3,
+                               minimum_n_gram_overlap=0.5,
+                               sorted_neighborhood_window=5,
+                               maximum_block_size=500,
+                               known_matches=None,
+                               entities_per_chunk=10000,
+                               show_summary=True):
+    """
+    Finds the candidate pairs of entities worth scoring in entity matching, rather than comparing every entity in one list to every entity in the other.
+    Each blocking method puts entities that share a key into the same block, and only pairs that share at least one block are returned:
+    'Token' blocks on the words in each entity, 'Character N-Gram' on its overlapping runs of n characters, 'Phonetic' on the Soundex code of
+    each word (so that "Smith" and "Smyth" share a block), and 'Sorted Neighborhood' sorts both lists together and pairs entities that land
+    within a few places of each other. Blocks with more than maximum_block_size entities on either side, e.g. for words like "inc" or "the",
+    are skipped, since they add many pairs and little information. The first list is processed in chunks, so memory use is set by the chunk
+    size and the block sizes rather than by the number of possible pairs.
+
+    Args:
+        entities_1 (array-like of str): The entities of the first list, e.g. a column of a dataframe.
+        entities_2 (array-like of str): The entities of the second list.
+        blocking_methods (list of str, optional): The blocking methods to use. Defaults to ['Token', 'Character N-Gram', 'Sorted Neighborhood', 'Phonetic'].
+        n_gram_size (int, optional): The number of characters in each n-gram of the 'Character N-Gram' method. Defaults to 3.
+        minimum_n_gram_overlap (float, optional): The share of the shorter entity's n-grams (in blocks that aren't skipped) that a pair must have in common to be kept by the 'Character N-Gram' method. Defaults to 0.5.
+        sorted_neighborhood_window (int, optional): The size of the window that slides over both lists once sorted by the 'Sorted Neighborhood' method. Entities of different lists in the same window are paired. Defaults to 5.
+        maximum_block_size (int, optional): The largest number of entities from either list that a block can have before it is skipped. Defaults to 500.
+        known_matches (list of tuple, optional): Pairs of positions (in entities_1 and entities_2) that are known to match, used to calculate the pair recall of the blocks. Defaults to None.
+        entities_per_chunk (int, optional): The number of entities from the first list to block at a time. Defaults to 10000.
+        show_summary (bool, optional): Whether to print the number of candidate pairs, the reduction ratio, and the pair recall. Defaults to True.
+
+    Returns:
+        pandas.DataFrame: The candidate pairs, with the position of each entity in entities_1 ('Index 1') and entities_2 ('Index 2'), sorted by position.
+            The number of candidate pairs, the reduction ratio (the share of possible pairs that are not scored), and the pair recall (the share of
+            known matches that are candidate pairs, or None if known_matches is not given) are recorded in the dataframe's attrs.
+    """
+    # Create list of valid blocking methods
+    valid_blocking_methods = ['Token', 'Character N-Gram', 'Sorted Neighborhood', 'Phonetic']
+
+    # Ensure that blocking methods are valid
+    if len(blocking_methods) == 0:
+        raise ValueError("At least one blocking method must be specified.")
+    for blocking_method in blocking_methods:
+        if blocking_method not in valid_blocking_methods:
+            raise ValueError('Invalid blocking method specified: ' + blocking_method + ". Valid blocking methods are: " + ', '.join(valid_blocking_methods))
+
+    # Ensure that the block settings are valid
+    if n_gram_size < 1 or sorted_neighborhood_window < 2 or maximum_block_size < 1 or entities_per_chunk < 1:
+        raise ValueError("n_gram_size, maximum_block_size, and entities_per_chunk must be at least 1, and sorted_neighborhood_window must be at least 2.")
+    if minimum_n_gram_overlap < 0 or minimum_n_gram_overlap > 1:
+        raise ValueError("minimum_n_gram_overlap must be between 0 and 1.")
+
+    # Normalize the entities to lowercase words without punctuation
+    normalized_entities_1 = _normalize_entities(entities_1)
+    normalized_entities_2 = _normalize_entities(entities_2)
+    number_of_entities_1 = len(normalized_entities_1)
+    number_of_entities_2 = len(normalized_entities_2)
+
+    # Get the blocking keys of each entity for the methods that use an inverted index
+    list_of_postings = []
+    number_of_skipped_blocks = 0
+    for blocking_method in [blocking_method for blocking_method in ['Token', 'Character N-Gram', 'Phonetic'] if blocking_method in blocking_methods]:
+        postings = _create_postings(normalized_entities_1, normalized_entities_2, lambda entity: _get_blocking_keys(entity, blocking_method, n_gram_size), maximum_block_size)
+        number_of_skipped_blocks += postings['number_of_skipped_blocks']
+        list_of_postings.append((blocking_method, postings))
+
+    # Find the candidate pairs of each chunk of the first list, stored as single codes (Index 1 x number of entities in the second list + Index 2)
+    list_of_pair_codes = []
+    for chunk_start in range(0, number_of_entities_1, entities_per_chunk):
+        chunk_end = min(chunk_start + entities_per_chunk, number_of_entities_1)
+        list_of_chunk_pair_codes = []
+        for blocking_method, postings in list_of_postings:
+            pair_codes = _join_postings(postings, chunk_start, chunk_end, number_of_entities_2)
+            # Keep n-gram pairs that share enough of the shorter entity's n-grams
+            if blocking_method == 'Character N-Gram':
+                pair_codes, number_of_shared_keys = np.unique(pair_codes, return_counts=True)
+                number_of_keys_in_shorter = np.minimum(
+                    postings['number_of_keys_1'][pair_codes // number_of_entities_2],
+                    postings['number_of_keys_2'][pair_codes % number_of_entities_2]
+                )
+                pair_codes = pair_codes[number_of_shared_keys >= np.ceil(minimum_n_gram_overlap * number_of_keys_in_shorter)]
+            list_of_chunk_pair_codes.append(pair_codes)
+        if len(list_of_chunk_pair_codes) > 0:
+            list_of_pair_codes.append(np.unique(np.concatenate(list_of_chunk_pair_codes)))
+
+    # Pair entities that are near each other once both lists are sorted by their words in alphabetical order
+    if 'Sorted Neighborhood' in blocking_methods:
+        list_of_pair_codes.append(_get_sorted_neighborhood_pairs(normalized_entities_1, normalized_entities_2, sorted_neighborhood_window))
+
+    # Combine the candidate pairs of every method
+    if len(list_of_pair_codes) > 0:
+        pair_codes = np.unique(np.concatenate(list_of_pair_codes))
+    else:
+        pair_codes = np.array([], dtype=np.int64)
+    df_candidate_pairs = pd.DataFrame({
+        'Index 1': pair_codes // number_of_entities_2 if number_of_entities_2 > 0 else pair_codes,
+        'Index 2': pair_codes % number_of_entities_2 if number_of_entities_2 > 0 else pair_codes
+    })
+
+    # Calculate the reduction ratio, which is the share of possible pairs that don't need to be scored
+    number_of_possible_pairs = number_of_entities_1 * number_of_entities_2
+    reduction_ratio = 1 - pair_codes.size / number_of_possible_pairs if number_of_possible_pairs > 0 else 0.0
+
+    # Calculate the pair recall, which is the share of known matches that are among the candidate pairs
+    pair_recall = None
+    if known_matches is not None:
+        known_matches = np.asarray(known_matches, dtype=np.int64).reshape(-1, 2)
+        known_match_codes = np.unique(known_matches[:, 0] * number_of_entities_2 + known_matches[:, 1])
+        pair_recall = float(np.isin(known_match_codes, pair_codes).mean()) if known_match_codes.size > 0 else None
+
+    # Record the results of the blocking
+    df_candidate_pairs.attrs['number_of_candidate_pairs'] = int(pair_codes.size)
+    df_candidate_pairs.attrs['reduction_ratio'] = reduction_ratio
+    df_candidate_pairs.attrs['pair_recall'] = pair_recall
+
+    # Show the summary if requested
+    if show_summary:
+        print("Blocking kept {:,} of {:,} possible pairs (reduction ratio: {:.4%}).".format(pair_codes.size, number_of_possible_pairs, reduction_ratio))
+        if number_of_skipped_blocks > 0:
+            print("Skipped {:,} blocks with more than {:,} entities on one side.".format(number_of_skipped_blocks, maximum_block_size))
+        if pair_recall is not None:
+            print("Pair recall: {:.2%} of the {:,} known matches are candidate pairs.".format(pair_recall, known_match_codes.size))
+
+    # Return the candidate pairs
+    return df_candidate_pairs
+
+
+def _normalize_entities(entities):
+    # Lowercase each entity, and replace punctuation and repeated spaces with a single space
+    normalized_entities = pd.Series(entities, dtype=object).fillna('').astype(str)
+    normalized_entities = normalized_entities.str.lower().str.replace(r'[^a-z0-9]+', ' ', regex=True).str.strip()
+    return normalized_entities.tolist()
+
+
+def _get_blocking_keys(normalized_entity, blocking_method, n_gram_size=3):
+    # Get the keys of the blocks an entity belongs to: its words, its n-grams, or the Soundex codes of its words
+    if blocking_method == 'Token':
+        return normalized_entity.split()
+    if blocking_method == 'Character N-Gram':
+        return _get_n_grams(normalized_entity, n_gram_size)
+    return [_get_soundex_code(token) for token in normalized_entity.split()]
+
+
+def _get_n_grams(entity, n_gram_size):
+    # Get the overlapping runs of characters, or the whole entity if it is shorter than one n-gram
+    if len(entity) <= n_gram_size:
+        return [entity] if len(entity) > 0 else []
+    return [entity[start:start + n_gram_size] for start in range(len(entity) - n_gram_size + 1)]
+
+
+# Set the Soundex digit of each consonant. Vowels, 'y', 'h', and 'w' have no digit.
+_SOUNDEX_DIGITS = {
+    **dict.fromkeys('bfpv', '1'),
+    **dict.fromkeys('cgjkqsxz', '2'),
+    **dict.fromkeys('dt', '3'),
+    'l': '4',
+    **dict.fromkeys('mn', '5'),
+    'r': '6'
+}
+
+
+def _get_soundex_code(token):
+    # Keep numbers as they are, since they have no sound to encode
+    if not token[0].isalpha():
+        return token
+
+    # Keep the first letter, then add the digit of each following consonant, skipping repeats unless a vowel separates them
+    soundex_code = token[0]
+    previous_digit = _SOUNDEX_DIGITS.get(token[0], '')
+    for letter in token[1:]:
+        digit = _SOUNDEX_DIGITS.get(letter, '')
+        if digit != '' and digit != previous_digit:
+            soundex_code += digit
+            if len(soundex_code) == 4:
+                break
+        if letter not in 'hw':
+            previous_digit = digit
+    return soundex_code.ljust(4, '0')
+
+
+def _create_postings(normalized_entities_1, normalized_entities_2, key_function, maximum_block_size):
+    # Get the unique keys of each entity, caching them for entities that appear more than once
+    dict_of_keys = {}
+    def get_keys(entity):
+        if entity not in dict_of_keys:
+            dict_of_keys[entity] = list(dict.fromkeys(key_function(entity)))
+        return dict_of_keys[entity]
+    list_of_keys_1 = [get_keys(entity) for entity in normalized_entities_1]
+    list_of_keys_2 = [get_keys(entity) for entity in normalized_entities_2]
+    number_of_keys_1 = np.array([len(keys) for keys in list_of_keys_1], dtype=np.int64)
+    number_of_keys_2 = np.array([len(keys) for keys in list_of_keys_2], dtype=np.int64)
+
+    # Give each key a number shared by both lists
+    key_codes, unique_keys = pd.factorize(pd.Series([key for keys in list_of_keys_1 for key in keys] + [key for keys in list_of_keys_2 for key in keys], dtype=object))
+    key_codes_1 = key_codes[:number_of_keys_1.sum()].astype(np.int64)
+    key_codes_2 = key_codes[number_of_keys_1.sum():].astype(np.int64)
+
+    # Count the entities in each block, and skip blocks that are too large on either side
+    block_sizes_1 = np.bincount(key_codes_1, minlength=len(unique_keys))
+    block_sizes_2 = np.bincount(key_codes_2, minlength=len(unique_keys))
+    is_too_large = (block_sizes_1 > maximum_block_size) | (block_sizes_2 > maximum_block_size)
+    number_of_skipped_blocks = int(np.sum(is_too_large & (block_sizes_1 > 0) & (block_sizes_2 > 0)))
+    block_sizes_2[is_too_large] = 0
+
+    # Sort the second list's entities by block, so each block's entities can be looked up by position
+    entity_indices_1 = np.repeat(np.arange(len(normalized_entities_1), dtype=np.int64), number_of_keys_1)
+    entity_indices_2 = np.repeat(np.arange(len(normalized_entities_2), dtype=np.int64), number_of_keys_2)
+    order = np.argsort(key_codes_2, kind='stable')
+    is_kept = ~is_too_large[key_codes_2[order]]
+    return {
+        'entity_indices_1': entity_indices_1,
+        'key_codes_1': key_codes_1,
+        'sorted_entity_indices_2': entity_indices_2[order][is_kept],
+        'block_starts_2': np.concatenate([[0], np.cumsum(block_sizes_2)[:-1]]).astype(np.int64),
+        'block_sizes_2': block_sizes_2,
+        # Count the keys of each entity that are in blocks that weren't skipped
+        'number_of_keys_1': np.bincount(entity_indices_1[~is_too_large[key_codes_1]], minlength=len(normalized_entities_1)),
+        'number_of_keys_2': np.bincount(entity_indices_2[~is_too_large[key_codes_2]], minlength=len(normalized_entities_2)),
+        'number_of_skipped_blocks': number_of_skipped_blocks
+    }
+
+
+def _join_postings(postings, chunk_start, chunk_end, number_of_entities_2):
+    # Select the keys of the chunk's entities, which are stored in order of entity
+    first_posting, last_posting = np.searchsorted(postings['entity_indices_1'], [chunk_start, chunk_end])
+    entity_indices_1 = postings['entity_indices_1'][first_posting:last_posting]
+    key_codes_1 = postings['key_codes_1'][first_posting:last_posting]
+
+    # Pair each entity with every entity of the second list in the same block
+    block_sizes = postings['block_sizes_2'][key_codes_1]
+    total_number_of_pairs = int(block_sizes.sum())
+    offsets_in_block = np.arange(total_number_of_pairs, dtype=np.int64) - np.repeat(np.cumsum(block_sizes) - block_sizes, block_sizes)
+    matched_entity_indices_2 = postings['sorted_entity_indices_2'][np.repeat(postings['block_starts_2'][key_codes_1], block_sizes) + offsets_in_block]
+    return np.repeat(entity_indices_1, block_sizes) * number_of_entities_2 + matched_entity_indices_2
+
+
+def _get_sorted_neighborhood_pairs(normalized_entities_1, normalized_entities_2, sorted_neighborhood_window):
+    # Sort both lists together by their words in alphabetical order, so that differences in word order don't separate matches
+    sorting_keys = np.array([' '.join(sorted(entity.split())) for entity in normalized_entities_1 + normalized_entities_2], dtype=str)
+    list_numbers = np.repeat([0, 1], [len(normalized_entities_1), len(normalized_entities_2)])
+    entity_indices = np.concatenate([np.arange(len(normalized_entities_1)), np.arange(len(normalized_entities_2))]).astype(np.int64)
+    order = np.argsort(sorting_keys, kind='stable')
+    order = order[sorting_keys[order] != '']
+
+    # Pair each entity with the entities of the other list that are within the window
+    list_of_pair_codes = []
+    for offset in range(1, sorted_neighborhood_window):
+        earlier, later = order[:-offset], order[offset:]
+        is_across_lists = list_numbers[earlier] != list_numbers[later]
+        earlier, later = earlier[is_across_lists], later[is_across_lists]
+        is_first_earlier = list_numbers[earlier] == 0
+        indices_1 = np.where(is_first_earlier, entity_indices[earlier], entity_indices[later])
+        indices_2 = np.where(is_first_earlier, entity_indices[later], entity_indices[earlier])
+        list_of_pair_codes.append(indices_1 * len(normalized_entities_2) + indices_2)
+    return np.concatenate(list_of_pair_codes) if len(list_of_pair_codes) > 0 else np.array([], dtype=np.int64)
@@ -0,0 +1,267 @@
+# Load packages
+import numpy as np
+import pandas as pd
+import pickle
+from .ConductEntityMatching import _add_entity_columns, _create_entity_column, _keep_top_matches, _score_entity_pairs
+from .CreateEntityMatchingBlocks import _get_blocking_keys, _normalize_entities
+
+# Declare class
+class EntityMatchingIndex:
+    """
+    A reference table prepared once for entity matching, so that new batches of records can be matched against it without starting over.
+    The index holds each unique reference entity with its normalized and cleaned strings, the blocks (words, n-grams, and Soundex codes)
+    it belongs to, and its place in sorted order. match() only looks up the blocks of the batch's entities and scores the pairs found,
+    so it takes time in proportion to the size of the batch rather than the reference table, and add() indexes new reference records
+    without re-indexing the old ones. Indexes can be saved to disk with save() and reopened with LoadEntityMatchingIndex().
+
+    Args:
+        reference_dataframe (pandas.DataFrame): The reference records to match against.
+        primary_key (str): Name of the primary key column in reference_dataframe.
+        columns_to_compare (list of str): List of columns to compare. Batches matched against the index must have the same columns.
+        blocking_methods (list of str, optional): The blocking methods used to find candidate pairs, from 'Token', 'Character N-Gram', 'Sorted Neighborhood', and 'Phonetic'.
+            Defaults to ['Token', 'Character N-Gram', 'Sorted Neighborhood', 'Phonetic'].
+        n_gram_size (int, optional): The number of characters in each n-gram of the 'Character N-Gram' method. Defaults to 3.
+        minimum_n_gram_overlap (float, optional): The share of the shorter entity's n-grams (in blocks that aren't skipped) that a pair must have in common to be kept by the 'Character N-Gram' method. Defaults to 0.5.
+        sorted_neighborhood_window (int, optional): The number of reference entities, in sorted order, on either side of a new entity that it is paired with by the 'Sorted Neighborhood' method. Defaults to 5.
+        maximum_block_size (int, optional): The largest number of reference entities that a block can have before it is skipped. Defaults to 500.
+    """
+
+    def __init__(self,
+                 reference_dataframe,
+                 primary_key,
+                 columns_to_compare,
+                 blocking_methods=['Token', 'Character N-Gram', 'Sorted Neighborhood', 'Phonetic'],
+                 n_gram_size=3,
+                 minimum_n_gram_overlap=0.5,
+                 sorted_neighborhood_window=5,
+                 maximum_block_size=500):
+        # Create list of valid blocking methods
+        valid_blocking_methods = ['Token', 'Character N-Gram', 'Sorted Neighborhood', 'Phonetic']
+
+        # Ensure that blocking methods are valid
+        if len(blocking_methods) == 0:
+            raise ValueError("At least one blocking method must be specified.")
+        for blocking_method in blocking_methods:
+            if blocking_method not in valid_blocking_methods:
+                raise ValueError('Invalid blocking method specified: ' + blocking_method + ". Valid blocking methods are: " + ', '.join(valid_blocking_methods))
+
+        # Ensure that the block settings are valid
+        if n_gram_size < 1 or sorted_neighborhood_window < 1 or maximum_block_size < 1:
+            raise ValueError("n_gram_size, sorted_neighborhood_window, and maximum_block_size must be at least 1.")
+        if minimum_n_gram_overlap < 0 or minimum_n_gram_overlap > 1:
+            raise ValueError("minimum_n_gram_overlap must be between 0 and 1.")
+
+        # Set the index settings
+        self.primary_key = primary_key
+        self.columns_to_compare = list(columns_to_compare)
+        self.blocking_methods = list(blocking_methods)
+        self.n_gram_size = n_gram_size
+        self.minimum_n_gram_overlap = minimum_n_gram_overlap
+        self.sorted_neighborhood_window = sorted_neighborhood_window
+        self.maximum_block_size = maximum_block_size
+
+        # Set the starting, empty index
+        self.reference_dataframe = pd.DataFrame(columns=[primary_key] + self.columns_to_compare + ['Entity'])
+        self._entity_numbers = {}
+        self._entities = np.array([], dtype=object)
+        self._processed_entities = np.array([], dtype=object)
+        self._number_of_kept_n_grams = np.array([], dtype=np.int64)
+        self._postings = {blocking_method: {} for blocking_method in self.blocking_methods if blocking_method != 'Sorted Neighborhood'}
+        self._sorting_keys = np.array([], dtype=object)
+        self._sorted_entity_numbers = np.array([], dtype=np.int64)
+        self._row_starts = np.zeros(1, dtype=np.int64)
+
+        # Index the reference records
+        self.add(reference_dataframe)
+
+    @property
+    def number_of_entities(self):
+        """int: The number of unique reference entities in the index."""
+        return len(self._entities)
+
+    def __len__(self):
+        return len(self.reference_dataframe)
+
+    def __repr__(self):
+        return "EntityMatchingIndex(number_of_records={:,}, number_of_entities={:,}, blocking_methods={})".format(len(self), self.number_of_entities, self.blocking_methods)
+
+    def add(self,
+            dataframe):
+        """
+        Adds records to the reference table. Only entities that aren't already in the index are normalized and added to its blocks.
+
+        Args:
+            dataframe (pandas.DataFrame): The reference records to add, with the primary key and the columns to compare.
+
+        Returns:
+            EntityMatchingIndex: The updated index.
+        """
+        # Lazy load uncommon packages
+        from rapidfuzz import utils
+
+        # Add the new records, dropping records that are already in the reference table and records with nothing to compare
+        df_new_records = _create_entity_column(dataframe, self.primary_key, self.columns_to_compare).dropna(subset=['Entity'])
+        reference_dataframe = pd.concat([self.reference_dataframe, df_new_records], ignore_index=True) if len(self.reference_dataframe) > 0 else df_new_records.reset_index(drop=True)
+        reference_dataframe = reference_dataframe.drop_duplicates(subset=[self.primary_key] + self.columns_to_compare)
+
+        # Get the entities that aren't indexed yet
+        new_entities = [entity for entity in pd.unique(df_new_records['Entity']) if entity not in self._entity_numbers]
+        first_entity_number = self.number_of_entities
+        for entity_number, entity in enumerate(new_entities, start=first_entity_number):
+            self._entity_numbers[entity] = entity_number
+        normalized_new_entities = _normalize_entities(new_entities)
+
+        # Store the cleaned strings used by the match methods
+        self._entities = np.concatenate([self._entities, np.array(new_entities, dtype=object)])
+        self._processed_entities = np.concatenate([self._processed_entities, np.array([utils.default_process(entity) for entity in new_entities], dtype=object)])
+
+        # Add the new entities to the blocks of each inverted index
+        for blocking_method, postings in self._postings.items():
+            list_of_number_of_keys = []
+            dict_of_previous_block_sizes = {}
+            for entity_number, normalized_entity in enumerate(normalized_new_entities, start=first_entity_number):
+                keys = list(dict.fromkeys(_get_blocking_keys(normalized_entity, blocking_method, self.n_gram_size)))
+                for key in keys:
+                    block = postings.setdefault(key, [])
+                    dict_of_previous_block_sizes.setdefault(key, len(block))
+                    block.append(entity_number)
+                list_of_number_of_keys.append(len(keys))
+            if blocking_method == 'Character N-Gram':
+                # Count each entity's n-grams in blocks that aren't skipped, removing the n-grams of blocks that are now too large
+                self._number_of_kept_n_grams = np.concatenate([self._number_of_kept_n_grams, np.array(list_of_number_of_keys, dtype=np.int64)])
+                for key, previous_block_size in dict_of_previous_block_sizes.items():
+                    if len(postings[key]) > self.maximum_block_size:
+                        newly_skipped_entities = postings[key] if previous_block_size <= self.maximum_block_size else postings[key][previous_block_size:]
+                        np.subtract.at(self._number_of_kept_n_grams, np.array(newly_skipped_entities, dtype=np.int64), 1)
+
+        # Insert the new entities into the sorted order, by their words in alphabetical order
+        if 'Sorted Neighborhood' in self.blocking_methods and len(new_entities) > 0:
+            new_sorting_keys = np.array([' '.join(sorted(entity.split())) for entity in normalized_new_entities], dtype=object)
+            order = np.argsort(new_sorting_keys, kind='stable')
+            insert_positions = np.searchsorted(self._sorting_keys, new_sorting_keys[order], side='right')
+            self._sorting_keys = np.insert(self._sorting_keys, insert_positions, new_sorting_keys[order])
+            self._sorted_entity_numbers = np.insert(self._sorted_entity_numbers, insert_positions, first_entity_number + order)
+
+        # Sort the reference records by entity, so that each entity's records can be looked up by position
+        entity_numbers = reference_dataframe['Entity'].map(self._entity_numbers).to_numpy(dtype=np.int64)
+        order = np.argsort(entity_numbers, kind='stable')
+        self.reference_dataframe = reference_dataframe.iloc[order].reset_index(drop=True)
+        self._row_starts = np.searchsorted(entity_numbers[order], np.arange(self.number_of_entities + 1))
+        return self
+
+    def match(self,
+              dataframe,
+              primary_key,
+              match_score_threshold=95,
+              match_methods=['Partial Token Set Ratio', 'Weighted Ratio'],
+              levenshtein_distance_filter=None,
+              top_k=None,
+              pairs_per_chunk=1000000,
+              number_of_workers=None):
+        """
+        Matches a batch of records against the reference table, scoring only the pairs that share a block.
+        The results have the same columns as ConductEntityMatching, with the batch as dataframe_1 and the reference table as dataframe_2.
+
+        Args:
+            dataframe (pandas.DataFrame): The records to match, with a primary key and the columns to compare.
+            primary_key (str): Name of the primary key column in dataframe.
+            match_score_threshold (int, optional): Minimum match score to consider a match. Scores of methods below the threshold are left empty. Defaults to 95.
+            match_methods (list of str, optional): List of fuzzy matching algorithms to use. See ConductEntityMatching for how their scores compare to fuzzywuzzy's. Defaults to ['Partial Token Set Ratio', 'Weighted Ratio'].
+            levenshtein_distance_filter (int, optional): Maximum Levenshtein distance between two entities to consider a match. Defaults to None.
+            top_k (int, optional): The number of best matches to keep for each entity in the batch, ranked by their highest score across the match methods. Defaults to None.
+            pairs_per_chunk (int, optional): The number of pairs of entities to score at a time. Defaults to 1000000.
+            number_of_workers (int, optional): The number of threads used to score each chunk. If None, all available CPU cores are used. Defaults to None.
+
+        Returns:
+            pandas.DataFrame: Dataframe of matched entities and their match scores.
+        """
+        # Lazy load uncommon packages
+        from rapidfuzz import utils
+
+        # Ensure that top_k is a positive integer or None
+        if top_k is not None and (not isinstance(top_k, int) or top_k < 1):
+            raise ValueError('top_k must be a positive integer or None')
+
+        # Get the unique entities of the batch
+        df_batch = _create_entity_column(dataframe, primary_key, self.columns_to_compare)
+        batch_entities = df_batch['Entity'].dropna().unique()
+
+        # Find the reference entities that share a block with each entity of the batch
+        pair_indices = self._get_candidate_pairs(_normalize_entities(batch_entities))
+
+        # Score every requested match method for each candidate pair, reusing the reference table's cleaned strings
+        data_match_results = _score_entity_pairs(
+            batch_entities,
+            self._entities,
+            match_methods=match_methods,
+            match_score_threshold=match_score_threshold,
+            levenshtein_distance_filter=levenshtein_distance_filter,
+            pair_indices=pair_indices,
+            pairs_per_chunk=pairs_per_chunk,
+            number_of_workers=number_of_workers,
+            processed_entities=([utils.default_process(entity) for entity in batch_entities], self._processed_entities)
+        )
+
+        # Keep the best matches of each entity, if requested
+        if top_k is not None:
+            data_match_results = _keep_top_matches(data_match_results, top_k)
+
+        # Add the primary keys and columns compared, looking up only the reference records of the matched entities
+        matched_entity_numbers = np.array(sorted(self._entity_numbers[entity] for entity in pd.unique(data_match_results['Entity 2'])), dtype=np.int64)
+        row_counts = self._row_starts[matched_entity_numbers + 1] - self._row_starts[matched_entity_numbers]
+        row_numbers = np.repeat(self._row_starts[matched_entity_numbers], row_counts) + np.arange(row_counts.sum()) - np.repeat(np.cumsum(row_counts) - row_counts, row_counts)
+        return _add_entity_columns(data_match_results, df_batch, primary_key, self.reference_dataframe.iloc[row_numbers], self.primary_key, self.columns_to_compare)
+
+    def save(self,
+             filepath):
+        """
+        Saves the index to disk with pickle. Only open index files from sources you trust, since loading a pickle file can run code.
+
+        Args:
+            filepath (str): The path to save the index to, e.g. 'reference_index.pkl'.
+
+        Returns:
+            str: The path the index was saved to.
+        """
+        with open(filepath, 'wb') as index_file:
+            pickle.dump(self, index_file, protocol=pickle.HIGHEST_PROTOCOL)
+        return filepath
+
+    def _get_candidate_pairs(self, normalized_batch_entities):
+        # Collect the reference entities that share a block with each entity of the batch
+        list_of_batch_numbers = []
+        list_of_reference_numbers = []
+        for batch_number, normalized_entity in enumerate(normalized_batch_entities):
+            list_of_candidates = []
+            for blocking_method, postings in self._postings.items():
+                # Look up the entity's blocks, skipping blocks that are too large
+                keys = list(dict.fromkeys(_get_blocking_keys(normalized_entity, blocking_method, self.n_gram_size)))
+                list_of_blocks = [postings[key] for key in keys if key in postings]
+                list_of_blocks = [block for block in list_of_blocks if len(block) <= self.maximum_block_size]
+                if len(list_of_blocks) == 0:
+                    continue
+                candidates = np.concatenate(list_of_blocks)
+                # Keep n-gram candidates that share enough of the shorter entity's n-grams, counting the n-grams of both entities in blocks that aren't skipped
+                if blocking_method == 'Character N-Gram':
+                    candidates, number_of_shared_n_grams = np.unique(candidates, return_counts=True)
+                    number_of_kept_n_grams = sum(1 for key in keys if len(postings.get(key, ())) <= self.maximum_block_size)
+                    number_of_n_grams_in_shorter = np.minimum(number_of_kept_n_grams, self._number_of_kept_n_grams[candidates])
+                    candidates = candidates[number_of_shared_n_grams >= np.ceil(self.minimum_n_gram_overlap * number_of_n_grams_in_shorter)]
+                list_of_candidates.append(candidates)
+
+            # Pair the entity with its neighbors, once it is placed in the sorted order of the reference entities
+            sorting_key = ' '.join(sorted(normalized_entity.split()))
+            if 'Sorted Neighborhood' in self.blocking_methods and sorting_key != '':
+                position = np.searchsorted(self._sorting_keys, sorting_key)
+                list_of_candidates.append(self._sorted_entity_numbers[max(0, position - self.sorted_neighborhood_window):position + self.sorted_neighborhood_window])
+
+            # Add the entity's unique candidates
+            if len(list_of_candidates) > 0:
+                candidates = np.unique(np.concatenate(list_of_candidates))
+                list_of_batch_numbers.append(np.full(candidates.size, batch_number, dtype=np.int64))
+                list_of_reference_numbers.append(candidates.astype(np.int64))
+
+        # Return the candidate pairs, sorted by the entity of the batch
+        if len(list_of_batch_numbers) == 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+        return np.concatenate(list_of_batch_numbers), np.concatenate(list_of_reference_numbers)
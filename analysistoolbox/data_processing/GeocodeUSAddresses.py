@@ -1,4 +1,10 @@
 # Load packages
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import csv
+import io
+import re
+import sqlite3
+import time
 import pandas as pd
 import numpy as np
 
@@ -6,38 +12,170 @@ import numpy as np
 def GeocodeUSAddresses(dataframe,
                        address_column_name,
                        latitude_column_name='Latitude',
-                       longitude_column_name='Longitude'):
+                       longitude_column_name='Longitude',
+                       city_column_name=None,
+                       state_column_name=None,
+                       zip_code_column_name=None,
+                       addresses_per_batch=10000,
+                       number_of_workers=4,
+                       maximum_retries=3,
+                       backoff_seconds=2,
+                       timeout_seconds=600,
+                       cache_filepath=None,
+                       base_url='https://geocoding.geo.census.gov/geocoder',
+                       benchmark='Public_AR_Current',
+                       show_summary=True):
     """Geocodes addresses in a dataframe using U.S. Census Bureau's geocoding service.
+    Addresses are normalized (uppercased, with extra spaces removed) and deduplicated, so each unique address is geocoded once. The unique addresses are sent to
+    the Census batch geocoder in files of up to addresses_per_batch addresses, several batches at a time, and batches that fail are retried with exponential backoff.
+    If a cache file is given, results are saved to it as each batch finishes, so reruns only geocode addresses that aren't in the cache yet.
 
     Args:
         dataframe (pandas.DataFrame): The dataframe containing the addresses to be geocoded.
-        address_column_name (str): The name of the column in the dataframe that contains the addresses.
+        address_column_name (str): The name of the column in the dataframe that contains the addresses. If no city, state, or ZIP code columns are given, this should hold the full, one-line address.
         latitude_column_name (str, optional): The name of the column to be created in the dataframe to store the latitude. Defaults to 'Latitude'.
         longitude_column_name (str, optional): The name of the column to be created in the dataframe to store the longitude. Defaults to 'Longitude'.
+        city_column_name (str, optional): The name of the column that contains the city, if it is separate from the address. Defaults to None.
+        state_column_name (str, optional): The name of the column that contains the state, if it is separate from the address. Defaults to None.
+        zip_code_column_name (str, optional): The name of the column that contains the ZIP code, if it is separate from the address. Defaults to None.
+        addresses_per_batch (int, optional): The number of addresses in each batch file. The Census geocoder accepts up to 10,000. Defaults to 10000.
+        number_of_workers (int, optional): The number of batches sent to the geocoder at the same time. Defaults to 4.
+        maximum_retries (int, optional): The number of times a failed batch is retried before its addresses are left without coordinates. Defaults to 3.
+        backoff_seconds (float, optional): The number of seconds to wait before the first retry, doubling with each retry after that. Defaults to 2.
+        timeout_seconds (float, optional): The number of seconds to wait for the geocoder to respond to a batch. Defaults to 600.
+        cache_filepath (str, optional): The path of a SQLite file to cache results in. It is created if it doesn't exist. If None, results aren't cached. Defaults to None.
+        base_url (str, optional): The base URL of the geocoding service, e.g. to use a mirror or a local stand-in for testing. Defaults to 'https://geocoding.geo.census.gov/geocoder'.
+        benchmark (str, optional): The Census geocoder benchmark (the version of the address data) to use. Defaults to 'Public_AR_Current'.
+        show_summary (bool, optional): Whether to print the number of unique, cached, and geocoded addresses. Defaults to True.
 
     Returns:
-        pandas.DataFrame: The dataframe with additional columns for latitude and longitude.
+        pandas.DataFrame: The dataframe with additional columns for latitude and longitude. Addresses that couldn't be matched, or whose batch failed, have missing coordinates.
     """
-    # Lazy load uncommon packages
-    import censusgeocode as cg
-    
-    # Define a function to handle geocoding for a single address
-    def get_geocode(address):
-        try:
-            # Using 'street' as the search parameter allows for freeform address input
-            result = cg.onelineaddress(address, returntype='locations')
-            # The API returns a list of matches; we'll take the first (best) match if any
-            if result and len(result) > 0:
-                top_result = result[0]
-                return top_result['coordinates']['x'], top_result['coordinates']['y'] # x = longitude, y = latitude
-        except Exception as e:
-            print(f"Error geocoding address {address}: {str(e)}")
-            return np.nan, np.nan
-        
-        return np.nan, np.nan
-    
-    # Apply the function to the desired column and create new columns for latitude and longitude
-    dataframe[latitude_column_name], dataframe[longitude_column_name] = zip(*dataframe[address_column_name].apply(get_geocode))
-    
+    # Ensure that the batch settings are valid
+    if addresses_per_batch < 1 or addresses_per_batch > 10000:
+        raise ValueError("addresses_per_batch must be between 1 and 10,000, the upper limit of the Census batch geocoder.")
+    if number_of_workers < 1:
+        raise ValueError("number_of_workers must be at least 1.")
+
+    # Normalize the address fields, and join them into one key per row
+    address_fields = pd.DataFrame({
+        field: dataframe[column_name].map(_normalize_address).to_numpy() if column_name is not None else ''
+        for field, column_name in [('Street', address_column_name), ('City', city_column_name), ('State', state_column_name), ('ZIP', zip_code_column_name)]
+    }, index=dataframe.index)
+    address_keys = address_fields['Street'] + '|' + address_fields['City'] + '|' + address_fields['State'] + '|' + address_fields['ZIP']
+    address_keys[address_fields['Street'] == ''] = np.nan
+
+    # Get the unique addresses by their key, which works by position, so duplicate index labels are fine
+    address_fields['Address Key'] = address_keys.to_numpy()
+    unique_addresses = address_fields[address_keys.notna().to_numpy()].drop_duplicates(subset='Address Key').set_index('Address Key')
+
+    # Look up the unique addresses in the cache, if one is given
+    coordinates = {}
+    if cache_filepath is not None:
+        coordinates = _read_cached_geocodes(cache_filepath, benchmark, unique_addresses.index.tolist())
+    addresses_to_geocode = unique_addresses[~unique_addresses.index.isin(list(coordinates))]
+
+    # Split the addresses that aren't cached into batch files
+    list_of_batches = [addresses_to_geocode.iloc[start:start + addresses_per_batch] for start in range(0, len(addresses_to_geocode), addresses_per_batch)]
+    if show_summary:
+        print("Found {:,} unique addresses, {:,} of them in the cache. Geocoding {:,} addresses in {:,} batches.".format(len(unique_addresses), len(coordinates), len(addresses_to_geocode), len(list_of_batches)))
+
+    # Send the batches to the geocoder, several at a time, caching the results of each batch as it finishes
+    url = base_url.rstrip('/') + '/locations/addressbatch'
+    number_of_failed_batches = 0
+    with ThreadPoolExecutor(max_workers=number_of_workers) as executor:
+        futures = [executor.submit(_geocode_address_batch, url, benchmark, data_batch, maximum_retries, backoff_seconds, timeout_seconds) for data_batch in list_of_batches]
+        for future in as_completed(futures):
+            try:
+                batch_coordinates = future.result()
+            except Exception as e:
+                print(f"Error geocoding a batch of addresses: {str(e)}")
+                number_of_failed_batches += 1
+                continue
+            coordinates.update(batch_coordinates)
+            if cache_filepath is not None:
+                _write_cached_geocodes(cache_filepath, benchmark, batch_coordinates)
+    if show_summary and number_of_failed_batches > 0:
+        print("{:,} batches failed after {:,} retries, and their addresses were left without coordinates.".format(number_of_failed_batches, maximum_retries))
+
+    # Add the coordinates of each row's address, leaving addresses without a match empty
+    dataframe[latitude_column_name] = [coordinates.get(address_key, (np.nan, np.nan))[0] for address_key in address_keys]
+    dataframe[longitude_column_name] = [coordinates.get(address_key, (np.nan, np.nan))[1] for address_key in address_keys]
+
     # Return the dataframe with the new columns
     return dataframe
+
+
+def _normalize_address(address):
+    # Uppercase the address, and remove extra spaces and spaces before commas
+    if pd.isna(address):
+        return ''
+    address = re.sub(r'\s+', ' ', str(address)).strip().upper()
+    return re.sub(r'\s*,\s*', ', ', address).strip(', ')
+
+
+def _geocode_address_batch(url, benchmark, data_batch, maximum_retries, backoff_seconds, timeout_seconds):
+    # Lazy load uncommon packages
+    import requests
+
+    # Write the batch file, with the position of each address as its ID
+    batch_file = io.StringIO()
+    csv.writer(batch_file).writerows(
+        [row_number] + list(row) for row_number, row in enumerate(data_batch[['Street', 'City', 'State', 'ZIP']].itertuples(index=False))
+    )
+
+    # Post the batch file, retrying connection errors, timeouts, rate limits, and server errors with exponential backoff
+    for attempt in range(maximum_retries + 1):
+        try:
+            response = requests.post(
+                url,
+                data={'benchmark': benchmark},
+                files={'addressFile': ('addresses.csv', batch_file.getvalue(), 'text/csv')},
+                timeout=timeout_seconds
+            )
+            if response.status_code != 429 and response.status_code < 500:
+                response.raise_for_status()
+                break
+            error = requests.HTTPError(f"{response.status_code} response from {url}", response=response)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+        if attempt == maximum_retries:
+            raise error
+        time.sleep(backoff_seconds * 2 ** attempt)
+
+    # Read the coordinates of matched addresses, which are given as "longitude,latitude", and leave unmatched addresses empty
+    batch_coordinates = {}
+    for row in csv.reader(io.StringIO(response.text)):
+        if len(row) < 3 or not row[0].strip().isdigit() or int(row[0]) >= len(data_batch):
+            continue
+        address_key = data_batch.index[int(row[0])]
+        if row[2] == 'Match' and len(row) > 5 and ',' in row[5]:
+            longitude, latitude = row[5].split(',')
+            batch_coordinates[address_key] = (float(latitude), float(longitude))
+        else:
+            batch_coordinates[address_key] = (np.nan, np.nan)
+    return batch_coordinates
+
+
+def _read_cached_geocodes(cache_filepath, benchmark, address_keys):
+    # Create the cache table if needed, and read the cached coordinates of the addresses
+    cached_coordinates = {}
+    with sqlite3.connect(cache_filepath) as connection:
+        connection.execute("CREATE TABLE IF NOT EXISTS geocodes (benchmark TEXT, address TEXT, latitude REAL, longitude REAL, PRIMARY KEY (benchmark, address))")
+        for start in range(0, len(address_keys), 500):
+            chunk_of_keys = address_keys[start:start + 500]
+            query = "SELECT address, latitude, longitude FROM geocodes WHERE benchmark = ? AND address IN (" + ', '.join(['?'] * len(chunk_of_keys)) + ")"
+            for address_key, latitude, longitude in connection.execute(query, [benchmark] + chunk_of_keys):
+                cached_coordinates[address_key] = (np.nan if latitude is None else latitude, np.nan if longitude is None else longitude)
+    connection.close()
+    return cached_coordinates
+
+
+def _write_cached_geocodes(cache_filepath, benchmark, batch_coordinates):
+    # Save the coordinates of the batch, saving unmatched addresses too so they aren't geocoded again
+    with sqlite3.connect(cache_filepath) as connection:
+        connection.executemany(
+            "INSERT OR REPLACE INTO geocodes (benchmark, address, latitude, longitude) VALUES (?, ?, ?, ?)",
+            [(benchmark, address_key, None if np.isnan(latitude) else latitude, None if np.isnan(longitude) else longitude) for address_key, (latitude, longitude) in batch_coordinates.items()]
+        )
+    connection.close()
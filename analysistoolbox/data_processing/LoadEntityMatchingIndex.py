@@ -0,0 +1,26 @@
+# Load packages
+import pickle
+from .EntityMatchingIndex import EntityMatchingIndex
+
+# Declare function
+def LoadEntityMatchingIndex(filepath):
+    """
+    Loads an entity matching index saved with EntityMatchingIndex.save(), ready to match new batches or add reference records.
+    Only open index files from sources you trust, since loading a pickle file can run code.
+
+    Args:
+        filepath (str): The path of the saved index.
+
+    Returns:
+        EntityMatchingIndex: The loaded index.
+    """
+    # Read the index
+    with open(filepath, 'rb') as index_file:
+        entity_matching_index = pickle.load(index_file)
+
+    # Ensure that the file holds an entity matching index
+    if not isinstance(entity_matching_index, EntityMatchingIndex):
+        raise ValueError("The file " + filepath + " doesn't contain an EntityMatchingIndex.")
+
+    # Return the index
+    return entity_matching_index
@@ -5,14 +5,18 @@ from .AddTPeriodColumn import AddTPeriodColumn
 from .AddTukeyOutlierColumn import AddTukeyOutlierColumn
 from .CleanTextColumns import CleanTextColumns
 from .ConductAnomalyDetection import ConductAnomalyDetection
+from .ConductDeduplication import ConductDeduplication
 from .ConductEntityMatching import ConductEntityMatching
 from .ConvertOddsToProbability import ConvertOddsToProbability
 from .CountMissingDataByGroup import CountMissingDataByGroup
 from .CreateBinnedColumn import CreateBinnedColumn
 from .CreateDataOverview import CreateDataOverview
+from .CreateEntityMatchingBlocks import CreateEntityMatchingBlocks
 from .CreateRandomSampleGroups import CreateRandomSampleGroups
 from .CreateRareCategoryColumn import CreateRareCategoryColumn
 from .CreateStratifiedRandomSampleGroups import CreateStratifiedRandomSampleGroups
+from .EntityMatchingIndex import EntityMatchingIndex
 from .GeocodeUSAddresses import GeocodeUSAddresses
 from .ImputeMissingValuesUsingNearestNeighbors import ImputeMissingValuesUsingNearestNeighbors
+from .LoadEntityMatchingIndex import LoadEntityMatchingIndex
 from .VerifyGranularity import VerifyGranularity
\ No newline at end of file
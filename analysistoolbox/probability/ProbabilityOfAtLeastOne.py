@@ -1,5 +1,6 @@
 # Load packages
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 import seaborn as sns
 import textwrap
@@ -27,13 +28,19 @@ def ProbabilityOfAtLeastOne(probability_of_event,
                             subtitle_y_indent=1.05,
                             caption_y_indent=-0.3,
                             # Plot formatting arguments
-                            figure_size=(7, 6)):
+                            figure_size=(7, 6),
+                            # Scenario arguments
+                            dataframe=None,
+                            return_number_of_events_to_risk_tolerance=False):
     """
     Calculates the probability of at least one event occurring, given the probability of an event and the number of events.
+    The probability and number of events can be single numbers, or arrays or dataframe columns of many risk scenarios, which are
+    scored in one vectorized pass. The probability is calculated as -expm1(number_of_events * log1p(-probability_of_event)), which stays
+    accurate for very small probabilities, and the number of events needed to reach the risk tolerance is solved in closed form.
 
     Args:
-        probability_of_event (float): The probability of an event occurring.
-        number_of_events (int): The number of events.
+        probability_of_event (float, array-like, or str): The probability of an event occurring, or the name of the column of probabilities if dataframe is given.
+        number_of_events (int, array-like, or str): The number of events, or the name of the column of event counts if dataframe is given.
         format_as_percent (bool, optional): Whether to format the probability as a percentage. Defaults to False.
         show_plot (bool, optional): Whether to show the plot of the probability of at least one event. Defaults to True.
         line_color (str, optional): The color of the line in the plot. Defaults to "#3269a8".
@@ -51,24 +58,82 @@ def ProbabilityOfAtLeastOne(probability_of_event,
         subtitle_y_indent (float, optional): The y-coordinate indent for the subtitle in the plot. Defaults to 1.05.
         caption_y_indent (float, optional): The y-coordinate indent for the caption in the plot. Defaults to -0.3.
         figure_size (tuple, optional): The size of the plot figure. Defaults to (7, 6).
+        dataframe (pandas.DataFrame, optional): A dataframe of risk scenarios, with one row per scenario. If given, a copy of the dataframe is returned
+            with a 'Probability of at Least One Event' column, and a 'Number of Events to Risk Tolerance' column if risk_tolerance is given. Defaults to None.
+        return_number_of_events_to_risk_tolerance (bool, optional): Whether to also return the smallest number of events at which the probability of at least
+            one event reaches the risk tolerance (infinite if the probability of an event is 0). Requires risk_tolerance. Defaults to False.
 
     Returns:
-        float: The probability of at least one event occurring.
+        float, str, numpy.ndarray, pandas.Series, or pandas.DataFrame: The probability of at least one event occurring, in the shape of the inputs.
+            If return_number_of_events_to_risk_tolerance is True, a tuple of the probability and the number of events to the risk tolerance is returned.
+            The plot is only shown for a single probability and number of events.
     """
     
+    # Ensure that the number of events to the risk tolerance can be calculated, if requested
+    if return_number_of_events_to_risk_tolerance and risk_tolerance is None:
+        raise ValueError("risk_tolerance must be specified when return_number_of_events_to_risk_tolerance is True.")
+    
+    # Get the probabilities and event counts from the dataframe, if one is given
+    if dataframe is not None:
+        probability_of_event = dataframe[probability_of_event]
+        number_of_events = dataframe[number_of_events]
+    
+    # Keep the index of a pandas series, so that the results line up with the inputs
+    series_index = None
+    for values in [probability_of_event, number_of_events]:
+        if isinstance(values, pd.Series):
+            series_index = values.index
+    is_single_scenario = np.ndim(probability_of_event) == 0 and np.ndim(number_of_events) == 0
+    arr_probability_of_event = np.asarray(probability_of_event, dtype=float)
+    arr_number_of_events = np.asarray(number_of_events, dtype=float)
+    
+    # Ensure that the probabilities are between 0 and 1, and the event counts aren't negative
+    if np.any((arr_probability_of_event < 0) | (arr_probability_of_event > 1)):
+        raise ValueError("probability_of_event must be between 0 and 1.")
+    if np.any(arr_number_of_events < 0):
+        raise ValueError("number_of_events must be greater than or equal to 0.")
+    
     # Calculate the probability of at least one event
-    probability_of_at_least_one_event = 1 - ((1 - probability_of_event) ** number_of_events)
+    probability_of_at_least_one_event = _calculate_probability_of_at_least_one(arr_probability_of_event, arr_number_of_events)
+    
+    # Calculate the number of events needed to reach the risk tolerance, if one is given
+    if risk_tolerance is not None:
+        number_of_events_to_risk_tolerance = _calculate_number_of_events_to_risk_tolerance(arr_probability_of_event, risk_tolerance)
+    
+    # Return a copy of the dataframe with the results, if one is given
+    if dataframe is not None:
+        dataframe = dataframe.copy()
+        dataframe['Probability of at Least One Event'] = probability_of_at_least_one_event
+        if risk_tolerance is not None:
+            dataframe['Number of Events to Risk Tolerance'] = np.broadcast_to(number_of_events_to_risk_tolerance, len(dataframe.index))
+        return dataframe
+    
+    # Convert the results back to the shape of the inputs
+    if is_single_scenario:
+        probability_of_at_least_one_event = float(probability_of_at_least_one_event)
+        if risk_tolerance is not None:
+            number_of_events_to_risk_tolerance = float(number_of_events_to_risk_tolerance)
+    elif series_index is not None:
+        probability_of_at_least_one_event = pd.Series(probability_of_at_least_one_event, index=series_index, name='Probability of at Least One Event')
+        if risk_tolerance is not None:
+            number_of_events_to_risk_tolerance = pd.Series(np.broadcast_to(number_of_events_to_risk_tolerance, len(series_index)), index=series_index, name='Number of Events to Risk Tolerance')
     
     # If format_as_percent is True, format the probability as a percent
     if format_as_percent:
-        probability_of_at_least_one_event = "{:.2%}".format(probability_of_at_least_one_event)
+        if is_single_scenario:
+            probability_of_at_least_one_event = "{:.2%}".format(probability_of_at_least_one_event)
+        elif series_index is not None:
+            probability_of_at_least_one_event = probability_of_at_least_one_event.map("{:.2%}".format)
+        else:
+            probability_of_at_least_one_event = np.vectorize("{:.2%}".format, otypes=[object])(probability_of_at_least_one_event)
     
-    # If show_plot is True, plot the probability of at least one event
-    if show_plot:
+    # If show_plot is True, plot the probability of at least one event for a single scenario
+    if show_plot and is_single_scenario:
         # Create dataframe of probability of at least one event
+        arr_number_of_events_to_plot = np.arange(1, int(number_of_events) + 1)
         dataframe = pd.DataFrame({
-            "Number of Events": range(1, number_of_events + 1),
-            "Probability of at Least One Event": [1 - ((1 - probability_of_event) ** x) for x in range(1, number_of_events + 1)]
+            "Number of Events": arr_number_of_events_to_plot,
+            "Probability of at Least One Event": _calculate_probability_of_at_least_one(float(probability_of_event), arr_number_of_events_to_plot)
         })
         
         # Create figure and axes
@@ -84,12 +149,10 @@ def ProbabilityOfAtLeastOne(probability_of_event,
             ax=ax
         )
         
-        # If risk_tolerance is not None, plot the risk tolerance as a dot on the line plot
-        if risk_tolerance is not None:
-            # Calulate the number of events that meet the risk tolerance
-            number_of_events_meeting_risk_tolerance = 0
-            while 1 - ((1 - probability_of_event) ** number_of_events_meeting_risk_tolerance) < risk_tolerance:
-                number_of_events_meeting_risk_tolerance += 1
+        # If risk_tolerance is not None and can be reached, plot the risk tolerance as a dot on the line plot
+        if risk_tolerance is not None and np.isfinite(number_of_events_to_risk_tolerance):
+            # Get the number of events that meet the risk tolerance
+            number_of_events_meeting_risk_tolerance = int(number_of_events_to_risk_tolerance)
             
             # Plot the risk tolerance as a dot on the line plot
             sns.scatterplot(
@@ -233,6 +296,27 @@ def ProbabilityOfAtLeastOne(probability_of_event,
         # Show plot
         plt.show()
     
-    # Return the probability of at least one event
+    # Return the probability of at least one event, with the number of events to the risk tolerance if requested
+    if return_number_of_events_to_risk_tolerance:
+        return probability_of_at_least_one_event, number_of_events_to_risk_tolerance
     return probability_of_at_least_one_event
 
+
+def _calculate_probability_of_at_least_one(probability_of_event, number_of_events):
+    # Calculate 1 - (1 - p) ^ n as -expm1(n * log1p(-p)), which doesn't lose precision when p is tiny, and is 0 when there are no events
+    with np.errstate(divide='ignore', invalid='ignore'):
+        probability_of_at_least_one_event = -np.expm1(number_of_events * np.log1p(-probability_of_event))
+    return np.where(number_of_events == 0, 0.0, probability_of_at_least_one_event)
+
+
+def _calculate_number_of_events_to_risk_tolerance(probability_of_event, risk_tolerance):
+    # Solve 1 - (1 - p) ^ n >= risk tolerance for the smallest whole n, which is infinite when p is 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        number_of_events = np.ceil(np.log1p(-risk_tolerance) / np.log1p(-probability_of_event))
+    number_of_events = np.where(probability_of_event == 1, 1.0, number_of_events)
+    number_of_events = np.where(risk_tolerance <= 0, 0.0, number_of_events)
+    
+    # Step back one event where rounding in the logarithms overshot the smallest whole number
+    is_overshot = (number_of_events >= 1) & np.isfinite(number_of_events) & (_calculate_probability_of_at_least_one(probability_of_event, number_of_events - 1) >= risk_tolerance)
+    return np.where(is_overshot, number_of_events - 1, number_of_events)
+
@@ -0,0 +1,68 @@
+# Load packages
+import numpy as np
+import pandas as pd
+
+# Declare function
+def CalculateSimulationStandardError(simulated_values,
+                                     statistic='mean',
+                                     sampling_method='random',
+                                     number_of_replicates=10,
+                                     risk_tolerance=None,
+                                     lower_is_worse=True,
+                                     quantile=0.5):
+    """
+    Calculates the Monte Carlo standard error of a statistic of simulated values, i.e. how much the statistic would vary if the simulation were rerun with a different seed.
+    For pseudo-random samples, the mean and probability use the usual formulas for independent trials. For the variance-reduction designs
+    of GenerateUniformSamples, whose trials aren't independent, the statistic is calculated for each replicate and the standard error
+    comes from the spread of the replicate estimates. Quantiles always use the spread of the replicates (i.e. batches of trials).
+
+    Args:
+        simulated_values (numpy.ndarray, pandas.Series, or list): The simulated values, in the order they were drawn.
+        statistic (str, optional): Either 'mean', 'probability' (the probability of an outcome worse than risk_tolerance), or 'quantile'. Defaults to 'mean'.
+        sampling_method (str, optional): The sampling method the values were drawn with. See GenerateUniformSamples. Defaults to 'random'.
+        number_of_replicates (int, optional): The number of replicates the values were drawn in, or the number of batches used for quantiles. Defaults to 10.
+        risk_tolerance (float, optional): The risk tolerance, required when statistic is 'probability'. Defaults to None.
+        lower_is_worse (bool, optional): Whether values lower than the risk tolerance are worse. Defaults to True.
+        quantile (float, optional): The quantile to use when statistic is 'quantile'. Defaults to 0.5.
+
+    Returns:
+        float: The standard error of the statistic.
+    """
+    # Ensure that statistic is valid
+    if statistic not in ['mean', 'probability', 'quantile']:
+        raise ValueError("statistic must be one of the following: 'mean', 'probability', or 'quantile'.")
+
+    # Ensure that risk_tolerance is given when the probability is requested
+    if statistic == 'probability' and risk_tolerance is None:
+        raise ValueError("risk_tolerance must be specified when statistic is 'probability'.")
+
+    # Convert the simulated values to a flat numpy array
+    if isinstance(simulated_values, (pd.Series, pd.DataFrame)):
+        simulated_values = simulated_values.to_numpy()
+    simulated_values = np.asarray(simulated_values, dtype=float).ravel()
+
+    # Ensure that there are enough values and replicates to estimate a spread
+    number_of_replicates = min(number_of_replicates, len(simulated_values))
+    if number_of_replicates < 2:
+        raise ValueError("At least 2 simulated values and 2 replicates are needed to calculate a standard error.")
+
+    # Flag the outcomes worse than the risk tolerance
+    if statistic == 'probability':
+        if lower_is_worse:
+            simulated_values = (simulated_values < risk_tolerance).astype(float)
+        else:
+            simulated_values = (simulated_values > risk_tolerance).astype(float)
+
+    # Use the formula for independent trials, if possible
+    if sampling_method == 'random' and statistic != 'quantile':
+        return float(np.std(simulated_values, ddof=1) / np.sqrt(len(simulated_values)))
+
+    # Calculate the statistic for each replicate, in the same layout that GenerateUniformSamples uses
+    replicate_edges = np.linspace(0, len(simulated_values), number_of_replicates + 1).round().astype(int)
+    if statistic == 'quantile':
+        replicate_estimates = np.array([np.quantile(simulated_values[start:end], quantile) for start, end in zip(replicate_edges[:-1], replicate_edges[1:])])
+    else:
+        replicate_estimates = np.add.reduceat(simulated_values, replicate_edges[:-1]) / np.diff(replicate_edges)
+
+    # Return the standard error of the average of the replicate estimates
+    return float(np.std(replicate_estimates, ddof=1) / np.sqrt(number_of_replicates))
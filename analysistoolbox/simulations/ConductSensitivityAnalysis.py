@@ -0,0 +1,340 @@
+# Load packages
+from inspect import signature
+from itertools import product
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import textwrap
+from .CreateRandomNumberGenerator import CreateRandomNumberGenerator
+from .GenerateUniformSamples import GenerateUniformSamples
+from .SimulateCorrelatedOutcomes import _DISTRIBUTION_PARAMETERS, _calculate_inverse_cdf
+from .SimulateCountOfSuccesses import SimulateCountOfSuccesses
+from .SimulateCountOutcome import SimulateCountOutcome
+from .SimulateCountUntilFirstSuccess import SimulateCountUntilFirstSuccess
+from .SimulateInParallel import RunSimulationTask
+from .SimulateNormallyDistributedOutcome import SimulateNormallyDistributedOutcome
+from .SimulateTDistributedOutcome import SimulateTDistributedOutcome
+from .SimulateTimeBetweenEvents import SimulateTimeBetweenEvents
+from .SimulateTimeUntilNEvents import SimulateTimeUntilNEvents
+
+# Set the distribution simulated by each Simulate* function, so that their parameter sweeps can be vectorized
+_SIMULATION_DISTRIBUTIONS = {
+    SimulateNormallyDistributedOutcome: 'normal',
+    SimulateTDistributedOutcome: 't',
+    SimulateCountOutcome: 'poisson',
+    SimulateCountOfSuccesses: 'binomial',
+    SimulateCountUntilFirstSuccess: 'geometric',
+    SimulateTimeBetweenEvents: 'exponential',
+    SimulateTimeUntilNEvents: 'gamma'
+}
+
+# Declare function
+def ConductSensitivityAnalysis(simulation_function,
+                               parameter_ranges,
+                               base_parameters=None,
+                               analysis_type='one_at_a_time',
+                               # Simulation parameters
+                               number_of_trials=10000,
+                               sampling_method='random',
+                               random_seed=412,
+                               list_of_quantiles=None,
+                               risk_tolerance=None,
+                               lower_is_worse=True,
+                               tornado_statistic='Mean',
+                               # Plotting parameters
+                               plot_tornado_chart=True,
+                               low_value_color="#8eb3de",
+                               high_value_color="#b0170c",
+                               fill_transparency=0.8,
+                               figure_size=(8, 6),
+                               # Text formatting arguments
+                               title_for_plot="Sensitivity Analysis",
+                               subtitle_for_plot="Showing how the outcome changes as each parameter moves from its low to its high value",
+                               caption_for_plot=None,
+                               data_source_for_plot=None,
+                               title_y_indent=1.1,
+                               subtitle_y_indent=1.05,
+                               caption_y_indent=-0.15,
+                               # Plot saving arguments
+                               filepath_to_save_plot=None):
+    """
+    Evaluates a simulation across a range of parameter values to show which parameters drive the outcome, and plots a tornado chart.
+    Every parameter setting uses common random numbers (the same random numbers for each setting), so differences between settings come from
+    the parameters rather than sampling noise. The Simulate* functions are evaluated in one vectorized sweep: a single set of uniform numbers is
+    passed through the inverse CDF of the distribution with every parameter setting at once, as a settings x trials array. Any other function that
+    takes number_of_trials and random_seed arguments and returns an array of simulated values (e.g. a user-defined model) is called once per
+    setting with the same random seed.
+
+    Args:
+        simulation_function (function): The simulation function to evaluate, e.g. SimulateTimeUntilNEvents.
+        parameter_ranges (dict): The values to try for each parameter, keyed by the argument name of the simulation function, e.g. {'number_of_events': [2, 5]}.
+            For a one-at-a-time analysis, the lowest and highest values are the ends of each bar of the tornado chart.
+        base_parameters (dict, optional): The base value of each parameter, and any other arguments to pass to the simulation function.
+            Parameters in parameter_ranges without a base value use the middle of their sorted values (the lower middle for an even number of values). Defaults to None.
+        analysis_type (str, optional): Either 'one_at_a_time' (each parameter is varied on its own, with the others at their base values) or 'grid'
+            (every combination of the parameter values is evaluated, and the tornado chart shows each parameter's average effect). Defaults to 'one_at_a_time'.
+        number_of_trials (int, optional): The number of trials to simulate for each setting. Defaults to 10000.
+        sampling_method (str, optional): The sampling method used to draw the common random numbers. See GenerateUniformSamples. Defaults to 'random'.
+        random_seed (int or numpy.random.Generator, optional): The random seed to use for replicability. Defaults to 412.
+        list_of_quantiles (list, optional): The quantiles of the outcome to summarize for each setting. If None, the 5th, 50th, and 95th percentiles are used. Defaults to None.
+        risk_tolerance (float, optional): If specified, the probability of an outcome worse than the risk tolerance is summarized for each setting. Defaults to None.
+        lower_is_worse (bool, optional): Whether values lower than the risk tolerance are worse. Defaults to True.
+        tornado_statistic (str, optional): The column of the results to show in the tornado chart, e.g. 'Mean', 'P95', or 'Probability Beyond Tolerance'. Defaults to 'Mean'.
+        plot_tornado_chart (bool, optional): Whether to plot the tornado chart. Defaults to True.
+        low_value_color (str, optional): The color of the bars for the low value of each parameter. Defaults to "#8eb3de".
+        high_value_color (str, optional): The color of the bars for the high value of each parameter. Defaults to "#b0170c".
+        fill_transparency (float, optional): The transparency of the bars. Defaults to 0.8.
+        figure_size (tuple, optional): The size of the plot figure. Defaults to (8, 6).
+        title_for_plot (str, optional): The title of the plot. Defaults to "Sensitivity Analysis".
+        subtitle_for_plot (str, optional): The subtitle of the plot. Defaults to "Showing how the outcome changes as each parameter moves from its low to its high value".
+        caption_for_plot (str, optional): The caption of the plot. Defaults to None.
+        data_source_for_plot (str, optional): The data source of the plot. Defaults to None.
+        title_y_indent (float, optional): The y-indent of the plot title. Defaults to 1.1.
+        subtitle_y_indent (float, optional): The y-indent of the plot subtitle. Defaults to 1.05.
+        caption_y_indent (float, optional): The y-indent of the plot caption. Defaults to -0.15.
+        filepath_to_save_plot (str, optional): The filepath to save the plot. Must end with '.png' or '.jpg'. Defaults to None.
+
+    Returns:
+        pandas.DataFrame: One row per parameter setting, with the parameter values and the mean, standard deviation, quantiles, and (if requested)
+            probability beyond the risk tolerance of the outcome. The tornado chart's data is stored in the dataframe's attrs['tornado_table'].
+    """
+
+    # Ensure that analysis_type is valid
+    if analysis_type not in ['one_at_a_time', 'grid']:
+        raise ValueError("analysis_type must be either 'one_at_a_time' or 'grid'.")
+
+    # Ensure that each parameter has at least one value to try
+    if len(parameter_ranges) == 0 or any(len(list_of_values) == 0 for list_of_values in parameter_ranges.values()):
+        raise ValueError("parameter_ranges must have at least one value for each parameter.")
+
+    # Set the default quantiles
+    if list_of_quantiles is None:
+        list_of_quantiles = [0.05, 0.5, 0.95]
+
+    # Set the base value of each parameter, using the middle of its sorted values if none is given, so that the base is always one of the values to try
+    base_parameters = dict(base_parameters or {})
+    for parameter_name, list_of_values in parameter_ranges.items():
+        if parameter_name not in base_parameters:
+            base_parameters[parameter_name] = sorted(list_of_values)[(len(list_of_values) - 1) // 2]
+
+    # Create the parameter settings to evaluate
+    list_of_parameter_names = list(parameter_ranges)
+    list_of_settings = []
+    if analysis_type == 'one_at_a_time':
+        list_of_settings.append(dict({'Varied Parameter': 'Base'}, **{parameter_name: base_parameters[parameter_name] for parameter_name in list_of_parameter_names}))
+        for parameter_name, list_of_values in parameter_ranges.items():
+            for parameter_value in list_of_values:
+                setting = {other_parameter: base_parameters[other_parameter] for other_parameter in list_of_parameter_names}
+                setting[parameter_name] = parameter_value
+                list_of_settings.append(dict({'Varied Parameter': parameter_name}, **setting))
+    else:
+        for combination in product(*parameter_ranges.values()):
+            list_of_settings.append(dict(zip(list_of_parameter_names, combination)))
+    df_results = pd.DataFrame(list_of_settings)
+
+    # Get the arguments of the simulation function that aren't varied
+    fixed_arguments = {key: value for key, value in base_parameters.items() if key not in list_of_parameter_names}
+
+    # Fill in the distribution's parameters from the Simulate* function's defaults, to see if the sweep can be vectorized
+    distribution = _SIMULATION_DISTRIBUTIONS.get(simulation_function)
+    if distribution is not None:
+        function_parameters = signature(simulation_function).parameters
+        marginal = {'distribution': distribution}
+        for parameter_name in _DISTRIBUTION_PARAMETERS[distribution]:
+            if parameter_name in list_of_parameter_names:
+                marginal[parameter_name] = df_results[parameter_name].to_numpy(dtype=float)[:, np.newaxis]
+            elif parameter_name in fixed_arguments:
+                marginal[parameter_name] = fixed_arguments[parameter_name]
+            elif function_parameters[parameter_name].default not in [None, function_parameters[parameter_name].empty]:
+                marginal[parameter_name] = function_parameters[parameter_name].default
+        unused_arguments = set(list_of_parameter_names).union(fixed_arguments) - set(_DISTRIBUTION_PARAMETERS[distribution])
+        is_vectorized = len(marginal) == len(_DISTRIBUTION_PARAMETERS[distribution]) + 1 and len(unused_arguments - {'simulated_variable_name'}) == 0
+    else:
+        is_vectorized = False
+
+    # Simulate every setting
+    if is_vectorized:
+        # Pass one set of uniform numbers through the inverse CDF of every setting at once
+        uniform_values = GenerateUniformSamples(number_of_trials, sampling_method=sampling_method, random_seed=random_seed)
+        arr_simulations = _calculate_inverse_cdf(marginal, uniform_values[np.newaxis, :])
+        arr_simulations = np.broadcast_to(arr_simulations, (len(df_results.index), number_of_trials))
+    else:
+        # Call the function once per setting, with the same random seed each time
+        seed_sequence = CreateRandomNumberGenerator(random_seed, return_seed_sequences=True)
+        if 'sampling_method' in signature(simulation_function).parameters:
+            fixed_arguments['sampling_method'] = sampling_method
+        arr_simulations = np.stack([
+            RunSimulationTask(
+                simulation_function,
+                number_of_trials,
+                seed_sequence,
+                dict(fixed_arguments, **{parameter_name: setting[parameter_name] for parameter_name in list_of_parameter_names})
+            )['results']
+            for setting in list_of_settings
+        ])
+
+    # Ensure that every setting produced valid outcomes, e.g. no non-integer values of an integer parameter
+    is_missing = np.isnan(arr_simulations).any(axis=1)
+    if is_missing.any():
+        raise ValueError("The simulation returned missing values for these parameter settings: " + "; ".join(
+            ", ".join(parameter_name + "=" + str(setting[parameter_name]) for parameter_name in list_of_parameter_names)
+            for setting, is_setting_missing in zip(list_of_settings, is_missing) if is_setting_missing
+        ) + ". Check that each parameter value is valid for the simulation function.")
+
+    # Summarize the outcome of each setting
+    df_results['Mean'] = arr_simulations.mean(axis=1)
+    df_results['Standard Deviation'] = arr_simulations.std(axis=1, ddof=1)
+    for quantile, quantile_values in zip(list_of_quantiles, np.quantile(arr_simulations, list_of_quantiles, axis=1)):
+        df_results['P' + format(quantile * 100, 'g')] = quantile_values
+    if risk_tolerance is not None:
+        if lower_is_worse:
+            df_results['Probability Beyond Tolerance'] = (arr_simulations < risk_tolerance).mean(axis=1)
+        else:
+            df_results['Probability Beyond Tolerance'] = (arr_simulations > risk_tolerance).mean(axis=1)
+
+    # Ensure that tornado_statistic is one of the summaries
+    if tornado_statistic not in df_results.columns[len(list_of_settings[0]):]:
+        raise ValueError("tornado_statistic must be one of the following: " + ", ".join(df_results.columns[len(list_of_settings[0]):]) + ".")
+
+    # Get the statistic at the lowest and highest value of each parameter, averaging over the other parameters in a grid
+    if analysis_type == 'one_at_a_time':
+        base_statistic = df_results[tornado_statistic].iloc[0]
+    else:
+        base_statistic = df_results[tornado_statistic].mean()
+    list_of_tornado_rows = []
+    for parameter_name, list_of_values in parameter_ranges.items():
+        df_parameter = df_results[df_results['Varied Parameter'] == parameter_name] if analysis_type == 'one_at_a_time' else df_results
+        list_of_tornado_rows.append({
+            'Parameter': parameter_name,
+            'Low Value': min(list_of_values),
+            'High Value': max(list_of_values),
+            'Statistic at Low Value': df_parameter.loc[df_parameter[parameter_name] == min(list_of_values), tornado_statistic].mean(),
+            'Statistic at High Value': df_parameter.loc[df_parameter[parameter_name] == max(list_of_values), tornado_statistic].mean()
+        })
+    df_tornado = pd.DataFrame(list_of_tornado_rows)
+    df_tornado['Swing'] = (df_tornado['Statistic at High Value'] - df_tornado['Statistic at Low Value']).abs()
+    df_tornado = df_tornado.sort_values('Swing', ascending=False).reset_index(drop=True)
+    df_results.attrs['tornado_table'] = df_tornado
+
+    # Plot the tornado chart, if requested
+    if plot_tornado_chart:
+        # Create figure and axes
+        fig, ax = plt.subplots(figsize=figure_size)
+
+        # Draw a bar from the base statistic to the statistic at each parameter's low and high value, with the largest swing at the top
+        y_positions = np.arange(len(df_tornado.index))[::-1]
+        ax.barh(
+            y_positions,
+            df_tornado['Statistic at Low Value'] - base_statistic,
+            left=base_statistic,
+            color=low_value_color,
+            alpha=fill_transparency,
+            label='Low value'
+        )
+        ax.barh(
+            y_positions,
+            df_tornado['Statistic at High Value'] - base_statistic,
+            left=base_statistic,
+            color=high_value_color,
+            alpha=fill_transparency,
+            label='High value'
+        )
+
+        # Show the base statistic as a vertical line
+        ax.axvline(
+            x=base_statistic,
+            color="#262626",
+            linestyle="--",
+            linewidth=1.5,
+            alpha=0.5
+        )
+
+        # Label each bar with its parameter and its low and high values
+        ax.set_yticks(y_positions)
+        ax.set_yticklabels([
+            parameter_name + '\n(' + '{:g}'.format(low_value) + ' to ' + '{:g}'.format(high_value) + ')'
+            for parameter_name, low_value, high_value in zip(df_tornado['Parameter'], df_tornado['Low Value'], df_tornado['High Value'])
+        ])
+        ax.tick_params(
+            axis='both',
+            which='major',
+            labelsize=9,
+            labelcolor="#666666",
+            pad=2,
+            left=False
+        )
+
+        # Remove top, left, and right spines. Set bottom spine to dark gray.
+        ax.spines['top'].set_visible(False)
+        ax.spines['left'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+        ax.spines['bottom'].set_color("#262626")
+
+        # Label the x-axis with the statistic, and add a legend
+        ax.set_xlabel(tornado_statistic, fontsize=9, color="#666666")
+        ax.legend(frameon=False, fontsize=9, loc='lower right')
+
+        # Set the title with size 14, and color #262626 at the top of the plot
+        ax.text(
+            x=0,
+            y=title_y_indent,
+            s=title_for_plot,
+            fontsize=14,
+            color="#262626",
+            transform=ax.transAxes
+        )
+
+        # Set the subtitle with size 11, and color #666666
+        ax.text(
+            x=0,
+            y=subtitle_y_indent,
+            s=subtitle_for_plot,
+            fontsize=11,
+            color="#666666",
+            transform=ax.transAxes
+        )
+
+        # Add a word-wrapped caption if one is provided
+        if caption_for_plot != None or data_source_for_plot != None:
+            # Create starting point for caption
+            wrapped_caption = ""
+
+            # Add the caption to the plot, if one is provided
+            if caption_for_plot != None:
+                # Word wrap the caption without splitting words
+                wrapped_caption = textwrap.fill(caption_for_plot, 110, break_long_words=False)
+
+            # Add the data source to the caption, if one is provided
+            if data_source_for_plot != None:
+                wrapped_caption = wrapped_caption + "\n\nSource: " + data_source_for_plot
+
+            # Add the caption to the plot
+            ax.text(
+                x=0,
+                y=caption_y_indent,
+                s=wrapped_caption,
+                fontsize=8,
+                color="#666666",
+                transform=ax.transAxes
+            )
+
+        # If filepath_to_save_plot is provided, save the plot
+        if filepath_to_save_plot != None:
+            # Ensure that the filepath ends with '.png' or '.jpg'
+            if not filepath_to_save_plot.endswith('.png') and not filepath_to_save_plot.endswith('.jpg'):
+                raise ValueError("The filepath to save the plot must end with '.png' or '.jpg'.")
+
+            # Save plot
+            plt.savefig(
+                filepath_to_save_plot,
+                bbox_inches="tight"
+            )
+
+        # Show plot
+        plt.show()
+
+        # Clear plot
+        plt.clf()
+
+    # Return the results of each setting
+    return df_results
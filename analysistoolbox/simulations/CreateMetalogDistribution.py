@@ -1,9 +1,10 @@
 # Load packages
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import seaborn as sns
-import textwrap
+from .MetalogCache import MetalogCache
+from .MetalogDistribution import MetalogDistribution
+from .PlotSimulationHistogram import PlotSimulationHistogram
+from .SIPLibrary import SIPLibrary
 
 # Declare function
 def CreateMetalogDistribution(dataframe,
@@ -18,6 +19,9 @@ def CreateMetalogDistribution(dataframe,
                               number_of_samples=10000,
                               show_summary=True,
                               return_format='dataframe',
+                              return_metalog_distribution=False,
+                              use_cache=True,
+                              metalog_cache=None,
                               # Histogram formatting arguments
                               plot_metalog_distribution=True,
                               fill_color="#999999",
@@ -33,7 +37,8 @@ def CreateMetalogDistribution(dataframe,
                               show_y_axis=False,
                               title_y_indent=1.1,
                               subtitle_y_indent=1.05,
-                              caption_y_indent=-0.15):
+                              caption_y_indent=-0.15,
+                              filepath_to_save_plot=None):
     """
     Creates a metalog distribution from a given variable in a pandas dataframe.
 
@@ -50,7 +55,11 @@ def CreateMetalogDistribution(dataframe,
         number_of_samples (int, optional): The number of samples to randomly select from the metalog distribution.
             Defaults to 10000.
         show_summary (bool, optional): Whether to show the summary of the metalog distribution. Defaults to True.
-        return_format (str, optional): The format of the output. Either 'dataframe' or 'array'. Defaults to 'dataframe'.
+        return_format (str, optional): The format of the output. Either 'dataframe', 'array', or 'sip' (a SIPLibrary with the metalog's
+            bounds and coefficients recorded in its metadata, which can be saved to disk or exported to SIPmath 3.0 JSON). Defaults to 'dataframe'.
+        return_metalog_distribution (bool, optional): Whether to also return the fitted MetalogDistribution, which can be resampled without refitting. Defaults to False.
+        use_cache (bool, optional): Whether to reuse a cached fit of the same values, bounds, term limits, and learning rate. Defaults to True.
+        metalog_cache (MetalogCache, optional): The cache to use. If None, the shared cache returned by MetalogCache.default() is used. Defaults to None.
         plot_metalog_distribution (bool, optional): Whether to plot the metalog distribution. Defaults to True.
         fill_color (str, optional): The color of the histogram fill. Defaults to "#999999".
         fill_transparency (float, optional): The transparency of the histogram fill. Defaults to 0.6.
@@ -65,16 +74,14 @@ def CreateMetalogDistribution(dataframe,
         title_y_indent (float, optional): The y-indent of the title on the plot. Defaults to 1.1.
         subtitle_y_indent (float, optional): The y-indent of the subtitle on the plot. Defaults to 1.05.
         caption_y_indent (float, optional): The y-indent of the caption on the plot. Defaults to -0.15.
+        filepath_to_save_plot (str, optional): The filepath to save the plot to. Must end with '.png' or '.jpg'. Defaults to None.
 
     Returns:
-        pandas.DataFrame or numpy.ndarray: The metalog distribution in the specified format.
+        pandas.DataFrame, numpy.ndarray, or SIPLibrary: The metalog distribution in the specified format.
     """
-    # Lazy load uncommon packages
-    import pymetalog as pm
-    
-    # Ensure that return_format is either 'dataframe' or 'array'
-    if return_format not in ['dataframe', 'array']:
-        raise ValueError("return_format must be either 'dataframe' or 'array'.")
+    # Ensure that return_format is either 'dataframe', 'array', or 'sip'
+    if return_format not in ['dataframe', 'array', 'sip']:
+        raise ValueError("return_format must be either 'dataframe', 'array', or 'sip'.")
     
     # Select necessary columns from the dataframe
     dataframe = dataframe[[variable]]
@@ -85,59 +92,37 @@ def CreateMetalogDistribution(dataframe,
     dataframe = dataframe[dataframe[variable] != np.inf]
     
     # Extract values from the dataframe
-    arr_variable = dataframe[variable]
-    arr_variable = list(arr_variable)
+    arr_variable = dataframe[variable].to_numpy(dtype=float)
     
-    # Create a metalog distribution
-    if lower_bound is None and upper_bound is None:
-        metalog_dist = pm.metalog(
-            x=arr_variable,
-            step_len=learning_rate,
-            term_lower_bound=term_minimum,
-            term_limit=term_maximum
-        )
-    elif lower_bound is not None and upper_bound is None:
-        metalog_dist = pm.metalog(
-            x=arr_variable,
-            boundedness='sl',
-            bounds=[lower_bound],
-            step_len=learning_rate,
-            term_lower_bound=term_minimum,
-            term_limit=term_maximum
-        )
-    elif lower_bound is None and upper_bound is not None:
-        metalog_dist = pm.metalog(
-            x=arr_variable,
-            boundedness='su',
-            bounds=[upper_bound],
-            step_len=learning_rate,
-            term_lower_bound=term_minimum,
-            term_limit=term_maximum
-        )
+    # Create a metalog distribution, reusing a cached fit of the same inputs if one exists
+    if use_cache:
+        if metalog_cache is None:
+            metalog_cache = MetalogCache.default()
+        fit_metalog_distribution = metalog_cache.get_or_fit
     else:
-        metalog_dist = pm.metalog(
-            x=arr_variable,
-            boundedness='b',
-            bounds=[lower_bound, upper_bound],
-            step_len=learning_rate,
-            term_lower_bound=term_minimum,
-            term_limit=term_maximum
-        )
+        fit_metalog_distribution = MetalogDistribution.fit
+    metalog_dist = fit_metalog_distribution(
+        arr_variable,
+        lower_bound=lower_bound,
+        upper_bound=upper_bound,
+        term_minimum=term_minimum,
+        term_maximum=term_maximum,
+        learning_rate=learning_rate
+    )
         
     # Show summary of the metalog distribution, if requested
     if show_summary:
-        pm.summary(m = metalog_dist)
+        print(metalog_dist.summary().to_string(index=False))
         
     # Get the maximum number of terms used in the metalog distribution that is valid
     if term_for_random_sample is None:
-        term_for_random_sample = metalog_dist.term_limit
+        term_for_random_sample = metalog_dist.default_terms
         
     # Randomly select values from the metalog distribution
-    arr_metalog = pm.rmetalog(
-        metalog_dist, 
-        n=number_of_samples, 
-        term=term_for_random_sample, 
-        generator="hdr"
+    arr_metalog = metalog_dist.sample(
+        number_of_samples,
+        number_of_terms=term_for_random_sample,
+        generator='hdr'
     )
     
     # Convert the metalog distribution to a dataframe
@@ -145,152 +130,41 @@ def CreateMetalogDistribution(dataframe,
     
     # Plot the metalog distribution, if requested
     if plot_metalog_distribution:
-        # Create figure and axes
-        fig, ax = plt.subplots(figsize=figure_size)
-        
-        # Create histogram using seaborn
-        sns.histplot(
-            data=metalog_df,
-            x=variable,
-            color=fill_color,
-            alpha=fill_transparency,
-        )
-        
-        # Remove top, left, and right spines. Set bottom spine to dark gray.
-        ax.spines['top'].set_visible(False)
-        ax.spines['left'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        ax.spines['bottom'].set_color("#262626")
-        
-        # Remove the y-axis, and adjust the indent of the plot titles
-        if show_y_axis == False:
-            ax.axes.get_yaxis().set_visible(False)
-            x_indent = 0.015
-        else:
-            x_indent = -0.005
-        
-        # Remove the y-axis label
-        ax.set_ylabel(None)
-        
-        # Remove the x-axis label
-        ax.set_xlabel(None)
-        
-        # Show the mean if requested
-        if show_mean:
-            # Calculate the mean
-            mean = metalog_df[variable].mean()
-            # Show the mean as a vertical line with a label
-            ax.axvline(
-                x=mean,
-                ymax=0.97-.02,
-                color="#262626",
-                linestyle="--",
-                linewidth=1.5,
-                alpha=0.5
-            )
-            ax.text(
-                x=mean, 
-                y=plt.ylim()[1] * 0.97, 
-                s='Mean: {:.2f}'.format(mean),
-                horizontalalignment='center',
-                fontname="Arial",
-                fontsize=9,
-                color="#262626",
-                alpha=0.75
-            )
-        
-        # Show the median if requested
-        if show_median:
-            # Calculate the median
-            median = metalog_df[variable].median()
-            # Show the median as a vertical line with a label
-            ax.axvline(
-                x=median,
-                ymax=0.90-.02,
-                color="#262626",
-                linestyle=":",
-                linewidth=1.5,
-                alpha=0.5
-            )
-            ax.text(
-                x=median,
-                y=plt.ylim()[1] * .90,
-                s='Median: {:.2f}'.format(median),
-                horizontalalignment='center',
-                fontname="Arial",
-                fontsize=9,
-                color="#262626",
-                alpha=0.75
-            )
-        
-        # Set the title with Arial font, size 14, and color #262626 at the top of the plot
-        ax.text(
-            x=x_indent,
-            y=title_y_indent,
-            s=title_for_plot,
-            fontname="Arial",
-            fontsize=14,
-            color="#262626",
-            transform=ax.transAxes
-        )
-        
-        # Set the subtitle with Arial font, size 11, and color #666666
-        ax.text(
-            x=x_indent,
-            y=subtitle_y_indent,
-            s=subtitle_for_plot,
-            fontname="Arial",
-            fontsize=11,
-            color="#666666",
-            transform=ax.transAxes
+        # Plot the pre-binned histogram of the simulated values
+        PlotSimulationHistogram(
+            arr_metalog,
+            fill_color=fill_color,
+            fill_transparency=fill_transparency,
+            figure_size=figure_size,
+            show_mean=show_mean,
+            show_median=show_median,
+            title_for_plot=title_for_plot,
+            subtitle_for_plot=subtitle_for_plot,
+            caption_for_plot=caption_for_plot,
+            data_source_for_plot=data_source_for_plot,
+            show_y_axis=show_y_axis,
+            title_y_indent=title_y_indent,
+            subtitle_y_indent=subtitle_y_indent,
+            caption_y_indent=caption_y_indent,
+            filepath_to_save_plot=filepath_to_save_plot
         )
         
-        # Set x-axis tick label font to Arial, size 9, and color #666666
-        ax.tick_params(
-            axis='x',
-            which='major',
-            labelsize=9,
-            labelcolor="#666666",
-            pad=2,
-            bottom=True,
-            labelbottom=True
-        )
-        plt.xticks(fontname='Arial')
-        
-        # Add a word-wrapped caption if one is provided
-        if caption_for_plot is not None or data_source_for_plot is not None:
-            # Create starting point for caption
-            wrapped_caption = ""
-            
-            # Add the caption to the plot, if one is provided
-            if caption_for_plot is not None:
-                # Word wrap the caption without splitting words
-                wrapped_caption = textwrap.fill(caption_for_plot, 110, break_long_words=False)
-                
-            # Add the data source to the caption, if one is provided
-            if data_source_for_plot is not None:
-                wrapped_caption = wrapped_caption + "\n\nSource: " + data_source_for_plot
-            
-            # Add the caption to the plot
-            ax.text(
-                x=x_indent,
-                y=caption_y_indent,
-                s=wrapped_caption,
-                fontname="Arial",
-                fontsize=8,
-                color="#666666",
-                transform=ax.transAxes
-            )
-            
-        # Show plot
-        plt.show()
-        
-        # Clear plot
-        plt.clf()
-        
-    # Return the metalog distribution
+    # Get the metalog distribution in the requested format
     if return_format == 'dataframe':
-        return metalog_df
+        simulation_results = metalog_df
+    elif return_format == 'sip':
+        simulation_results = SIPLibrary(
+            arr_metalog,
+            [variable],
+            metadata={variable: dict(
+                metalog_dist.to_metadata(term_for_random_sample),
+                number_of_observations=len(arr_variable)
+            )}
+        )
     else:
-        return arr_metalog
+        simulation_results = arr_metalog
 
+    # Return the simulation results, with the fitted distribution if requested
+    if return_metalog_distribution:
+        return simulation_results, metalog_dist
+    return simulation_results
@@ -0,0 +1,55 @@
+# Load packages
+import numpy as np
+
+# Declare function
+def CreateRandomNumberGenerator(random_seed=412,
+                                number_of_streams=None,
+                                return_seed_sequences=False):
+    """
+    Creates a numpy random number generator (or a set of independent generators) for use in simulations.
+    Generators are built from a numpy SeedSequence, so the same random_seed always produces the same stream of
+    random numbers. When number_of_streams is specified, the SeedSequence is spawned into that many child
+    sequences, each of which produces a statistically independent stream. This allows a large simulation to be
+    split into chunks or across workers while remaining reproducible.
+
+    Args:
+        random_seed (int, numpy.random.SeedSequence, or numpy.random.Generator, optional): The random seed to use for replicability.
+            If None, fresh entropy is drawn from the operating system. If a Generator is passed and number_of_streams is None, it is returned as-is. Defaults to 412.
+        number_of_streams (int, optional): The number of independent streams to create. If None, a single generator is returned. Defaults to None.
+        return_seed_sequences (bool, optional): Whether to return the SeedSequence objects instead of Generators.
+            SeedSequences are lightweight and can be sent to other processes. Defaults to False.
+
+    Returns:
+        numpy.random.Generator, numpy.random.SeedSequence, or list: A single generator (or SeedSequence), or a list of them if number_of_streams is specified.
+    """
+
+    # Ensure that number_of_streams is a positive whole number, if specified
+    if number_of_streams is not None:
+        if not isinstance(number_of_streams, (int, np.integer)) or number_of_streams < 1:
+            raise ValueError("number_of_streams must be a positive whole number.")
+
+    # If a generator is passed, use it directly or spawn independent streams from its bit generator
+    if isinstance(random_seed, np.random.Generator):
+        if number_of_streams is None and not return_seed_sequences:
+            return random_seed
+        seed_sequence = random_seed.bit_generator.seed_seq
+    # If a SeedSequence is passed, use it as the root of the streams
+    elif isinstance(random_seed, np.random.SeedSequence):
+        seed_sequence = random_seed
+    # Otherwise, create a SeedSequence from the random seed (None draws fresh entropy)
+    else:
+        seed_sequence = np.random.SeedSequence(random_seed)
+
+    # Return a single stream if number_of_streams is not specified
+    if number_of_streams is None:
+        if return_seed_sequences:
+            return seed_sequence
+        return np.random.default_rng(seed_sequence)
+
+    # Spawn independent child sequences, one per stream
+    list_of_seed_sequences = seed_sequence.spawn(number_of_streams)
+    if return_seed_sequences:
+        return list_of_seed_sequences
+
+    # Return a generator for each child sequence
+    return [np.random.default_rng(child_sequence) for child_sequence in list_of_seed_sequences]
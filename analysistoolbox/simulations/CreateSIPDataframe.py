@@ -1,11 +1,13 @@
 # Load packages
 import pandas as pd
 import numpy as np
+from .SIPLibrary import SIPLibrary
 
 # Declare function
 def CreateSIPDataframe(name_of_items,
                        list_of_items,
-                       number_of_trials=10000):
+                       number_of_trials=10000,
+                       return_format='dataframe'):
     """
     Creates a pandas DataFrame of trials of simulations (i.e., stochastic information packet, or SIP) for each item specified in a list.
 
@@ -13,27 +15,32 @@ def CreateSIPDataframe(name_of_items,
         name_of_items (str): The name of the item being simulated.
         list_of_items (list): A list of items to simulate.
         number_of_trials (int, optional): The number of trials to simulate. Defaults to 10000.
+        return_format (str, optional): The format of the output. Either 'dataframe' (a long DataFrame with one row per trial and item) or 'sip'
+            (a SIPLibrary with one zero-filled variable per item, held in a single trials x items array, to be filled in place with simulated values). Defaults to 'dataframe'.
 
     Returns:
-        pandas.DataFrame: A DataFrame containing the simulation results.
+        pandas.DataFrame or SIPLibrary: The SIP of trials for each item in the specified format.
     """
-    
-    # Create dataframe of trials
-    df_sips = pd.DataFrame(columns=[
-        'Trial',
-        name_of_items
-    ])
-    
-    # Iterate through list of items
-    for item in list(set(list_of_items)):
-        # Create trial column with item name
-        df_temp = pd.DataFrame({
-            'Trial': np.linspace(1, number_of_trials, number_of_trials, dtype='int'),
-            name_of_items: item
-        })
-        # Append to SIP dataframe
-        df_sips = pd.concat([df_sips, df_temp])
-        
+
+    # Ensure that return_format is either 'dataframe' or 'sip'
+    if return_format not in ['dataframe', 'sip']:
+        raise ValueError("return_format must be either 'dataframe' or 'sip'.")
+
+    # Get the unique items, in the order they first appear
+    list_of_unique_items = list(pd.unique(pd.Series(list_of_items)))
+
+    # Create a SIP library with one column per item, if requested
+    if return_format == 'sip':
+        return SIPLibrary(
+            np.zeros((number_of_trials, len(list_of_unique_items)), order='F'),
+            [str(item) for item in list_of_unique_items]
+        )
+
+    # Create the long dataframe of trials in one pass, repeating the trial numbers for each item
+    df_sips = pd.DataFrame({
+        'Trial': np.tile(np.arange(1, number_of_trials + 1), len(list_of_unique_items)),
+        name_of_items: np.repeat(np.array(list_of_unique_items, dtype=object), number_of_trials)
+    })
+
     # Return SIP DataFrame
     return(df_sips)
-
@@ -2,9 +2,10 @@
 import os
 import pandas as pd
 from math import ceil
-from matplotlib import pyplot as plt
-import seaborn as sns
-import textwrap
+from .MetalogCache import MetalogCache
+from .MetalogDistribution import MetalogDistribution
+from .PlotSimulationHistogram import PlotSimulationHistogram
+from .SIPLibrary import SIPLibrary
 
 # Declare function
 def CreateSLURPDistribution(linear_regression_model, 
@@ -18,8 +19,13 @@ def CreateSLURPDistribution(linear_regression_model,
                             term_maximum=3,
                             term_minimum=2,
                             term_for_random_sample=None,
+                            random_seed=412,
+                            sampling_method='random',
                             show_summary=False,
                             return_format='dataframe',
+                            return_metalog_distribution=False,
+                            use_cache=True,
+                            metalog_cache=None,
                             # Plot parameters
                             show_distribution_plot=True,
                             figure_size=(8, 6),
@@ -35,10 +41,10 @@ def CreateSLURPDistribution(linear_regression_model,
                             data_source_for_plot=None,
                             title_y_indent=1.1,
                             subtitle_y_indent=1.05,
-                            caption_y_indent=-0.15):
+                            caption_y_indent=-0.15,
+                            filepath_to_save_plot=None):
     # Lazy load uncommon packages
     import statsmodels.api as sm
-    import pymetalog as pm
     
     # Ensure that the linear_regression_model is a statsmodels regression model
     if not isinstance(linear_regression_model, sm.regression.linear_model.RegressionResultsWrapper):
@@ -105,59 +111,37 @@ def CreateSLURPDistribution(linear_regression_model,
     ]
     # print("Percentiles: ", list_of_percentiles)
     
-    # Use the prediction interval to simulate the prediction distribution
-    if lower_bound is None and upper_bound is None:
-        metalog_dist = pm.metalog(
-            x=list_of_values,
-            probs=list_of_percentiles,
-            step_len=learning_rate,
-            term_lower_bound=term_minimum,
-            term_limit=term_maximum
-        )
-    elif lower_bound is not None and upper_bound is None:
-        metalog_dist = pm.metalog(
-            x=list_of_values,
-            probs=list_of_percentiles,
-            boundedness='sl',
-            bounds=[lower_bound],
-            step_len=learning_rate,
-            term_lower_bound=term_minimum,
-            term_limit=term_maximum
-        )
-    elif lower_bound is None and upper_bound is not None:
-        metalog_dist = pm.metalog(
-            x=list_of_values,
-            probs=list_of_percentiles,
-            boundedness='su',
-            bounds=[upper_bound],
-            step_len=learning_rate,
-            term_lower_bound=term_minimum,
-            term_limit=term_maximum
-        )
+    # Fit a metalog distribution to the prediction interval, reusing a cached fit of the same inputs if one exists
+    if use_cache:
+        if metalog_cache is None:
+            metalog_cache = MetalogCache.default()
+        fit_metalog_distribution = metalog_cache.get_or_fit
     else:
-        metalog_dist = pm.metalog(
-            x=list_of_values,
-            probs=list_of_percentiles,
-            boundedness='b',
-            bounds=[lower_bound, upper_bound],
-            step_len=learning_rate,
-            term_lower_bound=term_minimum,
-            term_limit=term_maximum
-        )
-        
+        fit_metalog_distribution = MetalogDistribution.fit
+    metalog_dist = fit_metalog_distribution(
+        list_of_values,
+        probabilities=list_of_percentiles,
+        lower_bound=lower_bound,
+        upper_bound=upper_bound,
+        term_minimum=term_minimum,
+        term_maximum=term_maximum,
+        learning_rate=learning_rate
+    )
+
     # Show summary of the metalog distribution
     if show_summary:
-        pm.summary(m = metalog_dist)
+        print(metalog_dist.summary().to_string(index=False))
         
     # Get the maximum number of terms used in the metalog distribution that is valid
     if term_for_random_sample is None:
-        term_for_random_sample = metalog_dist.term_limit
+        term_for_random_sample = metalog_dist.default_terms
 
     # Take a random sample from the metalog distribution
-    arr_metalog = pm.rmetalog(
-        m=metalog_dist, 
-        n=number_of_trials,
-        term=term_for_random_sample
+    arr_metalog = metalog_dist.sample(
+        number_of_trials,
+        number_of_terms=term_for_random_sample,
+        random_seed=random_seed,
+        sampling_method=sampling_method
     )
     
     # Convert the array to a dataframe
@@ -165,152 +149,44 @@ def CreateSLURPDistribution(linear_regression_model,
     
     # Plot the metalog distribution
     if show_distribution_plot:
-        # Create figure and axes
-        fig, ax = plt.subplots(figsize=figure_size)
-        
-        # Create histogram using seaborn
-        sns.histplot(
-            data=metalog_df,
-            x=outcome_variable,
-            color=fill_color,
-            alpha=fill_transparency,
-        )
-        
-        # Remove top, left, and right spines. Set bottom spine to dark gray.
-        ax.spines['top'].set_visible(False)
-        ax.spines['left'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        ax.spines['bottom'].set_color("#262626")
-        
-        # Remove the y-axis, and adjust the indent of the plot titles
-        if show_y_axis == False:
-            ax.axes.get_yaxis().set_visible(False)
-            x_indent = 0.015
-        else:
-            x_indent = -0.005
-        
-        # Remove the y-axis label
-        ax.set_ylabel(None)
-        
-        # Remove the x-axis label
-        ax.set_xlabel(None)
-        
-        # Show the mean if requested
-        if show_mean:
-            # Calculate the mean
-            mean = metalog_df[outcome_variable].mean()
-            # Show the mean as a vertical line with a label
-            ax.axvline(
-                x=mean,
-                ymax=0.97-.02,
-                color="#262626",
-                linestyle="--",
-                linewidth=1.5,
-                alpha=0.5
-            )
-            ax.text(
-                x=mean, 
-                y=plt.ylim()[1] * 0.97, 
-                s='Mean: {:.2f}'.format(mean),
-                horizontalalignment='center',
-                fontname="Arial",
-                fontsize=9,
-                color="#262626",
-                alpha=0.75
-            )
-        
-        # Show the median if requested
-        if show_median:
-            # Calculate the median
-            median = metalog_df[outcome_variable].median()
-            # Show the median as a vertical line with a label
-            ax.axvline(
-                x=median,
-                ymax=0.90-.02,
-                color="#262626",
-                linestyle=":",
-                linewidth=1.5,
-                alpha=0.5
-            )
-            ax.text(
-                x=median,
-                y=plt.ylim()[1] * .90,
-                s='Median: {:.2f}'.format(median),
-                horizontalalignment='center',
-                fontname="Arial",
-                fontsize=9,
-                color="#262626",
-                alpha=0.75
-            )
-        
-        # Set the title with Arial font, size 14, and color #262626 at the top of the plot
-        ax.text(
-            x=x_indent,
-            y=title_y_indent,
-            s=title_for_plot,
-            fontname="Arial",
-            fontsize=14,
-            color="#262626",
-            transform=ax.transAxes
-        )
-        
-        # Set the subtitle with Arial font, size 11, and color #666666
-        ax.text(
-            x=x_indent,
-            y=subtitle_y_indent,
-            s=subtitle_for_plot,
-            fontname="Arial",
-            fontsize=11,
-            color="#666666",
-            transform=ax.transAxes
-        )
-        
-        # Set x-axis tick label font to Arial, size 9, and color #666666
-        ax.tick_params(
-            axis='x',
-            which='major',
-            labelsize=9,
-            labelcolor="#666666",
-            pad=2,
-            bottom=True,
-            labelbottom=True
+        # Plot the pre-binned histogram of the simulated values
+        PlotSimulationHistogram(
+            arr_metalog,
+            fill_color=fill_color,
+            fill_transparency=fill_transparency,
+            figure_size=figure_size,
+            show_mean=show_mean,
+            show_median=show_median,
+            title_for_plot=title_for_plot,
+            subtitle_for_plot=subtitle_for_plot,
+            caption_for_plot=caption_for_plot,
+            data_source_for_plot=data_source_for_plot,
+            show_y_axis=show_y_axis,
+            title_y_indent=title_y_indent,
+            subtitle_y_indent=subtitle_y_indent,
+            caption_y_indent=caption_y_indent,
+            filepath_to_save_plot=filepath_to_save_plot
         )
-        plt.xticks(fontname='Arial')
-        
-        # Add a word-wrapped caption if one is provided
-        if caption_for_plot != None or data_source_for_plot != None:
-            # Create starting point for caption
-            wrapped_caption = ""
-            
-            # Add the caption to the plot, if one is provided
-            if caption_for_plot != None:
-                # Word wrap the caption without splitting words
-                wrapped_caption = textwrap.fill(caption_for_plot, 110, break_long_words=False)
-                
-            # Add the data source to the caption, if one is provided
-            if data_source_for_plot != None:
-                wrapped_caption = wrapped_caption + "\n\nSource: " + data_source_for_plot
-            
-            # Add the caption to the plot
-            ax.text(
-                x=x_indent,
-                y=caption_y_indent,
-                s=wrapped_caption,
-                fontname="Arial",
-                fontsize=8,
-                color="#666666",
-                transform=ax.transAxes
-            )
-                
-        # Show plot
-        plt.show()
-        
-        # Clear plot
-        plt.clf()
     
-    # Return the metalog distribution
+    # Get the metalog distribution in the requested format
     if return_format == 'dataframe':
-        return metalog_df
+        simulation_results = metalog_df
+    elif return_format == 'sip':
+        simulation_results = SIPLibrary(
+            arr_metalog,
+            [outcome_variable],
+            metadata={outcome_variable: dict(
+                metalog_dist.to_metadata(term_for_random_sample),
+                percentiles=list_of_percentiles,
+                quantiles=list_of_values,
+                random_seed=random_seed if isinstance(random_seed, int) else None,
+                sampling_method=sampling_method
+            )}
+        )
     else:
-        return arr_metalog
+        simulation_results = arr_metalog
 
+    # Return the simulation results, with the fitted distribution if requested
+    if return_metalog_distribution:
+        return simulation_results, metalog_dist
+    return simulation_results
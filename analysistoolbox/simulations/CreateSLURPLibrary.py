@@ -0,0 +1,170 @@
+# Load packages
+import numpy as np
+from .CreateRandomNumberGenerator import CreateRandomNumberGenerator
+from .GenerateHDRRandomNumbers import GenerateHDRRandomNumbers
+from .MetalogDistribution import _inverse_transform_values, _transform_values
+from .SIPLibrary import SIPLibrary
+
+# Declare function
+def CreateSLURPLibrary(linear_regression_model,
+                       dataframe_of_scenarios,
+                       # Simulation parameters
+                       number_of_trials=10000,
+                       prediction_interval=0.95,
+                       lower_bound=None,
+                       upper_bound=None,
+                       scenario_name_column=None,
+                       use_common_random_numbers=True,
+                       random_seed=412,
+                       generator='numpy',
+                       return_format='sip'):
+    """
+    Creates a stochastic library with unit relationships preserved (SLURP) for every row of a dataframe of predictor scenarios.
+    This is the batch version of CreateSLURPDistribution: the prediction intervals of all scenarios come from a single call to
+    the model's get_prediction(), each scenario's 3-term metalog is solved in closed form from the lower limit, prediction, and
+    upper limit of its interval, and the trials of every scenario are drawn together as one trials x scenarios array.
+
+    Args:
+        linear_regression_model (statsmodels.regression.linear_model.RegressionResultsWrapper): The fitted statsmodels linear regression model.
+        dataframe_of_scenarios (pandas.DataFrame): The predictor values of each scenario, with one row per scenario and one column per predictor.
+            A 'const' column is added if the model has one. Models fit with a formula are given the dataframe as is.
+        number_of_trials (int, optional): The number of trials to simulate for each scenario. Defaults to 10000.
+        prediction_interval (float, optional): The prediction interval used to fit each scenario's metalog. Defaults to 0.95.
+        lower_bound (float, optional): The lower bound of the outcome. Defaults to None.
+        upper_bound (float, optional): The upper bound of the outcome. Defaults to None.
+        scenario_name_column (str, optional): The column with the name of each scenario. If None, scenarios are named after the outcome and the dataframe's index. Defaults to None.
+        use_common_random_numbers (bool, optional): Whether every scenario uses the same random numbers, so that trial i of each scenario has the same percentile and
+            differences between scenarios aren't masked by sampling noise. Set to False to draw the scenarios independently. Defaults to True.
+        random_seed (int or numpy.random.Generator, optional): The random seed to use for replicability when generator is 'numpy'. Defaults to 412.
+        generator (str, optional): Either 'numpy' or 'hdr' (the Hubbard Decision Research generator, with one variable ID per scenario when the scenarios are independent). Defaults to 'numpy'.
+        return_format (str, optional): Either 'sip' (a SIPLibrary with one variable per scenario, and each scenario's coefficients and prediction interval in its metadata),
+            'dataframe' (a wide dataframe with one column per scenario), or 'array' (a trials x scenarios numpy array). Defaults to 'sip'.
+
+    Returns:
+        SIPLibrary, pandas.DataFrame, or numpy.ndarray: The simulated outcome of each scenario in the specified format.
+    """
+    # Lazy load uncommon packages
+    import statsmodels.api as sm
+
+    # Ensure that the linear_regression_model is a statsmodels regression model
+    if not isinstance(linear_regression_model, sm.regression.linear_model.RegressionResultsWrapper):
+        raise ValueError("linear_regression_model must be a statsmodels regression model.")
+
+    # Ensure that prediction_interval is between 0 and 1
+    if prediction_interval <= 0 or prediction_interval >= 1:
+        raise ValueError("prediction_interval must be between 0 and 1.")
+
+    # Ensure that generator and return_format are valid
+    if generator not in ['numpy', 'hdr']:
+        raise ValueError("generator must be either 'numpy' or 'hdr'.")
+    if return_format not in ['sip', 'dataframe', 'array']:
+        raise ValueError("return_format must be one of the following: 'sip', 'dataframe', or 'array'.")
+
+    # Get the outcome variable from the model
+    outcome_variable = linear_regression_model.model.endog_names
+    if isinstance(outcome_variable, list):
+        outcome_variable = outcome_variable[0]
+
+    # Get the name of each scenario
+    if scenario_name_column is None:
+        list_of_scenario_names = [outcome_variable + ' (' + str(index) + ')' for index in dataframe_of_scenarios.index]
+    else:
+        list_of_scenario_names = [str(scenario_name) for scenario_name in dataframe_of_scenarios[scenario_name_column]]
+
+    # Select the predictors in the order the model expects, adding a constant if the model has one
+    if getattr(linear_regression_model.model, 'formula', None) is not None:
+        dataframe_of_predictors = dataframe_of_scenarios
+    else:
+        list_of_predictors = linear_regression_model.model.exog_names
+        dataframe_of_predictors = dataframe_of_scenarios.copy()
+        if 'const' in list_of_predictors and 'const' not in dataframe_of_predictors.columns:
+            dataframe_of_predictors['const'] = 1.0
+        missing_predictors = [predictor for predictor in list_of_predictors if predictor not in dataframe_of_predictors.columns]
+        if missing_predictors:
+            raise ValueError("dataframe_of_scenarios is missing the following predictors: " + ", ".join(missing_predictors))
+        dataframe_of_predictors = dataframe_of_predictors[list_of_predictors]
+
+    # Get the prediction interval of every scenario at once
+    pred_interval = linear_regression_model.get_prediction(dataframe_of_predictors).summary_frame(alpha=1-prediction_interval)
+    arr_lower_values = pred_interval['obs_ci_lower'].to_numpy(dtype=float)
+    arr_middle_values = pred_interval['mean'].to_numpy(dtype=float)
+    arr_upper_values = pred_interval['obs_ci_upper'].to_numpy(dtype=float)
+
+    # Move any values outside the bounds just inside them, keeping the lower limit, prediction, and upper limit in order
+    if lower_bound is not None:
+        bound_margin = 1e-5 * max(abs(lower_bound), 1)
+        arr_lower_values = np.maximum(arr_lower_values, lower_bound + bound_margin)
+        arr_middle_values = np.maximum(arr_middle_values, lower_bound + 2 * bound_margin)
+        arr_upper_values = np.maximum(arr_upper_values, lower_bound + 3 * bound_margin)
+    if upper_bound is not None:
+        bound_margin = 1e-5 * max(abs(upper_bound), 1)
+        arr_upper_values = np.minimum(arr_upper_values, upper_bound - bound_margin)
+        arr_middle_values = np.minimum(arr_middle_values, upper_bound - 2 * bound_margin)
+        arr_lower_values = np.minimum(arr_lower_values, upper_bound - 3 * bound_margin)
+
+    # Transform the values to the unbounded scale
+    arr_lower_values = _transform_values(arr_lower_values, lower_bound, upper_bound)
+    arr_middle_values = _transform_values(arr_middle_values, lower_bound, upper_bound)
+    arr_upper_values = _transform_values(arr_upper_values, lower_bound, upper_bound)
+
+    # Solve each scenario's 3-term metalog in closed form. At probabilities alpha, 0.5, and 1 - alpha, the basis rows are
+    # [1, -L, d * L], [1, 0, 0], and [1, L, d * L], where L is the log-odds of 1 - alpha and d is 0.5 - alpha.
+    alpha = (1 - prediction_interval) / 2
+    log_odds = np.log((1 - alpha) / alpha)
+    distance_from_median = 0.5 - alpha
+    arr_a1 = arr_middle_values
+    arr_a2 = (arr_upper_values - arr_lower_values) / (2 * log_odds)
+    arr_a3 = (arr_upper_values + arr_lower_values - 2 * arr_middle_values) / (2 * distance_from_median * log_odds)
+
+    # A 3-term metalog is only valid when a2 is positive and |a3| / a2 is less than 1.66711, so drop the skew of any invalid scenario
+    is_invalid = ~((arr_a2 > 0) & (np.abs(arr_a3) < 1.66711 * arr_a2))
+    if is_invalid.any():
+        print("Warning: " + str(is_invalid.sum()) + " scenario(s) would give an invalid 3-term metalog, so a symmetric 2-term metalog was used for them instead.")
+        arr_a3 = np.where(is_invalid, 0.0, arr_a3)
+
+    # Generate the uniform random numbers, with one row per scenario
+    number_of_scenarios = len(list_of_scenario_names)
+    number_of_streams = 1 if use_common_random_numbers else number_of_scenarios
+    if generator == 'hdr':
+        uniform_values = np.stack([GenerateHDRRandomNumbers(number_of_trials, variable_id=i + 1) for i in range(number_of_streams)])
+    else:
+        uniform_values = CreateRandomNumberGenerator(random_seed).random((number_of_streams, number_of_trials))
+
+    # Evaluate every scenario's quantile function at once, as a scenarios x trials array whose transpose is the column-major trials x scenarios array
+    centered_uniform_values = uniform_values - 0.5
+    uniform_log_odds = np.log(uniform_values / (1 - uniform_values))
+    arr_simulations = arr_a1[:, np.newaxis] + uniform_log_odds * (arr_a2[:, np.newaxis] + arr_a3[:, np.newaxis] * centered_uniform_values)
+    arr_simulations = _inverse_transform_values(arr_simulations, lower_bound, upper_bound).T
+
+    # Return the simulation results in the requested format
+    if return_format == 'array':
+        return arr_simulations
+    if lower_bound is None and upper_bound is None:
+        boundedness = 'u'
+    elif upper_bound is None:
+        boundedness = 'sl'
+    elif lower_bound is None:
+        boundedness = 'su'
+    else:
+        boundedness = 'b'
+    sip_library = SIPLibrary(
+        arr_simulations,
+        list_of_scenario_names,
+        metadata={
+            scenario_name: {
+                'distribution': 'metalog',
+                'boundedness': boundedness,
+                'lower_bound': lower_bound,
+                'upper_bound': upper_bound,
+                'number_of_terms': 3,
+                'coefficients': [float(arr_a1[i]), float(arr_a2[i]), float(arr_a3[i])],
+                'percentiles': [alpha, 0.5, 1 - alpha],
+                'quantiles': pred_interval[['obs_ci_lower', 'mean', 'obs_ci_upper']].iloc[i].tolist(),
+                'random_seed': random_seed if isinstance(random_seed, int) and generator == 'numpy' else None
+            }
+            for i, scenario_name in enumerate(list_of_scenario_names)
+        }
+    )
+    if return_format == 'dataframe':
+        return sip_library.to_dataframe()
+    return sip_library
@@ -0,0 +1,217 @@
+# Load packages
+import ast
+import numpy as np
+import os
+import pandas as pd
+import re
+from .SIPLibrary import SIPLibrary
+from .StreamingSummary import StreamingSummary
+
+# Set the functions that formulas can use, and the syntax they can be written in
+_FORMULA_FUNCTIONS = {
+    'abs': np.abs,
+    'exp': np.exp,
+    'log': np.log,
+    'log10': np.log10,
+    'sqrt': np.sqrt,
+    'where': np.where,
+    'minimum': np.minimum,
+    'maximum': np.maximum
+}
+_NUMEXPR_FUNCTIONS = ['abs', 'exp', 'log', 'log10', 'sqrt', 'where']
+_FORMULA_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Call, ast.Name, ast.Load, ast.Constant,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.FloorDiv, ast.USub, ast.UAdd,
+    ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq, ast.BitAnd, ast.BitOr, ast.Invert
+)
+
+# Declare function
+def EvaluateSimulationModel(formulas,
+                            simulated_variables,
+                            constants=None,
+                            list_of_output_names=None,
+                            chunk_size=65536,
+                            use_numexpr=None,
+                            output_filepath=None,
+                            show_summary=True,
+                            return_summary=True):
+    """
+    Evaluates a model written as formulas over simulated variables, e.g. 'revenue = units * price - fixed_cost', one chunk of trials at a time.
+    Each chunk is small enough to stay in the CPU cache, so intermediate results never take up the memory of a full-length column, and the
+    outputs are written straight into a single trials x outputs array (or a memory-mapped file). If numexpr is installed, each formula is
+    compiled and evaluated in a single fused pass over the chunk. Combined with inputs reopened with LoadSIPLibrary(memory_map=True) and an
+    output_filepath, memory use doesn't grow with the number of trials.
+
+    Formulas can use +, -, *, /, **, %, //, comparisons, &, |, and the functions abs, exp, log, log10, sqrt, where, minimum, and maximum.
+    Later formulas can use the outputs of earlier formulas. Variable names that aren't valid Python names (e.g. 'Simulated Outcome')
+    can be written between backticks, e.g. 'profit = `Simulated Outcome` * 2'.
+
+    Args:
+        formulas (str or list of str): The formulas to evaluate, in order, as a list or as a string with one formula per line (or separated by semicolons).
+        simulated_variables (SIPLibrary, pandas.DataFrame, or dict): The simulated variables used in the formulas, with one value per trial.
+            A dataframe should be wide, with one column per variable. A dictionary can map names to arrays or single numbers.
+        constants (dict, optional): Single numbers used in the formulas, e.g. {'fixed_cost': 5000}. Defaults to None.
+        list_of_output_names (list of str, optional): The formula results to return. If None, the result of every formula is returned. Defaults to None.
+        chunk_size (int, optional): The number of trials evaluated at a time. Defaults to 65536.
+        use_numexpr (bool, optional): Whether to evaluate the formulas with numexpr. If None, numexpr is used if it is installed and supports every function in the formulas.
+            Formulas with floor division (//) are evaluated with numpy, since not every version of numexpr supports it. Defaults to None.
+        output_filepath (str, optional): If specified, the outputs are written to a memory-mapped .npy file with a JSON metadata sidecar (see SIPLibrary.save), instead of being held in memory. Defaults to None.
+        show_summary (bool, optional): Whether to print summary statistics of the outputs. Defaults to True.
+        return_summary (bool, optional): Whether to also return the summary statistics of the outputs. Defaults to True.
+
+    Returns:
+        SIPLibrary: The outputs, with one variable per formula result. If return_summary is True, a tuple of the outputs and a pandas.DataFrame of their
+            summary statistics (calculated as the chunks are evaluated, with StreamingSummary) is returned.
+    """
+    # Ensure that chunk_size is a positive whole number
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive whole number.")
+
+    # Split the formulas into the name and expression of each result
+    if isinstance(formulas, str):
+        formulas = [formula for formula in re.split(r'[\n;]', formulas) if formula.strip() != '']
+    list_of_result_names = []
+    list_of_expressions = []
+    for formula in formulas:
+        formula_match = re.match(r'^\s*(`[^`]+`|[A-Za-z_]\w*)\s*=(?!=)(.+)$', formula)
+        if formula_match is None:
+            raise ValueError("Each formula must have the form 'name = expression': " + formula)
+        list_of_result_names.append(formula_match.group(1).strip('`'))
+        list_of_expressions.append(formula_match.group(2).strip())
+    list_of_original_expressions = list(list_of_expressions)
+
+    # Get the simulated variables as a dictionary of flat arrays (or single numbers), without copying SIP library columns
+    if isinstance(simulated_variables, SIPLibrary):
+        dict_of_variables = {variable_name: simulated_variables[variable_name] for variable_name in simulated_variables.variable_names}
+    elif isinstance(simulated_variables, pd.DataFrame):
+        dict_of_variables = {str(column_name): simulated_variables[column_name].to_numpy() for column_name in simulated_variables.columns}
+    else:
+        dict_of_variables = {str(variable_name): values if np.isscalar(values) else np.asarray(values).ravel() for variable_name, values in simulated_variables.items()}
+    dict_of_variables.update(constants or {})
+
+    # Ensure that every simulated variable has the same number of trials
+    set_of_lengths = set(len(values) for values in dict_of_variables.values() if not np.isscalar(values))
+    if len(set_of_lengths) != 1:
+        raise ValueError("simulated_variables must include at least one array, and every array must have the same number of trials.")
+    number_of_trials = set_of_lengths.pop()
+
+    # Give every variable and result a valid Python name for the formulas, replacing backtick-quoted names
+    dict_of_aliases = {}
+    def get_alias(variable_name):
+        if variable_name not in dict_of_aliases:
+            dict_of_aliases[variable_name] = variable_name if variable_name.isidentifier() else '_variable_' + str(len(dict_of_aliases))
+        return dict_of_aliases[variable_name]
+    list_of_expressions = [re.sub(r'`([^`]+)`', lambda match: get_alias(match.group(1)), expression) for expression in list_of_expressions]
+    list_of_result_aliases = [get_alias(result_name) for result_name in list_of_result_names]
+
+    # Parse each expression, and ensure that it only uses arithmetic, known functions, and known names
+    set_of_known_names = set(get_alias(variable_name) for variable_name in dict_of_variables)
+    set_of_used_functions = set()
+    uses_floor_division = False
+    list_of_compiled_expressions = []
+    for result_alias, expression in zip(list_of_result_aliases, list_of_expressions):
+        try:
+            expression_tree = ast.parse(expression, mode='eval')
+        except SyntaxError:
+            raise ValueError("The following formula couldn't be read: " + expression)
+        for node in ast.walk(expression_tree):
+            if not isinstance(node, _FORMULA_NODES):
+                raise ValueError("Formulas can't use " + type(node).__name__ + ": " + expression)
+            if isinstance(node, ast.Call):
+                if not isinstance(node.func, ast.Name) or node.func.id not in _FORMULA_FUNCTIONS or node.keywords:
+                    raise ValueError("Formulas can only call the following functions: " + ", ".join(_FORMULA_FUNCTIONS) + ".")
+                set_of_used_functions.add(node.func.id)
+            elif isinstance(node, ast.FloorDiv):
+                uses_floor_division = True
+            elif isinstance(node, ast.Name) and node.id not in _FORMULA_FUNCTIONS and node.id not in set_of_known_names:
+                raise ValueError("The following name isn't a simulated variable, a constant, or an earlier result: " + node.id)
+        list_of_compiled_expressions.append(compile(expression_tree, '<formula>', 'eval'))
+        set_of_known_names.add(result_alias)
+
+    # Use numexpr if it is installed and supports every function and operator in the formulas
+    if use_numexpr is None or use_numexpr:
+        try:
+            # Lazy load uncommon packages
+            import numexpr
+        except ImportError:
+            if use_numexpr:
+                raise ValueError("use_numexpr is True, but numexpr isn't installed.")
+            use_numexpr = False
+        else:
+            if not set_of_used_functions.issubset(_NUMEXPR_FUNCTIONS):
+                if use_numexpr:
+                    raise ValueError("numexpr only supports the following functions: " + ", ".join(_NUMEXPR_FUNCTIONS) + ".")
+                use_numexpr = False
+            elif uses_floor_division:
+                if use_numexpr:
+                    raise ValueError("Formulas with floor division (//) can't be evaluated with numexpr. Set use_numexpr to None or False.")
+                use_numexpr = False
+            else:
+                use_numexpr = True
+
+    # Set the outputs to return
+    if list_of_output_names is None:
+        list_of_output_names = list_of_result_names
+    missing_outputs = [output_name for output_name in list_of_output_names if output_name not in list_of_result_names]
+    if missing_outputs:
+        raise ValueError("The following outputs aren't the result of a formula: " + ", ".join(missing_outputs))
+
+    # Create the trials x outputs array, in memory or as a memory-mapped file
+    if output_filepath is None:
+        arr_outputs = np.empty((number_of_trials, len(list_of_output_names)), order='F')
+    else:
+        output_filepath = os.path.splitext(output_filepath)[0] + '.npy'
+        arr_outputs = np.lib.format.open_memmap(output_filepath, mode='w+', dtype=float, shape=(number_of_trials, len(list_of_output_names)), fortran_order=True)
+
+    # Keep constant-memory summaries of the outputs as the chunks are evaluated, if requested
+    if show_summary or return_summary:
+        dict_of_summaries = {output_name: StreamingSummary(variable_name=output_name) for output_name in list_of_output_names}
+    else:
+        dict_of_summaries = {}
+
+    # Get the variables by their formula names, with a chunk-sized buffer for each result that isn't an output
+    dict_of_variables = {get_alias(variable_name): values for variable_name, values in dict_of_variables.items()}
+    dict_of_buffers = {result_alias: np.empty(min(chunk_size, number_of_trials)) for result_name, result_alias in zip(list_of_result_names, list_of_result_aliases) if result_name not in list_of_output_names}
+
+    # Evaluate the formulas one chunk of trials at a time
+    for chunk_start in range(0, number_of_trials, chunk_size):
+        chunk_end = min(chunk_start + chunk_size, number_of_trials)
+
+        # Get views of this chunk of each variable
+        dict_of_chunk_values = dict(_FORMULA_FUNCTIONS)
+        for variable_alias, values in dict_of_variables.items():
+            dict_of_chunk_values[variable_alias] = values if np.isscalar(values) else values[chunk_start:chunk_end]
+
+        # Evaluate each formula into its output column or buffer, so later formulas can use the result
+        for result_name, result_alias, expression, compiled_expression in zip(list_of_result_names, list_of_result_aliases, list_of_expressions, list_of_compiled_expressions):
+            if result_name in list_of_output_names:
+                result_values = arr_outputs[chunk_start:chunk_end, list_of_output_names.index(result_name)]
+            else:
+                result_values = dict_of_buffers[result_alias][:chunk_end - chunk_start]
+            if use_numexpr:
+                numexpr.evaluate(expression, local_dict={name: values for name, values in dict_of_chunk_values.items() if name not in _FORMULA_FUNCTIONS}, out=result_values, casting='unsafe')
+            else:
+                result_values[:] = eval(compiled_expression, {'__builtins__': {}}, dict_of_chunk_values)
+            dict_of_chunk_values[result_alias] = result_values
+            if result_name in dict_of_summaries:
+                dict_of_summaries[result_name].update(result_values)
+
+    # Create the SIP library of outputs, saving its metadata sidecar if it was written to a file
+    sip_library = SIPLibrary(
+        arr_outputs,
+        list_of_output_names,
+        metadata={result_name: {'formula': result_name + ' = ' + expression} for result_name, expression in zip(list_of_result_names, list_of_original_expressions) if result_name in list_of_output_names}
+    )
+    if output_filepath is not None:
+        arr_outputs.flush()
+        sip_library._save_sidecar(output_filepath, 'npy')
+
+    # Return the outputs, with the summary if requested
+    if not dict_of_summaries:
+        return sip_library
+    df_summary = pd.concat([summary.to_dataframe() for summary in dict_of_summaries.values()], ignore_index=True)
+    if show_summary:
+        print(df_summary.to_string(index=False))
+    if return_summary:
+        return sip_library, df_summary
+    return sip_library
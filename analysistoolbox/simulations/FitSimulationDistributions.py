@@ -0,0 +1,227 @@
+# Load packages
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import os
+import pandas as pd
+from scipy import stats
+from scipy.special import digamma, gammaln, polygamma
+from .CreateRandomNumberGenerator import CreateRandomNumberGenerator
+from .MetalogDistribution import MetalogDistribution
+
+# Set the candidate distributions, named as in SimulateCorrelatedOutcomes
+_CANDIDATE_DISTRIBUTIONS = ['normal', 't', 'poisson', 'exponential', 'gamma', 'metalog']
+
+# Declare function
+def FitSimulationDistributions(dataframe,
+                               list_of_column_names=None,
+                               list_of_candidate_distributions=None,
+                               ranking_criterion='aic',
+                               goodness_of_fit_sample_size=10000,
+                               number_of_workers=None,
+                               random_seed=412,
+                               show_summary=True):
+    """
+    Fits every candidate distribution to each column of a dataframe, ranks the fits, and returns the best fit of each column as a ready-to-sample specification.
+    The candidates are the distributions the simulations package can sample: 'normal', 't', 'poisson', 'exponential', 'gamma', and 'metalog'.
+    The normal, Poisson, exponential, and gamma fits are maximum likelihood estimates calculated from sufficient statistics (the count, mean, variance,
+    and mean of the logs), so they take a single pass over each column, however many rows it has. The t distribution is fit by maximum likelihood
+    to a random subsample, and the metalog is fit with MetalogDistribution.fit. Each fit's log-likelihood is calculated over the whole column, and the
+    Kolmogorov-Smirnov (KS) distance is calculated on a random subsample of goodness_of_fit_sample_size rows. The columns can be fit in parallel
+    worker processes, each with its own random number stream, so the results are reproducible for a given random_seed.
+
+    Candidates that don't fit a column's values are skipped, e.g. the Poisson for values that aren't whole numbers, and the exponential
+    and gamma for negative values. For columns of whole numbers, the likelihood of each continuous candidate is the probability it gives to
+    the interval within 0.5 of each value, so that its AIC and BIC are on the same scale as the Poisson's.
+
+    Args:
+        dataframe (pandas.DataFrame): The data to fit, with one column per variable.
+        list_of_column_names (list of str, optional): The columns to fit. If None, every numeric column is fit. Defaults to None.
+        list_of_candidate_distributions (list of str, optional): The distributions to fit. If None, every candidate is fit. Defaults to None.
+        ranking_criterion (str, optional): The criterion used to pick the best fit of each column. Either 'aic', 'bic', or 'ks_distance'. Defaults to 'aic'.
+        goodness_of_fit_sample_size (int, optional): The largest number of rows used to fit the t distribution and to calculate the KS distance. Defaults to 10000.
+        number_of_workers (int, optional): The number of worker processes to use. If None, all available CPU cores are used. Defaults to None.
+        random_seed (int or numpy.random.SeedSequence, optional): The random seed to use for replicability. Defaults to 412.
+        show_summary (bool, optional): Whether to print the best fit of each column. Defaults to True.
+
+    Returns:
+        tuple: A pandas.DataFrame with one row per column and candidate (the parameters, log-likelihood, AIC, BIC, KS distance, and the rank by each),
+            and a list of the best fit of each column, as dictionaries that can be passed to SimulateCorrelatedOutcomes as list_of_marginals.
+    """
+    # Ensure that the candidate distributions and ranking criterion are valid
+    if list_of_candidate_distributions is None:
+        list_of_candidate_distributions = _CANDIDATE_DISTRIBUTIONS
+    unknown_distributions = [distribution for distribution in list_of_candidate_distributions if distribution not in _CANDIDATE_DISTRIBUTIONS]
+    if unknown_distributions:
+        raise ValueError("list_of_candidate_distributions can only include the following: " + ", ".join("'" + distribution + "'" for distribution in _CANDIDATE_DISTRIBUTIONS) + ".")
+    if ranking_criterion not in ['aic', 'bic', 'ks_distance']:
+        raise ValueError("ranking_criterion must be one of the following: 'aic', 'bic', or 'ks_distance'.")
+
+    # Ensure that goodness_of_fit_sample_size is large enough to compare distributions
+    if goodness_of_fit_sample_size < 100:
+        raise ValueError("goodness_of_fit_sample_size must be at least 100.")
+
+    # If list_of_column_names is not specified, fit every numeric column
+    if list_of_column_names is None:
+        list_of_column_names = dataframe.select_dtypes(include='number').columns.tolist()
+
+    # If number_of_workers is not specified, use all available CPU cores
+    if number_of_workers is None:
+        number_of_workers = os.cpu_count() or 1
+
+    # Give each column its own random number stream for subsampling
+    list_of_seed_sequences = CreateRandomNumberGenerator(
+        random_seed,
+        number_of_streams=max(len(list_of_column_names), 1),
+        return_seed_sequences=True
+    )
+
+    # Fit the candidates to each column, in the current process if only one worker is requested
+    list_of_arrays = [dataframe[column_name].to_numpy(dtype=float) for column_name in list_of_column_names]
+    list_of_arguments = [list_of_arrays, [list_of_candidate_distributions] * len(list_of_arrays), [goodness_of_fit_sample_size] * len(list_of_arrays), list_of_seed_sequences[:len(list_of_arrays)]]
+    if number_of_workers == 1:
+        list_of_column_fits = list(map(_fit_column, *list_of_arguments))
+    else:
+        with ProcessPoolExecutor(max_workers=number_of_workers) as executor:
+            list_of_column_fits = list(executor.map(_fit_column, *list_of_arguments))
+
+    # Create a dataframe of the fits, with the rank of each candidate within its column
+    list_of_rows = []
+    for column_name, list_of_fits in zip(list_of_column_names, list_of_column_fits):
+        if not list_of_fits:
+            print("Warning: None of the candidate distributions could be fit to " + str(column_name) + ". It needs at least 10 finite values that aren't all equal.")
+        for fit in list_of_fits:
+            list_of_rows.append({'Variable': column_name, **fit})
+    df_fits = pd.DataFrame(list_of_rows, columns=['Variable', 'Distribution', 'Parameters', 'Number of Parameters', 'Number of Values', 'Log Likelihood', 'AIC', 'BIC', 'KS Distance'])
+    for criterion, column_name in [('aic', 'AIC'), ('bic', 'BIC'), ('ks_distance', 'KS Distance')]:
+        df_fits[column_name + ' Rank'] = df_fits.groupby('Variable', sort=False)[column_name].rank(method='min').astype(int)
+    ranking_column_name = {'aic': 'AIC', 'bic': 'BIC', 'ks_distance': 'KS Distance'}[ranking_criterion]
+    df_fits = df_fits.sort_values(['Variable', ranking_column_name], kind='stable', key=lambda values: values.map(list_of_column_names.index) if values.name == 'Variable' else values).reset_index(drop=True)
+    df_fits['Best'] = ~df_fits['Variable'].duplicated()
+
+    # Create the ready-to-sample specification of the best fit of each column
+    list_of_marginals = [
+        {'name': row['Variable'], 'distribution': row['Distribution'], **row['Parameters']}
+        for row in df_fits[df_fits['Best']].to_dict('records')
+    ]
+
+    # Show the best fit of each column, if requested
+    if show_summary:
+        df_best_fits = df_fits.loc[df_fits['Best'], ['Variable', 'Distribution', 'AIC', 'BIC', 'KS Distance']]
+        print(df_best_fits.to_string(index=False))
+
+    # Return the fits and the best specifications
+    return df_fits, list_of_marginals
+
+
+def _fit_column(values, list_of_candidate_distributions, goodness_of_fit_sample_size, seed_sequence):
+    # Fit each candidate to one column, which is the unit of work sent to each worker
+    values = values[np.isfinite(values)]
+    number_of_values = values.size
+    if number_of_values < 10 or np.ptp(values) == 0:
+        return []
+
+    # Calculate the sufficient statistics in one pass over the values
+    mean = values.mean()
+    variance = values.var()
+    minimum = values.min()
+    is_whole_number = minimum >= 0 and np.all(values == np.floor(values))
+    mean_log = np.log(values).mean() if minimum > 0 else None
+    if is_whole_number:
+        unique_values, value_counts = np.unique(values, return_counts=True)
+
+    # Draw the subsample for the t fit and the goodness of fit
+    rng = CreateRandomNumberGenerator(seed_sequence)
+    if number_of_values > goodness_of_fit_sample_size:
+        sample_values = np.sort(rng.choice(values, goodness_of_fit_sample_size, replace=False))
+    else:
+        sample_values = np.sort(values)
+
+    # Fit each candidate that suits the values
+    list_of_fits = []
+    for distribution in list_of_candidate_distributions:
+        cdf_function = None
+        if distribution == 'normal':
+            standard_deviation = np.sqrt(variance)
+            parameters = {'expected_outcome': mean, 'standard_deviation_of_outcome': standard_deviation}
+            log_likelihood = -number_of_values / 2 * (np.log(2 * np.pi * variance) + 1)
+            cdf_function = lambda x: stats.norm.cdf(x, loc=mean, scale=standard_deviation)
+        elif distribution == 't':
+            degrees_of_freedom, location, scale = stats.t.fit(sample_values)
+            parameters = {'degrees_of_freedom': degrees_of_freedom, 'expected_outcome': location, 'standard_deviation_of_outcome': scale}
+            log_likelihood = stats.t.logpdf(values, degrees_of_freedom, loc=location, scale=scale).sum()
+            cdf_function = lambda x: stats.t.cdf(x, degrees_of_freedom, loc=location, scale=scale)
+        elif distribution == 'poisson' and is_whole_number:
+            parameters = {'expected_count': mean}
+            log_likelihood = values.sum() * np.log(mean) - number_of_values * mean - gammaln(values + 1).sum()
+        elif distribution == 'exponential' and minimum >= 0:
+            parameters = {'expected_time_between_events': mean}
+            log_likelihood = -number_of_values * (np.log(mean) + 1)
+            cdf_function = lambda x: stats.expon.cdf(x, scale=mean)
+        elif distribution == 'gamma' and mean_log is not None:
+            shape = _estimate_gamma_shape(np.log(mean) - mean_log)
+            scale = mean / shape
+            parameters = {'number_of_events': shape, 'expected_time_between_events': scale}
+            log_likelihood = number_of_values * ((shape - 1) * mean_log - shape - shape * np.log(scale) - gammaln(shape))
+            cdf_function = lambda x: stats.gamma.cdf(x, shape, scale=scale)
+        elif distribution == 'metalog':
+            metalog_distribution = MetalogDistribution.fit(values, term_maximum=min(9, number_of_values))
+            if not metalog_distribution.valid_terms:
+                continue
+            number_of_terms = metalog_distribution.default_terms
+            parameters = {'metalog_distribution': metalog_distribution, 'number_of_terms': number_of_terms}
+            # Invert the quantile function on a fine grid of probabilities to get each value's probability and density
+            grid_probabilities = np.concatenate([np.geomspace(1e-6, 1e-3, 30), np.linspace(1e-3, 1 - 1e-3, 2000)[1:-1], 1 - np.geomspace(1e-3, 1e-6, 30)])
+            grid_quantiles = metalog_distribution.quantile(grid_probabilities, number_of_terms)
+            cdf_function = lambda x: np.interp(x, grid_quantiles, grid_probabilities, left=0, right=1)
+            value_probabilities = np.interp(values, grid_quantiles, grid_probabilities)
+            log_likelihood = np.log(metalog_distribution.density(value_probabilities, number_of_terms)).sum()
+        else:
+            continue
+
+        # For whole numbers, use the probability each continuous fit gives to the interval around each value
+        if is_whole_number and cdf_function is not None:
+            interval_probabilities = cdf_function(unique_values + 0.5) - cdf_function(unique_values - 0.5)
+            log_likelihood = np.sum(value_counts * np.log(np.maximum(interval_probabilities, np.finfo(float).tiny)))
+
+        # Calculate the KS distance between the subsample and the fit
+        if cdf_function is None:
+            ks_distance = _calculate_discrete_ks_distance(sample_values, lambda x: stats.poisson.cdf(x, mean))
+        else:
+            cdf_values = cdf_function(sample_values)
+            sample_size = sample_values.size
+            ks_distance = max(np.max(np.arange(1, sample_size + 1) / sample_size - cdf_values), np.max(cdf_values - np.arange(sample_size) / sample_size))
+
+        # Record the fit with its information criteria
+        number_of_parameters = parameters.get('number_of_terms', len(parameters))
+        list_of_fits.append({
+            'Distribution': distribution,
+            'Parameters': {key: float(value) if np.isscalar(value) and key != 'number_of_terms' else value for key, value in parameters.items()},
+            'Number of Parameters': number_of_parameters,
+            'Number of Values': number_of_values,
+            'Log Likelihood': float(log_likelihood),
+            'AIC': float(2 * number_of_parameters - 2 * log_likelihood),
+            'BIC': float(number_of_parameters * np.log(number_of_values) - 2 * log_likelihood),
+            'KS Distance': float(ks_distance)
+        })
+    return list_of_fits
+
+
+def _estimate_gamma_shape(log_mean_difference):
+    # Solve log(shape) - digamma(shape) = log(mean) - mean(log) with Newton's method, starting from Minka's approximation
+    shape = (3 - log_mean_difference + np.sqrt((log_mean_difference - 3) ** 2 + 24 * log_mean_difference)) / (12 * log_mean_difference)
+    for iteration in range(20):
+        step = (np.log(shape) - digamma(shape) - log_mean_difference) / (1 / shape - polygamma(1, shape))
+        shape = max(shape - step, shape / 10)
+        if abs(step) < 1e-10 * shape:
+            break
+    return shape
+
+
+def _calculate_discrete_ks_distance(sorted_values, cdf_function):
+    # Compare the empirical and fitted CDFs at each observed whole number and just below it, where the largest gaps must be
+    unique_values, counts = np.unique(sorted_values, return_counts=True)
+    empirical_cdf = np.cumsum(counts) / sorted_values.size
+    return max(
+        np.max(np.abs(empirical_cdf - cdf_function(unique_values))),
+        np.max(np.abs(empirical_cdf - counts / sorted_values.size - cdf_function(unique_values - 1)))
+    )
@@ -0,0 +1,43 @@
+# Load packages
+import numpy as np
+
+# Declare function
+def GenerateHDRRandomNumbers(number_of_trials=10000,
+                             variable_id=1,
+                             entity_id=1,
+                             seed_3=0,
+                             seed_4=0,
+                             first_trial=1):
+    """
+    Generates uniform random numbers between 0 and 1 with the Hubbard Decision Research (HDR) pseudo-random number generator (version 2).
+    Each number depends only on its trial number and the four seeds, so the same trial of the same variable gives the same number in
+    any tool that implements the HDR generator (e.g. Excel or the SIPmath 3.0 standard), and any range of trials can be generated
+    on its own. Every trial is computed at once with integer arithmetic on numpy arrays.
+
+    Args:
+        number_of_trials (int, optional): The number of random numbers to generate. Defaults to 10000.
+        variable_id (int, optional): The ID of the variable, which gives each variable its own stream of random numbers. Defaults to 1.
+        entity_id (int, optional): The ID of the entity (e.g. the organization or model), which separates the streams of different entities. Defaults to 1.
+        seed_3 (int, optional): The third seed. Defaults to 0.
+        seed_4 (int, optional): The fourth seed. Defaults to 0.
+        first_trial (int, optional): The trial number (PM_Index) of the first random number. Defaults to 1.
+
+    Returns:
+        numpy.ndarray: The uniform random numbers, one per trial.
+    """
+    # Ensure that number_of_trials is a positive whole number
+    if number_of_trials < 1:
+        raise ValueError("number_of_trials must be a positive whole number.")
+
+    # Get the trial numbers, which the generator uses as its counter
+    trial_index = np.arange(first_trial, first_trial + number_of_trials, dtype=np.int64)
+
+    # Combine the trial number and seeds in two independent streams, scrambling each with the remainder of a large prime divided by it
+    first_stream = (trial_index * 2499997 + (variable_id * 1800451 + entity_id * 2000371 + seed_3 * 1796777 + seed_4 * 2299603)) % 7450589
+    first_stream = ((999999999999989 % (first_stream * 4658 + 7450581)) * 383) % 99991
+    second_stream = (trial_index * 2246527 + (variable_id * 2399993 + entity_id * 2100869 + seed_3 * 1918303 + seed_4 * 1624729)) % 7450987
+    second_stream = ((999999999999989 % (second_stream * 7580 + 7560584)) * 17669) % 7440893
+
+    # Mix the streams and scale the result to the open interval between 0 and 1
+    mixed_streams = ((first_stream * 7440893 + second_stream) * 1343) % 4294967296
+    return (mixed_streams + 0.5) / 4294967296
@@ -0,0 +1,86 @@
+# Load packages
+import numpy as np
+import warnings
+from .CreateRandomNumberGenerator import CreateRandomNumberGenerator
+
+# Declare function
+def GenerateUniformSamples(number_of_trials=10000,
+                           number_of_dimensions=1,
+                           sampling_method='random',
+                           number_of_replicates=10,
+                           random_seed=412):
+    """
+    Generates uniform numbers between 0 and 1 for inverse-CDF sampling, using plain pseudo-random sampling or a variance-reduction design.
+    Quasi-random ('sobol'), Latin Hypercube, antithetic, and stratified samples cover the unit interval more evenly than pseudo-random
+    numbers, so the same precision is reached with far fewer trials. To keep the precision measurable, the trials of these designs
+    are split into independent, randomized replicates: trials are laid out replicate by replicate, and the spread of the replicate
+    estimates gives the standard error (see CalculateSimulationStandardError).
+
+    Args:
+        number_of_trials (int, optional): The number of uniform numbers to generate for each dimension. Defaults to 10000.
+        number_of_dimensions (int, optional): The number of dimensions (i.e. independent variables) to sample. Defaults to 1.
+        sampling_method (str, optional): Either 'random' (pseudo-random numbers), 'sobol' (scrambled Sobol quasi-random sequence), 'latin_hypercube'
+            (one point in each of number_of_trials equal strata of every dimension, paired at random), 'antithetic' (each number u is paired with 1 - u),
+            or 'stratified' (one point in each of number_of_trials equal strata of the first dimension, with the other dimensions pseudo-random). Defaults to 'random'.
+        number_of_replicates (int, optional): The number of independent replicates the trials are split into when sampling_method isn't 'random'. Defaults to 10.
+        random_seed (int or numpy.random.Generator, optional): The random seed to use for replicability. Defaults to 412.
+
+    Returns:
+        numpy.ndarray: The uniform numbers, with shape (number_of_trials,) for one dimension, or (number_of_trials, number_of_dimensions) otherwise.
+    """
+    # Lazy load uncommon packages
+    from scipy.stats import qmc
+
+    # Ensure that sampling_method is valid
+    if sampling_method not in ['random', 'sobol', 'latin_hypercube', 'antithetic', 'stratified']:
+        raise ValueError("sampling_method must be one of the following: 'random', 'sobol', 'latin_hypercube', 'antithetic', or 'stratified'.")
+
+    # Ensure that number_of_trials, number_of_dimensions, and number_of_replicates are positive whole numbers
+    if number_of_trials < 1:
+        raise ValueError("number_of_trials must be a positive whole number.")
+    if number_of_dimensions < 1:
+        raise ValueError("number_of_dimensions must be a positive whole number.")
+    if number_of_replicates < 1:
+        raise ValueError("number_of_replicates must be a positive whole number.")
+
+    # Create a random number generator from the random seed for replicability
+    rng = CreateRandomNumberGenerator(random_seed)
+
+    # Draw pseudo-random numbers all at once
+    if sampling_method == 'random':
+        uniform_values = rng.random((number_of_trials, number_of_dimensions))
+    else:
+        # Draw each replicate on its own, so that the replicates are independent of each other
+        list_of_replicates = []
+        for replicate_size in np.diff(np.linspace(0, number_of_trials, min(number_of_replicates, number_of_trials) + 1).round().astype(int)):
+            if sampling_method == 'sobol':
+                # Sobol sequences are balanced at powers of 2, but any number of points is still better spread than pseudo-random numbers
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore', UserWarning)
+                    replicate = _create_qmc_engine(qmc.Sobol, number_of_dimensions, rng, scramble=True).random(replicate_size)
+            elif sampling_method == 'latin_hypercube':
+                replicate = _create_qmc_engine(qmc.LatinHypercube, number_of_dimensions, rng).random(replicate_size)
+            elif sampling_method == 'antithetic':
+                base_values = rng.random((-(-replicate_size // 2), number_of_dimensions))
+                replicate = np.concatenate([base_values, 1 - base_values])[:replicate_size]
+            else:
+                replicate = rng.random((replicate_size, number_of_dimensions))
+                replicate[:, 0] = (rng.permutation(replicate_size) + replicate[:, 0]) / replicate_size
+            list_of_replicates.append(replicate)
+        uniform_values = np.concatenate(list_of_replicates)
+
+    # Keep the numbers strictly between 0 and 1, so that inverse CDFs never return infinite values
+    uniform_values = np.clip(uniform_values, 2 ** -53, 1 - 2 ** -53)
+
+    # Return a flat array for a single dimension
+    if number_of_dimensions == 1:
+        return uniform_values[:, 0]
+    return uniform_values
+
+
+def _create_qmc_engine(engine, number_of_dimensions, rng, **kwargs):
+    # Pass the generator as rng, which replaced the seed argument of the qmc engines in scipy 1.15, or as seed in older versions
+    try:
+        return engine(d=number_of_dimensions, rng=rng, **kwargs)
+    except TypeError:
+        return engine(d=number_of_dimensions, seed=rng, **kwargs)
@@ -0,0 +1,49 @@
+# Load packages
+import json
+import numpy as np
+import os
+from .SIPLibrary import SIPLibrary
+
+# Declare function
+def LoadSIPLibrary(filepath,
+                   memory_map=True):
+    """
+    Loads a SIP library saved with SIPLibrary.save(). With the .npy format and memory_map set to True, the trials are
+    memory-mapped rather than read into memory, so opening even a very large library is instant and every process that
+    loads the same file shares one copy of it through the operating system's page cache. A memory-mapped library is read-only;
+    arithmetic on it returns new libraries in memory, and SIPLibrary(library.data, copy=True) makes an editable copy.
+
+    Args:
+        filepath (str): The path of the saved library. Either the JSON metadata sidecar or the trials file (.npy or .arrow) can be given.
+        memory_map (bool, optional): Whether to memory-map the trials instead of reading them into memory. Defaults to True.
+
+    Returns:
+        SIPLibrary: The loaded SIP library, with its variable names and metadata.
+    """
+    # Read the metadata sidecar
+    base_filepath = os.path.splitext(filepath)[0]
+    with open(base_filepath + '.json', 'r') as sidecar_file:
+        sidecar = json.load(sidecar_file)
+    data_filepath = os.path.join(os.path.dirname(base_filepath), sidecar['data_file'])
+
+    # Load the trials, memory-mapping them if requested
+    if sidecar['file_format'] == 'npy':
+        data = np.load(data_filepath, mmap_mode='r' if memory_map else None)
+    elif sidecar['file_format'] == 'arrow':
+        # Lazy load uncommon packages
+        import pyarrow as pa
+        source = pa.memory_map(data_filepath, 'r') if memory_map else pa.OSFile(data_filepath, 'rb')
+        table = pa.ipc.open_file(source).read_all()
+        # Copy the Arrow columns into a single column-major buffer
+        data = np.empty((table.num_rows, len(sidecar['variable_names'])), order='F')
+        for i, variable_name in enumerate(sidecar['variable_names']):
+            data[:, i] = table.column(variable_name).to_numpy()
+    else:
+        raise ValueError("The file format " + str(sidecar['file_format']) + " is not supported.")
+
+    # Ensure that the trials match the sidecar
+    if data.shape != (sidecar['number_of_trials'], len(sidecar['variable_names'])):
+        raise ValueError("The trials in " + data_filepath + " don't match the number of trials and variables in the metadata sidecar.")
+
+    # Return the SIP library
+    return SIPLibrary(data, sidecar['variable_names'], metadata=sidecar['metadata'])
@@ -0,0 +1,209 @@
+# Load packages
+from collections import OrderedDict
+import hashlib
+import json
+import numpy as np
+import os
+import threading
+from .MetalogDistribution import MetalogDistribution
+
+# Declare class
+class MetalogCache:
+    """
+    A cache of fitted metalog distributions, keyed by a hash of the values, probabilities, bounds, term limits, and learning rate
+    they were fit with. Recently used distributions are kept in memory, and the least recently used distribution is dropped once
+    the cache is full. If a cache directory is given, fitted coefficients are also saved there as JSON files, so they can be
+    reused by later sessions or other processes. CreateMetalogDistribution, CreateMetalogDistributionFromPercentiles, and
+    CreateSLURPDistribution use the shared cache returned by MetalogCache.default() unless told otherwise.
+
+    Args:
+        maximum_size (int, optional): The maximum number of distributions to keep in memory. Defaults to 128.
+        cache_directory (str, optional): The folder to save fitted coefficients to. If None, distributions are only cached in memory. Defaults to None.
+    """
+
+    # Set the shared cache, which is created when first requested
+    _default_cache = None
+
+    def __init__(self,
+                 maximum_size=128,
+                 cache_directory=None):
+        # Ensure that maximum_size is a positive whole number
+        if maximum_size < 1:
+            raise ValueError("maximum_size must be a positive whole number.")
+
+        # Set the cache parameters
+        self.maximum_size = maximum_size
+        self.cache_directory = cache_directory
+        if cache_directory is not None:
+            os.makedirs(cache_directory, exist_ok=True)
+
+        # Set the starting cache and counters
+        self._distributions = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def default(cls):
+        """
+        Returns the shared cache used by the metalog builders, creating it if needed.
+
+        Returns:
+            MetalogCache: The shared cache.
+        """
+        if cls._default_cache is None:
+            cls._default_cache = cls()
+        return cls._default_cache
+
+    def get_or_fit(self,
+                   values,
+                   probabilities=None,
+                   lower_bound=None,
+                   upper_bound=None,
+                   term_minimum=2,
+                   term_maximum=9,
+                   learning_rate=0.01):
+        """
+        Returns the cached metalog distribution for the given inputs, fitting and caching it if it isn't cached yet.
+        The arguments are the same as MetalogDistribution.fit().
+
+        Args:
+            values (array-like): The observed values, or the values at the given probabilities.
+            probabilities (array-like, optional): The cumulative probability of each value. Defaults to None.
+            lower_bound (float, optional): The lower bound of the distribution. Defaults to None.
+            upper_bound (float, optional): The upper bound of the distribution. Defaults to None.
+            term_minimum (int, optional): The minimum number of terms to fit. Defaults to 2.
+            term_maximum (int, optional): The maximum number of terms to fit. Defaults to 9.
+            learning_rate (float, optional): The spacing of the probabilities used when fitting to quantiles of more than 100 values. Defaults to 0.01.
+
+        Returns:
+            MetalogDistribution: The fitted metalog distribution.
+        """
+        cache_key = self.create_key(values, probabilities, lower_bound, upper_bound, term_minimum, term_maximum, learning_rate)
+
+        # Look for the distribution in memory, marking it as the most recently used
+        with self._lock:
+            if cache_key in self._distributions:
+                self._distributions.move_to_end(cache_key)
+                self.hits += 1
+                return self._distributions[cache_key]
+
+        # Look for the distribution's coefficients on disk
+        metalog_distribution = self._load_from_disk(cache_key)
+        if metalog_distribution is not None:
+            with self._lock:
+                self.disk_hits += 1
+        else:
+            # Fit the distribution, and save its coefficients to disk
+            metalog_distribution = MetalogDistribution.fit(
+                values,
+                probabilities=probabilities,
+                lower_bound=lower_bound,
+                upper_bound=upper_bound,
+                term_minimum=term_minimum,
+                term_maximum=term_maximum,
+                learning_rate=learning_rate
+            )
+            with self._lock:
+                self.misses += 1
+            self._save_to_disk(cache_key, metalog_distribution)
+
+        # Add the distribution to memory, dropping the least recently used distribution if the cache is full
+        with self._lock:
+            self._distributions[cache_key] = metalog_distribution
+            self._distributions.move_to_end(cache_key)
+            while len(self._distributions) > self.maximum_size:
+                self._distributions.popitem(last=False)
+        return metalog_distribution
+
+    @staticmethod
+    def create_key(values,
+                   probabilities=None,
+                   lower_bound=None,
+                   upper_bound=None,
+                   term_minimum=2,
+                   term_maximum=9,
+                   learning_rate=0.01):
+        """
+        Creates the cache key for a fit by hashing its inputs, so identical inputs give the same key in any session.
+        The arguments are the same as MetalogDistribution.fit().
+
+        Returns:
+            str: The hexadecimal cache key.
+        """
+        hasher = hashlib.blake2b(digest_size=20)
+        hasher.update(np.ascontiguousarray(values, dtype=float).ravel())
+        if probabilities is not None:
+            hasher.update(b'probabilities')
+            hasher.update(np.ascontiguousarray(probabilities, dtype=float).ravel())
+        hasher.update(json.dumps([lower_bound, upper_bound, term_minimum, term_maximum, learning_rate], default=float).encode())
+        return hasher.hexdigest()
+
+    def info(self):
+        """
+        Returns the cache's hit and miss counters.
+
+        Returns:
+            dict: The number of memory hits, disk hits, misses, and distributions currently in memory.
+        """
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'size': len(self._distributions),
+            'maximum_size': self.maximum_size
+        }
+
+    def clear(self,
+              clear_disk=False):
+        """
+        Removes every distribution from memory and resets the counters.
+
+        Args:
+            clear_disk (bool, optional): Whether to also delete the saved coefficients in the cache directory. Defaults to False.
+        """
+        with self._lock:
+            self._distributions.clear()
+            self.hits = 0
+            self.disk_hits = 0
+            self.misses = 0
+        if clear_disk and self.cache_directory is not None:
+            for filename in os.listdir(self.cache_directory):
+                if filename.startswith('metalog_') and filename.endswith('.json'):
+                    os.remove(os.path.join(self.cache_directory, filename))
+
+    def __len__(self):
+        return len(self._distributions)
+
+    def __repr__(self):
+        return "MetalogCache(hits={hits}, disk_hits={disk_hits}, misses={misses}, size={size}, maximum_size={maximum_size})".format(**self.info())
+
+    def _get_disk_filepath(self, cache_key):
+        # Get the path of a distribution's saved coefficients
+        return os.path.join(self.cache_directory, 'metalog_' + cache_key + '.json')
+
+    def _load_from_disk(self, cache_key):
+        # Recreate a distribution from its saved coefficients, if the disk tier is enabled and they exist
+        if self.cache_directory is None or not os.path.exists(self._get_disk_filepath(cache_key)):
+            return None
+        with open(self._get_disk_filepath(cache_key), 'r') as cache_file:
+            saved_distribution = json.load(cache_file)
+        return MetalogDistribution(
+            {int(number_of_terms): coefficients for number_of_terms, coefficients in saved_distribution['coefficients'].items()},
+            lower_bound=saved_distribution['lower_bound'],
+            upper_bound=saved_distribution['upper_bound']
+        )
+
+    def _save_to_disk(self, cache_key, metalog_distribution):
+        # Save a distribution's coefficients, writing to a temporary file first so other processes never read a partial file
+        if self.cache_directory is None:
+            return
+        temporary_filepath = self._get_disk_filepath(cache_key) + '.' + str(os.getpid()) + '.tmp'
+        with open(temporary_filepath, 'w') as cache_file:
+            json.dump({
+                'lower_bound': metalog_distribution.lower_bound,
+                'upper_bound': metalog_distribution.upper_bound,
+                'coefficients': {str(number_of_terms): coefficients.tolist() for number_of_terms, coefficients in metalog_distribution.coefficients.items()}
+            }, cache_file, default=float)
+        os.replace(temporary_filepath, self._get_disk_filepath(cache_key))
@@ -0,0 +1,410 @@
+# Load packages
+import numpy as np
+import pandas as pd
+from scipy.special import expit
+from .GenerateHDRRandomNumbers import GenerateHDRRandomNumbers
+from .GenerateUniformSamples import GenerateUniformSamples
+
+# Set the number of values evaluated at a time by quantile()
+_BLOCK_SIZE = 65536
+
+# Declare class
+class MetalogDistribution:
+    """
+    A metalog distribution, which describes a variable by a quantile function that is linear in its coefficients.
+    The k-term metalog's quantile at probability y is the sum of a_j * (y - 0.5)^p_j * (ln(y / (1 - y)) or 1), and is
+    transformed with a log or logit when the distribution has a lower bound, an upper bound, or both.
+    Use MetalogDistribution.fit() to fit one to data or percentiles, or create one directly from known coefficients.
+
+    Args:
+        coefficients (array-like or dict): The coefficients of the metalog. A dictionary maps each number of terms to its coefficients.
+        lower_bound (float, optional): The lower bound of the distribution. Defaults to None.
+        upper_bound (float, optional): The upper bound of the distribution. Defaults to None.
+    """
+
+    def __init__(self,
+                 coefficients,
+                 lower_bound=None,
+                 upper_bound=None):
+        # Store the coefficients for each number of terms
+        if not isinstance(coefficients, dict):
+            coefficients = np.asarray(coefficients, dtype=float)
+            coefficients = {coefficients.size: coefficients}
+        self.coefficients = {int(number_of_terms): np.asarray(term_coefficients, dtype=float) for number_of_terms, term_coefficients in coefficients.items()}
+
+        # Ensure that the bounds are in order
+        if lower_bound is not None and upper_bound is not None and lower_bound >= upper_bound:
+            raise ValueError("lower_bound must be less than upper_bound.")
+
+        # Set the bounds and boundedness, using the same codes as the metalog literature
+        self.lower_bound = lower_bound
+        self.upper_bound = upper_bound
+        if lower_bound is None and upper_bound is None:
+            self.boundedness = 'u'
+        elif upper_bound is None:
+            self.boundedness = 'sl'
+        elif lower_bound is None:
+            self.boundedness = 'su'
+        else:
+            self.boundedness = 'b'
+
+        # Set the data the metalog was fit to, which fit() fills in
+        self.fit_values = None
+        self.fit_probabilities = None
+
+        # Check which numbers of terms give a valid (strictly increasing) quantile function
+        self.valid_terms = [number_of_terms for number_of_terms in sorted(self.coefficients) if self.is_valid(number_of_terms)]
+
+    @classmethod
+    def fit(cls,
+            values,
+            probabilities=None,
+            lower_bound=None,
+            upper_bound=None,
+            term_minimum=2,
+            term_maximum=9,
+            learning_rate=0.01):
+        """
+        Fits metalogs with every number of terms from term_minimum to term_maximum by ordinary least squares.
+        All of the fits share a single QR decomposition of the basis, and are solved together as one batch.
+        When more than 100 values are given without probabilities, the metalog is fit to quantiles of the values
+        (spaced by the learning rate, with finer spacing in the tails) rather than to every value.
+
+        Args:
+            values (array-like): The observed values, or the values at the given probabilities.
+            probabilities (array-like, optional): The cumulative probability of each value, e.g. for a fit to expert-elicited percentiles. If None, empirical probabilities are used. Defaults to None.
+            lower_bound (float, optional): The lower bound of the distribution. Defaults to None.
+            upper_bound (float, optional): The upper bound of the distribution. Defaults to None.
+            term_minimum (int, optional): The minimum number of terms to fit. Defaults to 2.
+            term_maximum (int, optional): The maximum number of terms to fit. Defaults to 9.
+            learning_rate (float, optional): The spacing of the probabilities used when fitting to quantiles of more than 100 values. Defaults to 0.01.
+
+        Returns:
+            MetalogDistribution: The fitted metalog, with coefficients for each number of terms.
+        """
+        # Convert the values to a flat array of finite floats
+        values = np.asarray(values, dtype=float).ravel()
+
+        # Get the probabilities to fit, if not specified
+        if probabilities is None:
+            values = values[np.isfinite(values)]
+            if values.size > 100:
+                # Fit to quantiles of the values, adding finer steps in each tail
+                tail_probabilities = np.arange(1, 10) * learning_rate / 10
+                probabilities = np.concatenate([tail_probabilities, np.arange(learning_rate, 1 - learning_rate / 2, learning_rate), 1 - tail_probabilities[::-1]])
+                # Interpolate the quantiles from one sort, which is faster than np.quantile's repeated partitioning for many quantiles
+                sorted_values = np.sort(values)
+                positions = probabilities * (values.size - 1)
+                lower_positions = np.floor(positions).astype(np.int64)
+                upper_positions = np.minimum(lower_positions + 1, values.size - 1)
+                values = sorted_values[lower_positions] + (positions - lower_positions) * (sorted_values[upper_positions] - sorted_values[lower_positions])
+            else:
+                # Fit to every value, at its empirical probability
+                values = np.sort(values)
+                probabilities = (np.arange(1, values.size + 1) - 0.5) / values.size
+        else:
+            probabilities = np.asarray(probabilities, dtype=float).ravel()
+            if probabilities.size != values.size:
+                raise ValueError("The number of values and probabilities must be equal.")
+            if np.any(probabilities <= 0) or np.any(probabilities >= 1):
+                raise ValueError("probabilities must be between 0 and 1.")
+
+        # Ensure that the values are within the bounds
+        if lower_bound is not None and np.any(values <= lower_bound):
+            raise ValueError("All values must be greater than the lower_bound.")
+        if upper_bound is not None and np.any(values >= upper_bound):
+            raise ValueError("All values must be less than the upper_bound.")
+
+        # Ensure that the numbers of terms are valid
+        if term_minimum < 2 or term_maximum < term_minimum:
+            raise ValueError("term_minimum must be at least 2, and term_maximum must be at least term_minimum.")
+        if term_maximum > values.size:
+            raise ValueError("term_maximum cannot be greater than the number of values.")
+
+        # Transform the values to the unbounded scale
+        transformed_values = _transform_values(values, lower_bound, upper_bound)
+
+        # Decompose the basis with the most terms once; the first k columns of Q and R give the k-term fit
+        basis = _create_basis(probabilities, term_maximum)
+        q_matrix, r_matrix = np.linalg.qr(basis)
+        projected_values = q_matrix.T @ transformed_values
+
+        # Solve every k-term system at once, padding each upper-left block of R with the identity
+        list_of_terms = list(range(term_minimum, term_maximum + 1))
+        stacked_r_matrices = np.tile(np.eye(term_maximum), (len(list_of_terms), 1, 1))
+        stacked_projections = np.zeros((len(list_of_terms), term_maximum))
+        for i, number_of_terms in enumerate(list_of_terms):
+            stacked_r_matrices[i, :number_of_terms, :number_of_terms] = r_matrix[:number_of_terms, :number_of_terms]
+            stacked_projections[i, :number_of_terms] = projected_values[:number_of_terms]
+        stacked_coefficients = np.linalg.solve(stacked_r_matrices, stacked_projections[..., np.newaxis])[..., 0]
+
+        # Create the metalog distribution
+        metalog_distribution = cls(
+            {number_of_terms: stacked_coefficients[i, :number_of_terms] for i, number_of_terms in enumerate(list_of_terms)},
+            lower_bound=lower_bound,
+            upper_bound=upper_bound
+        )
+        metalog_distribution.fit_values = values
+        metalog_distribution.fit_probabilities = probabilities
+        return metalog_distribution
+
+    @property
+    def term_maximum(self):
+        """int: The largest number of terms with coefficients."""
+        return max(self.coefficients)
+
+    @property
+    def default_terms(self):
+        """int: The largest number of terms that gives a valid distribution, or the largest number of terms if none are valid."""
+        return self.valid_terms[-1] if self.valid_terms else self.term_maximum
+
+    def is_valid(self,
+                 number_of_terms=None,
+                 number_of_checks=1000):
+        """
+        Checks whether a metalog is a valid distribution, i.e. whether its quantile function is strictly increasing.
+
+        Args:
+            number_of_terms (int, optional): The number of terms to check. If None, the default number of terms is used. Defaults to None.
+            number_of_checks (int, optional): The number of probabilities at which the slope of the quantile function is checked. Defaults to 1000.
+
+        Returns:
+            bool: Whether the metalog is valid.
+        """
+        # Check the slope at evenly spaced probabilities, and at finer steps in each tail
+        probabilities = np.concatenate([
+            np.geomspace(1e-6, 0.5 / number_of_checks, 20),
+            (np.arange(number_of_checks) + 0.5) / number_of_checks,
+            1 - np.geomspace(0.5 / number_of_checks, 1e-6, 20)
+        ])
+        # The bounded transforms are increasing, so only the slope of the unbounded metalog needs to be positive
+        return bool(np.all(self._evaluate_slope(probabilities, self._get_coefficients(number_of_terms)) > 0))
+
+    def quantile(self,
+                 probabilities,
+                 number_of_terms=None):
+        """
+        Evaluates the quantile function (inverse CDF) of the metalog.
+
+        Args:
+            probabilities (float or array-like): The cumulative probabilities, between 0 and 1.
+            number_of_terms (int, optional): The number of terms to use. If None, the default number of terms is used. Defaults to None.
+
+        Returns:
+            float or numpy.ndarray: The value at each probability.
+        """
+        probabilities = np.asarray(probabilities, dtype=float)
+        coefficients = self._get_coefficients(number_of_terms)
+
+        # Evaluate large arrays in blocks that fit in the CPU cache, so each step doesn't stream the whole array through memory
+        if probabilities.size > _BLOCK_SIZE:
+            flat_probabilities = probabilities.ravel()
+            quantiles = np.empty_like(flat_probabilities)
+            for block_start in range(0, flat_probabilities.size, _BLOCK_SIZE):
+                block = slice(block_start, block_start + _BLOCK_SIZE)
+                quantiles[block] = self._inverse_transform(self._evaluate_metalog(flat_probabilities[block], coefficients))
+            return quantiles.reshape(probabilities.shape)
+        quantiles = self._inverse_transform(self._evaluate_metalog(probabilities, coefficients))
+        return quantiles if quantiles.ndim else float(quantiles)
+
+    def density(self,
+                probabilities,
+                number_of_terms=None):
+        """
+        Evaluates the probability density of the metalog at the quantile of each probability.
+
+        Args:
+            probabilities (float or array-like): The cumulative probabilities, between 0 and 1.
+            number_of_terms (int, optional): The number of terms to use. If None, the default number of terms is used. Defaults to None.
+
+        Returns:
+            float or numpy.ndarray: The probability density at the quantile of each probability.
+        """
+        probabilities = np.asarray(probabilities, dtype=float)
+        coefficients = self._get_coefficients(number_of_terms)
+        metalog_values = self._evaluate_metalog(probabilities, coefficients)
+        slope = self._evaluate_slope(probabilities, coefficients)
+
+        # Apply the chain rule for the bounded transforms
+        if self.boundedness == 'sl':
+            slope = slope * np.exp(metalog_values)
+        elif self.boundedness == 'su':
+            slope = slope * np.exp(-metalog_values)
+        elif self.boundedness == 'b':
+            bounded_share = expit(metalog_values)
+            slope = slope * (self.upper_bound - self.lower_bound) * bounded_share * (1 - bounded_share)
+        densities = 1 / slope
+        return densities if densities.ndim else float(densities)
+
+    def sample(self,
+               number_of_samples=10000,
+               number_of_terms=None,
+               random_seed=412,
+               generator='numpy',
+               hdr_variable_id=1,
+               hdr_entity_id=1,
+               sampling_method='random'):
+        """
+        Draws random samples from the metalog by evaluating its quantile function at uniform random numbers.
+
+        Args:
+            number_of_samples (int, optional): The number of samples to draw. Defaults to 10000.
+            number_of_terms (int, optional): The number of terms to use. If None, the default number of terms is used. Defaults to None.
+            random_seed (int or numpy.random.Generator, optional): The random seed to use when generator is 'numpy'. Defaults to 412.
+            generator (str, optional): Either 'numpy' (numpy's default generator) or 'hdr' (the Hubbard Decision Research generator, which matches SIPmath tools). Defaults to 'numpy'.
+            hdr_variable_id (int, optional): The HDR variable ID, used when generator is 'hdr'. Defaults to 1.
+            hdr_entity_id (int, optional): The HDR entity ID, used when generator is 'hdr'. Defaults to 1.
+            sampling_method (str, optional): The sampling method used when generator is 'numpy'. Either 'random', 'sobol', 'latin_hypercube', 'antithetic', or 'stratified'. See GenerateUniformSamples. Defaults to 'random'.
+
+        Returns:
+            numpy.ndarray: The random samples.
+        """
+        # Ensure that generator is either 'numpy' or 'hdr'
+        if generator not in ['numpy', 'hdr']:
+            raise ValueError("generator must be either 'numpy' or 'hdr'.")
+
+        # Generate uniform random numbers
+        if generator == 'hdr':
+            uniform_values = GenerateHDRRandomNumbers(number_of_samples, variable_id=hdr_variable_id, entity_id=hdr_entity_id)
+        else:
+            uniform_values = GenerateUniformSamples(number_of_samples, sampling_method=sampling_method, random_seed=random_seed)
+
+        # Evaluate the quantile function at the uniform random numbers
+        return self.quantile(uniform_values, number_of_terms)
+
+    def summary(self):
+        """
+        Summarizes the fitted metalogs, with one row per number of terms.
+
+        Returns:
+            pandas.DataFrame: The number of terms, whether the metalog is valid, selected percentiles, and the coefficients.
+        """
+        list_of_rows = []
+        for number_of_terms in sorted(self.coefficients):
+            row = {'Terms': number_of_terms, 'Valid': number_of_terms in self.valid_terms}
+            for percentile, quantile in zip([10, 50, 90], self.quantile([0.1, 0.5, 0.9], number_of_terms)):
+                row['P' + str(percentile)] = quantile
+            for j, coefficient in enumerate(self.coefficients[number_of_terms], start=1):
+                row['a' + str(j)] = coefficient
+            list_of_rows.append(row)
+        return pd.DataFrame(list_of_rows)
+
+    def to_metadata(self,
+                    number_of_terms=None):
+        """
+        Describes the metalog as a dictionary, for the metadata of a SIP library.
+
+        Args:
+            number_of_terms (int, optional): The number of terms to describe. If None, the default number of terms is used. Defaults to None.
+
+        Returns:
+            dict: The distribution, boundedness, bounds, number of terms, and coefficients.
+        """
+        if number_of_terms is None:
+            number_of_terms = self.default_terms
+        return {
+            'distribution': 'metalog',
+            'boundedness': self.boundedness,
+            'lower_bound': self.lower_bound,
+            'upper_bound': self.upper_bound,
+            'number_of_terms': number_of_terms,
+            'coefficients': self._get_coefficients(number_of_terms).tolist()
+        }
+
+    def __repr__(self):
+        return "MetalogDistribution(boundedness={!r}, terms={}, valid_terms={})".format(self.boundedness, sorted(self.coefficients), self.valid_terms)
+
+    def _get_coefficients(self, number_of_terms):
+        # Get the coefficients for a number of terms, with a clear error if they weren't fit
+        if number_of_terms is None:
+            number_of_terms = self.default_terms
+        if number_of_terms not in self.coefficients:
+            raise ValueError("The metalog has no coefficients for " + str(number_of_terms) + " terms. Available terms: " + str(sorted(self.coefficients)) + ".")
+        return self.coefficients[number_of_terms]
+
+    def _evaluate_metalog(self, probabilities, coefficients):
+        # Split the coefficients into a polynomial in (y - 0.5) and a polynomial multiplied by the log-odds, then evaluate both with Horner's method
+        centered_probabilities = probabilities - 0.5
+        polynomial_coefficients, log_odds_coefficients = _split_coefficients(coefficients)
+        metalog_values = _evaluate_polynomial(centered_probabilities, polynomial_coefficients)
+        if log_odds_coefficients.any():
+            metalog_values = metalog_values + np.log(probabilities / (1 - probabilities)) * _evaluate_polynomial(centered_probabilities, log_odds_coefficients)
+        return metalog_values
+
+    def _evaluate_slope(self, probabilities, coefficients):
+        # Differentiate M(y) = P(y - 0.5) + ln(y / (1 - y)) * Q(y - 0.5) with respect to y
+        centered_probabilities = probabilities - 0.5
+        polynomial_coefficients, log_odds_coefficients = _split_coefficients(coefficients)
+        powers = np.arange(polynomial_coefficients.size)
+        slope = _evaluate_polynomial(centered_probabilities, (powers * polynomial_coefficients)[1:])
+        slope = slope + np.log(probabilities / (1 - probabilities)) * _evaluate_polynomial(centered_probabilities, (powers * log_odds_coefficients)[1:])
+        slope = slope + _evaluate_polynomial(centered_probabilities, log_odds_coefficients) / (probabilities * (1 - probabilities))
+        return slope
+
+    def _inverse_transform(self, metalog_values):
+        # Transform values of the unbounded metalog back to the scale of the variable
+        return _inverse_transform_values(metalog_values, self.lower_bound, self.upper_bound)
+
+def _get_basis_terms(number_of_terms):
+    # Get the power of (y - 0.5) in each basis term, and whether the term is multiplied by the log-odds
+    list_of_basis_terms = [(0, False), (0, True), (1, True), (1, False)]
+    for term in range(5, number_of_terms + 1):
+        list_of_basis_terms.append(((term - 1) // 2, False) if term % 2 == 1 else (term // 2 - 1, True))
+    return list_of_basis_terms[:number_of_terms]
+
+
+def _create_basis(probabilities, number_of_terms):
+    # Create the matrix of basis terms, with one row per probability and one column per term
+    centered_probabilities = probabilities - 0.5
+    log_odds = np.log(probabilities / (1 - probabilities))
+    basis = np.empty((probabilities.size, number_of_terms))
+    for j, (power, has_log_odds) in enumerate(_get_basis_terms(number_of_terms)):
+        basis[:, j] = centered_probabilities ** power * (log_odds if has_log_odds else 1)
+    return basis
+
+
+def _split_coefficients(coefficients):
+    # Sort the coefficients by power, separately for the terms with and without the log-odds
+    list_of_basis_terms = _get_basis_terms(coefficients.size)
+    highest_power = max(power for power, has_log_odds in list_of_basis_terms)
+    polynomial_coefficients = np.zeros(highest_power + 1)
+    log_odds_coefficients = np.zeros(highest_power + 1)
+    for coefficient, (power, has_log_odds) in zip(coefficients, list_of_basis_terms):
+        if has_log_odds:
+            log_odds_coefficients[power] += coefficient
+        else:
+            polynomial_coefficients[power] += coefficient
+    return polynomial_coefficients, log_odds_coefficients
+
+
+def _evaluate_polynomial(x, coefficients):
+    # Evaluate a polynomial with coefficients in increasing order of power using Horner's method
+    if coefficients.size == 0:
+        return np.zeros_like(x)
+    result = np.full_like(x, coefficients[-1])
+    for coefficient in coefficients[-2::-1]:
+        result *= x
+        result += coefficient
+    return result
+
+
+def _transform_values(values, lower_bound, upper_bound):
+    # Transform bounded values to the unbounded scale that the metalog is fit on
+    if lower_bound is not None and upper_bound is not None:
+        return np.log((values - lower_bound) / (upper_bound - values))
+    if lower_bound is not None:
+        return np.log(values - lower_bound)
+    if upper_bound is not None:
+        return -np.log(upper_bound - values)
+    return values
+
+
+def _inverse_transform_values(metalog_values, lower_bound, upper_bound):
+    # Transform values on the unbounded scale back to the scale of the bounded variable
+    if lower_bound is not None and upper_bound is not None:
+        return lower_bound + (upper_bound - lower_bound) * expit(metalog_values)
+    if lower_bound is not None:
+        return lower_bound + np.exp(metalog_values)
+    if upper_bound is not None:
+        return upper_bound - np.exp(-metalog_values)
+    return metalog_values
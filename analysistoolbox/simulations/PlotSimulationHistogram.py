@@ -0,0 +1,309 @@
+# Load packages
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import textwrap
+from .StreamingSummary import StreamingSummary
+
+# Set the largest number of bins drawn for raw simulated values
+_MAXIMUM_NUMBER_OF_BINS = 200
+
+# Declare function
+def PlotSimulationHistogram(simulation_results,
+                            # Histogram formatting arguments
+                            number_of_bins='auto',
+                            bin_width=None,
+                            mean=None,
+                            median=None,
+                            fill_color="#999999",
+                            fill_transparency=0.6,
+                            figure_size=(8, 6),
+                            show_mean=True,
+                            show_median=True,
+                            # Text formatting arguments
+                            title_for_plot="Simulation Results",
+                            subtitle_for_plot="Showing the distribution of the outcome",
+                            caption_for_plot=None,
+                            data_source_for_plot=None,
+                            show_y_axis=False,
+                            title_y_indent=1.1,
+                            subtitle_y_indent=1.05,
+                            caption_y_indent=-0.15,
+                            # Output arguments
+                            show_plot=True,
+                            filepath_to_save_plot=None):
+    """
+    Plots the distribution of a simulated variable from pre-binned histogram counts. This is the shared renderer of the Simulate* functions and the metalog builders.
+    Raw simulated values are binned once with numpy, and their mean and median are calculated on the array, so that only the bins are drawn.
+    A StreamingSummary of a chunked simulation, or counts and bin edges that were already calculated, can be plotted directly. Either way,
+    the time spent drawing doesn't depend on the number of trials that were simulated. Set show_plot to False and give a filepath_to_save_plot
+    to write the plot to a file without displaying it, e.g. in a script or on a server.
+
+    Args:
+        simulation_results (StreamingSummary, array-like, or tuple): The simulated values (a numpy array, list, pandas Series, or single-column dataframe),
+            a StreamingSummary of them, or a tuple of histogram counts and bin edges, as returned by numpy.histogram.
+        number_of_bins (int or str, optional): The number of bins, or a numpy.histogram_bin_edges method, used when raw values are given. At most 200 bins are drawn. Defaults to 'auto'.
+        bin_width (float, optional): The width of each bin, used instead of number_of_bins when raw values are given. A StreamingSummary's histogram is re-binned to this width.
+            Use 1 for counts, so that each bin is centered on a whole number. Defaults to None.
+        mean (float, optional): The mean to show. If None, it is calculated from the values, the summary, or the bin centers. Defaults to None.
+        median (float, optional): The median to show. If None, it is calculated from the values, the summary, or interpolated from the counts. Defaults to None.
+        fill_color (str, optional): The color to fill the histogram bars with. Defaults to "#999999".
+        fill_transparency (float, optional): The transparency of the histogram bars. Defaults to 0.6.
+        figure_size (tuple, optional): The size of the plot figure. Defaults to (8, 6).
+        show_mean (bool, optional): Whether to show the mean on the plot. Defaults to True.
+        show_median (bool, optional): Whether to show the median on the plot. Defaults to True.
+        title_for_plot (str, optional): The title of the plot. Defaults to "Simulation Results".
+        subtitle_for_plot (str, optional): The subtitle of the plot. Defaults to "Showing the distribution of the outcome".
+        caption_for_plot (str, optional): The caption of the plot. Defaults to None.
+        data_source_for_plot (str, optional): The data source of the plot. Defaults to None.
+        show_y_axis (bool, optional): Whether to show the y-axis on the plot. Defaults to False.
+        title_y_indent (float, optional): The y-indent of the plot title. Defaults to 1.1.
+        subtitle_y_indent (float, optional): The y-indent of the plot subtitle. Defaults to 1.05.
+        caption_y_indent (float, optional): The y-indent of the plot caption. Defaults to -0.15.
+        show_plot (bool, optional): Whether to display the plot. If False, the figure is closed once it is saved. Defaults to True.
+        filepath_to_save_plot (str, optional): The filepath to save the plot to. Must end with '.png' or '.jpg'. Defaults to None.
+
+    Returns:
+        None
+    """
+    # Ensure that the filepath ends with '.png' or '.jpg'
+    if filepath_to_save_plot is not None and not filepath_to_save_plot.endswith('.png') and not filepath_to_save_plot.endswith('.jpg'):
+        raise ValueError("The filepath to save the plot must end with '.png' or '.jpg'.")
+
+    # Get the histogram counts, bin edges, mean, and median
+    if isinstance(simulation_results, StreamingSummary):
+        bin_counts, bin_edges = _get_summary_histogram(simulation_results, number_of_bins, bin_width)
+        if mean is None:
+            mean = simulation_results.mean
+        if median is None and show_median:
+            median = simulation_results.median
+    elif isinstance(simulation_results, tuple):
+        bin_counts, bin_edges = np.asarray(simulation_results[0], dtype=float), np.asarray(simulation_results[1], dtype=float)
+        if bin_edges.size != bin_counts.size + 1:
+            raise ValueError("The bin edges must have one more value than the histogram counts.")
+        bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
+        if mean is None:
+            mean = np.sum(bin_counts * bin_centers) / np.sum(bin_counts)
+        if median is None and show_median:
+            median = _interpolate_median(bin_counts, bin_edges)
+    else:
+        if isinstance(simulation_results, (pd.Series, pd.DataFrame)):
+            simulation_results = simulation_results.to_numpy()
+        simulated_values = np.asarray(simulation_results, dtype=float).ravel()
+        simulated_values = simulated_values[np.isfinite(simulated_values)]
+        if simulated_values.size == 0:
+            raise ValueError("There are no finite simulated values to plot.")
+        # Calculate the quartiles in one pass, for the median and the width of the bins
+        lower_quartile, middle_quartile, upper_quartile = np.percentile(simulated_values, [25, 50, 75])
+        bin_edges = _get_bin_edges(simulated_values, number_of_bins, bin_width, upper_quartile - lower_quartile)
+        bin_counts, bin_edges = np.histogram(simulated_values, bins=bin_edges)
+        if mean is None:
+            mean = simulated_values.mean()
+        if median is None:
+            median = middle_quartile
+    
+    # Create figure and axes
+    fig, ax = plt.subplots(figsize=figure_size)
+    
+    # Draw the pre-binned histogram as one filled outline, which is much faster to draw than a bar for each bin
+    ax.stairs(
+        bin_counts,
+        bin_edges,
+        fill=True,
+        color=fill_color,
+        alpha=fill_transparency
+    )
+
+    # Separate the bins with thin white lines
+    ax.vlines(
+        bin_edges[1:-1],
+        ymin=0,
+        ymax=np.minimum(bin_counts[:-1], bin_counts[1:]),
+        colors="white",
+        linewidth=0.5
+    )
+    ax.set_ylim(bottom=0)
+    
+    # Remove top, left, and right spines. Set bottom spine to dark gray.
+    ax.spines['top'].set_visible(False)
+    ax.spines['left'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['bottom'].set_color("#262626")
+    
+    # Remove the y-axis, and adjust the indent of the plot titles
+    if show_y_axis == False:
+        ax.axes.get_yaxis().set_visible(False)
+        x_indent = 0.015
+    else:
+        x_indent = -0.005
+    
+    # Remove the y-axis label
+    ax.set_ylabel(None)
+    
+    # Remove the x-axis label
+    ax.set_xlabel(None)
+    
+    # Show the mean if requested
+    if show_mean:
+        # Show the mean as a vertical line with a label
+        ax.axvline(
+            x=mean,
+            ymax=0.97-.02,
+            color="#262626",
+            linestyle="--",
+            linewidth=1.5,
+            alpha=0.5
+        )
+        ax.text(
+            x=mean, 
+            y=plt.ylim()[1] * 0.97, 
+            s='Mean: {:.2f}'.format(mean),
+            horizontalalignment='center',
+            fontname="Arial",
+            fontsize=9,
+            color="#262626",
+            alpha=0.75
+        )
+    
+    # Show the median if requested
+    if show_median:
+        # Show the median as a vertical line with a label
+        ax.axvline(
+            x=median,
+            ymax=0.90-.02,
+            color="#262626",
+            linestyle=":",
+            linewidth=1.5,
+            alpha=0.5
+        )
+        ax.text(
+            x=median,
+            y=plt.ylim()[1] * .90,
+            s='Median: {:.2f}'.format(median),
+            horizontalalignment='center',
+            fontname="Arial",
+            fontsize=9,
+            color="#262626",
+            alpha=0.75
+        )
+    
+    # Set the title with Arial font, size 14, and color #262626 at the top of the plot
+    ax.text(
+        x=x_indent,
+        y=title_y_indent,
+        s=title_for_plot,
+        fontname="Arial",
+        fontsize=14,
+        color="#262626",
+        transform=ax.transAxes
+    )
+    
+    # Set the subtitle with Arial font, size 11, and color #666666
+    ax.text(
+        x=x_indent,
+        y=subtitle_y_indent,
+        s=subtitle_for_plot,
+        fontname="Arial",
+        fontsize=11,
+        color="#666666",
+        transform=ax.transAxes
+    )
+    
+    # Set x-axis tick label font to Arial, size 9, and color #666666
+    ax.tick_params(
+        axis='x',
+        which='major',
+        labelsize=9,
+        labelcolor="#666666",
+        pad=2,
+        bottom=True,
+        labelbottom=True
+    )
+    plt.xticks(fontname='Arial')
+    
+    # Add a word-wrapped caption if one is provided
+    if caption_for_plot != None or data_source_for_plot != None:
+        # Create starting point for caption
+        wrapped_caption = ""
+        
+        # Add the caption to the plot, if one is provided
+        if caption_for_plot != None:
+            # Word wrap the caption without splitting words
+            wrapped_caption = textwrap.fill(caption_for_plot, 110, break_long_words=False)
+            
+        # Add the data source to the caption, if one is provided
+        if data_source_for_plot != None:
+            wrapped_caption = wrapped_caption + "\n\nSource: " + data_source_for_plot
+        
+        # Add the caption to the plot
+        ax.text(
+            x=x_indent,
+            y=caption_y_indent,
+            s=wrapped_caption,
+            fontname="Arial",
+            fontsize=8,
+            color="#666666",
+            transform=ax.transAxes
+        )
+        
+    # If filepath_to_save_plot is provided, save the plot
+    if filepath_to_save_plot != None:
+        plt.savefig(
+            filepath_to_save_plot,
+            bbox_inches="tight"
+        )
+    
+    # Show plot, or close it if it is only saved
+    if show_plot:
+        plt.show()
+        
+        # Clear plot
+        plt.clf()
+    else:
+        plt.close(fig)
+
+
+def _get_bin_edges(simulated_values, number_of_bins, bin_width, interquartile_range):
+    # Center bins of the given width on multiples of the width, e.g. on whole numbers for counts
+    minimum, maximum = simulated_values.min(), simulated_values.max()
+    if bin_width is not None:
+        if bin_width <= 0:
+            raise ValueError("bin_width must be greater than 0.")
+        first_edge = (np.floor(minimum / bin_width) - 0.5) * bin_width
+        last_edge = (np.ceil(maximum / bin_width) + 0.5) * bin_width
+        if (last_edge - first_edge) / bin_width <= _MAXIMUM_NUMBER_OF_BINS:
+            return np.arange(first_edge, last_edge + bin_width / 2, bin_width)
+        number_of_bins = _MAXIMUM_NUMBER_OF_BINS
+    
+    # Use numpy's 'auto' rule (the narrower of the Freedman-Diaconis and Sturges widths) with the quartiles already calculated, rather than sorting the values again
+    if number_of_bins == 'auto':
+        if maximum == minimum:
+            number_of_bins = 1
+        else:
+            sturges_width = (maximum - minimum) / (np.log2(simulated_values.size) + 1)
+            freedman_diaconis_width = 2 * interquartile_range * simulated_values.size ** (-1 / 3)
+            number_of_bins = int(np.ceil((maximum - minimum) / (min(sturges_width, freedman_diaconis_width) if freedman_diaconis_width > 0 else sturges_width)))
+    
+    # Use at most the maximum number of bins
+    bin_edges = np.histogram_bin_edges(simulated_values, bins=number_of_bins, range=(minimum, maximum))
+    if bin_edges.size - 1 > _MAXIMUM_NUMBER_OF_BINS:
+        bin_edges = np.histogram_bin_edges(simulated_values, bins=_MAXIMUM_NUMBER_OF_BINS, range=(minimum, maximum))
+    return bin_edges
+
+
+def _get_summary_histogram(simulation_summary, number_of_bins, bin_width):
+    # Use the summary's own histogram, unless a bin width is given
+    bin_counts, bin_edges = simulation_summary.histogram()
+    if bin_width is None or bin_counts.size == 0:
+        return bin_counts, bin_edges
+
+    # Move the count of each of the summary's bins into the bin of the given width that holds its center, e.g. so counts sit on whole numbers
+    bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
+    new_bin_edges = _get_bin_edges(np.array([simulation_summary.minimum, simulation_summary.maximum]), number_of_bins, bin_width, 0)
+    return np.histogram(bin_centers, bins=new_bin_edges, weights=bin_counts)
+
+
+def _interpolate_median(bin_counts, bin_edges):
+    # Interpolate the median within the bin where the cumulative count passes half of the total
+    cumulative_counts = np.concatenate([[0], np.cumsum(bin_counts)])
+    return float(np.interp(cumulative_counts[-1] / 2, cumulative_counts, bin_edges))
@@ -0,0 +1,408 @@
+# Load packages
+from datetime import date
+import json
+import numpy as np
+import operator
+import os
+import pandas as pd
+from .MetalogDistribution import MetalogDistribution
+
+# Declare class
+class SIPLibrary:
+    """
+    A library of stochastic information packets (SIPs), stored as a single 2-D numpy array of trials x variables.
+    Each variable is stored contiguously (column-major order), so selecting a variable returns a zero-copy view of
+    its trials, and arithmetic between libraries, arrays, and numbers is vectorized over the whole buffer.
+    Long and wide DataFrames are only created when requested with to_dataframe().
+    Libraries can be saved to disk with save() and reopened as a memory map with LoadSIPLibrary(), or exported to the SIPmath 3.0 JSON standard with to_sipmath_json().
+
+    Args:
+        data (array-like): The simulated values, with one row per trial and one column per variable. A 1-D array is treated as a single variable.
+        variable_names (list of str, optional): The name of each variable. If None, the variables are named 'Variable 1', 'Variable 2', etc. Defaults to None.
+        metadata (dict, optional): A dictionary of metadata (e.g. seeds or distribution parameters) for each variable, keyed by variable name. Defaults to None.
+        copy (bool, optional): Whether to copy the data. If False, the data is only copied if it isn't already a column-major float array. Defaults to False.
+    """
+
+    # Let numpy arrays defer to the SIP library's arithmetic operators (e.g. array * library)
+    __array_ufunc__ = None
+
+    def __init__(self,
+                 data,
+                 variable_names=None,
+                 metadata=None,
+                 copy=False):
+        # Convert the data to a column-major, 2-D array of floats
+        if copy:
+            data = np.array(data, dtype=float, order='F')
+        else:
+            data = np.asarray(data, dtype=float, order='F')
+        if data.ndim == 1:
+            data = data.reshape(-1, 1, order='F')
+        if data.ndim != 2:
+            raise ValueError("data must be a 1-D or 2-D array of trials x variables.")
+
+        # Set default variable names, if not specified
+        if variable_names is None:
+            variable_names = ['Variable ' + str(i) for i in range(1, data.shape[1] + 1)]
+        variable_names = list(variable_names)
+
+        # Ensure that there is one unique name per variable
+        if len(variable_names) != data.shape[1]:
+            raise ValueError("The number of variable_names must equal the number of columns in data.")
+        if len(set(variable_names)) != len(variable_names):
+            raise ValueError("variable_names must be unique.")
+
+        # Set the library attributes
+        self.data = data
+        self.variable_names = variable_names
+        self.metadata = {variable_name: dict((metadata or {}).get(variable_name, {})) for variable_name in variable_names}
+
+    @classmethod
+    def from_dataframe(cls,
+                       dataframe,
+                       list_of_variables=None,
+                       metadata=None):
+        """
+        Creates a SIP library from a wide DataFrame with one column per variable.
+
+        Args:
+            dataframe (pandas.DataFrame): The dataframe of simulated values.
+            list_of_variables (list of str, optional): The columns to include. If None, all columns except 'Trial' are included. Defaults to None.
+            metadata (dict, optional): A dictionary of metadata for each variable, keyed by variable name. Defaults to None.
+
+        Returns:
+            SIPLibrary: The SIP library.
+        """
+        if list_of_variables is None:
+            list_of_variables = [column for column in dataframe.columns if column != 'Trial']
+        return cls(dataframe[list_of_variables].to_numpy(dtype=float), list_of_variables, metadata=metadata)
+
+    @property
+    def number_of_trials(self):
+        """int: The number of trials in each SIP."""
+        return self.data.shape[0]
+
+    @property
+    def number_of_variables(self):
+        """int: The number of variables in the library."""
+        return self.data.shape[1]
+
+    @property
+    def shape(self):
+        """tuple: The number of trials and number of variables."""
+        return self.data.shape
+
+    def __len__(self):
+        return self.number_of_trials
+
+    def __contains__(self, variable_name):
+        return variable_name in self.variable_names
+
+    def __iter__(self):
+        return iter(self.variable_names)
+
+    def __repr__(self):
+        # Only show the first and last few variable names of large libraries
+        if self.number_of_variables > 10:
+            shown_names = ', '.join(repr(name) for name in self.variable_names[:5]) + ', ..., ' + ', '.join(repr(name) for name in self.variable_names[-5:])
+            return "SIPLibrary(number_of_trials={:,}, number_of_variables={:,}, variable_names=[{}])".format(self.number_of_trials, self.number_of_variables, shown_names)
+        return "SIPLibrary(number_of_trials={:,}, variable_names={})".format(self.number_of_trials, self.variable_names)
+
+    def __getitem__(self, key):
+        # Return a zero-copy view of a single variable's trials
+        if isinstance(key, str):
+            return self.data[:, self._get_variable_index(key)]
+        # Return a new library with the selected variables
+        list_of_indices = [self._get_variable_index(variable_name) for variable_name in key]
+        return SIPLibrary(
+            self.data[:, list_of_indices],
+            [self.variable_names[i] for i in list_of_indices],
+            metadata={self.variable_names[i]: self.metadata[self.variable_names[i]] for i in list_of_indices}
+        )
+
+    def __setitem__(self, variable_name, values):
+        # Overwrite the trials of an existing variable in place, or add a new variable
+        if variable_name in self.variable_names:
+            self.data[:, self._get_variable_index(variable_name)] = values
+        else:
+            self.add_variable(variable_name, values)
+
+    def add_variable(self,
+                     variable_name,
+                     values,
+                     metadata=None):
+        """
+        Adds a variable to the library. This reallocates the buffer, so when adding many variables it is faster to
+        create the library with every variable up front (e.g. with CreateSIPDataframe(..., return_format='sip')) and fill them in place.
+
+        Args:
+            variable_name (str): The name of the new variable.
+            values (array-like or float): The simulated values of the new variable, with one value per trial. A single number is repeated for every trial.
+            metadata (dict, optional): Metadata for the new variable. Defaults to None.
+
+        Returns:
+            SIPLibrary: The updated library.
+        """
+        # Ensure that the variable doesn't already exist
+        if variable_name in self.variable_names:
+            raise ValueError("The variable " + variable_name + " already exists in the SIP library.")
+
+        # Broadcast the values to one per trial
+        values = np.broadcast_to(np.asarray(values, dtype=float), (self.number_of_trials,))
+
+        # Copy the existing data into a larger column-major buffer, with the new variable in the last column
+        new_data = np.empty((self.number_of_trials, self.number_of_variables + 1), order='F')
+        new_data[:, :-1] = self.data
+        new_data[:, -1] = values
+        self.data = new_data
+        self.variable_names.append(variable_name)
+        self.metadata[variable_name] = dict(metadata or {})
+        return self
+
+    def to_dataframe(self,
+                     format='wide',
+                     include_trial_column=True):
+        """
+        Converts the library to a pandas DataFrame.
+
+        Args:
+            format (str, optional): Either 'wide' (one column per variable) or 'long' (one row per trial and variable). Defaults to 'wide'.
+            include_trial_column (bool, optional): Whether to include a 'Trial' column numbered from 1. Defaults to True.
+
+        Returns:
+            pandas.DataFrame: The simulated values.
+        """
+        # Ensure that format is either 'wide' or 'long'
+        if format not in ['wide', 'long']:
+            raise ValueError("format must be either 'wide' or 'long'.")
+
+        # Create a wide dataframe, with one column per variable
+        if format == 'wide':
+            dataframe = pd.DataFrame(self.data, columns=self.variable_names)
+            if include_trial_column:
+                dataframe.insert(0, 'Trial', np.arange(1, self.number_of_trials + 1))
+            return dataframe
+
+        # Create a long dataframe, reading the column-major buffer in order so the values aren't reshuffled
+        dataframe = pd.DataFrame({
+            'Variable': np.repeat(np.array(self.variable_names, dtype=object), self.number_of_trials),
+            'Value': self.data.ravel(order='F')
+        })
+        if include_trial_column:
+            dataframe.insert(0, 'Trial', np.tile(np.arange(1, self.number_of_trials + 1), self.number_of_variables))
+        return dataframe
+
+    def summary(self,
+                list_of_percentiles=[0.05, 0.25, 0.5, 0.75, 0.95]):
+        """
+        Summarizes each variable in the library.
+
+        Args:
+            list_of_percentiles (list of float, optional): The percentiles to include in the summary. Defaults to [0.05, 0.25, 0.5, 0.75, 0.95].
+
+        Returns:
+            pandas.DataFrame: The mean, standard deviation, minimum, percentiles, and maximum of each variable.
+        """
+        df_summary = pd.DataFrame({
+            'Variable': self.variable_names,
+            'Mean': self.data.mean(axis=0),
+            'Standard Deviation': self.data.std(axis=0, ddof=1),
+            'Minimum': self.data.min(axis=0)
+        })
+        arr_percentiles = np.quantile(self.data, list_of_percentiles, axis=0)
+        for percentile, percentile_values in zip(list_of_percentiles, arr_percentiles):
+            df_summary['{:g}th Percentile'.format(percentile * 100)] = percentile_values
+        df_summary['Maximum'] = self.data.max(axis=0)
+        return df_summary
+
+    def save(self,
+             filepath,
+             file_format=None):
+        """
+        Saves the library to disk as a binary file of trials with a JSON metadata sidecar of the same name (e.g. 'library.npy' and 'library.json').
+        The sidecar holds the variable names and each variable's metadata (e.g. seeds and distribution parameters).
+        The .npy format keeps the column-major layout, so LoadSIPLibrary() can memory-map it without copying; the Arrow IPC format
+        stores one column per variable, which can be read by other tools (e.g. pyarrow, polars, or R's arrow package).
+
+        Args:
+            filepath (str): The path to save the library to. The extension is replaced with .npy or .arrow for the trials and .json for the sidecar.
+            file_format (str, optional): Either 'npy' or 'arrow'. If None, 'arrow' is used when the filepath ends in .arrow or .feather, and 'npy' otherwise. Defaults to None.
+
+        Returns:
+            str: The path of the JSON metadata sidecar.
+        """
+        # Set the file format from the extension, if not specified
+        base_filepath, extension = os.path.splitext(filepath)
+        if file_format is None:
+            file_format = 'arrow' if extension.lower() in ['.arrow', '.feather'] else 'npy'
+
+        # Ensure that file_format is either 'npy' or 'arrow'
+        if file_format not in ['npy', 'arrow']:
+            raise ValueError("file_format must be either 'npy' or 'arrow'.")
+
+        # Save the trials
+        data_filepath = base_filepath + '.' + file_format
+        if file_format == 'npy':
+            np.save(data_filepath, np.asfortranarray(self.data))
+        else:
+            # Lazy load uncommon packages
+            import pyarrow as pa
+            table = pa.table({variable_name: self.data[:, i] for i, variable_name in enumerate(self.variable_names)})
+            with pa.OSFile(data_filepath, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+
+        # Save the metadata sidecar
+        return self._save_sidecar(data_filepath, file_format)
+
+    def to_sipmath_json(self,
+                        filepath=None,
+                        library_name='SIP Library',
+                        provenance=None,
+                        number_of_terms=5,
+                        entity_id=1):
+        """
+        Exports the library in the SIPmath 3.0 JSON standard, where each SIP is described by metalog coefficients and a
+        Hubbard Decision Research (HDR) random number generator rather than by its trials. Variables created from a metalog
+        (e.g. with CreateMetalogDistribution(..., return_format='sip')) use their own coefficients and bounds; other variables
+        are fit with an unbounded metalog of their trials.
+
+        Args:
+            filepath (str, optional): The path to save the JSON file to. If None, the JSON is only returned. Defaults to None.
+            library_name (str, optional): The name of the library. Defaults to 'SIP Library'.
+            provenance (str, optional): A description of where the library came from. Defaults to None.
+            number_of_terms (int, optional): The number of metalog terms used to fit variables that weren't created from a metalog. Defaults to 5.
+            entity_id (int, optional): The HDR entity ID, which separates the random numbers of different organizations or models. Defaults to 1.
+
+        Returns:
+            dict: The SIPmath 3.0 library.
+        """
+        list_of_generators = []
+        list_of_sips = []
+        for i, variable_name in enumerate(self.variable_names):
+            # Give each variable its own HDR random number stream
+            generator_name = 'hdr' + str(i + 1)
+            list_of_generators.append({
+                'name': generator_name,
+                'function': 'HDR_2_0',
+                'arguments': {'counter': 'PM_Index', 'entity': entity_id, 'varId': i + 1, 'seed3': 0, 'seed4': 0}
+            })
+
+            # Use the variable's own metalog, if it has one, otherwise fit one to its trials
+            variable_metadata = self.metadata[variable_name]
+            if variable_metadata.get('distribution') == 'metalog' and 'coefficients' in variable_metadata:
+                metalog_arguments = {'aCoefficients': list(variable_metadata['coefficients'])}
+                if variable_metadata.get('lower_bound') is not None:
+                    metalog_arguments['lowerBound'] = variable_metadata['lower_bound']
+                if variable_metadata.get('upper_bound') is not None:
+                    metalog_arguments['upperBound'] = variable_metadata['upper_bound']
+            else:
+                metalog_distribution = MetalogDistribution.fit(self[variable_name], term_minimum=number_of_terms, term_maximum=number_of_terms)
+                metalog_arguments = {'aCoefficients': metalog_distribution.coefficients[number_of_terms].tolist()}
+
+            # Describe the SIP, keeping its metadata alongside summary statistics of the trials
+            list_of_sips.append({
+                'name': variable_name,
+                'ref': {'source': 'rng', 'name': generator_name},
+                'function': 'Metalog_1_0',
+                'arguments': metalog_arguments,
+                'metadata': dict(
+                    variable_metadata,
+                    count=self.number_of_trials,
+                    mean=self[variable_name].mean(),
+                    P10=np.quantile(self[variable_name], 0.1),
+                    P50=np.quantile(self[variable_name], 0.5),
+                    P90=np.quantile(self[variable_name], 0.9)
+                )
+            })
+
+        # Create the library
+        sipmath_library = {
+            'name': library_name,
+            'objectType': 'sipModel',
+            'libraryType': 'SIPmath_3_0',
+            'dateCreated': date.today().isoformat(),
+            'provenance': provenance or '',
+            'U01': {'rng': list_of_generators},
+            'sips': list_of_sips,
+            'version': '1'
+        }
+
+        # Convert numpy values in the library to Python types
+        sipmath_library = json.loads(json.dumps(sipmath_library, default=_convert_to_json_value))
+
+        # Save the library, if requested
+        if filepath is not None:
+            with open(filepath, 'w') as sipmath_file:
+                json.dump(sipmath_library, sipmath_file, indent=2)
+        return sipmath_library
+
+    def _save_sidecar(self, data_filepath, file_format):
+        # Save the metadata sidecar, referring to the trials file by name so that the pair can be moved together
+        sidecar_filepath = os.path.splitext(data_filepath)[0] + '.json'
+        with open(sidecar_filepath, 'w') as sidecar_file:
+            json.dump({
+                'file_format': file_format,
+                'data_file': os.path.basename(data_filepath),
+                'number_of_trials': self.number_of_trials,
+                'variable_names': self.variable_names,
+                'metadata': self.metadata
+            }, sidecar_file, indent=2, default=_convert_to_json_value)
+        return sidecar_filepath
+
+    def _get_variable_index(self, variable_name):
+        # Get the column index of a variable, with a clear error if it doesn't exist
+        try:
+            return self.variable_names.index(variable_name)
+        except ValueError:
+            raise KeyError("The variable " + str(variable_name) + " is not in the SIP library.")
+
+    def _apply_operator(self, other, operation, reverse=False):
+        # Use the underlying buffer of another library, after checking that the shapes match
+        if isinstance(other, SIPLibrary):
+            if other.shape != self.shape:
+                raise ValueError("SIP libraries must have the same number of trials and variables to be combined.")
+            other = other.data
+        # Apply the operation to the whole buffer at once
+        result = operation(other, self.data) if reverse else operation(self.data, other)
+        return SIPLibrary(result, list(self.variable_names))
+
+    def __add__(self, other):
+        return self._apply_operator(other, operator.add)
+
+    def __radd__(self, other):
+        return self._apply_operator(other, operator.add, reverse=True)
+
+    def __sub__(self, other):
+        return self._apply_operator(other, operator.sub)
+
+    def __rsub__(self, other):
+        return self._apply_operator(other, operator.sub, reverse=True)
+
+    def __mul__(self, other):
+        return self._apply_operator(other, operator.mul)
+
+    def __rmul__(self, other):
+        return self._apply_operator(other, operator.mul, reverse=True)
+
+    def __truediv__(self, other):
+        return self._apply_operator(other, operator.truediv)
+
+    def __rtruediv__(self, other):
+        return self._apply_operator(other, operator.truediv, reverse=True)
+
+    def __pow__(self, other):
+        return self._apply_operator(other, operator.pow)
+
+    def __neg__(self):
+        return SIPLibrary(-self.data, list(self.variable_names))
+
+
+def _convert_to_json_value(value):
+    # Convert numpy scalars and arrays, which the json module can't serialize, to Python types
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError("Object of type " + type(value).__name__ + " is not JSON serializable.")
+
@@ -0,0 +1,180 @@
+# Load packages
+import numpy as np
+from scipy import stats
+from .CreateRandomNumberGenerator import CreateRandomNumberGenerator
+from .GenerateUniformSamples import GenerateUniformSamples
+from .MetalogDistribution import MetalogDistribution
+from .SIPLibrary import SIPLibrary
+
+# Set the parameters each marginal distribution requires, named as in the matching Simulate* function
+_DISTRIBUTION_PARAMETERS = {
+    'normal': ['expected_outcome', 'standard_deviation_of_outcome'],
+    't': ['degrees_of_freedom', 'expected_outcome', 'standard_deviation_of_outcome'],
+    'poisson': ['expected_count'],
+    'binomial': ['probability_of_success', 'sample_size_per_trial'],
+    'geometric': ['probability_of_success'],
+    'exponential': ['expected_time_between_events'],
+    'gamma': ['number_of_events', 'expected_time_between_events'],
+    'metalog': ['metalog_distribution']
+}
+
+# Declare function
+def SimulateCorrelatedOutcomes(list_of_marginals,
+                               correlation_matrix,
+                               # Simulation parameters
+                               number_of_trials=10000,
+                               correlation_method='gaussian_copula',
+                               sampling_method='random',
+                               random_seed=412,
+                               return_format='sip'):
+    """
+    Simulates several uncertain variables at once, with the specified correlation between them.
+    Each variable is described by a marginal distribution, and every variable is drawn in one vectorized pass: a single trials x variables
+    matrix of uniform numbers is generated, the correlation is imposed with one Cholesky factorization, and each column is passed through the
+    inverse CDF of its marginal distribution.
+
+    Two methods are available:
+    - 'gaussian_copula': The uniform numbers are turned into standard normal scores, correlated with the Cholesky factor, and turned back into
+      uniform numbers. The correlation matrix is the correlation of the normal scores, which is close to the rank correlation of the outcomes.
+    - 'iman_conover': Each variable is drawn independently, then its trials are reordered to follow the ranks of correlated scores (Iman and Conover, 1982).
+      The simulated values of each variable are unchanged, so each marginal is reproduced exactly, and the rank correlation of the outcomes is close to the correlation matrix.
+
+    Args:
+        list_of_marginals (list of dict): One dictionary per variable, with a 'name', a 'distribution', and the distribution's parameters, named as in the matching Simulate* function:
+            'normal' (expected_outcome, standard_deviation_of_outcome), 't' (degrees_of_freedom, expected_outcome, standard_deviation_of_outcome), 'poisson' (expected_count),
+            'binomial' (probability_of_success, sample_size_per_trial), 'geometric' (probability_of_success), 'exponential' (expected_time_between_events),
+            'gamma' (number_of_events, expected_time_between_events), or 'metalog' (metalog_distribution, a fitted MetalogDistribution, and optionally number_of_terms).
+            For example: {'name': 'Demand', 'distribution': 'poisson', 'expected_count': 120}.
+        correlation_matrix (array-like or pandas.DataFrame): The variables x variables correlation matrix, in the order of list_of_marginals. It must be symmetric and positive definite, with ones on the diagonal.
+        number_of_trials (int, optional): The number of trials to simulate. Defaults to 10000.
+        correlation_method (str, optional): Either 'gaussian_copula' or 'iman_conover'. Defaults to 'gaussian_copula'.
+        sampling_method (str, optional): The sampling method used to draw the uniform numbers. Either 'random', 'sobol', 'latin_hypercube', 'antithetic', or 'stratified'. See GenerateUniformSamples. Defaults to 'random'.
+        random_seed (int or numpy.random.Generator, optional): The random seed to use for replicability. Defaults to 412.
+        return_format (str, optional): Either 'sip' (a SIPLibrary with one variable per marginal, and its distribution and the correlation in its metadata),
+            'dataframe' (a wide dataframe with one column per variable), or 'array' (a trials x variables numpy array). Defaults to 'sip'.
+
+    Returns:
+        SIPLibrary, pandas.DataFrame, or numpy.ndarray: The simulated outcomes in the specified format.
+    """
+
+    # Ensure that correlation_method and return_format are valid
+    if correlation_method not in ['gaussian_copula', 'iman_conover']:
+        raise ValueError("correlation_method must be either 'gaussian_copula' or 'iman_conover'.")
+    if return_format not in ['sip', 'dataframe', 'array']:
+        raise ValueError("return_format must be one of the following: 'sip', 'dataframe', or 'array'.")
+
+    # Ensure that each marginal has a known distribution and all of its parameters
+    for marginal in list_of_marginals:
+        if marginal.get('distribution') not in _DISTRIBUTION_PARAMETERS:
+            raise ValueError("Each marginal's distribution must be one of the following: " + ", ".join("'" + distribution + "'" for distribution in _DISTRIBUTION_PARAMETERS) + ".")
+        missing_parameters = [parameter for parameter in _DISTRIBUTION_PARAMETERS[marginal['distribution']] if parameter not in marginal]
+        if missing_parameters:
+            raise ValueError("The " + marginal['distribution'] + " marginal '" + str(marginal.get('name')) + "' is missing the following parameters: " + ", ".join(missing_parameters))
+
+    # Get the name of each variable
+    list_of_variable_names = [str(marginal.get('name', 'Variable ' + str(i + 1))) for i, marginal in enumerate(list_of_marginals)]
+    if len(set(list_of_variable_names)) != len(list_of_variable_names):
+        raise ValueError("Each marginal must have a unique name.")
+
+    # Ensure that the correlation matrix is a valid correlation matrix for the marginals
+    correlation_matrix = np.asarray(correlation_matrix, dtype=float)
+    number_of_variables = len(list_of_marginals)
+    if correlation_matrix.shape != (number_of_variables, number_of_variables):
+        raise ValueError("correlation_matrix must have one row and one column per marginal.")
+    if not np.allclose(correlation_matrix, correlation_matrix.T) or not np.allclose(np.diag(correlation_matrix), 1):
+        raise ValueError("correlation_matrix must be symmetric, with ones on the diagonal.")
+
+    # Factor the correlation matrix once
+    try:
+        cholesky_factor = np.linalg.cholesky(correlation_matrix)
+    except np.linalg.LinAlgError:
+        raise ValueError("correlation_matrix must be positive definite.")
+
+    # Create a random number generator from the random seed for replicability
+    rng = CreateRandomNumberGenerator(random_seed)
+
+    # Generate one trials x variables matrix of independent uniform numbers
+    uniform_values = GenerateUniformSamples(
+        number_of_trials,
+        number_of_dimensions=number_of_variables,
+        sampling_method=sampling_method,
+        random_seed=rng
+    ).reshape(number_of_trials, number_of_variables)
+
+    # Impose the correlation
+    if correlation_method == 'gaussian_copula':
+        # Correlate the normal scores of the uniform numbers, and turn them back into uniform numbers
+        normal_scores = stats.norm.ppf(uniform_values) @ cholesky_factor.T
+        uniform_values = stats.norm.cdf(normal_scores)
+        arr_simulations = _calculate_inverse_cdfs(list_of_marginals, uniform_values)
+    else:
+        # Draw each variable independently
+        arr_simulations = _calculate_inverse_cdfs(list_of_marginals, uniform_values)
+
+        # Create scores with the target correlation, removing the sample correlation of the independent scores first,
+        # using a random permutation of evenly spaced normal scores for each variable
+        scores = stats.norm.ppf(np.arange(1, number_of_trials + 1) / (number_of_trials + 1))
+        scores = rng.permuted(np.tile(scores[:, np.newaxis], (1, number_of_variables)), axis=0)
+        score_cholesky_factor = np.linalg.cholesky(np.corrcoef(scores, rowvar=False).reshape(number_of_variables, number_of_variables))
+        scores = scores @ np.linalg.inv(score_cholesky_factor).T @ cholesky_factor.T
+
+        # Reorder each variable's simulated values to follow the ranks of its scores
+        score_ranks = np.argsort(np.argsort(scores, axis=0), axis=0)
+        arr_simulations = np.take_along_axis(np.sort(arr_simulations, axis=0), score_ranks, axis=0)
+
+    # Return the simulation results in the requested format
+    arr_simulations = np.asfortranarray(arr_simulations)
+    if return_format == 'array':
+        return arr_simulations
+    sip_library = SIPLibrary(
+        arr_simulations,
+        list_of_variable_names,
+        metadata={
+            variable_name: {
+                'distribution': marginal['distribution'],
+                'parameters': {key: value for key, value in marginal.items() if key not in ['name', 'distribution', 'metalog_distribution']},
+                'correlation_method': correlation_method,
+                'correlations': dict(zip(list_of_variable_names, correlation_matrix[i].tolist())),
+                'number_of_trials': number_of_trials,
+                'sampling_method': sampling_method,
+                'random_seed': random_seed if isinstance(random_seed, (int, np.integer)) else None
+            }
+            for i, (variable_name, marginal) in enumerate(zip(list_of_variable_names, list_of_marginals))
+        }
+    )
+    for variable_name, marginal in zip(list_of_variable_names, list_of_marginals):
+        if marginal['distribution'] == 'metalog':
+            sip_library.metadata[variable_name].update(marginal['metalog_distribution'].to_metadata(marginal.get('number_of_terms')))
+    if return_format == 'dataframe':
+        return sip_library.to_dataframe()
+    return sip_library
+
+
+def _calculate_inverse_cdfs(list_of_marginals, uniform_values):
+    # Pass each column of uniform numbers through the inverse CDF of its marginal distribution
+    arr_simulations = np.empty(uniform_values.shape, order='F')
+    for i, marginal in enumerate(list_of_marginals):
+        arr_simulations[:, i] = _calculate_inverse_cdf(marginal, uniform_values[:, i])
+    return arr_simulations
+
+
+def _calculate_inverse_cdf(marginal, uniform_values):
+    # Evaluate the inverse CDF of a marginal distribution, broadcasting any array parameters against the uniform numbers
+    distribution = marginal['distribution']
+    if distribution == 'normal':
+        return stats.norm.ppf(uniform_values, loc=marginal['expected_outcome'], scale=marginal['standard_deviation_of_outcome'])
+    if distribution == 't':
+        return stats.t.ppf(uniform_values, df=marginal['degrees_of_freedom']) * marginal['standard_deviation_of_outcome'] + marginal['expected_outcome']
+    if distribution == 'poisson':
+        return stats.poisson.ppf(uniform_values, mu=marginal['expected_count'])
+    if distribution == 'binomial':
+        return stats.binom.ppf(uniform_values, n=marginal['sample_size_per_trial'], p=marginal['probability_of_success'])
+    if distribution == 'geometric':
+        return stats.geom.ppf(uniform_values, p=marginal['probability_of_success'])
+    if distribution == 'exponential':
+        return stats.expon.ppf(uniform_values, scale=marginal['expected_time_between_events'])
+    if distribution == 'gamma':
+        return stats.gamma.ppf(uniform_values, a=marginal['number_of_events'], scale=marginal['expected_time_between_events'])
+    if not isinstance(marginal['metalog_distribution'], MetalogDistribution):
+        raise ValueError("metalog_distribution must be a fitted MetalogDistribution.")
+    return marginal['metalog_distribution'].quantile(uniform_values, marginal.get('number_of_terms'))
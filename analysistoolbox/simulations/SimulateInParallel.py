@@ -0,0 +1,188 @@
+# Load packages
+from concurrent.futures import ProcessPoolExecutor
+from inspect import signature
+from math import ceil
+import numpy as np
+import os
+import pandas as pd
+import time
+from .CreateRandomNumberGenerator import CreateRandomNumberGenerator
+from .StreamingSummary import StreamingSummary
+
+# Declare function
+def RunSimulationTask(simulation_function,
+                      number_of_trials,
+                      random_seed,
+                      simulation_arguments=None,
+                      summarize_results=False):
+    """
+    Runs one chunk of a simulation without plotting, and returns the simulated values along with timing information.
+    Any Simulate* function can be used, as can a user-defined model that takes number_of_trials and random_seed
+    arguments and returns an array of simulated values. This is the unit of work that SimulateInParallel sends to each worker.
+
+    Args:
+        simulation_function (function): The simulation function to run.
+        number_of_trials (int): The number of trials to simulate in this chunk.
+        random_seed (int, numpy.random.SeedSequence, or numpy.random.Generator): The random seed for this chunk.
+        simulation_arguments (dict, optional): Additional keyword arguments to pass to the simulation function. Defaults to None.
+        summarize_results (bool, optional): Whether to return a StreamingSummary of the values instead of the values themselves. If the simulation function can stream
+            its trials in chunks (return_format='stream'), the chunks are summarized as they are drawn, so memory use doesn't grow with the number of trials. Defaults to False.
+
+    Returns:
+        dict: The results (a numpy.ndarray or StreamingSummary), the number of trials, the seconds taken, and the process ID.
+    """
+    # Copy the simulation arguments so that the caller's dictionary isn't changed
+    simulation_arguments = dict(simulation_arguments or {})
+
+    # Turn off plotting and request an array, or a stream of chunks when summarizing, if the simulation function supports those arguments
+    function_parameters = signature(simulation_function).parameters
+    if 'plot_simulation_results' in function_parameters:
+        simulation_arguments['plot_simulation_results'] = False
+    is_streamed = summarize_results and 'return_format' in function_parameters and 'chunk_size' in function_parameters
+    if 'return_format' in function_parameters:
+        simulation_arguments['return_format'] = 'stream' if is_streamed else 'array'
+
+    # Set the number of trials using the argument name the function expects
+    if 'number_of_samples' in function_parameters and 'number_of_trials' not in function_parameters:
+        simulation_arguments['number_of_samples'] = number_of_trials
+    else:
+        simulation_arguments['number_of_trials'] = number_of_trials
+
+    # Run the simulation and time it
+    start_time = time.perf_counter()
+    results = simulation_function(random_seed=random_seed, **simulation_arguments)
+    if is_streamed:
+        results = StreamingSummary(
+            variable_name=simulation_arguments.get('simulated_variable_name', 'Simulated Outcome')
+        ).update_from_chunks(results)
+    elif summarize_results:
+        results = StreamingSummary(
+            variable_name=simulation_arguments.get('simulated_variable_name', 'Simulated Outcome')
+        ).update(results)
+    else:
+        results = np.asarray(results).ravel()
+    elapsed_seconds = time.perf_counter() - start_time
+
+    # Return the results with timing information
+    return {
+        'results': results,
+        'number_of_trials': number_of_trials,
+        'seconds': elapsed_seconds,
+        'process_id': os.getpid()
+    }
+
+
+# Declare function
+def SimulateInParallel(simulation_function,
+                       number_of_trials=10000000,
+                       number_of_workers=None,
+                       trials_per_task=None,
+                       random_seed=412,
+                       return_format='array',
+                       show_worker_timing=True,
+                       return_worker_timing=False,
+                       **simulation_arguments):
+    """
+    Splits a single simulation across multiple processes, giving each chunk of trials its own independent random number stream,
+    then merges the results. Any Simulate* function can be used, as can a user-defined model that takes number_of_trials and
+    random_seed arguments and returns an array of simulated values. The function must be defined at the top level of a module
+    (not a lambda or nested function) so that it can be sent to the worker processes.
+    A user-defined model that draws several inputs should split its random_seed into one stream per input with
+    CreateRandomNumberGenerator(random_seed, number_of_streams=...), rather than passing the same seed to each input.
+    Results are reproducible for a given random_seed, number_of_trials, and trials_per_task, regardless of how many workers are used.
+
+    Args:
+        simulation_function (function): The simulation function to run, e.g. SimulateTimeUntilNEvents.
+        number_of_trials (int, optional): The total number of trials to simulate. Defaults to 10000000.
+        number_of_workers (int, optional): The number of worker processes to use. If None, all available CPU cores are used. Defaults to None.
+        trials_per_task (int, optional): The number of trials in each chunk sent to a worker. If None, the trials are split evenly across the workers. Defaults to None.
+        random_seed (int or numpy.random.SeedSequence, optional): The random seed to use for replicability. Defaults to 412.
+        return_format (str, optional): Either 'array' (the concatenated simulated values) or 'summary' (a StreamingSummary merged from each chunk). Defaults to 'array'.
+        show_worker_timing (bool, optional): Whether to print the timing of each worker. Defaults to True.
+        return_worker_timing (bool, optional): Whether to also return a dataframe with the timing of each chunk. Defaults to False.
+        **simulation_arguments: Additional keyword arguments to pass to the simulation function, e.g. expected_count=3.
+
+    Returns:
+        numpy.ndarray or StreamingSummary: The merged simulation results. If return_worker_timing is True, a tuple of the results and a pandas.DataFrame of the timing of each chunk is returned.
+    """
+
+    # Ensure that return_format is either 'array' or 'summary'
+    if return_format not in ['array', 'summary']:
+        raise ValueError("return_format must be either 'array' or 'summary'.")
+
+    # Ensure that number_of_trials is a positive whole number
+    if number_of_trials < 1:
+        raise ValueError("number_of_trials must be a positive whole number.")
+
+    # If number_of_workers is not specified, use all available CPU cores
+    if number_of_workers is None:
+        number_of_workers = os.cpu_count() or 1
+
+    # If trials_per_task is not specified, split the trials evenly across the workers
+    if trials_per_task is None:
+        trials_per_task = ceil(number_of_trials / number_of_workers)
+
+    # Split the trials into tasks, each with its own independent random number stream
+    list_of_task_sizes = [min(trials_per_task, number_of_trials - task_start) for task_start in range(0, number_of_trials, trials_per_task)]
+    list_of_seed_sequences = CreateRandomNumberGenerator(
+        random_seed,
+        number_of_streams=len(list_of_task_sizes),
+        return_seed_sequences=True
+    )
+    summarize_results = return_format == 'summary'
+
+    # Run the tasks, in the current process if only one worker is requested
+    start_time = time.perf_counter()
+    if number_of_workers == 1:
+        list_of_task_results = [
+            RunSimulationTask(simulation_function, task_size, seed_sequence, simulation_arguments, summarize_results)
+            for task_size, seed_sequence in zip(list_of_task_sizes, list_of_seed_sequences)
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=number_of_workers) as executor:
+            list_of_task_results = list(executor.map(
+                RunSimulationTask,
+                [simulation_function] * len(list_of_task_sizes),
+                list_of_task_sizes,
+                list_of_seed_sequences,
+                [simulation_arguments] * len(list_of_task_sizes),
+                [summarize_results] * len(list_of_task_sizes)
+            ))
+    elapsed_seconds = time.perf_counter() - start_time
+
+    # Merge the results in task order, so the merged results don't depend on which worker finished first
+    if summarize_results:
+        simulation_results = StreamingSummary(
+            variable_name=simulation_arguments.get('simulated_variable_name', 'Simulated Outcome')
+        )
+        for task_result in list_of_task_results:
+            simulation_results.merge(task_result['results'])
+    else:
+        simulation_results = np.concatenate([task_result['results'] for task_result in list_of_task_results])
+
+    # Create a dataframe of the timing of each task
+    df_timing = pd.DataFrame({
+        'Task': range(1, len(list_of_task_results) + 1),
+        'Process ID': [task_result['process_id'] for task_result in list_of_task_results],
+        'Number of Trials': [task_result['number_of_trials'] for task_result in list_of_task_results],
+        'Seconds': [task_result['seconds'] for task_result in list_of_task_results]
+    })
+    df_timing['Trials per Second'] = df_timing['Number of Trials'] / df_timing['Seconds']
+
+    # Show the timing of each worker, if requested
+    if show_worker_timing:
+        df_worker_timing = df_timing.groupby('Process ID', as_index=False)[['Number of Trials', 'Seconds']].sum()
+        df_worker_timing['Trials per Second'] = df_worker_timing['Number of Trials'] / df_worker_timing['Seconds']
+        print(df_worker_timing.to_string(index=False))
+        print("Simulated {:,} trials in {:.2f} seconds across {:,} worker(s), which were busy for a combined {:.2f} seconds ({:.1f}x the elapsed time).".format(
+            number_of_trials,
+            elapsed_seconds,
+            df_worker_timing.shape[0],
+            df_timing['Seconds'].sum(),
+            df_timing['Seconds'].sum() / elapsed_seconds
+        ))
+
+    # Return the results, with the timing if requested
+    if return_worker_timing:
+        return simulation_results, df_timing
+    return simulation_results
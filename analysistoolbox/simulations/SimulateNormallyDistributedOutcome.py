@@ -1,11 +1,15 @@
 # Load packages
 from math import ceil
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import random
-import seaborn as sns
-import textwrap
+from scipy import stats
+from .CalculateSimulationStandardError import CalculateSimulationStandardError
+from .CreateRandomNumberGenerator import CreateRandomNumberGenerator
+from .GenerateUniformSamples import GenerateUniformSamples
+from .PlotSimulationHistogram import PlotSimulationHistogram
+from .SIPLibrary import SIPLibrary
+from .StreamSimulationChunks import StreamSimulationChunks
+from .StreamingSummary import StreamingSummary
 
 # Delcare function
 def SimulateNormallyDistributedOutcome(expected_outcome=0,
@@ -14,8 +18,10 @@ def SimulateNormallyDistributedOutcome(expected_outcome=0,
                                        # Simulation parameters
                                        number_of_trials=10000,
                                        return_format='dataframe',
+                                       chunk_size=1000000,
                                        simulated_variable_name='Simulated Outcome',
                                        random_seed=412,
+                                       sampling_method='random',
                                        # Plotting parameters
                                        plot_simulation_results=True,
                                        fill_color="#999999",
@@ -31,7 +37,8 @@ def SimulateNormallyDistributedOutcome(expected_outcome=0,
                                        show_y_axis=False,
                                        title_y_indent=1.1,
                                        subtitle_y_indent=1.05,
-                                       caption_y_indent=-0.15):
+                                       caption_y_indent=-0.15,
+                                       filepath_to_save_plot=None):
     """
     Simulates normally distributed outcomes based on the specified parameters.
     The normal distribution is a continuous probability distribution that is symmetrical around its mean, most of the observations cluster around the central peak, and the probabilities for values further away from the mean taper off equally in both directions. 
@@ -46,9 +53,11 @@ def SimulateNormallyDistributedOutcome(expected_outcome=0,
         standard_deviation_of_outcome (float): The standard deviation of the outcome. If not specified, it is estimated using min_max_of_outcome. Defaults to None.
         min_max_of_outcome (list): A list of length 2 specifying the minimum and maximum values of the outcome. If specified, standard_deviation_of_outcome is ignored. Defaults to None.
         number_of_trials (int): The number of trials to simulate. Defaults to 10000.
-        return_format (str): The format in which to return the simulation results. Must be either 'dataframe' or 'array'. Defaults to 'dataframe'.
+        return_format (str): The format of the simulation results. Either 'dataframe', 'array', 'stream' (a generator of numpy arrays, one per chunk of trials, drawn lazily and not plotted), 'summary' (a StreamingSummary of the trials, which uses constant memory), or 'sip' (a SIPLibrary with the distribution, its parameters, and the random seed recorded in its metadata, which can be saved to disk). Defaults to 'dataframe'.
+        chunk_size (int, optional): The number of trials drawn at a time when return_format is 'stream' or 'summary'. Defaults to 1000000.
         simulated_variable_name (str): The name of the simulated variable. Defaults to 'Simulated Outcome'.
-        random_seed (int): The random seed to use for replicability. Defaults to 412.
+        random_seed (int or numpy.random.Generator): The random seed to use for replicability. Defaults to 412.
+        sampling_method (str): The sampling method used to draw the trials through the inverse CDF of the distribution. Either 'random', 'sobol', 'latin_hypercube', 'antithetic', or 'stratified'. See GenerateUniformSamples. The variance-reduction methods reach the same precision with far fewer trials. Defaults to 'random'.
         plot_simulation_results (bool): Whether to plot the simulation results. Defaults to True.
         fill_color (str): The color to use for the histogram fill. Defaults to "#999999".
         fill_transparency (float): The transparency of the histogram fill. Defaults to 0.6.
@@ -63,27 +72,35 @@ def SimulateNormallyDistributedOutcome(expected_outcome=0,
         title_y_indent (float): The y-indent of the plot title. Defaults to 1.1.
         subtitle_y_indent (float): The y-indent of the plot subtitle. Defaults to 1.05.
         caption_y_indent (float): The y-indent of the plot caption. Defaults to -0.15.
+        filepath_to_save_plot (str, optional): The filepath to save the plot to. Must end with '.png' or '.jpg'. Defaults to None.
 
     Returns:
-        pandas.DataFrame or numpy.ndarray: The simulated outcomes in the specified format.
+        pandas.DataFrame, numpy.ndarray, generator, StreamingSummary, or SIPLibrary: The simulated outcomes in the specified format.
     """
     
     # Ensure arguments are valid
     if standard_deviation_of_outcome is not None and standard_deviation_of_outcome < 0:
         raise ValueError("Please make sure that your standard_deviation_of_outcome argument is greater than or equal to 0.")
     
-    # Ensure that return_format is either 'dataframe' or 'array'
-    if return_format not in ['dataframe', 'array']:
-        raise ValueError("return_format must be either 'dataframe' or 'array'.")
+    # Ensure that return_format is valid
+    if return_format not in ['dataframe', 'array', 'stream', 'summary', 'sip']:
+        raise ValueError("return_format must be one of the following: 'dataframe', 'array', 'stream', 'summary', or 'sip'.")
+    
+    # Ensure that chunk_size is a positive whole number
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive whole number.")
+    
+    # Ensure that sampling_method is valid
+    if sampling_method not in ['random', 'sobol', 'latin_hypercube', 'antithetic', 'stratified']:
+        raise ValueError("sampling_method must be one of the following: 'random', 'sobol', 'latin_hypercube', 'antithetic', or 'stratified'.")
     
     # Ensure that min_max_of_outcome is either None or a list of length 2
     if min_max_of_outcome is not None:
         if len(min_max_of_outcome) != 2:
             raise ValueError("If specified, min_max_of_outcome must be a list of length 2.")
     
-    # If specified, set random seed for replicability
-    if random_seed is not None:
-        random.seed(random_seed)
+    # Create a random number generator from the random seed for replicability
+    rng = CreateRandomNumberGenerator(random_seed)
     
     # If standard_deviation_of_outcome and min_max_of_outcome are not None, print a warning
     if standard_deviation_of_outcome is not None and min_max_of_outcome is not None:
@@ -98,165 +115,104 @@ def SimulateNormallyDistributedOutcome(expected_outcome=0,
             # of a normal distribution is typically equal to 3.29 times its standard deviation.
             standard_deviation_of_outcome = (min_max_of_outcome[1] - min_max_of_outcome[0]) / 3.29  
         
+    # Define how a chunk of trials is simulated
+    def simulate_chunk(rng, size):
+        if sampling_method == 'random':
+            return rng.normal(
+                loc=expected_outcome,
+                scale=standard_deviation_of_outcome,
+                size=size
+            )
+        uniform_values = GenerateUniformSamples(size, sampling_method=sampling_method, random_seed=rng)
+        return stats.norm.ppf(uniform_values, loc=expected_outcome, scale=standard_deviation_of_outcome)
+    
+    # If requested, stream the simulation in chunks so that memory use doesn't grow with the number of trials
+    if return_format in ['stream', 'summary']:
+        simulation_chunks = StreamSimulationChunks(
+            sampler=simulate_chunk,
+            number_of_trials=number_of_trials,
+            chunk_size=chunk_size,
+            random_seed=rng
+        )
+        if return_format == 'stream':
+            return simulation_chunks
+        
+        # Keep only online summaries of the chunks as they are drawn
+        simulation_summary = StreamingSummary(variable_name=simulated_variable_name).update_from_chunks(simulation_chunks)
+        
+        # Plot the aggregated histogram, if requested
+        if plot_simulation_results == True:
+            PlotSimulationHistogram(
+                simulation_summary,
+                fill_color=fill_color,
+                fill_transparency=fill_transparency,
+                figure_size=figure_size,
+                show_mean=show_mean,
+                show_median=show_median,
+                title_for_plot=title_for_plot,
+                subtitle_for_plot=subtitle_for_plot,
+                caption_for_plot=caption_for_plot,
+                data_source_for_plot=data_source_for_plot,
+                show_y_axis=show_y_axis,
+                title_y_indent=title_y_indent,
+                subtitle_y_indent=subtitle_y_indent,
+                caption_y_indent=caption_y_indent,
+                filepath_to_save_plot=filepath_to_save_plot
+            )
+        return simulation_summary
+    
     # Simulate normally distributed outcome
-    list_sim_results = np.random.normal(
-        loc=expected_outcome,
-        scale=standard_deviation_of_outcome,
-        size=number_of_trials
-    )
+    list_sim_results = simulate_chunk(rng, number_of_trials)
     
     # Create dataframe of simulation results
     df_simulation = pd.DataFrame(list_sim_results,
                                  columns=[simulated_variable_name])
     
+    # Record the sampling method and the standard error of the mean, so that the precision of the simulation is known
+    df_simulation.attrs['sampling_method'] = sampling_method
+    if number_of_trials > 1:
+        df_simulation.attrs['standard_error'] = CalculateSimulationStandardError(list_sim_results, sampling_method=sampling_method)
+    
     # Generate plot if user requests it
     if plot_simulation_results == True:
-        # Create figure and axes
-        fig, ax = plt.subplots(figsize=figure_size)
-        
-        # Create histogram using seaborn
-        sns.histplot(
-            data=df_simulation,
-            x=simulated_variable_name,
-            color=fill_color,
-            alpha=fill_transparency,
-        )
-        
-        # Remove top, left, and right spines. Set bottom spine to dark gray.
-        ax.spines['top'].set_visible(False)
-        ax.spines['left'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        ax.spines['bottom'].set_color("#262626")
-        
-        # Remove the y-axis, and adjust the indent of the plot titles
-        if show_y_axis == False:
-            ax.axes.get_yaxis().set_visible(False)
-            x_indent = 0.015
-        else:
-            x_indent = -0.005
-        
-        # Remove the y-axis label
-        ax.set_ylabel(None)
-        
-        # Remove the x-axis label
-        ax.set_xlabel(None)
-        
-        # Show the mean if requested
-        if show_mean:
-            # Calculate the mean
-            mean = df_simulation[simulated_variable_name].mean()
-            # Show the mean as a vertical line with a label
-            ax.axvline(
-                x=mean,
-                ymax=0.97-.02,
-                color="#262626",
-                linestyle="--",
-                linewidth=1.5,
-                alpha=0.5
-            )
-            ax.text(
-                x=mean, 
-                y=plt.ylim()[1] * 0.97, 
-                s='Mean: {:.2f}'.format(mean),
-                horizontalalignment='center',
-                fontname="Arial",
-                fontsize=9,
-                color="#262626",
-                alpha=0.75
-            )
-        
-        # Show the median if requested
-        if show_median:
-            # Calculate the median
-            median = df_simulation[simulated_variable_name].median()
-            # Show the median as a vertical line with a label
-            ax.axvline(
-                x=median,
-                ymax=0.90-.02,
-                color="#262626",
-                linestyle=":",
-                linewidth=1.5,
-                alpha=0.5
-            )
-            ax.text(
-                x=median,
-                y=plt.ylim()[1] * .90,
-                s='Median: {:.2f}'.format(median),
-                horizontalalignment='center',
-                fontname="Arial",
-                fontsize=9,
-                color="#262626",
-                alpha=0.75
-            )
-        
-        # Set the title with Arial font, size 14, and color #262626 at the top of the plot
-        ax.text(
-            x=x_indent,
-            y=title_y_indent,
-            s=title_for_plot,
-            fontname="Arial",
-            fontsize=14,
-            color="#262626",
-            transform=ax.transAxes
+        # Plot the pre-binned histogram of the simulated values
+        PlotSimulationHistogram(
+            list_sim_results,
+            fill_color=fill_color,
+            fill_transparency=fill_transparency,
+            figure_size=figure_size,
+            show_mean=show_mean,
+            show_median=show_median,
+            title_for_plot=title_for_plot,
+            subtitle_for_plot=subtitle_for_plot,
+            caption_for_plot=caption_for_plot,
+            data_source_for_plot=data_source_for_plot,
+            show_y_axis=show_y_axis,
+            title_y_indent=title_y_indent,
+            subtitle_y_indent=subtitle_y_indent,
+            caption_y_indent=caption_y_indent,
+            filepath_to_save_plot=filepath_to_save_plot
         )
         
-        # Set the subtitle with Arial font, size 11, and color #666666
-        ax.text(
-            x=x_indent,
-            y=subtitle_y_indent,
-            s=subtitle_for_plot,
-            fontname="Arial",
-            fontsize=11,
-            color="#666666",
-            transform=ax.transAxes
-        )
-        
-        # Set x-axis tick label font to Arial, size 9, and color #666666
-        ax.tick_params(
-            axis='x',
-            which='major',
-            labelsize=9,
-            labelcolor="#666666",
-            pad=2,
-            bottom=True,
-            labelbottom=True
-        )
-        plt.xticks(fontname='Arial')
-        
-        # Add a word-wrapped caption if one is provided
-        if caption_for_plot != None or data_source_for_plot != None:
-            # Create starting point for caption
-            wrapped_caption = ""
-            
-            # Add the caption to the plot, if one is provided
-            if caption_for_plot != None:
-                # Word wrap the caption without splitting words
-                wrapped_caption = textwrap.fill(caption_for_plot, 110, break_long_words=False)
-                
-            # Add the data source to the caption, if one is provided
-            if data_source_for_plot != None:
-                wrapped_caption = wrapped_caption + "\n\nSource: " + data_source_for_plot
-            
-            # Add the caption to the plot
-            ax.text(
-                x=x_indent,
-                y=caption_y_indent,
-                s=wrapped_caption,
-                fontname="Arial",
-                fontsize=8,
-                color="#666666",
-                transform=ax.transAxes
-            )
-            
-        # Show plot
-        plt.show()
-        
-        # Clear plot
-        plt.clf()
-        
     # Return the metalog distribution
     if return_format == 'dataframe':
         return df_simulation
+    elif return_format == 'sip':
+        return SIPLibrary(
+            list_sim_results,
+            [simulated_variable_name],
+            metadata={simulated_variable_name: {
+                'distribution': 'normal',
+                'parameters': {
+                    'expected_outcome': expected_outcome,
+                    'standard_deviation_of_outcome': standard_deviation_of_outcome
+                },
+                'number_of_trials': number_of_trials,
+                'random_seed': random_seed if isinstance(random_seed, (int, np.integer)) else None,
+                'sampling_method': sampling_method,
+                'standard_error': df_simulation.attrs.get('standard_error')
+            }}
+        )
     else:
         return np.array(list_sim_results)
 
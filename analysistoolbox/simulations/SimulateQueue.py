@@ -0,0 +1,190 @@
+# Load packages
+from concurrent.futures import ProcessPoolExecutor
+from math import ceil
+import numpy as np
+import os
+import pandas as pd
+import time
+from .CreateRandomNumberGenerator import CreateRandomNumberGenerator
+from .SimulateTimeBetweenEvents import SimulateTimeBetweenEvents
+from .SimulateTimeUntilNEvents import SimulateTimeUntilNEvents
+
+# Declare function
+def SimulateQueue(expected_time_between_arrivals,
+                  expected_service_time,
+                  number_of_servers=1,
+                  service_time_shape=1,
+                  number_of_customers=1000,
+                  number_of_replications=1000,
+                  number_of_warm_up_customers=0,
+                  # Parallel parameters
+                  number_of_workers=None,
+                  replications_per_task=None,
+                  random_seed=412,
+                  show_summary=True,
+                  return_wait_times=False):
+    """
+    Simulates a first-in, first-out (FIFO) queue with one or more servers, e.g. a call center or a checkout line, over many independent replications at once.
+    The times between arrivals are exponential, drawn with SimulateTimeBetweenEvents, and the service times are gamma (Erlang) distributed, drawn with
+    SimulateTimeUntilNEvents, so a service_time_shape of 1 gives the classic M/M/c queue and larger shapes give less variable service times.
+
+    With one server, every customer's wait comes from the Lindley recursion W(n + 1) = max(0, W(n) + S(n) - A(n + 1)), which is solved for every replication
+    and customer at once as the cumulative sum of S(n) - A(n + 1) minus its running minimum. With several servers, each customer is given to the server
+    that is free first (the Kiefer-Wolfowitz recursion), stepping through the customers once with every replication updated together. Replications can
+    be split into tasks that run in separate processes, each with its own random number stream, so the results are reproducible for a given random_seed
+    and replications_per_task, regardless of how many workers are used.
+
+    Args:
+        expected_time_between_arrivals (float): The expected time between customer arrivals.
+        expected_service_time (float): The expected time to serve a customer.
+        number_of_servers (int, optional): The number of servers. Defaults to 1.
+        service_time_shape (float, optional): The shape of the gamma distribution of service times. 1 gives exponential service times. Defaults to 1.
+        number_of_customers (int, optional): The number of customers that arrive in each replication. Defaults to 1000.
+        number_of_replications (int, optional): The number of independent replications to simulate. Defaults to 1000.
+        number_of_warm_up_customers (int, optional): The number of customers at the start of each replication that are left out of the wait time and backlog results,
+            so that they describe the queue once it has settled rather than starting empty. Defaults to 0.
+        number_of_workers (int, optional): The number of worker processes to use. If None, all available CPU cores are used. Defaults to None.
+        replications_per_task (int, optional): The number of replications in each task sent to a worker. If None, the replications are split evenly across the workers. Defaults to None.
+        random_seed (int or numpy.random.SeedSequence, optional): The random seed to use for replicability. Defaults to 412.
+        show_summary (bool, optional): Whether to print the average of each result across replications, and the simulation's throughput. Defaults to True.
+        return_wait_times (bool, optional): Whether to also return the replications x customers array of wait times. Defaults to False.
+
+    Returns:
+        pandas.DataFrame: One row per replication, with the average and 95th percentile wait time, the probability of waiting, the average time in the system,
+            the server utilization, and the average and maximum number of customers waiting (the backlog). The number of simulated arrivals, the seconds taken,
+            and the arrivals simulated per second are recorded in the dataframe's attrs. If return_wait_times is True, a tuple of the dataframe and the wait times is returned.
+    """
+    # Ensure that the times are valid
+    if expected_time_between_arrivals <= 0 or expected_service_time <= 0 or service_time_shape <= 0:
+        raise ValueError("expected_time_between_arrivals, expected_service_time, and service_time_shape must be greater than 0.")
+
+    # Ensure that the counts are valid
+    if number_of_servers < 1 or number_of_customers < 1 or number_of_replications < 1:
+        raise ValueError("number_of_servers, number_of_customers, and number_of_replications must be positive whole numbers.")
+    if number_of_warm_up_customers < 0 or number_of_warm_up_customers >= number_of_customers:
+        raise ValueError("number_of_warm_up_customers must be at least 0 and less than number_of_customers.")
+
+    # Warn if the queue is unstable, since the waits then grow without limit as customers arrive
+    traffic_intensity = expected_service_time / (number_of_servers * expected_time_between_arrivals)
+    if traffic_intensity >= 1:
+        print("Warning: The servers are busy {:.1%} of the time on average, so the queue grows without limit and the results depend on number_of_customers.".format(traffic_intensity))
+
+    # If number_of_workers is not specified, use all available CPU cores
+    if number_of_workers is None:
+        number_of_workers = os.cpu_count() or 1
+
+    # If replications_per_task is not specified, split the replications evenly across the workers
+    if replications_per_task is None:
+        replications_per_task = ceil(number_of_replications / number_of_workers)
+
+    # Split the replications into tasks, each with its own independent random number stream
+    list_of_task_sizes = [min(replications_per_task, number_of_replications - task_start) for task_start in range(0, number_of_replications, replications_per_task)]
+    list_of_seed_sequences = CreateRandomNumberGenerator(
+        random_seed,
+        number_of_streams=len(list_of_task_sizes),
+        return_seed_sequences=True
+    )
+    list_of_arguments = [
+        list_of_task_sizes,
+        list_of_seed_sequences,
+        [expected_time_between_arrivals] * len(list_of_task_sizes),
+        [expected_service_time] * len(list_of_task_sizes),
+        [number_of_servers] * len(list_of_task_sizes),
+        [service_time_shape] * len(list_of_task_sizes),
+        [number_of_customers] * len(list_of_task_sizes),
+        [number_of_warm_up_customers] * len(list_of_task_sizes)
+    ]
+
+    # Run the tasks, in the current process if only one worker is requested
+    start_time = time.perf_counter()
+    if number_of_workers == 1:
+        list_of_task_results = list(map(_simulate_queue_replications, *list_of_arguments))
+    else:
+        with ProcessPoolExecutor(max_workers=number_of_workers) as executor:
+            list_of_task_results = list(executor.map(_simulate_queue_replications, *list_of_arguments))
+    elapsed_seconds = time.perf_counter() - start_time
+
+    # Merge the results in task order, so they don't depend on which worker finished first
+    df_replications = pd.concat([task_result[0] for task_result in list_of_task_results], ignore_index=True)
+    df_replications.insert(0, 'Replication', np.arange(1, number_of_replications + 1))
+    number_of_arrivals = number_of_replications * number_of_customers
+    df_replications.attrs['number_of_arrivals'] = number_of_arrivals
+    df_replications.attrs['seconds'] = elapsed_seconds
+    df_replications.attrs['arrivals_per_second'] = number_of_arrivals / elapsed_seconds
+
+    # Show the average of each result across replications, with the half-width of its 95% confidence interval
+    if show_summary:
+        df_summary = pd.DataFrame({
+            'Result': df_replications.columns[1:],
+            'Average': df_replications.iloc[:, 1:].mean().to_numpy(),
+            '95% CI Half Width': (1.96 * df_replications.iloc[:, 1:].std() / np.sqrt(number_of_replications)).to_numpy() if number_of_replications > 1 else np.nan
+        })
+        print(df_summary.to_string(index=False))
+        print("Simulated {:,} arrivals in {:.2f} seconds ({:,.0f} arrivals per second).".format(number_of_arrivals, elapsed_seconds, number_of_arrivals / elapsed_seconds))
+
+    # Return the results of each replication, with the wait times if requested
+    if return_wait_times:
+        return df_replications, np.concatenate([task_result[1] for task_result in list_of_task_results])
+    return df_replications
+
+
+def _simulate_queue_replications(number_of_replications, seed_sequence, expected_time_between_arrivals, expected_service_time,
+                                 number_of_servers, service_time_shape, number_of_customers, number_of_warm_up_customers):
+    # Simulate a batch of replications, which is the unit of work sent to each worker
+    rng = CreateRandomNumberGenerator(seed_sequence)
+    times_between_arrivals = SimulateTimeBetweenEvents(
+        expected_time_between_arrivals,
+        number_of_trials=number_of_replications * number_of_customers,
+        return_format='array',
+        random_seed=rng,
+        plot_simulation_results=False
+    ).reshape(number_of_replications, number_of_customers)
+    service_times = SimulateTimeUntilNEvents(
+        number_of_events=service_time_shape,
+        expected_time_between_events=expected_service_time / service_time_shape,
+        number_of_trials=number_of_replications * number_of_customers,
+        return_format='array',
+        random_seed=rng,
+        plot_simulation_results=False
+    ).reshape(number_of_replications, number_of_customers)
+    arrival_times = np.cumsum(times_between_arrivals, axis=1)
+
+    # Calculate each customer's wait
+    if number_of_servers == 1:
+        # Solve the Lindley recursion as the cumulative sum of S(n) - A(n + 1) minus its running minimum, starting from an empty queue
+        cumulative_differences = np.zeros((number_of_replications, number_of_customers))
+        np.cumsum(service_times[:, :-1] - times_between_arrivals[:, 1:], axis=1, out=cumulative_differences[:, 1:])
+        wait_times = cumulative_differences - np.minimum.accumulate(cumulative_differences, axis=1)
+    else:
+        # Give each customer to the server that is free first, updating every replication at once
+        wait_times = np.empty((number_of_replications, number_of_customers))
+        server_free_times = np.zeros((number_of_replications, number_of_servers))
+        replication_indices = np.arange(number_of_replications)
+        for customer in range(number_of_customers):
+            first_free_servers = np.argmin(server_free_times, axis=1)
+            start_times = np.maximum(server_free_times[replication_indices, first_free_servers], arrival_times[:, customer])
+            wait_times[:, customer] = start_times - arrival_times[:, customer]
+            server_free_times[replication_indices, first_free_servers] = start_times + service_times[:, customer]
+    start_times = arrival_times + wait_times
+    departure_times = start_times + service_times
+
+    # Count the customers still waiting when each customer arrives. Service starts in arrival order, so one sorted search over every replication counts them.
+    row_offsets = np.arange(number_of_replications)[:, np.newaxis] * (departure_times.max() + 1)
+    number_started = np.searchsorted((start_times + row_offsets).ravel(), (arrival_times + row_offsets).ravel(), side='right').reshape(number_of_replications, number_of_customers)
+    number_started -= np.arange(number_of_replications)[:, np.newaxis] * number_of_customers
+    customer_indices = np.arange(number_of_customers)[np.newaxis, :]
+    queue_lengths = customer_indices - np.minimum(number_started, customer_indices)
+
+    # Summarize each replication, leaving out the warm-up customers
+    measured_wait_times = wait_times[:, number_of_warm_up_customers:]
+    measured_duration = departure_times.max(axis=1) - arrival_times[:, number_of_warm_up_customers - 1] if number_of_warm_up_customers > 0 else departure_times.max(axis=1)
+    df_replications = pd.DataFrame({
+        'Average Wait Time': measured_wait_times.mean(axis=1),
+        'Wait Time P95': np.quantile(measured_wait_times, 0.95, axis=1),
+        'Probability of Waiting': (measured_wait_times > 0).mean(axis=1),
+        'Average Time in System': (measured_wait_times + service_times[:, number_of_warm_up_customers:]).mean(axis=1),
+        'Utilization': service_times.sum(axis=1) / (number_of_servers * departure_times.max(axis=1)),
+        'Average Queue Length': measured_wait_times.sum(axis=1) / measured_duration,
+        'Maximum Queue Length': queue_lengths[:, number_of_warm_up_customers:].max(axis=1)
+    })
+    return df_replications, wait_times
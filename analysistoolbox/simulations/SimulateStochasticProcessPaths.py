@@ -0,0 +1,335 @@
+# Load packages
+import matplotlib.pyplot as plt
+import numpy as np
+import os
+import pandas as pd
+from scipy.signal import lfilter
+import textwrap
+from .CreateRandomNumberGenerator import CreateRandomNumberGenerator
+from .StreamingSummary import StreamingSummary
+from .StreamSimulationChunks import StreamSimulationChunks
+
+# Declare function
+def SimulateStochasticProcessPaths(process='random_walk',
+                                   number_of_trials=10000,
+                                   number_of_time_steps=365,
+                                   time_step=1,
+                                   initial_value=0,
+                                   # Process parameters
+                                   drift=0,
+                                   volatility=1,
+                                   autoregressive_coefficient=0.9,
+                                   long_run_mean=0,
+                                   event_rate=1,
+                                   # Output parameters
+                                   return_format='array',
+                                   chunk_size=10000,
+                                   output_filepath=None,
+                                   list_of_quantiles=[0.05, 0.5, 0.95],
+                                   return_summary=False,
+                                   random_seed=412,
+                                   # Plotting parameters
+                                   plot_simulation_results=True,
+                                   number_of_paths_to_plot=20,
+                                   line_color="#3269a8",
+                                   fill_color="#999999",
+                                   fill_transparency=0.4,
+                                   figure_size=(8, 6),
+                                   title_for_plot="Simulated Paths",
+                                   subtitle_for_plot=None,
+                                   caption_for_plot=None,
+                                   data_source_for_plot=None,
+                                   x_indent=-0.1,
+                                   title_y_indent=1.1,
+                                   subtitle_y_indent=1.05,
+                                   caption_y_indent=-0.15):
+    """
+    Simulates paths of a stochastic process over time, as a trials x time steps matrix, in one vectorized call per chunk of trials.
+    The first column of each path is its initial_value at time 0, followed by one column per time step. The following processes are available:
+    - 'random_walk': A Gaussian random walk, whose steps have a mean of drift * time_step and a standard deviation of volatility * sqrt(time_step). The steps are summed with a cumulative sum.
+    - 'geometric_brownian_motion': A geometric Brownian motion, e.g. of a price, with a drift and volatility per unit of time. The log-returns are summed with a cumulative sum and exponentiated.
+    - 'ar1': An autoregressive process, X(t) = long_run_mean + autoregressive_coefficient * (X(t - 1) - long_run_mean) + volatility * e(t), which is run with a single linear filter over each chunk.
+    - 'poisson_process': The number of events so far, when events happen at event_rate per unit of time. The arrival times are the cumulative sum of exponential times between events,
+      and the count at each time step is found with one sorted search over the arrival times of every path.
+
+    Paths are drawn in chunks of trials, so that very many paths can be streamed (return_format='stream'), written to a memory-mapped file (output_filepath),
+    or reduced to summary bands at each time step without keeping the paths (return_format='summary'). The summary bands are exact when the paths are kept,
+    and estimated with a StreamingSummary for each time step when they are not.
+
+    Args:
+        process (str, optional): Either 'random_walk', 'geometric_brownian_motion', 'ar1', or 'poisson_process'. Defaults to 'random_walk'.
+        number_of_trials (int, optional): The number of paths to simulate. Defaults to 10000.
+        number_of_time_steps (int, optional): The number of time steps in each path. Defaults to 365.
+        time_step (float, optional): The length of each time step, in the units of time that drift, volatility, and event_rate are given in. Defaults to 1.
+        initial_value (float, optional): The value of each path at time 0. Must be greater than 0 for a geometric Brownian motion. Defaults to 0.
+        drift (float, optional): The expected change per unit of time of a random walk, or the expected log-return per unit of time of a geometric Brownian motion (before the volatility adjustment). Defaults to 0.
+        volatility (float, optional): The standard deviation per square root unit of time of a random walk or geometric Brownian motion, or the standard deviation of each step's shock in an AR(1) process. Defaults to 1.
+        autoregressive_coefficient (float, optional): The share of the last step's distance from the long-run mean that carries over in an AR(1) process. Defaults to 0.9.
+        long_run_mean (float, optional): The mean that an AR(1) process reverts to. Defaults to 0.
+        event_rate (float, optional): The expected number of events per unit of time in a Poisson process. Defaults to 1.
+        return_format (str, optional): Either 'array' (a trials x (time steps + 1) numpy array), 'stream' (a generator of arrays, one per chunk of paths, drawn lazily and not plotted),
+            or 'summary' (a dataframe of the summary bands at each time step, without keeping the paths). Defaults to 'array'.
+        chunk_size (int, optional): The number of paths drawn at a time. Defaults to 10000.
+        output_filepath (str, optional): If specified with return_format 'array', the paths are written to a memory-mapped .npy file instead of being held in memory. Defaults to None.
+        list_of_quantiles (list of float, optional): The quantiles in the summary bands. Defaults to [0.05, 0.5, 0.95].
+        return_summary (bool, optional): Whether to also return the summary bands when return_format is 'array'. Defaults to False.
+        random_seed (int or numpy.random.Generator, optional): The random seed for replicability. Defaults to 412.
+        plot_simulation_results (bool, optional): Whether to plot the summary bands, with a sample of paths when they are kept. Defaults to True.
+        number_of_paths_to_plot (int, optional): The number of paths drawn over the summary bands. Defaults to 20.
+        line_color (str, optional): The color of the median and the sample of paths. Defaults to "#3269a8".
+        fill_color (str, optional): The fill color of the band between the lowest and highest quantile. Defaults to "#999999".
+        fill_transparency (float, optional): The fill transparency of the band. Defaults to 0.4.
+        figure_size (tuple, optional): The size of the plot figure. Defaults to (8, 6).
+        title_for_plot (str, optional): The title of the plot. Defaults to "Simulated Paths".
+        subtitle_for_plot (str, optional): The subtitle of the plot. If None, the quantiles in the band are described. Defaults to None.
+        caption_for_plot (str, optional): The caption of the plot. Defaults to None.
+        data_source_for_plot (str, optional): The data source of the plot. Defaults to None.
+        x_indent (float, optional): The x-indent of the title, subtitle, and caption on the plot. Defaults to -0.1.
+        title_y_indent (float, optional): The y-indent of the title on the plot. Defaults to 1.1.
+        subtitle_y_indent (float, optional): The y-indent of the subtitle on the plot. Defaults to 1.05.
+        caption_y_indent (float, optional): The y-indent of the caption on the plot. Defaults to -0.15.
+
+    Returns:
+        numpy.ndarray, generator, or pandas.DataFrame: The simulated paths, or their summary bands (the time step, time, mean, standard deviation, and each quantile).
+            If return_summary is True and return_format is 'array', a tuple of the paths and the summary bands is returned.
+    """
+    # Ensure that process and return_format are valid
+    if process not in ['random_walk', 'geometric_brownian_motion', 'ar1', 'poisson_process']:
+        raise ValueError("process must be one of the following: 'random_walk', 'geometric_brownian_motion', 'ar1', or 'poisson_process'.")
+    if return_format not in ['array', 'stream', 'summary']:
+        raise ValueError("return_format must be one of the following: 'array', 'stream', or 'summary'.")
+
+    # Ensure that the sizes are positive whole numbers
+    if number_of_trials < 1 or number_of_time_steps < 1 or chunk_size < 1:
+        raise ValueError("number_of_trials, number_of_time_steps, and chunk_size must be positive whole numbers.")
+    if time_step <= 0:
+        raise ValueError("time_step must be greater than 0.")
+
+    # Ensure that the process parameters are valid
+    if volatility < 0:
+        raise ValueError("volatility must be greater than or equal to 0.")
+    if process == 'geometric_brownian_motion' and initial_value <= 0:
+        raise ValueError("initial_value must be greater than 0 for a geometric Brownian motion.")
+    if process == 'poisson_process' and event_rate <= 0:
+        raise ValueError("event_rate must be greater than 0.")
+
+    # Create a random number generator from the random seed for replicability
+    rng = CreateRandomNumberGenerator(random_seed)
+    arr_times = np.arange(number_of_time_steps + 1) * time_step
+
+    # Define how a chunk of paths is simulated
+    def simulate_chunk(rng, size):
+        paths = np.empty((size, number_of_time_steps + 1))
+        paths[:, 0] = initial_value
+        if process == 'random_walk':
+            steps = rng.standard_normal((size, number_of_time_steps))
+            steps *= volatility * np.sqrt(time_step)
+            steps += drift * time_step
+            np.cumsum(steps, axis=1, out=paths[:, 1:])
+            paths[:, 1:] += initial_value
+        elif process == 'geometric_brownian_motion':
+            log_returns = rng.standard_normal((size, number_of_time_steps))
+            log_returns *= volatility * np.sqrt(time_step)
+            log_returns += (drift - volatility ** 2 / 2) * time_step
+            np.cumsum(log_returns, axis=1, out=paths[:, 1:])
+            np.exp(paths[:, 1:], out=paths[:, 1:])
+            paths[:, 1:] *= initial_value
+        elif process == 'ar1':
+            # Filter the shocks with y(t) = e(t) + coefficient * y(t - 1), starting from the initial distance from the long-run mean
+            shocks = rng.standard_normal((size, number_of_time_steps)) * volatility
+            initial_state = np.full((size, 1), autoregressive_coefficient * (initial_value - long_run_mean))
+            paths[:, 1:] = lfilter([1], [1, -autoregressive_coefficient], shocks, axis=1, zi=initial_state)[0]
+            paths[:, 1:] += long_run_mean
+        else:
+            paths[:, 1:] = _count_poisson_arrivals(rng, size, arr_times[1:], event_rate)
+            paths[:, 1:] += initial_value
+        return paths
+
+    # Draw the paths one chunk at a time
+    simulation_chunks = StreamSimulationChunks(
+        sampler=simulate_chunk,
+        number_of_trials=number_of_trials,
+        chunk_size=chunk_size,
+        random_seed=rng
+    )
+    if return_format == 'stream':
+        return simulation_chunks
+
+    if return_format == 'summary':
+        # Keep a constant-memory summary of each time step as the chunks are drawn
+        list_of_summaries = [StreamingSummary(variable_name='Time Step ' + str(step)) for step in range(number_of_time_steps + 1)]
+        for paths in simulation_chunks:
+            for step, summary in enumerate(list_of_summaries):
+                summary.update(paths[:, step])
+        df_summary_bands = pd.DataFrame({
+            'Time Step': np.arange(number_of_time_steps + 1),
+            'Time': arr_times,
+            'Mean': [summary.mean for summary in list_of_summaries],
+            'Standard Deviation': [summary.standard_deviation for summary in list_of_summaries]
+        })
+        for quantile in list_of_quantiles:
+            df_summary_bands[_get_quantile_name(quantile)] = [summary.quantile(quantile) for summary in list_of_summaries]
+        paths = None
+    else:
+        # Create the trials x time steps array, in memory or as a memory-mapped file, and fill it one chunk at a time
+        if output_filepath is None:
+            paths = np.empty((number_of_trials, number_of_time_steps + 1))
+        else:
+            output_filepath = os.path.splitext(output_filepath)[0] + '.npy'
+            paths = np.lib.format.open_memmap(output_filepath, mode='w+', dtype=float, shape=(number_of_trials, number_of_time_steps + 1))
+        chunk_start = 0
+        for chunk_paths in simulation_chunks:
+            paths[chunk_start:chunk_start + chunk_paths.shape[0]] = chunk_paths
+            chunk_start += chunk_paths.shape[0]
+        if output_filepath is not None:
+            paths.flush()
+
+        # Calculate the exact summary bands, if they are needed
+        if return_summary or plot_simulation_results:
+            df_summary_bands = pd.DataFrame({
+                'Time Step': np.arange(number_of_time_steps + 1),
+                'Time': arr_times,
+                'Mean': paths.mean(axis=0),
+                'Standard Deviation': paths.std(axis=0, ddof=1) if number_of_trials > 1 else np.zeros(number_of_time_steps + 1)
+            })
+            arr_quantiles = np.quantile(paths, list_of_quantiles, axis=0)
+            for quantile, quantile_values in zip(list_of_quantiles, arr_quantiles):
+                df_summary_bands[_get_quantile_name(quantile)] = quantile_values
+
+    # Plot the summary bands, with a sample of paths if they were kept
+    if plot_simulation_results:
+        # Create figure and axes
+        fig, ax = plt.subplots(figsize=figure_size)
+
+        # Fill the band between the lowest and highest quantiles, and draw the median (or mean)
+        lowest_quantile_name = _get_quantile_name(min(list_of_quantiles))
+        highest_quantile_name = _get_quantile_name(max(list_of_quantiles))
+        ax.fill_between(
+            df_summary_bands['Time'],
+            df_summary_bands[lowest_quantile_name],
+            df_summary_bands[highest_quantile_name],
+            color=fill_color,
+            alpha=fill_transparency,
+            linewidth=0
+        )
+        center_column_name = 'P50' if 'P50' in df_summary_bands.columns else 'Mean'
+        ax.plot(
+            df_summary_bands['Time'],
+            df_summary_bands[center_column_name],
+            color=line_color,
+            linewidth=2
+        )
+
+        # Draw a sample of the paths, if they were kept
+        if paths is not None and number_of_paths_to_plot > 0:
+            ax.plot(
+                arr_times,
+                paths[:number_of_paths_to_plot].T,
+                color=line_color,
+                linewidth=0.5,
+                alpha=0.3
+            )
+
+        # Remove top and right spines, and set bottom and left spines to gray
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+        ax.spines['bottom'].set_color('#666666')
+        ax.spines['left'].set_color('#666666')
+
+        # Format tick labels to be Arial, size 9, and color #666666
+        ax.tick_params(
+            which='major',
+            labelsize=9,
+            color='#666666'
+        )
+
+        # Set the title with Arial font, size 14, and color #262626 at the top of the plot
+        ax.text(
+            x=x_indent,
+            y=title_y_indent,
+            s=title_for_plot,
+            fontname="Arial",
+            fontsize=14,
+            color="#262626",
+            transform=ax.transAxes
+        )
+
+        # Set the subtitle with Arial font, size 11, and color #666666
+        if subtitle_for_plot is None:
+            subtitle_for_plot = "Showing the {} (line) and the {} to {} band of {:,} paths".format(
+                'median' if center_column_name == 'P50' else 'mean',
+                lowest_quantile_name,
+                highest_quantile_name,
+                number_of_trials
+            )
+        ax.text(
+            x=x_indent,
+            y=subtitle_y_indent,
+            s=subtitle_for_plot,
+            fontname="Arial",
+            fontsize=11,
+            color="#666666",
+            transform=ax.transAxes
+        )
+
+        # Add a word-wrapped caption if one is provided
+        if caption_for_plot != None or data_source_for_plot != None:
+            # Create starting point for caption
+            wrapped_caption = ""
+
+            # Add the caption to the plot, if one is provided
+            if caption_for_plot != None:
+                # Word wrap the caption without splitting words
+                wrapped_caption = textwrap.fill(caption_for_plot, 110, break_long_words=False)
+
+            # Add the data source to the caption, if one is provided
+            if data_source_for_plot != None:
+                wrapped_caption = wrapped_caption + "\n\nSource: " + data_source_for_plot
+
+            # Add the caption to the plot
+            ax.text(
+                x=x_indent,
+                y=caption_y_indent,
+                s=wrapped_caption,
+                fontname="Arial",
+                fontsize=8,
+                color="#666666",
+                transform=ax.transAxes
+            )
+
+        # Show plot
+        plt.show()
+
+        # Clear plot
+        plt.clf()
+
+    # Return the paths or their summary bands
+    if return_format == 'summary':
+        return df_summary_bands
+    if return_summary:
+        return paths, df_summary_bands
+    return paths
+
+
+def _count_poisson_arrivals(rng, size, arr_times, event_rate):
+    # Draw enough times between events that every path almost surely passes the last time, adding more in the rare case that one doesn't
+    horizon = arr_times[-1]
+    expected_arrivals = event_rate * horizon
+    number_of_arrivals = int(np.ceil(expected_arrivals + 6 * np.sqrt(expected_arrivals) + 10))
+    arrival_times = np.cumsum(rng.exponential(scale=1 / event_rate, size=(size, number_of_arrivals)), axis=1)
+    while np.any(arrival_times[:, -1] <= horizon):
+        more_arrival_times = arrival_times[:, -1:] + np.cumsum(rng.exponential(scale=1 / event_rate, size=(size, number_of_arrivals)), axis=1)
+        arrival_times = np.concatenate([arrival_times, more_arrival_times], axis=1)
+        number_of_arrivals = arrival_times.shape[1]
+
+    # Offset each path's arrival times and time steps by a gap wider than the horizon, so one sorted search counts the arrivals of every path
+    path_offsets = np.arange(size)[:, np.newaxis] * (2 * horizon + 1)
+    np.minimum(arrival_times, 2 * horizon, out=arrival_times)
+    arrival_times += path_offsets
+    arrival_counts = np.searchsorted(arrival_times.ravel(), (arr_times[np.newaxis, :] + path_offsets).ravel(), side='right')
+    return arrival_counts.reshape(size, arr_times.size) - np.arange(size)[:, np.newaxis] * number_of_arrivals
+
+
+def _get_quantile_name(quantile):
+    # Name a quantile by its percentile, e.g. 'P5' for 0.05
+    return 'P' + '{:g}'.format(quantile * 100)
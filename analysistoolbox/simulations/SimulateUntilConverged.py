@@ -0,0 +1,215 @@
+# Load packages
+from math import ceil
+import numpy as np
+import pandas as pd
+from scipy import stats
+import time
+from .CreateRandomNumberGenerator import CreateRandomNumberGenerator
+from .SimulateInParallel import RunSimulationTask
+from .StreamingSummary import StreamingSummary
+
+# Declare function
+def SimulateUntilConverged(simulation_function,
+                           tolerance,
+                           target_statistic='mean',
+                           quantile=0.5,
+                           risk_tolerance=None,
+                           lower_is_worse=True,
+                           confidence_level=0.95,
+                           # Budget parameters
+                           batch_size=10000,
+                           maximum_trials=10000000,
+                           maximum_seconds=None,
+                           random_seed=412,
+                           show_progress=True,
+                           **simulation_arguments):
+    """
+    Runs a simulation in batches until the confidence interval of a target statistic is narrow enough, instead of guessing number_of_trials up front.
+    After each batch, the half-width of the confidence interval is compared to the tolerance. If it is too wide, the number of trials still
+    needed is projected from how the half-width shrinks with the square root of the number of trials, so easy estimates stop after the first
+    batch and hard tail estimates get the trials they need. The simulation also stops once maximum_trials or maximum_seconds is reached.
+    Any Simulate* function can be used, as can MetalogDistribution.sample or a user-defined model that takes number_of_trials (or number_of_samples)
+    and random_seed arguments and returns an array of simulated values. Each batch has its own independent random number stream, so the
+    results are reproducible for a given random_seed. The simulated values are only kept when the target is a quantile. For a mean or probability,
+    each batch is added to a constant-memory StreamingSummary instead, so memory use doesn't grow with the number of trials.
+
+    If the simulation uses a sampling_method other than 'random', each batch is treated as one replicate, every batch has batch_size trials (starting with 2),
+    and the confidence interval comes from the spread of the batch estimates (see CalculateSimulationStandardError).
+
+    Args:
+        simulation_function (function): The simulation function to run, e.g. SimulateCountOutcome.
+        tolerance (float): The largest acceptable half-width of the confidence interval of the target statistic, in the units of the statistic.
+        target_statistic (str, optional): Either 'mean', 'quantile', or 'probability' (the probability of an outcome worse than risk_tolerance). Defaults to 'mean'.
+        quantile (float, optional): The quantile to estimate when target_statistic is 'quantile'. Defaults to 0.5.
+        risk_tolerance (float, optional): The risk tolerance, required when target_statistic is 'probability'. Defaults to None.
+        lower_is_worse (bool, optional): Whether values lower than the risk tolerance are worse. Defaults to True.
+        confidence_level (float, optional): The confidence level of the confidence interval. Defaults to 0.95.
+        batch_size (int, optional): The number of trials in the first batch, and the smallest number of trials in any later batch. Defaults to 10000.
+        maximum_trials (int, optional): The largest total number of trials to simulate. Defaults to 10000000.
+        maximum_seconds (float, optional): The largest number of seconds to spend simulating. No new batch is started after this time. Defaults to None.
+        random_seed (int or numpy.random.SeedSequence, optional): The random seed to use for replicability. Defaults to 412.
+        show_progress (bool, optional): Whether to print the estimate and half-width after each batch. Defaults to True.
+        **simulation_arguments: Additional keyword arguments to pass to the simulation function, e.g. expected_count=3.
+
+    Returns:
+        dict: The simulated values ('results', a StreamingSummary of them unless target_statistic is 'quantile'), the estimate of the target statistic, its confidence interval half-width, the confidence level,
+            the number of trials, the seconds taken, whether the tolerance was reached ('converged'), and a pandas.DataFrame of each batch ('history').
+    """
+
+    # Ensure that target_statistic is valid
+    if target_statistic not in ['mean', 'quantile', 'probability']:
+        raise ValueError("target_statistic must be one of the following: 'mean', 'quantile', or 'probability'.")
+
+    # Ensure that risk_tolerance is given when the probability is the target
+    if target_statistic == 'probability' and risk_tolerance is None:
+        raise ValueError("risk_tolerance must be specified when target_statistic is 'probability'.")
+
+    # Ensure that tolerance, quantile, and confidence_level are valid
+    if tolerance <= 0:
+        raise ValueError("tolerance must be greater than 0.")
+    if quantile <= 0 or quantile >= 1:
+        raise ValueError("quantile must be between 0 and 1.")
+    if confidence_level <= 0 or confidence_level >= 1:
+        raise ValueError("confidence_level must be between 0 and 1.")
+
+    # Ensure that batch_size and maximum_trials are positive whole numbers
+    if batch_size < 2:
+        raise ValueError("batch_size must be a whole number greater than 1.")
+    if maximum_trials < 2 * batch_size:
+        raise ValueError("maximum_trials must be at least twice batch_size.")
+
+    # Use the spread of the batch estimates when the simulation's trials aren't independent
+    use_batch_estimates = simulation_arguments.get('sampling_method', 'random') != 'random'
+
+    # Create the root of the random number streams, which is split into one independent stream per batch
+    root_seed_sequence = CreateRandomNumberGenerator(random_seed, return_seed_sequences=True)
+
+    # Keep the simulated values only if the target is a quantile, and otherwise a summary of them and the count of trials worse than the risk tolerance
+    keep_values = target_statistic == 'quantile'
+    list_of_batches = []
+    simulation_summary = StreamingSummary(variable_name=simulation_arguments.get('simulated_variable_name', 'Simulated Outcome'))
+    number_of_worse_trials = 0
+
+    # Simulate in batches until the tolerance, the trial budget, or the time budget is reached
+    list_of_batch_estimates = []
+    list_of_history_rows = []
+    number_of_batches = 0
+    number_of_trials = 0
+    list_of_next_batch_sizes = [batch_size, batch_size] if use_batch_estimates else [batch_size]
+    start_time = time.perf_counter()
+    while True:
+        # Run the next batches, each on its own random number stream
+        for next_batch_size in list_of_next_batch_sizes:
+            task_result = RunSimulationTask(
+                simulation_function,
+                next_batch_size,
+                root_seed_sequence.spawn(1)[0],
+                simulation_arguments
+            )
+            number_of_batches += 1
+            number_of_trials += task_result['number_of_trials']
+            if keep_values:
+                list_of_batches.append(task_result['results'])
+            else:
+                simulation_summary.update(task_result['results'])
+                if target_statistic == 'probability':
+                    is_worse = task_result['results'] < risk_tolerance if lower_is_worse else task_result['results'] > risk_tolerance
+                    number_of_worse_trials += int(np.count_nonzero(is_worse))
+            if use_batch_estimates:
+                list_of_batch_estimates.append(_calculate_estimate(task_result['results'], target_statistic, quantile, risk_tolerance, lower_is_worse))
+
+        # Estimate the target statistic, only joining the batches when the target is a quantile
+        if keep_values:
+            simulated_values = np.concatenate(list_of_batches) if len(list_of_batches) > 1 else list_of_batches[0]
+            estimate = _calculate_estimate(simulated_values, target_statistic, quantile, risk_tolerance, lower_is_worse)
+        elif target_statistic == 'probability':
+            estimate = number_of_worse_trials / number_of_trials
+        else:
+            estimate = simulation_summary.mean
+
+        # Estimate the half-width of the confidence interval of the target statistic
+        if use_batch_estimates:
+            # Use a t critical value, since the standard error is estimated from only a few batches
+            critical_value = stats.t.ppf((1 + confidence_level) / 2, df=len(list_of_batch_estimates) - 1)
+            half_width = critical_value * np.std(list_of_batch_estimates, ddof=1) / np.sqrt(len(list_of_batch_estimates))
+        else:
+            critical_value = stats.norm.ppf((1 + confidence_level) / 2)
+            if target_statistic == 'quantile':
+                # Use the distribution-free interval between the order statistics that bracket the quantile
+                rank_half_width = critical_value * np.sqrt(number_of_trials * quantile * (1 - quantile))
+                lower_rank = max(int(np.floor(number_of_trials * quantile - rank_half_width)), 0)
+                upper_rank = min(int(np.ceil(number_of_trials * quantile + rank_half_width)), number_of_trials - 1)
+                lower_value, upper_value = np.partition(simulated_values, [lower_rank, upper_rank])[[lower_rank, upper_rank]]
+                half_width = (upper_value - lower_value) / 2
+            elif target_statistic == 'probability':
+                # Add 2 successes and 2 failures (Agresti-Coull), so that a rare outcome that hasn't happened yet doesn't look certain
+                adjusted_probability = (estimate * number_of_trials + 2) / (number_of_trials + 4)
+                half_width = critical_value * np.sqrt(adjusted_probability * (1 - adjusted_probability) / (number_of_trials + 4))
+            else:
+                half_width = critical_value * simulation_summary.standard_deviation / np.sqrt(simulation_summary.count)
+        elapsed_seconds = time.perf_counter() - start_time
+
+        # Record the progress of the simulation
+        list_of_history_rows.append({
+            'Batch': number_of_batches,
+            'Number of Trials': number_of_trials,
+            'Estimate': estimate,
+            'Half Width': half_width,
+            'Seconds': elapsed_seconds
+        })
+        if show_progress:
+            print("Batch {:,}: {:,} trials, estimate {:.6g} ± {:.3g}".format(number_of_batches, number_of_trials, estimate, half_width))
+
+        # Stop if the tolerance or a budget has been reached
+        converged = bool(half_width <= tolerance)
+        if converged or number_of_trials >= maximum_trials:
+            break
+        if maximum_seconds is not None and elapsed_seconds >= maximum_seconds:
+            break
+
+        # Project the number of trials still needed, since the half-width shrinks with the square root of the number of trials.
+        # The number of trials can grow at most tenfold at a time, so that a poor early estimate doesn't overshoot the budgets.
+        number_of_trials_needed = ceil(number_of_trials * min((half_width / tolerance) ** 2 * 1.1, 10)) - number_of_trials
+        if maximum_seconds is not None:
+            # Only start as many trials as the remaining time allows at the speed so far
+            trials_per_second = number_of_trials / max(elapsed_seconds, 1e-9)
+            number_of_trials_needed = min(number_of_trials_needed, int((maximum_seconds - elapsed_seconds) * trials_per_second))
+        number_of_trials_needed = min(max(number_of_trials_needed, batch_size), maximum_trials - number_of_trials)
+        if use_batch_estimates:
+            # Every replicate batch has batch_size trials, so stop if fewer than that remain in the trial budget
+            if number_of_trials_needed < batch_size:
+                break
+            list_of_next_batch_sizes = [batch_size] * max(number_of_trials_needed // batch_size, 1)
+        else:
+            list_of_next_batch_sizes = [number_of_trials_needed]
+
+    # Show the outcome of the simulation
+    if show_progress:
+        if converged:
+            print("Converged after {:,} trials in {:.2f} seconds.".format(number_of_trials, elapsed_seconds))
+        else:
+            print("Warning: The half-width of {:.3g} is still wider than the tolerance of {:.3g} after {:,} trials and {:.2f} seconds.".format(half_width, tolerance, number_of_trials, elapsed_seconds))
+
+    # Return the results with their precision
+    return {
+        'results': simulated_values if keep_values else simulation_summary,
+        'estimate': float(estimate),
+        'half_width': float(half_width),
+        'confidence_level': confidence_level,
+        'number_of_trials': number_of_trials,
+        'seconds': elapsed_seconds,
+        'converged': converged,
+        'history': pd.DataFrame(list_of_history_rows)
+    }
+
+
+
+def _calculate_estimate(simulated_values, target_statistic, quantile, risk_tolerance, lower_is_worse):
+    # Calculate the target statistic of a set of simulated values
+    if target_statistic == 'quantile':
+        return np.quantile(simulated_values, quantile)
+    if target_statistic == 'probability':
+        if lower_is_worse:
+            return np.mean(simulated_values < risk_tolerance)
+        return np.mean(simulated_values > risk_tolerance)
+    return np.mean(simulated_values)
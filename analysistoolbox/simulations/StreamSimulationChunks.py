@@ -0,0 +1,35 @@
+# Load packages
+from .CreateRandomNumberGenerator import CreateRandomNumberGenerator
+
+# Declare function
+def StreamSimulationChunks(sampler,
+                           number_of_trials=10000,
+                           chunk_size=1000000,
+                           random_seed=412):
+    """
+    Yields the trials of a simulation as fixed-size numpy chunks, so that a simulation never holds more than one chunk in memory.
+    Because every chunk is drawn from the same random number generator in order, concatenating the chunks gives the same
+    values as drawing all of the trials at once with the same seed.
+
+    Args:
+        sampler (function): A function that takes a numpy random Generator and a size, and returns a numpy array of that many simulated values.
+        number_of_trials (int, optional): The total number of trials to simulate. Defaults to 10000.
+        chunk_size (int, optional): The maximum number of trials in each chunk. Defaults to 1000000.
+        random_seed (int or numpy.random.Generator, optional): The random seed to use for replicability. Defaults to 412.
+
+    Yields:
+        numpy.ndarray: The next chunk of simulated values.
+    """
+
+    # Ensure that number_of_trials and chunk_size are valid
+    if number_of_trials < 0:
+        raise ValueError("number_of_trials must be greater than or equal to 0.")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive whole number.")
+
+    # Create a random number generator from the random seed for replicability
+    rng = CreateRandomNumberGenerator(random_seed)
+
+    # Draw the trials one chunk at a time
+    for chunk_start in range(0, number_of_trials, chunk_size):
+        yield sampler(rng, min(chunk_size, number_of_trials - chunk_start))
@@ -0,0 +1,257 @@
+# Load packages
+import numpy as np
+import pandas as pd
+
+# Declare class
+class StreamingSummary:
+    """
+    Keeps constant-memory summaries of a simulated variable as chunks of trials are added.
+    The mean and variance are updated with Welford's (Chan's) online algorithm, quantiles are estimated with a
+    merging t-digest, and a fixed number of histogram bins is kept for plotting. When a chunk falls outside the
+    current histogram range, the bin width is doubled and neighboring bins are merged, so the histogram always
+    covers every trial without storing the trials themselves. Summaries of separate chunks or workers can be
+    combined with merge().
+
+    Args:
+        variable_name (str, optional): The name of the simulated variable. Defaults to 'Simulated Outcome'.
+        number_of_bins (int, optional): The number of histogram bins to keep. Must be even. Defaults to 256.
+        compression (int, optional): The t-digest compression. Higher values keep more centroids (about half the compression) and give more accurate tail quantiles. Defaults to 500.
+    """
+
+    def __init__(self,
+                 variable_name='Simulated Outcome',
+                 number_of_bins=256,
+                 compression=500):
+        # Ensure that number_of_bins is a positive, even number so that bins can be merged in pairs
+        if number_of_bins < 2 or number_of_bins % 2 != 0:
+            raise ValueError("number_of_bins must be a positive, even number.")
+
+        # Set the summary parameters
+        self.variable_name = variable_name
+        self.number_of_bins = number_of_bins
+        self.compression = compression
+
+        # Set the starting moments
+        self.count = 0
+        self.mean = 0.0
+        self.sum_of_squared_deviations = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+
+        # Set the starting t-digest centroids
+        self.centroid_means = np.empty(0)
+        self.centroid_weights = np.empty(0)
+
+        # Set the starting histogram
+        self.bin_counts = np.zeros(number_of_bins, dtype=np.int64)
+        self.bin_start = None
+        self.bin_width = None
+
+    def update(self, values):
+        """
+        Adds a chunk of simulated values to the summary.
+
+        Args:
+            values (array-like): The simulated values to add. Non-finite values are ignored.
+
+        Returns:
+            StreamingSummary: The updated summary.
+        """
+        # Convert values to a flat array of finite floats
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            return self
+
+        # Update the mean and variance using the chunk's own moments
+        chunk_mean = values.mean()
+        self._combine_moments(values.size, chunk_mean, np.square(values - chunk_mean).sum())
+
+        # Update the minimum and maximum
+        self.minimum = min(self.minimum, values.min())
+        self.maximum = max(self.maximum, values.max())
+
+        # Update the histogram and quantile sketch
+        self._add_to_histogram(values, np.ones(values.size, dtype=np.int64))
+        self._add_to_digest(np.sort(values), np.ones(values.size), is_sorted=True)
+        return self
+
+    def update_from_chunks(self, chunks):
+        """
+        Adds every chunk from an iterable (e.g. the generator returned by StreamSimulationChunks) to the summary.
+
+        Args:
+            chunks (iterable): An iterable of array-like chunks of simulated values.
+
+        Returns:
+            StreamingSummary: The updated summary.
+        """
+        for chunk in chunks:
+            self.update(chunk)
+        return self
+
+    def merge(self, other):
+        """
+        Combines another StreamingSummary (e.g. from another chunk or worker) into this summary.
+
+        Args:
+            other (StreamingSummary): The summary to merge into this one.
+
+        Returns:
+            StreamingSummary: The updated summary.
+        """
+        # Skip empty summaries
+        if other.count == 0:
+            return self
+
+        # Combine the moments and extremes
+        self._combine_moments(other.count, other.mean, other.sum_of_squared_deviations)
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+        # Add the other histogram's counts at its bin centers
+        other_bin_centers = other.bin_start + other.bin_width * (np.arange(other.number_of_bins) + 0.5)
+        has_counts = other.bin_counts > 0
+        self._add_to_histogram(other_bin_centers[has_counts], other.bin_counts[has_counts])
+
+        # Add the other centroids to the quantile sketch
+        self._add_to_digest(other.centroid_means, other.centroid_weights)
+        return self
+
+    @property
+    def variance(self):
+        """float: The sample variance of the values added so far."""
+        if self.count < 2:
+            return np.nan
+        return self.sum_of_squared_deviations / (self.count - 1)
+
+    @property
+    def standard_deviation(self):
+        """float: The sample standard deviation of the values added so far."""
+        return np.sqrt(self.variance)
+
+    @property
+    def median(self):
+        """float: The estimated median of the values added so far."""
+        return self.quantile(0.5)
+
+    def quantile(self, q):
+        """
+        Estimates one or more quantiles from the t-digest.
+
+        Args:
+            q (float or array-like): The quantile(s) to estimate, between 0 and 1.
+
+        Returns:
+            float or numpy.ndarray: The estimated quantile(s).
+        """
+        if self.count == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+
+        # Interpolate between centroid midpoints, anchored at the observed minimum and maximum
+        cumulative_weights = np.cumsum(self.centroid_weights)
+        centroid_quantiles = (cumulative_weights - self.centroid_weights / 2) / cumulative_weights[-1]
+        return np.interp(
+            q,
+            np.concatenate([[0], centroid_quantiles, [1]]),
+            np.concatenate([[self.minimum], self.centroid_means, [self.maximum]])
+        )
+
+    def histogram(self):
+        """
+        Returns the histogram counts and bin edges, trimmed of empty bins at either end.
+
+        Returns:
+            tuple: A numpy.ndarray of bin counts and a numpy.ndarray of bin edges (one longer than the counts).
+        """
+        if self.count == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(1)
+        non_empty_bins = np.flatnonzero(self.bin_counts)
+        first_bin, last_bin = non_empty_bins[0], non_empty_bins[-1] + 1
+        bin_edges = self.bin_start + self.bin_width * np.arange(first_bin, last_bin + 1)
+        return self.bin_counts[first_bin:last_bin], bin_edges
+
+    def to_dataframe(self):
+        """
+        Returns the summary statistics as a single-row pandas DataFrame.
+
+        Returns:
+            pandas.DataFrame: The count, mean, standard deviation, minimum, selected percentiles, and maximum.
+        """
+        percentiles = self.quantile([0.05, 0.25, 0.5, 0.75, 0.95])
+        return pd.DataFrame({
+            'Variable': [self.variable_name],
+            'Count': [self.count],
+            'Mean': [self.mean],
+            'Standard Deviation': [self.standard_deviation],
+            'Minimum': [self.minimum],
+            '5th Percentile': [percentiles[0]],
+            '25th Percentile': [percentiles[1]],
+            'Median': [percentiles[2]],
+            '75th Percentile': [percentiles[3]],
+            '95th Percentile': [percentiles[4]],
+            'Maximum': [self.maximum]
+        })
+
+    def __repr__(self):
+        return "StreamingSummary(variable_name={!r}, count={:,}, mean={:.4g}, standard_deviation={:.4g})".format(
+            self.variable_name, self.count, self.mean, self.standard_deviation
+        )
+
+    def _combine_moments(self, count, mean, sum_of_squared_deviations):
+        # Combine moments with Chan's parallel form of Welford's algorithm
+        total_count = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total_count
+        self.sum_of_squared_deviations += sum_of_squared_deviations + delta ** 2 * self.count * count / total_count
+        self.count = total_count
+
+    def _add_to_histogram(self, values, counts):
+        # Initialize the bins to span twice the range of the first values seen, so that later values rarely fall outside it
+        lowest_value, highest_value = values.min(), values.max()
+        if self.bin_start is None:
+            value_range = highest_value - lowest_value
+            if value_range <= 0:
+                value_range = max(abs(lowest_value), 1.0)
+            self.bin_start = lowest_value - value_range / 2
+            self.bin_width = 2 * value_range / self.number_of_bins
+
+        # Double the bin width until the bins cover the new values, merging neighboring bins in pairs
+        half_of_bins = self.number_of_bins // 2
+        while lowest_value < self.bin_start or highest_value > self.bin_start + self.number_of_bins * self.bin_width:
+            merged_counts = self.bin_counts.reshape(-1, 2).sum(axis=1)
+            if lowest_value < self.bin_start:
+                self.bin_counts = np.concatenate([np.zeros(half_of_bins, dtype=np.int64), merged_counts])
+                self.bin_start -= self.number_of_bins * self.bin_width
+            else:
+                self.bin_counts = np.concatenate([merged_counts, np.zeros(half_of_bins, dtype=np.int64)])
+            self.bin_width *= 2
+
+        # Count the values in each bin
+        bin_index = np.floor((values - self.bin_start) / self.bin_width).astype(np.int64)
+        bin_index = np.clip(bin_index, 0, self.number_of_bins - 1)
+        self.bin_counts += np.bincount(bin_index, weights=counts, minlength=self.number_of_bins).astype(np.int64)
+
+    def _add_to_digest(self, means, weights, is_sorted=False):
+        # Sort the new points, then interleave them with the existing (already sorted) centroids
+        if not is_sorted:
+            sort_order = np.argsort(means)
+            means, weights = means[sort_order], weights[sort_order]
+        insert_positions = np.searchsorted(means, self.centroid_means) + np.arange(self.centroid_means.size)
+        is_existing_centroid = np.zeros(means.size + self.centroid_means.size, dtype=bool)
+        is_existing_centroid[insert_positions] = True
+        all_means = np.empty(is_existing_centroid.size)
+        all_weights = np.empty(is_existing_centroid.size)
+        all_means[is_existing_centroid], all_weights[is_existing_centroid] = self.centroid_means, self.centroid_weights
+        all_means[~is_existing_centroid], all_weights[~is_existing_centroid] = means, weights
+
+        # Group neighboring centroids using the arcsine scale function, which keeps centroids small in the tails
+        cumulative_weights = np.cumsum(all_weights)
+        midpoint_quantiles = (cumulative_weights - all_weights / 2) / cumulative_weights[-1]
+        scale_values = self.compression / (2 * np.pi) * np.arcsin(2 * midpoint_quantiles - 1)
+        group_ids = np.floor(scale_values - scale_values[0]).astype(np.int64)
+        group_starts = np.flatnonzero(np.diff(group_ids, prepend=group_ids[0] - 1))
+
+        # Merge each group into a single weighted centroid
+        self.centroid_weights = np.add.reduceat(all_weights, group_starts)
+        self.centroid_means = np.add.reduceat(all_means * all_weights, group_starts) / self.centroid_weights
@@ -1,11 +1,31 @@
+from .ConductSensitivityAnalysis import ConductSensitivityAnalysis
+from .CalculateSimulationStandardError import CalculateSimulationStandardError
 from .CreateMetalogDistributionFromPercentiles import CreateMetalogDistributionFromPercentiles
 from .CreateMetalogDistribution import CreateMetalogDistribution
+from .CreateRandomNumberGenerator import CreateRandomNumberGenerator
 from .CreateSIPDataframe import CreateSIPDataframe
 from .CreateSLURPDistribution import CreateSLURPDistribution
+from .CreateSLURPLibrary import CreateSLURPLibrary
+from .EvaluateSimulationModel import EvaluateSimulationModel
+from .FitSimulationDistributions import FitSimulationDistributions
+from .GenerateHDRRandomNumbers import GenerateHDRRandomNumbers
+from .GenerateUniformSamples import GenerateUniformSamples
+from .LoadSIPLibrary import LoadSIPLibrary
+from .MetalogCache import MetalogCache
+from .MetalogDistribution import MetalogDistribution
+from .PlotSimulationHistogram import PlotSimulationHistogram
+from .SIPLibrary import SIPLibrary
+from .SimulateCorrelatedOutcomes import SimulateCorrelatedOutcomes
 from .SimulateCountOfSuccesses import SimulateCountOfSuccesses
 from .SimulateCountOutcome import SimulateCountOutcome
 from .SimulateCountUntilFirstSuccess import SimulateCountUntilFirstSuccess
+from .SimulateInParallel import RunSimulationTask, SimulateInParallel
 from .SimulateNormallyDistributedOutcome import SimulateNormallyDistributedOutcome
+from .SimulateQueue import SimulateQueue
+from .SimulateStochasticProcessPaths import SimulateStochasticProcessPaths
 from .SimulateTDistributedOutcome import SimulateTDistributedOutcome
 from .SimulateTimeBetweenEvents import SimulateTimeBetweenEvents
 from .SimulateTimeUntilNEvents import SimulateTimeUntilNEvents
+from .SimulateUntilConverged import SimulateUntilConverged
+from .StreamingSummary import StreamingSummary
+from .StreamSimulationChunks import StreamSimulationChunks
@@ -0,0 +1,25 @@
+import unittest
+import numpy as np
+from analysistoolbox.simulations import CalculateSimulationStandardError, GenerateUniformSamples
+
+class TestCalculateSimulationStandardError(unittest.TestCase):
+    def setUp(self):
+        # Create pseudo-random and Sobol samples of the same size
+        self.random_values = GenerateUniformSamples(10000, sampling_method='random')
+        self.sobol_values = GenerateUniformSamples(10000, sampling_method='sobol')
+
+    def test_random_standard_errors(self):
+        # Pseudo-random samples should use the formulas for independent trials
+        self.assertAlmostEqual(CalculateSimulationStandardError(self.random_values), np.std(self.random_values, ddof=1) / 100)
+        probability = np.mean(self.random_values < 0.2)
+        self.assertAlmostEqual(CalculateSimulationStandardError(self.random_values, statistic='probability', risk_tolerance=0.2), np.sqrt(probability * (1 - probability) / 9999))
+
+    def test_replicate_standard_errors(self):
+        # Sobol samples should report a much smaller standard error than pseudo-random samples
+        self.assertLess(CalculateSimulationStandardError(self.sobol_values, sampling_method='sobol') * 10, CalculateSimulationStandardError(self.random_values))
+        self.assertGreater(CalculateSimulationStandardError(self.sobol_values, statistic='quantile', sampling_method='sobol', quantile=0.9), 0)
+        with self.assertRaises(ValueError):
+            CalculateSimulationStandardError(self.sobol_values, statistic='probability')
+
+if __name__ == '__main__':
+    unittest.main()
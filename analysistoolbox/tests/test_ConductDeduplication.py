@@ -0,0 +1,28 @@
+import unittest
+import numpy as np
+import pandas as pd
+from analysistoolbox.data_processing import ConductDeduplication
+
+class TestConductDeduplication(unittest.TestCase):
+    def setUp(self):
+        # Create a list of company names with misspelled duplicates and a missing name
+        self.df_companies = pd.DataFrame({
+            'Company': ['Acme Corporation', 'Blue River Holdings', 'Acme Corporatoin', 'North Data Systems', None, 'ACME Corporation', 'Blue River Holding', 'Zeta'],
+            'City': ['Austin', 'Denver', 'Austin', 'Boston', 'Austin', 'Austin', 'Denver', 'Austin']
+        })
+
+    def test_clusters_near_duplicates(self):
+        # Misspelled and chained duplicates should share a cluster, while the missing name gets its own
+        df_clusters = ConductDeduplication(self.df_companies, ['Company'], match_score_threshold=90, show_summary=False)
+        self.assertEqual(df_clusters['Cluster ID'].tolist(), [1, 2, 1, 3, 4, 1, 2, 5])
+        self.assertEqual(df_clusters['Cluster Size'].tolist(), [3, 2, 3, 1, 1, 3, 2, 1])
+
+    def test_chunks_and_workers(self):
+        # The clusters should not depend on the chunk size or number of workers
+        df_clusters = ConductDeduplication(self.df_companies, ['Company', 'City'], show_summary=False)
+        df_chunked_clusters = ConductDeduplication(self.df_companies, ['Company', 'City'], entities_per_chunk=2, number_of_workers=2, show_summary=False)
+        np.testing.assert_array_equal(df_clusters['Cluster ID'], df_chunked_clusters['Cluster ID'])
+        self.assertRaises(ValueError, ConductDeduplication, self.df_companies, ['Company'], match_methods=['Cosine'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, utils
+from analysistoolbox.data_processing import ConductEntityMatching
+
+class TestConductEntityMatching(unittest.TestCase):
+    def setUp(self):
+        # Create two lists of company names and cities
+        self.df_vendors = pd.DataFrame({'Vendor ID': [1, 2, 3, 4], 'Name': ['Acme Corp', 'Smith Holdings', 'Blue River Inc', 'North Data'], 'City': ['Austin', 'Boston', 'Denver', 'Austin']})
+        self.df_reference = pd.DataFrame({'Reference ID': ['a', 'b', 'c', 'd', 'e'], 'Name': ['ACME Corp.', 'Smyth Holdings', 'River Blue Inc', 'Data North', 'Zeta'], 'City': ['Austin', 'Boston', 'Denver', 'Austin', 'Austin']})
+
+    def test_scores_every_method_in_one_wide_result(self):
+        # Each match method should get its own column, with scores below the threshold left empty
+        df_matches = ConductEntityMatching(self.df_vendors, 'Vendor ID', self.df_reference, 'Reference ID', columns_to_compare=['Name'], match_score_threshold=90, match_methods=['Ratio', 'Token Set Ratio'])
+        self.assertEqual(list(df_matches.columns[:5]), ['Vendor ID', 'Reference ID', 'Entity 1', 'Entity 2', 'Ratio'])
+        row = df_matches[(df_matches['Vendor ID'] == 3) & (df_matches['Reference ID'] == 'c')].iloc[0]
+        self.assertEqual(row['Token Set Ratio'], round(fuzz.token_set_ratio('Blue River Inc', 'River Blue Inc', processor=utils.default_process)))
+        self.assertTrue(np.isnan(row['Ratio']))
+        self.assertNotIn('e', df_matches['Reference ID'].tolist())
+
+    def test_chunks_and_filters(self):
+        # The results should not depend on the chunk size, and the Levenshtein filter should remove distant pairs
+        df_matches = ConductEntityMatching(self.df_vendors, 'Vendor ID', self.df_reference, 'Reference ID', match_score_threshold=80)
+        df_chunked_matches = ConductEntityMatching(self.df_vendors, 'Vendor ID', self.df_reference, 'Reference ID', match_score_threshold=80, pairs_per_chunk=3, number_of_workers=1)
+        pd.testing.assert_frame_equal(df_matches, df_chunked_matches)
+        df_filtered_matches = ConductEntityMatching(self.df_vendors, 'Vendor ID', self.df_reference, 'Reference ID', match_score_threshold=80, levenshtein_distance_filter=4)
+        self.assertEqual(sorted(df_filtered_matches['Vendor ID']), [1, 2])
+
+    def test_top_matches_written_in_chunks(self):
+        # Only the best match of each vendor should be kept, and writing chunk by chunk should give the same matches
+        df_top_matches = ConductEntityMatching(self.df_vendors, 'Vendor ID', self.df_reference, 'Reference ID', columns_to_compare=['Name'], match_score_threshold=50, top_k=1)
+        self.assertEqual(df_top_matches['Vendor ID'].tolist(), [1, 2, 3, 4])
+        self.assertEqual(df_top_matches['Reference ID'].tolist(), ['a', 'b', 'c', 'd'])
+        output_filepath = os.path.join(tempfile.mkdtemp(), 'matches.csv')
+        ConductEntityMatching(self.df_vendors, 'Vendor ID', self.df_reference, 'Reference ID', columns_to_compare=['Name'], match_score_threshold=50, top_k=1, pairs_per_chunk=5, output_filepath=output_filepath)
+        pd.testing.assert_frame_equal(pd.read_csv(output_filepath), df_top_matches, check_dtype=False)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+import numpy as np
+from analysistoolbox.simulations import ConductSensitivityAnalysis, SimulateCountOfSuccesses, SimulateTimeUntilNEvents
+
+def simulate_profit(number_of_trials, random_seed, price=10, unit_cost=4):
+    # Simulate the profit of a product with Poisson demand
+    rng = np.random.default_rng(random_seed)
+    return (price - unit_cost) * rng.poisson(100, number_of_trials)
+
+class TestConductSensitivityAnalysis(unittest.TestCase):
+    def setUp(self):
+        # Set the parameter ranges of the time until n events
+        self.parameter_ranges = {'number_of_events': [2, 4, 8], 'expected_time_between_events': [1, 3]}
+
+    def test_one_at_a_time(self):
+        # A one-at-a-time analysis should have a base row plus one row per parameter value, and rank the parameters by their swing
+        df_results = ConductSensitivityAnalysis(SimulateTimeUntilNEvents, self.parameter_ranges, risk_tolerance=10, lower_is_worse=False, plot_tornado_chart=False)
+        self.assertEqual(len(df_results.index), 6)
+        self.assertAlmostEqual(df_results['Mean'].iloc[0], 4, delta=0.1)
+        self.assertIn('Probability Beyond Tolerance', df_results.columns)
+        self.assertEqual(df_results.attrs['tornado_table']['Parameter'].iloc[0], 'expected_time_between_events')
+
+    def test_grid_with_common_random_numbers(self):
+        # A grid should evaluate every combination, and common random numbers should make the mean exactly proportional to the scale
+        df_results = ConductSensitivityAnalysis(SimulateTimeUntilNEvents, self.parameter_ranges, analysis_type='grid', plot_tornado_chart=False)
+        self.assertEqual(len(df_results.index), 6)
+        df_two_events = df_results[df_results['number_of_events'] == 2]
+        self.assertAlmostEqual(df_two_events['Mean'].iloc[1], df_two_events['Mean'].iloc[0] * 3)
+
+    def test_user_defined_model(self):
+        # A user-defined model should be called once per setting with the same random numbers
+        df_results = ConductSensitivityAnalysis(simulate_profit, {'price': [8, 12], 'unit_cost': [3, 5]}, plot_tornado_chart=False)
+        self.assertAlmostEqual(df_results['Mean'].iloc[2] * 5, df_results['Mean'].iloc[0] * 9)
+
+    def test_integer_parameter_without_base_value(self):
+        # The base value of an integer parameter should be one of its values, so no setting has missing outcomes
+        df_results = ConductSensitivityAnalysis(SimulateCountOfSuccesses, {'sample_size_per_trial': [10, 25], 'probability_of_success': [0.2, 0.4, 0.6]}, plot_tornado_chart=False)
+        self.assertEqual(df_results['sample_size_per_trial'].iloc[0], 10)
+        self.assertFalse(df_results['Mean'].isna().any())
+        self.assertAlmostEqual(df_results['Mean'].iloc[0], 4, delta=0.1)
+        self.assertRaises(ValueError, ConductSensitivityAnalysis, SimulateCountOfSuccesses, {'sample_size_per_trial': [10, 25]}, base_parameters={'sample_size_per_trial': 17.5, 'probability_of_success': 0.4}, plot_tornado_chart=False)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+import pandas as pd
+from analysistoolbox.data_processing import CreateEntityMatchingBlocks, ConductEntityMatching
+
+class TestCreateEntityMatchingBlocks(unittest.TestCase):
+    def setUp(self):
+        # Create two small lists of company names, where each name in the first list has one match in the second
+        self.df_vendors = pd.DataFrame({'Vendor ID': [1, 2, 3, 4], 'Name': ['Acme Corp', 'Smith Holdings', 'Blue River Inc', 'North Data']})
+        self.df_reference = pd.DataFrame({'Reference ID': ['a', 'b', 'c', 'd', 'e'], 'Name': ['ACME Corp.', 'Smyth Holdings', 'River Blue Inc', 'Data North', 'Zeta']})
+
+    def test_each_method_finds_its_pairs(self):
+        # Each method should pair the entities it is designed to catch, and leave out entities with nothing in common
+        df_token_pairs = CreateEntityMatchingBlocks(self.df_vendors['Name'], self.df_reference['Name'], blocking_methods=['Token'], show_summary=False)
+        self.assertIn((3, 3), list(zip(df_token_pairs['Index 1'], df_token_pairs['Index 2'])))
+        self.assertNotIn(4, df_token_pairs['Index 2'].tolist())
+        df_phonetic_pairs = CreateEntityMatchingBlocks(self.df_vendors['Name'], self.df_reference['Name'], blocking_methods=['Phonetic'], show_summary=False)
+        self.assertIn((1, 1), list(zip(df_phonetic_pairs['Index 1'], df_phonetic_pairs['Index 2'])))
+        df_sorted_pairs = CreateEntityMatchingBlocks(['Blue River Inc'], ['Inc River Blue', 'Zeta'], blocking_methods=['Sorted Neighborhood'], sorted_neighborhood_window=2, show_summary=False)
+        self.assertEqual(list(zip(df_sorted_pairs['Index 1'], df_sorted_pairs['Index 2'])), [(0, 0)])
+
+    def test_reduction_ratio_and_pair_recall(self):
+        # Blocking should keep the known matches while scoring fewer pairs than the full cross join
+        df_candidate_pairs = CreateEntityMatchingBlocks(self.df_vendors['Name'], self.df_reference['Name'], known_matches=[(0, 0), (1, 1), (2, 2), (3, 3)], show_summary=False)
+        self.assertEqual(df_candidate_pairs.attrs['pair_recall'], 1)
+        self.assertEqual(df_candidate_pairs.attrs['reduction_ratio'], 1 - len(df_candidate_pairs) / 20)
+        df_blocked_matches = ConductEntityMatching(self.df_vendors, 'Vendor ID', self.df_reference, 'Reference ID', columns_to_compare=['Name'], match_score_threshold=80, blocking_methods=['Token', 'Phonetic'])
+        df_all_matches = ConductEntityMatching(self.df_vendors, 'Vendor ID', self.df_reference, 'Reference ID', columns_to_compare=['Name'], match_score_threshold=80)
+        self.assertEqual(sorted(df_blocked_matches['Vendor ID']), sorted(df_all_matches['Vendor ID']))
+
+if __name__ == '__main__':
+    unittest.main()
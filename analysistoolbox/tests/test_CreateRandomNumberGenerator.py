@@ -0,0 +1,27 @@
+import unittest
+import numpy as np
+from analysistoolbox.simulations import CreateRandomNumberGenerator, SimulateNormallyDistributedOutcome
+
+class TestCreateRandomNumberGenerator(unittest.TestCase):
+    def test_same_seed_is_reproducible(self):
+        # Two generators from the same seed should produce identical draws
+        rng_1 = CreateRandomNumberGenerator(412)
+        rng_2 = CreateRandomNumberGenerator(412)
+        np.testing.assert_array_equal(rng_1.random(100), rng_2.random(100))
+
+    def test_streams_are_independent_and_reproducible(self):
+        # Spawned streams should differ from one another, but be identical across calls
+        list_of_streams_1 = CreateRandomNumberGenerator(412, number_of_streams=3)
+        list_of_streams_2 = CreateRandomNumberGenerator(412, number_of_streams=3)
+        self.assertEqual(len(list_of_streams_1), 3)
+        self.assertFalse(np.array_equal(list_of_streams_1[0].random(10), list_of_streams_1[1].random(10)))
+        np.testing.assert_array_equal(list_of_streams_1[2].random(10), list_of_streams_2[2].random(10))
+
+    def test_simulation_is_reproducible(self):
+        # Seeding a simulation should now produce the same results on every run
+        arr_1 = SimulateNormallyDistributedOutcome(expected_outcome=10, standard_deviation_of_outcome=2, random_seed=1, return_format='array', plot_simulation_results=False)
+        arr_2 = SimulateNormallyDistributedOutcome(expected_outcome=10, standard_deviation_of_outcome=2, random_seed=1, return_format='array', plot_simulation_results=False)
+        np.testing.assert_array_equal(arr_1, arr_2)
+
+if __name__ == '__main__':
+    unittest.main()
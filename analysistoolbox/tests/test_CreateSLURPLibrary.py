@@ -0,0 +1,36 @@
+import unittest
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+from analysistoolbox.simulations import CreateSLURPDistribution, CreateSLURPLibrary
+
+class TestCreateSLURPLibrary(unittest.TestCase):
+    def setUp(self):
+        # Fit a linear regression model and create a dataframe of predictor scenarios
+        rng = np.random.default_rng(412)
+        df = pd.DataFrame({'x1': rng.normal(size=200), 'x2': rng.normal(size=200)})
+        df['y'] = 3 + 2 * df['x1'] - df['x2'] + rng.normal(size=200)
+        self.model = sm.OLS(df['y'], sm.add_constant(df[['x1', 'x2']])).fit()
+        self.scenarios = pd.DataFrame({'Scenario': ['Low', 'Base', 'High'], 'x1': [-1.0, 0.0, 1.0], 'x2': [0.5, 0.0, -0.5]})
+
+    def test_library_matches_single_slurp(self):
+        # Each scenario should match a single SLURP of the same predictors drawn with the same seed
+        sip_library = CreateSLURPLibrary(self.model, self.scenarios, scenario_name_column='Scenario', number_of_trials=5000)
+        self.assertEqual(sip_library.shape, (5000, 3))
+        self.assertEqual(sip_library.variable_names, ['Low', 'Base', 'High'])
+        arr_single = CreateSLURPDistribution(self.model, [1.0, -0.5], number_of_trials=5000, return_format='array', show_distribution_plot=False, use_cache=False)
+        np.testing.assert_allclose(sip_library['High'], arr_single, rtol=1e-6)
+
+    def test_metalogs_pass_through_prediction_intervals(self):
+        # The metalog of each scenario should pass through the limits and prediction of its interval
+        sip_library = CreateSLURPLibrary(self.model, self.scenarios, lower_bound=-20, use_common_random_numbers=False)
+        prediction_frame = self.model.get_prediction(sm.add_constant(self.scenarios[['x1', 'x2']])).summary_frame(alpha=0.05)
+        for i, scenario_name in enumerate(sip_library.variable_names):
+            np.testing.assert_allclose(
+                np.quantile(sip_library[scenario_name], [0.025, 0.5, 0.975]),
+                prediction_frame[['obs_ci_lower', 'mean', 'obs_ci_upper']].iloc[i],
+                rtol=0.05
+            )
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+from analysistoolbox.data_processing import EntityMatchingIndex, LoadEntityMatchingIndex, ConductEntityMatching, CreateEntityMatchingBlocks
+from analysistoolbox.data_processing.CreateEntityMatchingBlocks import _normalize_entities
+
+class TestEntityMatchingIndex(unittest.TestCase):
+    def setUp(self):
+        # Create a reference table of company names and a daily batch of new names
+        self.df_reference = pd.DataFrame({'Reference ID': ['a', 'b', 'c', 'd', 'e'], 'Name': ['ACME Corp.', 'Smyth Holdings', 'River Blue Inc', 'Data North', 'Zeta']})
+        self.df_batch = pd.DataFrame({'Vendor ID': [1, 2, 3, 4], 'Name': ['Acme Corp', 'Smith Holdings', 'Blue River Inc', 'Zeta Group']})
+
+    def test_matches_like_conduct_entity_matching(self):
+        # Matching against the index should find the same matches as comparing every pair
+        entity_matching_index = EntityMatchingIndex(self.df_reference, 'Reference ID', ['Name'])
+        df_index_matches = entity_matching_index.match(self.df_batch, 'Vendor ID', match_score_threshold=85)
+        df_all_matches = ConductEntityMatching(self.df_batch, 'Vendor ID', self.df_reference, 'Reference ID', columns_to_compare=['Name'], match_score_threshold=85)
+        pd.testing.assert_frame_equal(df_index_matches.sort_values('Vendor ID').reset_index(drop=True), df_all_matches.sort_values('Vendor ID').reset_index(drop=True))
+
+    def test_add_and_reload(self):
+        # Records added to a saved index should be matched after it is reloaded, without re-indexing the old records
+        entity_matching_index = EntityMatchingIndex(self.df_reference.iloc[:3], 'Reference ID', ['Name'])
+        filepath = entity_matching_index.save(os.path.join(tempfile.mkdtemp(), 'reference_index.pkl'))
+        reloaded_index = LoadEntityMatchingIndex(filepath).add(self.df_reference.iloc[2:])
+        self.assertEqual((len(reloaded_index), reloaded_index.number_of_entities), (5, 5))
+        df_matches = reloaded_index.match(self.df_batch, 'Vendor ID', match_score_threshold=85, top_k=1)
+        self.assertEqual(dict(zip(df_matches['Vendor ID'], df_matches['Reference ID'])), {1: 'a', 2: 'b', 3: 'c', 4: 'e'})
+
+    def test_n_gram_candidates_match_blocks(self):
+        # The index should find the same n-gram candidates as CreateEntityMatchingBlocks, counting n-grams that aren't in the index
+        list_of_reference_names = ['abcqqqqqqq', 'abcxyq', 'zeta corp', 'data north']
+        list_of_batch_names = ['abcxyz', 'zeta group', 'north dat']
+        entity_matching_index = EntityMatchingIndex(pd.DataFrame({'ID': range(4), 'Name': list_of_reference_names}), 'ID', ['Name'], blocking_methods=['Character N-Gram'])
+        batch_numbers, reference_numbers = entity_matching_index._get_candidate_pairs(_normalize_entities(list_of_batch_names))
+        df_blocks = CreateEntityMatchingBlocks(list_of_batch_names, list_of_reference_names, blocking_methods=['Character N-Gram'], show_summary=False)
+        self.assertEqual(set(zip(batch_numbers, reference_numbers)), set(zip(df_blocks['Index 1'], df_blocks['Index 2'])))
+        self.assertNotIn((0, 0), set(zip(batch_numbers, reference_numbers)))
+
+        # With a common n-gram block skipped as too large, only the n-grams in kept blocks should count, so the misspelled match is still found
+        list_of_reference_names = ['acme holdings incorporated'] + ['firm%d incorporated' % i for i in range(10)]
+        entity_matching_index = EntityMatchingIndex(pd.DataFrame({'ID': range(11), 'Name': list_of_reference_names}), 'ID', ['Name'], blocking_methods=['Character N-Gram'], maximum_block_size=5)
+        batch_numbers, reference_numbers = entity_matching_index._get_candidate_pairs(_normalize_entities(['acme holdngs incorporated']))
+        df_blocks = CreateEntityMatchingBlocks(['acme holdngs incorporated'], list_of_reference_names, blocking_methods=['Character N-Gram'], maximum_block_size=5, show_summary=False)
+        self.assertEqual(set(zip(batch_numbers, reference_numbers)), set(zip(df_blocks['Index 1'], df_blocks['Index 2'])))
+        self.assertEqual(list(zip(batch_numbers, reference_numbers)), [(0, 0)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from analysistoolbox.simulations import EvaluateSimulationModel, LoadSIPLibrary, SIPLibrary
+
+class TestEvaluateSimulationModel(unittest.TestCase):
+    def setUp(self):
+        # Create a SIP library of units, prices, and unit costs
+        rng = np.random.default_rng(412)
+        self.sip_library = SIPLibrary(
+            np.column_stack([rng.poisson(100, 10000), rng.normal(20, 2, 10000), rng.normal(12, 1, 10000)]),
+            ['Units', 'Price', 'Unit Cost']
+        )
+
+    def test_formulas_match_column_arithmetic(self):
+        # Chained formulas evaluated in small chunks should match whole-column arithmetic
+        outputs, df_summary = EvaluateSimulationModel(
+            "revenue = Units * Price\nprofit = revenue - `Unit Cost` * Units - fixed_cost; is_loss = profit < 0",
+            self.sip_library,
+            constants={'fixed_cost': 700},
+            list_of_output_names=['profit', 'is_loss'],
+            chunk_size=1000,
+            show_summary=False
+        )
+        expected_profit = self.sip_library['Units'] * (self.sip_library['Price'] - self.sip_library['Unit Cost']) - 700
+        np.testing.assert_allclose(outputs['profit'], expected_profit)
+        np.testing.assert_array_equal(outputs['is_loss'], expected_profit < 0)
+        self.assertEqual(list(df_summary['Variable']), ['profit', 'is_loss'])
+        self.assertAlmostEqual(df_summary['Mean'].iloc[0], expected_profit.mean())
+
+    def test_memory_mapped_output(self):
+        # Outputs written to a file should reopen with LoadSIPLibrary
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            output_filepath = os.path.join(temporary_directory, 'model.npy')
+            EvaluateSimulationModel("margin = maximum(Price - `Unit Cost`, 0)", self.sip_library, output_filepath=output_filepath, show_summary=False, return_summary=False)
+            loaded_library = LoadSIPLibrary(output_filepath)
+            np.testing.assert_allclose(loaded_library['margin'], np.maximum(self.sip_library['Price'] - self.sip_library['Unit Cost'], 0))
+            del loaded_library
+
+    def test_unsafe_formulas_are_rejected(self):
+        # Attribute access, unknown functions, and unknown names should raise an error
+        for formula in ["x = Units.sum()", "x = __import__('os')", "x = Units * unknown_variable"]:
+            with self.assertRaises(ValueError):
+                EvaluateSimulationModel(formula, self.sip_library, show_summary=False)
+
+    def test_numexpr_path(self):
+        # numexpr should give the same outputs as numpy, and formulas with floor division should fall back to numpy
+        try:
+            import numexpr
+        except ImportError:
+            self.skipTest("numexpr isn't installed")
+        formula = "margin = where(Price > `Unit Cost`, Price - `Unit Cost`, 0) * sqrt(Units)"
+        outputs = EvaluateSimulationModel(formula, self.sip_library, use_numexpr=True, show_summary=False, return_summary=False)
+        numpy_outputs = EvaluateSimulationModel(formula, self.sip_library, use_numexpr=False, show_summary=False, return_summary=False)
+        np.testing.assert_allclose(outputs['margin'], numpy_outputs['margin'])
+        outputs = EvaluateSimulationModel("dozens = Units // 12", self.sip_library, show_summary=False, return_summary=False)
+        np.testing.assert_array_equal(outputs['dozens'], self.sip_library['Units'] // 12)
+        self.assertRaises(ValueError, EvaluateSimulationModel, "dozens = Units // 12", self.sip_library, use_numexpr=True, show_summary=False)
+
+if __name__ == '__main__':
+    unittest.main()
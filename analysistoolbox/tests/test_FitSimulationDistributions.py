@@ -0,0 +1,40 @@
+import unittest
+import numpy as np
+import pandas as pd
+from analysistoolbox.simulations import FitSimulationDistributions, SimulateCorrelatedOutcomes
+
+class TestFitSimulationDistributions(unittest.TestCase):
+    def setUp(self):
+        # Create columns drawn from known distributions
+        rng = np.random.default_rng(1)
+        self.df_data = pd.DataFrame({
+            'Demand': rng.poisson(4, 20000),
+            'Lead Time': rng.gamma(3, 2, 20000),
+            'Price': rng.normal(50, 5, 20000)
+        })
+
+    def test_best_fits(self):
+        # The distribution each column was drawn from should be picked, with parameters close to the truth
+        df_fits, list_of_marginals = FitSimulationDistributions(self.df_data, number_of_workers=1, show_summary=False)
+        self.assertEqual([marginal['distribution'] for marginal in list_of_marginals], ['poisson', 'gamma', 'normal'])
+        self.assertAlmostEqual(list_of_marginals[1]['number_of_events'], 3, delta=0.1)
+        self.assertAlmostEqual(list_of_marginals[2]['standard_deviation_of_outcome'], 5, delta=0.1)
+        self.assertEqual(df_fits.groupby('Variable')['Best'].sum().tolist(), [1, 1, 1])
+
+    def test_specifications_can_be_sampled(self):
+        # The best fits should be ready to pass to SimulateCorrelatedOutcomes
+        df_fits, list_of_marginals = FitSimulationDistributions(
+            self.df_data,
+            list_of_candidate_distributions=['normal', 'metalog'],
+            ranking_criterion='ks_distance',
+            number_of_workers=1,
+            show_summary=False
+        )
+        self.assertEqual(set(df_fits['Distribution']), {'normal', 'metalog'})
+        df_simulations = SimulateCorrelatedOutcomes(list_of_marginals, np.eye(3), number_of_trials=1000, return_format='dataframe')
+        self.assertEqual(df_simulations.shape[0], 1000)
+        with self.assertRaises(ValueError):
+            FitSimulationDistributions(self.df_data, list_of_candidate_distributions=['weibull'])
+
+if __name__ == '__main__':
+    unittest.main()
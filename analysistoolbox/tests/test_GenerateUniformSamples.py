@@ -0,0 +1,46 @@
+import unittest
+import numpy as np
+from scipy.stats import qmc
+from analysistoolbox.simulations import GenerateUniformSamples, SimulateNormallyDistributedOutcome
+from analysistoolbox.simulations.GenerateUniformSamples import _create_qmc_engine
+
+class SeedOnlyLatinHypercube(qmc.LatinHypercube):
+    # Stand in for the qmc engines of scipy versions before 1.15, which only take a seed argument
+    def __init__(self, d, seed=None):
+        super().__init__(d=d, rng=seed)
+
+class TestGenerateUniformSamples(unittest.TestCase):
+    def setUp(self):
+        self.sampling_methods = ['random', 'sobol', 'latin_hypercube', 'antithetic', 'stratified']
+
+    def test_shape_and_range(self):
+        # Every method should give numbers strictly between 0 and 1 in the requested shape
+        for sampling_method in self.sampling_methods:
+            uniform_values = GenerateUniformSamples(1000, number_of_dimensions=3, sampling_method=sampling_method)
+            self.assertEqual(uniform_values.shape, (1000, 3))
+            self.assertTrue(np.all((uniform_values > 0) & (uniform_values < 1)))
+        self.assertEqual(GenerateUniformSamples(1000).shape, (1000,))
+
+    def test_replicates_are_stratified(self):
+        # Each replicate of a Latin Hypercube or stratified sample should have one number in each of its strata
+        for sampling_method in ['latin_hypercube', 'stratified']:
+            uniform_values = GenerateUniformSamples(1000, sampling_method=sampling_method, number_of_replicates=10)
+            for replicate in uniform_values.reshape(10, 100):
+                self.assertTrue(np.array_equal(np.sort(np.floor(replicate * 100)), np.arange(100)))
+
+    def test_variance_reduction(self):
+        # The variance-reduction methods should estimate a tail probability more precisely than pseudo-random sampling
+        list_of_standard_errors = []
+        for sampling_method in ['random', 'latin_hypercube']:
+            df_simulation = SimulateNormallyDistributedOutcome(0, 1, number_of_trials=1000, sampling_method=sampling_method, plot_simulation_results=False)
+            self.assertEqual(df_simulation.attrs['sampling_method'], sampling_method)
+            list_of_standard_errors.append(df_simulation.attrs['standard_error'])
+        self.assertLess(list_of_standard_errors[1] * 10, list_of_standard_errors[0])
+
+    def test_seed_argument_fallback(self):
+        # Engines that only take a seed argument should draw the same numbers from the generator
+        uniform_values = _create_qmc_engine(SeedOnlyLatinHypercube, 2, np.random.default_rng(412)).random(100)
+        np.testing.assert_array_equal(uniform_values, qmc.LatinHypercube(d=2, rng=np.random.default_rng(412)).random(100))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import csv
+import email
+import io
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+from analysistoolbox.data_processing import GeocodeUSAddresses
+
+# Coordinates of the addresses known to the stand-in geocoder, as "longitude,latitude"
+KNOWN_ADDRESSES = {
+    '4600 SILVER HILL RD, WASHINGTON, DC 20233': '-76.92744,38.845985',
+    '1600 PENNSYLVANIA AVE NW, WASHINGTON, DC 20500': '-77.03654,38.89768',
+}
+
+class CensusStandInHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        # Fail the first request to test retries
+        self.server.batch_sizes.append(None)
+        if len(self.server.batch_sizes) == 1 and self.server.fail_first_request:
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        # Read the batch file from the multipart form, and answer with the Census batch result format
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        form = email.message_from_bytes(b'Content-Type: ' + self.headers['Content-Type'].encode() + b'\r\n\r\n' + body)
+        batch_file = [part for part in form.get_payload() if part.get_param('name', header='content-disposition') == 'addressFile'][0]
+        rows = list(csv.reader(io.StringIO(batch_file.get_payload(decode=True).decode())))
+        self.server.batch_sizes[-1] = len(rows)
+        results = io.StringIO()
+        for row in rows:
+            if row[1] in KNOWN_ADDRESSES:
+                csv.writer(results).writerow([row[0], row[1], 'Match', 'Exact', row[1], KNOWN_ADDRESSES[row[1]], '1', 'L'])
+            else:
+                csv.writer(results).writerow([row[0], row[1], 'No_Match'])
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(results.getvalue().encode())
+
+    def log_message(self, *args):
+        pass
+
+class TestGeocodeUSAddresses(unittest.TestCase):
+    def setUp(self):
+        # Start a local stand-in for the Census batch geocoder
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), CensusStandInHandler)
+        self.server.batch_sizes = []
+        self.server.fail_first_request = False
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = 'http://127.0.0.1:{}/geocoder'.format(self.server.server_address[1])
+
+        # Create a list of addresses with duplicates that only differ in case and spacing
+        self.df_addresses = pd.DataFrame({'Address': [
+            '4600 Silver Hill Rd, Washington, DC 20233',
+            '1600 Pennsylvania Ave NW, Washington, DC 20500',
+            '4600 silver hill rd ,  Washington, DC 20233',
+            '1 Nowhere Lane, Springfield',
+            None,
+        ]})
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_deduplicates_batches_and_retries(self):
+        # Each unique address should be sent once, in batches, with the failed batch retried
+        self.server.fail_first_request = True
+        df_geocoded = GeocodeUSAddresses(self.df_addresses.copy(), 'Address', addresses_per_batch=2, backoff_seconds=0, base_url=self.base_url)
+        self.assertEqual(sorted(size for size in self.server.batch_sizes if size is not None), [1, 2])
+        np.testing.assert_allclose(df_geocoded['Latitude'], [38.845985, 38.89768, 38.845985, np.nan, np.nan])
+        np.testing.assert_allclose(df_geocoded['Longitude'], [-76.92744, -77.03654, -76.92744, np.nan, np.nan])
+
+    def test_reruns_use_cache(self):
+        # A rerun should only geocode addresses that aren't in the cache, including unmatched addresses
+        cache_filepath = os.path.join(tempfile.mkdtemp(), 'geocodes.sqlite')
+        GeocodeUSAddresses(self.df_addresses.iloc[:4].copy(), 'Address', cache_filepath=cache_filepath, base_url=self.base_url)
+        df_new_addresses = pd.DataFrame({'Address': ['1600 PENNSYLVANIA AVE NW, WASHINGTON, DC 20500', '1 Nowhere Lane, Springfield', '2 Elsewhere Rd']})
+        df_geocoded = GeocodeUSAddresses(df_new_addresses, 'Address', cache_filepath=cache_filepath, base_url=self.base_url)
+        self.assertEqual(self.server.batch_sizes, [3, 1])
+        np.testing.assert_allclose(df_geocoded['Latitude'], [38.89768, np.nan, np.nan])
+
+    def test_duplicate_index_labels(self):
+        # Frames with repeated index labels, e.g. from pd.concat, should be geocoded row by row
+        df_concatenated = pd.concat([self.df_addresses, self.df_addresses.iloc[[1, 3]]])
+        df_geocoded = GeocodeUSAddresses(df_concatenated, 'Address', base_url=self.base_url)
+        np.testing.assert_allclose(df_geocoded['Latitude'], [38.845985, 38.89768, 38.845985, np.nan, np.nan, 38.89768, np.nan])
+        self.assertEqual(self.server.batch_sizes, [3])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import tempfile
+import unittest
+import numpy as np
+from analysistoolbox.simulations import CreateMetalogDistributionFromPercentiles, MetalogCache
+
+class TestMetalogCache(unittest.TestCase):
+    def setUp(self):
+        # Create a sample of values and an empty cache for testing
+        self.values = np.random.default_rng(412).normal(loc=10, scale=2, size=5000)
+        self.metalog_cache = MetalogCache(maximum_size=2)
+
+    def test_repeated_fit_is_a_hit(self):
+        # Fitting the same inputs twice should return the same fitted object, with one miss and one hit
+        first_fit = self.metalog_cache.get_or_fit(self.values, term_maximum=5)
+        second_fit = self.metalog_cache.get_or_fit(self.values.copy(), term_maximum=5)
+        self.assertIs(first_fit, second_fit)
+        self.assertEqual((self.metalog_cache.hits, self.metalog_cache.misses), (1, 1))
+        # Changing the bounds should change the key
+        self.metalog_cache.get_or_fit(self.values, lower_bound=0, term_maximum=5)
+        self.assertEqual(self.metalog_cache.misses, 2)
+
+    def test_least_recently_used_is_dropped(self):
+        # The least recently used fit should be dropped once the cache is full
+        for term_maximum in [3, 4, 5]:
+            self.metalog_cache.get_or_fit(self.values, term_maximum=term_maximum)
+        self.assertEqual(len(self.metalog_cache), 2)
+        self.metalog_cache.get_or_fit(self.values, term_maximum=3)
+        self.assertEqual(self.metalog_cache.misses, 4)
+
+    def test_disk_tier_and_builder(self):
+        # A new cache using the same directory should load the coefficients instead of refitting
+        with tempfile.TemporaryDirectory() as cache_directory:
+            CreateMetalogDistributionFromPercentiles([10, 20, 40], [0.1, 0.5, 0.9], lower_bound=0, show_summary=False, show_distribution_plot=False, metalog_cache=MetalogCache(cache_directory=cache_directory))
+            new_cache = MetalogCache(cache_directory=cache_directory)
+            arr_metalog, metalog_distribution = CreateMetalogDistributionFromPercentiles([10, 20, 40], [0.1, 0.5, 0.9], lower_bound=0, show_summary=False, show_distribution_plot=False, return_format='array', return_metalog_distribution=True, metalog_cache=new_cache)
+        self.assertEqual((new_cache.disk_hits, new_cache.misses), (1, 0))
+        np.testing.assert_allclose(metalog_distribution.quantile([0.1, 0.5, 0.9]), [10, 20, 40])
+        self.assertEqual(arr_metalog.size, 10000)
+
+if __name__ == '__main__':
+    unittest.main()
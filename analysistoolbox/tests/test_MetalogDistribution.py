@@ -0,0 +1,41 @@
+import unittest
+import numpy as np
+from analysistoolbox.simulations import GenerateHDRRandomNumbers, MetalogDistribution
+
+class TestMetalogDistribution(unittest.TestCase):
+    def setUp(self):
+        # Create a sample of skewed, positive values for testing
+        self.values = np.random.default_rng(412).gamma(shape=2, scale=3, size=100000)
+
+    def test_fit_matches_sample_quantiles(self):
+        # A semi-bounded metalog should closely match the quantiles of the values it was fit to
+        metalog_distribution = MetalogDistribution.fit(self.values, lower_bound=0, term_maximum=9)
+        self.assertEqual(sorted(metalog_distribution.coefficients), list(range(2, 10)))
+        np.testing.assert_allclose(
+            metalog_distribution.quantile([0.05, 0.25, 0.5, 0.75, 0.95]),
+            np.quantile(self.values, [0.05, 0.25, 0.5, 0.75, 0.95]),
+            rtol=0.02
+        )
+        self.assertTrue(np.all(metalog_distribution.sample(10000) > 0))
+
+    def test_three_term_fit_passes_through_percentiles(self):
+        # With three terms, the metalog should pass exactly through three percentiles
+        metalog_distribution = MetalogDistribution.fit([10, 20, 40], probabilities=[0.1, 0.5, 0.9], lower_bound=0, upper_bound=100, term_maximum=3)
+        np.testing.assert_allclose(metalog_distribution.quantile([0.1, 0.5, 0.9], number_of_terms=3), [10, 20, 40])
+        samples = metalog_distribution.sample(10000, number_of_terms=3)
+        self.assertTrue(np.all((samples > 0) & (samples < 100)))
+
+    def test_hdr_random_numbers(self):
+        # HDR random numbers should be uniform, repeatable, and differ between variables
+        uniform_values = GenerateHDRRandomNumbers(100000, variable_id=1)
+        np.testing.assert_array_equal(uniform_values[10:20], GenerateHDRRandomNumbers(10, variable_id=1, first_trial=11))
+        self.assertTrue(np.all((uniform_values > 0) & (uniform_values < 1)))
+        self.assertAlmostEqual(uniform_values.mean(), 0.5, places=2)
+        self.assertFalse(np.allclose(uniform_values[:100], GenerateHDRRandomNumbers(100, variable_id=2)))
+
+    def test_hdr_matches_published_values(self):
+        # The first trials of the default variable should match the published HDR generator (e.g. in SIPmath and Excel)
+        np.testing.assert_allclose(GenerateHDRRandomNumbers(5), [0.910, 0.759, 0.080, 0.520, 0.117], atol=0.0005)
+
+if __name__ == '__main__':
+    unittest.main()
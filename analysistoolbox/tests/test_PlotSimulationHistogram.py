@@ -0,0 +1,41 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+from analysistoolbox.simulations import PlotSimulationHistogram, StreamingSummary
+from analysistoolbox.simulations.PlotSimulationHistogram import _get_bin_edges, _get_summary_histogram
+
+class TestPlotSimulationHistogram(unittest.TestCase):
+    def setUp(self):
+        # Create a sample of simulated counts and a folder to save plots to
+        self.values = np.random.default_rng(412).poisson(4, 100000)
+        self.folder = tempfile.mkdtemp()
+
+    def test_saves_each_input_without_showing(self):
+        # Raw values, counts with bin edges, and a streaming summary should each be saved without displaying the plot
+        list_of_inputs = [self.values, np.histogram(self.values, bins=20), StreamingSummary().update(self.values)]
+        for index, simulation_results in enumerate(list_of_inputs):
+            filepath = os.path.join(self.folder, 'plot_{}.png'.format(index))
+            PlotSimulationHistogram(simulation_results, show_plot=False, filepath_to_save_plot=filepath)
+            self.assertTrue(os.path.getsize(filepath) > 0)
+        with self.assertRaises(ValueError):
+            PlotSimulationHistogram(self.values, show_plot=False, filepath_to_save_plot=os.path.join(self.folder, 'plot.pdf'))
+
+    def test_bin_edges(self):
+        # A bin width of 1 should center a bin on each whole number, and no more than 200 bins should be used
+        bin_edges = _get_bin_edges(self.values.astype(float), 'auto', 1, 0)
+        np.testing.assert_allclose(bin_edges, np.arange(self.values.min() - 0.5, self.values.max() + 1))
+        wide_values = np.random.default_rng(412).standard_cauchy(100000)
+        self.assertLessEqual(_get_bin_edges(wide_values, 'auto', None, np.subtract(*np.percentile(wide_values, [75, 25]))).size, 201)
+
+    def test_summary_rebinned_to_bin_width(self):
+        # A streaming summary of counts should be re-binned onto whole numbers, matching the histogram of the raw counts
+        bin_counts, bin_edges = _get_summary_histogram(StreamingSummary().update(self.values), 'auto', 1)
+        expected_counts, expected_edges = np.histogram(self.values, bins=_get_bin_edges(self.values.astype(float), 'auto', 1, 0))
+        np.testing.assert_allclose(bin_edges, expected_edges)
+        np.testing.assert_array_equal(bin_counts, expected_counts)
+
+if __name__ == '__main__':
+    unittest.main()
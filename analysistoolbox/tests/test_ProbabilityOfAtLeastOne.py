@@ -0,0 +1,41 @@
+import unittest
+import numpy as np
+import pandas as pd
+from analysistoolbox.probability import ProbabilityOfAtLeastOne
+
+class TestProbabilityOfAtLeastOne(unittest.TestCase):
+    def setUp(self):
+        # Create a table of risk scenarios
+        self.df_scenarios = pd.DataFrame({
+            'Probability': [0.0, 0.1, 0.25, 1.0],
+            'Events': [5, 0, 4, 3]
+        })
+
+    def test_single_scenario(self):
+        # A single scenario should keep returning a number or a formatted percent
+        self.assertAlmostEqual(ProbabilityOfAtLeastOne(0.05, 20, show_plot=False), 1 - 0.95 ** 20)
+        self.assertEqual(ProbabilityOfAtLeastOne(0.5, 2, format_as_percent=True, show_plot=False), '75.00%')
+
+    def test_array_of_scenarios(self):
+        # Arrays should be scored in one call, with the number of events to the risk tolerance matching a search over event counts
+        arr_probabilities = np.linspace(0.01, 0.5, 200)
+        probabilities, events_needed = ProbabilityOfAtLeastOne(
+            arr_probabilities,
+            10,
+            risk_tolerance=0.3,
+            return_number_of_events_to_risk_tolerance=True
+        )
+        np.testing.assert_allclose(probabilities, 1 - (1 - arr_probabilities) ** 10)
+        expected_events_needed = [next(n for n in range(1000) if 1 - (1 - p) ** n >= 0.3) for p in arr_probabilities]
+        np.testing.assert_array_equal(events_needed, expected_events_needed)
+
+    def test_dataframe_of_scenarios(self):
+        # Dataframe columns should be scored, including the edge cases of certain and impossible events
+        df_results = ProbabilityOfAtLeastOne('Probability', 'Events', dataframe=self.df_scenarios, risk_tolerance=0.5)
+        np.testing.assert_allclose(df_results['Probability of at Least One Event'], [0, 0, 1 - 0.75 ** 4, 1])
+        np.testing.assert_array_equal(df_results['Number of Events to Risk Tolerance'], [np.inf, 7, 3, 1])
+        with self.assertRaises(ValueError):
+            ProbabilityOfAtLeastOne([0.1, 1.5], 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+from analysistoolbox.simulations import CreateSIPDataframe, LoadSIPLibrary, SIPLibrary, SimulateCountOutcome
+
+class TestSIPLibrary(unittest.TestCase):
+    def setUp(self):
+        # Create a sample SIP library with two variables
+        self.sip_library = SIPLibrary(
+            np.column_stack([np.arange(1, 6), np.arange(10, 60, 10)]),
+            ['Units', 'Price']
+        )
+
+    def test_variable_is_zero_copy_view(self):
+        # Selecting a variable should return a view of the library's buffer
+        units = self.sip_library['Units']
+        self.assertTrue(np.shares_memory(units, self.sip_library.data))
+        units[0] = 100
+        self.assertEqual(self.sip_library['Units'][0], 100)
+
+    def test_arithmetic_and_new_variables(self):
+        # Arithmetic across variables and libraries should be vectorized and element-wise
+        self.sip_library['Revenue'] = self.sip_library['Units'] * self.sip_library['Price']
+        np.testing.assert_array_equal(self.sip_library['Revenue'], [10, 40, 90, 160, 250])
+        doubled_library = self.sip_library * 2 + self.sip_library
+        np.testing.assert_array_equal(doubled_library['Price'], [30, 60, 90, 120, 150])
+
+    def test_dataframe_conversion(self):
+        # Long and wide dataframes should have one row per trial (and variable)
+        self.assertEqual(self.sip_library.to_dataframe('wide').shape, (5, 3))
+        df_long = self.sip_library.to_dataframe('long')
+        self.assertEqual(df_long.shape, (10, 3))
+        self.assertEqual(list(df_long['Value'][5:]), [10, 20, 30, 40, 50])
+
+    def test_create_sip_dataframe(self):
+        # The long SIP dataframe should repeat every trial for each unique item
+        df_sips = CreateSIPDataframe('Project', ['A', 'B', 'A', 'C'], number_of_trials=4)
+        self.assertEqual(df_sips.shape, (12, 2))
+        self.assertEqual(list(df_sips['Trial'][:5]), [1, 2, 3, 4, 1])
+        sip_library = CreateSIPDataframe('Project', ['A', 'B', 'A', 'C'], number_of_trials=4, return_format='sip')
+        self.assertEqual(sip_library.shape, (4, 3))
+
+    def test_save_and_load_memory_map(self):
+        # Saving and loading should round-trip the trials, names, and metadata, with the trials memory-mapped
+        library = SimulateCountOutcome(expected_count=3, number_of_trials=5000, return_format='sip', plot_simulation_results=False)
+        library['Doubled'] = library['Count'] * 2
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            sidecar_filepath = library.save(os.path.join(temporary_directory, 'library.npy'))
+            loaded_library = LoadSIPLibrary(sidecar_filepath)
+            self.assertIsInstance(loaded_library.data.base, np.memmap)
+            np.testing.assert_array_equal(loaded_library.data, library.data)
+            self.assertEqual(loaded_library.variable_names, ['Count', 'Doubled'])
+            self.assertEqual(loaded_library.metadata['Count']['distribution'], 'poisson')
+            self.assertEqual(loaded_library.metadata['Count']['random_seed'], 412)
+            del loaded_library
+
+    def test_sipmath_export(self):
+        # The SIPmath 3.0 export should describe each variable with metalog coefficients and its own HDR stream
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            filepath = os.path.join(temporary_directory, 'library.json')
+            self.sip_library.to_sipmath_json(filepath, library_name='Test Library')
+            with open(filepath) as sipmath_file:
+                sipmath_library = json.load(sipmath_file)
+        self.assertEqual(sipmath_library['libraryType'], 'SIPmath_3_0')
+        self.assertEqual([sip['name'] for sip in sipmath_library['sips']], ['Units', 'Price'])
+        self.assertEqual([generator['arguments']['varId'] for generator in sipmath_library['U01']['rng']], [1, 2])
+        self.assertEqual(len(sipmath_library['sips'][0]['arguments']['aCoefficients']), 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+import numpy as np
+from scipy import stats
+from analysistoolbox.simulations import SimulateCorrelatedOutcomes, SIPLibrary
+
+class TestSimulateCorrelatedOutcomes(unittest.TestCase):
+    def setUp(self):
+        # Create a normal, a Poisson, and a gamma marginal with a mix of positive and negative correlations
+        self.list_of_marginals = [
+            {'name': 'Price', 'distribution': 'normal', 'expected_outcome': 10, 'standard_deviation_of_outcome': 2},
+            {'name': 'Demand', 'distribution': 'poisson', 'expected_count': 50},
+            {'name': 'Lead Time', 'distribution': 'gamma', 'number_of_events': 2, 'expected_time_between_events': 3}
+        ]
+        self.correlation_matrix = np.array([
+            [1.0, -0.6, 0.3],
+            [-0.6, 1.0, 0.0],
+            [0.3, 0.0, 1.0]
+        ])
+
+    def test_correlation_and_marginals(self):
+        # Both methods should give a trials x variables library with the target rank correlation and the right marginal means
+        for correlation_method in ['gaussian_copula', 'iman_conover']:
+            sip_library = SimulateCorrelatedOutcomes(self.list_of_marginals, self.correlation_matrix, number_of_trials=20000, correlation_method=correlation_method)
+            self.assertIsInstance(sip_library, SIPLibrary)
+            self.assertEqual(sip_library.shape, (20000, 3))
+            np.testing.assert_allclose(stats.spearmanr(sip_library.data).statistic, self.correlation_matrix, atol=0.05)
+            np.testing.assert_allclose(sip_library.data.mean(axis=0), [10, 50, 6], rtol=0.02)
+
+    def test_invalid_inputs(self):
+        # A matrix that isn't positive definite, or a marginal missing a parameter, should raise an error
+        with self.assertRaises(ValueError):
+            SimulateCorrelatedOutcomes(self.list_of_marginals, [[1, 0.9, 0.9], [0.9, 1, -0.9], [0.9, -0.9, 1]])
+        with self.assertRaises(ValueError):
+            SimulateCorrelatedOutcomes([{'name': 'Demand', 'distribution': 'poisson'}], [[1]])
+
+if __name__ == '__main__':
+    unittest.main()
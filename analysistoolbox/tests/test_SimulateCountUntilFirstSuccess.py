@@ -0,0 +1,32 @@
+import unittest
+import numpy as np
+from analysistoolbox.simulations import SimulateCountUntilFirstSuccess
+
+class TestSimulateCountUntilFirstSuccess(unittest.TestCase):
+    def setUp(self):
+        # Set the probability of success and the simulation settings shared by each test
+        self.probability_of_success = 0.2
+        self.settings = {'number_of_trials': 100000, 'return_format': 'array', 'plot_simulation_results': False}
+
+    def test_seed_and_mean(self):
+        # The same seed should give the same counts, and the mean should be close to 1/p
+        arr_counts = SimulateCountUntilFirstSuccess(self.probability_of_success, random_seed=7, **self.settings)
+        np.testing.assert_array_equal(arr_counts, SimulateCountUntilFirstSuccess(self.probability_of_success, random_seed=7, **self.settings))
+        self.assertAlmostEqual(arr_counts.mean(), 1 / self.probability_of_success, delta=0.05)
+        self.assertEqual(arr_counts.min(), 1)
+
+    def test_chunks_match_single_chunk(self):
+        # Drawing the trials in chunks should give the same counts as drawing them all at once
+        arr_counts = SimulateCountUntilFirstSuccess(self.probability_of_success, chunk_size=100000, **self.settings)
+        arr_chunked_counts = SimulateCountUntilFirstSuccess(self.probability_of_success, chunk_size=777, **self.settings)
+        np.testing.assert_array_equal(arr_counts, arr_chunked_counts)
+
+    def test_invalid_and_tiny_probabilities(self):
+        # A probability of zero or less should be rejected, and a tiny probability shouldn't overflow to negative counts
+        self.assertRaises(ValueError, SimulateCountUntilFirstSuccess, 0, plot_simulation_results=False)
+        self.assertRaises(ValueError, SimulateCountUntilFirstSuccess, -0.1, plot_simulation_results=False)
+        arr_counts = SimulateCountUntilFirstSuccess(1e-300, number_of_trials=1024, sampling_method='sobol', return_format='array', plot_simulation_results=False)
+        self.assertTrue((arr_counts > 0).all())
+
+if __name__ == '__main__':
+    unittest.main()
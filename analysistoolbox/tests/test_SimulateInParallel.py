@@ -0,0 +1,36 @@
+import unittest
+import numpy as np
+from analysistoolbox.simulations import RunSimulationTask, SimulateInParallel, SimulateTimeBetweenEvents
+
+def simulate_demand(number_of_trials, random_seed):
+    # Simulate a user-defined model that only returns arrays
+    return np.random.default_rng(random_seed).poisson(100, number_of_trials)
+
+class TestSimulateInParallel(unittest.TestCase):
+    def setUp(self):
+        # Set the simulation settings shared by each test
+        self.settings = {'number_of_trials': 40000, 'trials_per_task': 10000, 'random_seed': 412, 'show_worker_timing': False}
+
+    def test_same_results_for_any_number_of_workers(self):
+        # The results should only depend on the seed and task size, not on the number of workers
+        arr_one_worker = SimulateInParallel(SimulateTimeBetweenEvents, number_of_workers=1, expected_time_between_events=2, **self.settings)
+        arr_two_workers = SimulateInParallel(SimulateTimeBetweenEvents, number_of_workers=2, expected_time_between_events=2, **self.settings)
+        np.testing.assert_array_equal(arr_one_worker, arr_two_workers)
+        self.assertEqual(arr_one_worker.size, 40000)
+
+    def test_summary_matches_array(self):
+        # Summarizing each task's stream of chunks should give the same moments as summarizing the full array
+        arr_simulations = SimulateInParallel(SimulateTimeBetweenEvents, number_of_workers=2, expected_time_between_events=2, chunk_size=1000, **self.settings)
+        summary = SimulateInParallel(SimulateTimeBetweenEvents, number_of_workers=2, return_format='summary', expected_time_between_events=2, chunk_size=1000, **self.settings)
+        self.assertEqual(summary.count, arr_simulations.size)
+        self.assertAlmostEqual(summary.mean, arr_simulations.mean(), places=8)
+        self.assertAlmostEqual(summary.standard_deviation, arr_simulations.std(ddof=1), places=8)
+
+    def test_user_defined_model_summary(self):
+        # A model without a stream format should still be summarized from its array
+        task_result = RunSimulationTask(simulate_demand, 5000, 412, summarize_results=True)
+        self.assertEqual(task_result['results'].count, 5000)
+        self.assertAlmostEqual(task_result['results'].mean, simulate_demand(5000, 412).mean(), places=8)
+
+if __name__ == '__main__':
+    unittest.main()
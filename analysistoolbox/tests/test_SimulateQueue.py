@@ -0,0 +1,43 @@
+import unittest
+import numpy as np
+from analysistoolbox.simulations import SimulateQueue, SimulateTimeBetweenEvents, SimulateTimeUntilNEvents, CreateRandomNumberGenerator
+
+class TestSimulateQueue(unittest.TestCase):
+    def setUp(self):
+        # Set the arguments of a small queue
+        self.arguments = {'number_of_customers': 40, 'number_of_replications': 6, 'replications_per_task': 3, 'show_summary': False, 'return_wait_times': True}
+
+    def test_waits_match_recursions(self):
+        # The vectorized waits should match stepping through each customer, drawn from the same random numbers
+        for number_of_servers in [1, 3]:
+            df_replications, wait_times = SimulateQueue(1, 0.9 * number_of_servers, number_of_servers=number_of_servers, number_of_workers=1, **self.arguments)
+            rng = CreateRandomNumberGenerator(CreateRandomNumberGenerator(412, number_of_streams=2, return_seed_sequences=True)[0])
+            times_between_arrivals = SimulateTimeBetweenEvents(1, number_of_trials=120, return_format='array', random_seed=rng, plot_simulation_results=False).reshape(3, 40)
+            service_times = SimulateTimeUntilNEvents(1, 0.9 * number_of_servers, number_of_trials=120, return_format='array', random_seed=rng, plot_simulation_results=False).reshape(3, 40)
+            for replication in range(3):
+                server_free_times = np.zeros(number_of_servers)
+                arrival_time = 0
+                for customer in range(40):
+                    arrival_time += times_between_arrivals[replication, customer]
+                    first_free_server = np.argmin(server_free_times)
+                    start_time = max(server_free_times[first_free_server], arrival_time)
+                    self.assertAlmostEqual(wait_times[replication, customer], start_time - arrival_time)
+                    server_free_times[first_free_server] = start_time + service_times[replication, customer]
+            self.assertEqual(df_replications.shape[0], 6)
+
+    def test_matches_queueing_theory(self):
+        # An M/M/1 queue that is busy 80% of the time should have an average wait of 3.2 times between arrivals
+        df_replications = SimulateQueue(1, 0.8, number_of_customers=5000, number_of_replications=100, number_of_warm_up_customers=500, number_of_workers=1, show_summary=False)
+        self.assertAlmostEqual(df_replications['Average Wait Time'].mean(), 3.2, delta=0.3)
+        self.assertAlmostEqual(df_replications['Utilization'].mean(), 0.8, delta=0.01)
+        self.assertGreater(df_replications.attrs['arrivals_per_second'], 0)
+
+    def test_parallel_results_are_reproducible(self):
+        # The results should not depend on the number of workers
+        df_serial, wait_times_serial = SimulateQueue(1, 1.5, number_of_servers=2, number_of_workers=1, **self.arguments)
+        df_parallel, wait_times_parallel = SimulateQueue(1, 1.5, number_of_servers=2, number_of_workers=2, **self.arguments)
+        np.testing.assert_array_equal(wait_times_serial, wait_times_parallel)
+        self.assertTrue(df_serial.equals(df_parallel))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+import numpy as np
+from analysistoolbox.simulations import SimulateStochasticProcessPaths
+
+class TestSimulateStochasticProcessPaths(unittest.TestCase):
+    def setUp(self):
+        # Set the arguments shared by each simulation
+        self.arguments = {'number_of_trials': 5000, 'number_of_time_steps': 50, 'plot_simulation_results': False}
+
+    def test_process_moments(self):
+        # Each process should start at its initial value and match its theoretical mean and variance
+        random_walk_paths = SimulateStochasticProcessPaths('random_walk', drift=0.1, volatility=2, **self.arguments)
+        self.assertEqual(random_walk_paths.shape, (5000, 51))
+        self.assertAlmostEqual(random_walk_paths[:, -1].mean(), 5, delta=0.5)
+        self.assertAlmostEqual(random_walk_paths[:, -1].var(), 200, delta=20)
+        gbm_paths = SimulateStochasticProcessPaths('geometric_brownian_motion', initial_value=100, drift=0.01, volatility=0.05, **self.arguments)
+        self.assertAlmostEqual(gbm_paths[:, -1].mean(), 100 * np.exp(0.5), delta=3)
+        poisson_paths = SimulateStochasticProcessPaths('poisson_process', event_rate=3, time_step=0.5, **self.arguments)
+        self.assertTrue(np.all(np.diff(poisson_paths, axis=1) >= 0))
+        self.assertAlmostEqual(poisson_paths[:, -1].mean(), 75, delta=1)
+        self.assertAlmostEqual(poisson_paths[:, -1].var(), 75, delta=7.5)
+
+    def test_ar1_matches_recursion(self):
+        # The filtered AR(1) paths should match the recursion, drawn from the same shocks
+        paths = SimulateStochasticProcessPaths('ar1', number_of_trials=3, number_of_time_steps=5, initial_value=4, long_run_mean=1, autoregressive_coefficient=0.5, plot_simulation_results=False)
+        shocks = np.random.default_rng(412).standard_normal((3, 5))
+        expected_paths = np.empty((3, 6))
+        expected_paths[:, 0] = 4
+        for step in range(5):
+            expected_paths[:, step + 1] = 1 + 0.5 * (expected_paths[:, step] - 1) + shocks[:, step]
+        np.testing.assert_allclose(paths, expected_paths)
+
+    def test_streamed_and_summary_output(self):
+        # Streamed chunks should match the full array, and the streamed summary bands should be close to the exact ones
+        paths, df_summary_bands = SimulateStochasticProcessPaths(chunk_size=1000, return_summary=True, **self.arguments)
+        np.testing.assert_array_equal(np.concatenate(list(SimulateStochasticProcessPaths(chunk_size=1000, return_format='stream', **self.arguments))), paths)
+        df_streamed_bands = SimulateStochasticProcessPaths(chunk_size=1000, return_format='summary', **self.arguments)
+        self.assertEqual(list(df_streamed_bands.columns), ['Time Step', 'Time', 'Mean', 'Standard Deviation', 'P5', 'P50', 'P95'])
+        np.testing.assert_allclose(df_streamed_bands['Mean'], df_summary_bands['Mean'])
+        np.testing.assert_allclose(df_streamed_bands['P95'], df_summary_bands['P95'], atol=0.2)
+
+if __name__ == '__main__':
+    unittest.main()
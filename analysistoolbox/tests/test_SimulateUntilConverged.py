@@ -0,0 +1,38 @@
+import unittest
+from analysistoolbox.simulations import SimulateCountOutcome, SimulateNormallyDistributedOutcome, SimulateUntilConverged
+
+class TestSimulateUntilConverged(unittest.TestCase):
+    def setUp(self):
+        # Set the parameters of a normally distributed outcome
+        self.simulation_arguments = {'expected_outcome': 5, 'standard_deviation_of_outcome': 2}
+
+    def test_mean_converges(self):
+        # The mean should reach the tolerance, and the estimate should be within it of the true mean
+        convergence = SimulateUntilConverged(SimulateNormallyDistributedOutcome, 0.02, show_progress=False, **self.simulation_arguments)
+        self.assertTrue(convergence['converged'])
+        self.assertLessEqual(convergence['half_width'], 0.02)
+        self.assertEqual(convergence['results'].count, convergence['number_of_trials'])
+        self.assertAlmostEqual(convergence['estimate'], 5, delta=0.05)
+
+    def test_tail_probability_needs_more_trials(self):
+        # A rare outcome should need more trials than the mean, and stop at the trial budget if the tolerance is too small
+        convergence = SimulateUntilConverged(SimulateCountOutcome, 0.0002, target_statistic='probability', risk_tolerance=10, lower_is_worse=False, expected_count=3, show_progress=False)
+        self.assertTrue(convergence['converged'])
+        self.assertGreater(convergence['number_of_trials'], 10000)
+        convergence = SimulateUntilConverged(SimulateNormallyDistributedOutcome, 1e-6, target_statistic='quantile', quantile=0.99, maximum_trials=50000, show_progress=False, **self.simulation_arguments)
+        self.assertFalse(convergence['converged'])
+        self.assertEqual(convergence['number_of_trials'], 50000)
+        self.assertEqual(len(convergence['results']), 50000)
+
+    def test_replicated_sampling_method(self):
+        # Latin Hypercube batches should be treated as replicates of the same size
+        convergence = SimulateUntilConverged(SimulateNormallyDistributedOutcome, 0.005, batch_size=1000, sampling_method='latin_hypercube', show_progress=False, **self.simulation_arguments)
+        self.assertTrue(convergence['converged'])
+        self.assertEqual(convergence['number_of_trials'] % 1000, 0)
+        # The trial budget should not be exceeded, even when it isn't a multiple of batch_size
+        convergence = SimulateUntilConverged(SimulateNormallyDistributedOutcome, 1e-6, batch_size=1000, maximum_trials=4500, sampling_method='latin_hypercube', show_progress=False, **self.simulation_arguments)
+        self.assertFalse(convergence['converged'])
+        self.assertEqual(convergence['number_of_trials'], 4000)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+import numpy as np
+from analysistoolbox.simulations import StreamingSummary, SimulateTimeBetweenEvents
+
+class TestStreamingSummary(unittest.TestCase):
+    def setUp(self):
+        # Create a sample of skewed values for testing
+        self.values = np.random.default_rng(412).exponential(scale=2, size=200000)
+
+    def test_chunked_summary_matches_full_sample(self):
+        # Add the values in chunks and compare to statistics of the full sample
+        summary = StreamingSummary()
+        for chunk in np.array_split(self.values, 7):
+            summary.update(chunk)
+        self.assertEqual(summary.count, self.values.size)
+        self.assertAlmostEqual(summary.mean, self.values.mean(), places=8)
+        self.assertAlmostEqual(summary.variance, self.values.var(ddof=1), places=6)
+        np.testing.assert_allclose(summary.quantile([0.05, 0.5, 0.95]), np.quantile(self.values, [0.05, 0.5, 0.95]), rtol=0.01)
+        self.assertEqual(summary.histogram()[0].sum(), self.values.size)
+
+    def test_merged_summaries_match_single_summary(self):
+        # Merging two summaries should give the same moments as summarizing everything at once
+        summary_1 = StreamingSummary().update(self.values[:50000])
+        summary_2 = StreamingSummary().update(self.values[50000:] + 10)
+        summary_1.merge(summary_2)
+        combined_values = np.concatenate([self.values[:50000], self.values[50000:] + 10])
+        self.assertAlmostEqual(summary_1.mean, combined_values.mean(), places=8)
+        self.assertAlmostEqual(summary_1.standard_deviation, combined_values.std(ddof=1), places=8)
+        self.assertEqual(summary_1.histogram()[0].sum(), combined_values.size)
+
+    def test_stream_matches_array(self):
+        # Streaming a simulation in chunks should give the same values as drawing it all at once
+        arr_simulation = SimulateTimeBetweenEvents(expected_time_between_events=2, number_of_trials=25000, return_format='array', plot_simulation_results=False)
+        chunks = SimulateTimeBetweenEvents(expected_time_between_events=2, number_of_trials=25000, return_format='stream', chunk_size=4000)
+        np.testing.assert_array_equal(np.concatenate(list(chunks)), arr_simulation)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,6 +5,7 @@ from math import ceil
 from matplotlib import pyplot as plt
 import seaborn as sns
 import textwrap
+from ..simulations.CalculateSimulationStandardError import CalculateSimulationStandardError
 
 # Declare function
 def PlotRiskTolerance(simulated_values,
@@ -14,6 +15,10 @@ def PlotRiskTolerance(simulated_values,
                       variable_name="Outcome",
                       observed_value=None,
                       risk_tolerance_label="Tolerance",
+                      # Precision arguments
+                      show_standard_error=True,
+                      sampling_method='random',
+                      number_of_replicates=10,
                       # Histogram formatting arguments
                       fill_color="#999999",
                       fill_transparency=0.6,
@@ -40,6 +45,9 @@ def PlotRiskTolerance(simulated_values,
         variable_name (str, optional): The name of the variable being simulated. Defaults to "Outcome".
         observed_value (int or float, optional): The observed value to be plotted. Defaults to None.
         risk_tolerance_label (str, optional): The label for the risk tolerance. Defaults to "Tolerance".
+        show_standard_error (bool, optional): If True, the Monte Carlo standard error of the probability is shown next to it. Defaults to True.
+        sampling_method (str, optional): The sampling method the simulated values were drawn with, which sets how the standard error is calculated. See GenerateUniformSamples. Defaults to 'random'.
+        number_of_replicates (int, optional): The number of replicates the simulated values were drawn in, if sampling_method isn't 'random'. Defaults to 10.
         fill_color (str, optional): The fill color for the histogram. Defaults to "#999999".
         fill_transparency (float, optional): The transparency of the fill color. Defaults to 0.6.
         title_for_plot (str, optional): The title for the plot. Defaults to "Risk Tolerance".
@@ -115,6 +123,19 @@ def PlotRiskTolerance(simulated_values,
     
     # Calculate the percentage of outcomes that are worse than the risk tolerance
     risk_probability = dataframe[risk_flag_col_name].mean()
+    risk_probability_label = ' ({:.1%})'.format(risk_probability)
+    
+    # Show the standard error of the percentage, so that its precision is known
+    if show_standard_error and len(dataframe.index) > 1:
+        risk_probability_standard_error = CalculateSimulationStandardError(
+            dataframe[variable_name],
+            statistic='probability',
+            sampling_method=sampling_method,
+            number_of_replicates=number_of_replicates,
+            risk_tolerance=risk_tolerance,
+            lower_is_worse=lower_is_worse
+        )
+        risk_probability_label = ' ({:.1%} ± {:.1%})'.format(risk_probability, risk_probability_standard_error)
     
     # Show the risk tolerance as a vertical line with a label and probability
     ax.axvline(
@@ -128,7 +149,7 @@ def PlotRiskTolerance(simulated_values,
     ax.text(
         x=risk_tolerance, 
         y=plt.ylim()[1] * 0.97, 
-        s=risk_tolerance_label+': {:.2f}'.format(risk_tolerance)+' ({:.1%})'.format(risk_probability),
+        s=risk_tolerance_label+': {:.2f}'.format(risk_tolerance)+risk_probability_label,
         horizontalalignment='center',
         # fontname="Arial",
         fontsize=9,
@@ -29,13 +29,10 @@ setup(
     packages=find_packages(),
     dependencies=[
         'beautifulsoup4',
-        'censusgeocode',
         'edgar_tool',
         'folium',
-        'fuzzywuzzy',
         'geopandas',
         'Jinja2',
-        'Levenshtein',
         'lanchain',
         'langchain_anthropic',
         'langchain_core',
@@ -49,11 +46,12 @@ setup(
         'pandas',
         'pinecone',
         'psmpy',
+        'pyarrow',
         'pygris',
-        'pymetalog',
         'PyPDF2',
         'python-dotenv',
         'pywin32',
+        'rapidfuzz',
         'requests',
         'scikit-learn',  # sklearn
         'scipy',